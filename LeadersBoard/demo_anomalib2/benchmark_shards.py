@@ -0,0 +1,144 @@
+"""データセットシャード (anomalib.shards) の読み込みベンチマーク。
+
+1 エポック分の学習データを読み出す時間を、
+- 画像ファイルを毎回デコード・リサイズする方式 (cv2、anomalib.data.Folder 相当の処理)
+- anomalib.data.Folder の train_dataloader (anomalib がある場合)
+- 前処理済みシャードのメモリマップ読み出し
+で比較する。--root を省略すると合成 JPEG データセットを作って計測する。
+
+Usage:
+    PYTHONPATH=src python demo_anomalib2/benchmark_shards.py --images 512 --size 256
+    PYTHONPATH=src python demo_anomalib2/benchmark_shards.py \\
+        --root /shared/data/pcb1/Data/Images --normal-dir Normal --size 256
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import cv2  # type: ignore[import]
+import numpy as np  # type: ignore[import]
+import torch  # type: ignore[import]
+
+from anomalib.shards import ShardDataset, build_shards, discover_folder  # type: ignore[import]
+
+
+def make_dataset(root: Path, num_images: int, source_size: int, seed: int = 0) -> None:
+    """合成 JPEG の正常画像を root/Normal に書き出す。"""
+    rng = np.random.default_rng(seed)
+    normal = root / "Normal"
+    normal.mkdir(parents=True, exist_ok=True)
+    for i in range(num_images):
+        image = cv2.GaussianBlur(
+            rng.integers(0, 256, (source_size, source_size, 3), dtype=np.uint8), (7, 7), 0
+        )
+        cv2.imwrite(str(normal / f"{i:05d}.jpg"), image, [cv2.IMWRITE_JPEG_QUALITY, 90])
+
+
+def epoch_decode(paths: list[Path], size: int, batch_size: int) -> int:
+    count = 0
+    for start in range(0, len(paths), batch_size):
+        images = []
+        for path in paths[start : start + batch_size]:
+            image = cv2.cvtColor(cv2.imread(str(path)), cv2.COLOR_BGR2RGB)
+            image = cv2.resize(image, (size, size), interpolation=cv2.INTER_AREA)
+            images.append(torch.from_numpy(image).permute(2, 0, 1).float().div_(255))
+        count += len(torch.stack(images))
+    return count
+
+
+def epoch_shards(dataset: ShardDataset, batch_size: int) -> int:
+    count = 0
+    order = np.random.default_rng(0).permutation(len(dataset))
+    for start in range(0, len(order), batch_size):
+        images = [
+            torch.from_numpy(dataset.image(int(i))) for i in order[start : start + batch_size]
+        ]
+        count += len(torch.stack(images).float().div_(255))
+    return count
+
+
+def epoch_folder(root: Path, normal_dir: str, size: int, batch_size: int) -> int | None:
+    try:
+        from anomalib.data import Folder  # type: ignore[import]
+    except ImportError:
+        return None
+    datamodule = Folder(
+        name="benchmark",
+        root=root,
+        normal_dir=normal_dir,
+        train_batch_size=batch_size,
+        eval_batch_size=batch_size,
+        num_workers=0,
+    )
+    datamodule.setup()
+    count = 0
+    for batch in datamodule.train_dataloader():
+        image = torch.nn.functional.interpolate(batch.image, size=(size, size))
+        count += len(image)
+    return count
+
+
+def timed(run: Callable[[], int | None], repeats: int) -> tuple[float, int | None]:
+    best = float("inf")
+    count = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        count = run()
+        if count is None:
+            return float("nan"), None
+        best = min(best, time.perf_counter() - start)
+    return best, count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--root", type=Path, help="Folder 形式のデータセット (省略時は合成)")
+    parser.add_argument("--normal-dir", default="Normal")
+    parser.add_argument("--images", type=int, default=256, help="合成データの画像数")
+    parser.add_argument("--source-size", type=int, default=512, help="合成データの元画像サイズ")
+    parser.add_argument("--size", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = args.root
+        if root is None:
+            root = Path(tmp) / "data"
+            make_dataset(root, args.images, args.source_size)
+        sources = discover_folder(root, args.normal_dir)
+        paths = [source.path for source in sources]
+
+        start = time.perf_counter()
+        build_shards(sources, Path(tmp) / "shards", (args.size, args.size))
+        build_time = time.perf_counter() - start
+        dataset = ShardDataset(Path(tmp) / "shards", "train")
+
+        results = {
+            "decode (cv2)": timed(
+                lambda: epoch_decode(paths, args.size, args.batch_size), args.repeats
+            ),
+            "anomalib Folder": timed(
+                lambda: epoch_folder(root, args.normal_dir, args.size, args.batch_size),
+                args.repeats,
+            ),
+            "shards (mmap)": timed(lambda: epoch_shards(dataset, args.batch_size), args.repeats),
+        }
+
+    print(f"{len(paths)} images, {args.size}x{args.size}, batch {args.batch_size}")
+    print(f"shard build (one-time): {build_time:.3f}s")
+    print(f"{'loader':<18}{'epoch [s]':>12}{'images/s':>12}")
+    for name, (seconds, count) in results.items():
+        if count is None:
+            print(f"{name:<18}{'n/a':>12}{'':>12}")
+        else:
+            print(f"{name:<18}{seconds:>12.3f}{count / seconds:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""visualize.py の描画ベンチマーク。
+
+合成バッチを用いて、旧来の画像毎シリアル処理と
+バッチ化した現行実装 (PNG 事前描画 / 異常マップストアのみ) の
+処理時間とディスク使用量を比較する。
+
+Usage:
+    python demo_anomalib2/benchmark_visualize.py --batches 8 --batch-size 32 --size 256
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+import cv2  # type: ignore[import]
+import numpy as np  # type: ignore[import]
+import torch  # type: ignore[import]
+from PIL import Image  # type: ignore[import]
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import visualize  # noqa: E402
+
+
+def make_batches(num_batches: int, batch_size: int, size: int, seed: int = 0) -> list[dict]:
+    """trainer.predict() の出力を模した合成バッチを生成する。"""
+    gen = torch.Generator().manual_seed(seed)
+    batches = []
+    for b in range(num_batches):
+        batches.append(
+            {
+                "image": torch.randn(batch_size, 3, size, size, generator=gen),
+                "anomaly_map": _smooth_maps(batch_size, size, gen),
+                "pred_mask": torch.rand(batch_size, 1, size, size, generator=gen) > 0.9,
+                "pred_score": torch.rand(batch_size, generator=gen),
+                "pred_label": torch.rand(batch_size, generator=gen) > 0.5,
+                "image_path": [f"/data/test/img_{b:03d}_{i:03d}.png" for i in range(batch_size)],
+            }
+        )
+    return batches
+
+
+def _smooth_maps(batch_size: int, size: int, gen: torch.Generator) -> torch.Tensor:
+    """実際の異常マップに近い、空間的に滑らかなマップ (粗い乱数を双線形補間で拡大)。
+
+    画素ごとの一様乱数はほとんど圧縮できず、ストアのディスク使用量を過大に見積もる。
+    """
+    coarse = torch.rand(batch_size, 1, max(size // 32, 2), max(size // 32, 2), generator=gen)
+    return torch.nn.functional.interpolate(coarse, size=(size, size), mode="bilinear")
+
+
+# ===================================================================
+# Reference: 旧実装 (画像毎に逆正規化・正規化を繰り返すシリアル処理)
+# ===================================================================
+
+
+def _ref_denormalize(tensor: Any) -> np.ndarray:
+    arr = tensor.detach().cpu().float().numpy()
+    arr = np.transpose(arr, (1, 2, 0))
+    arr = arr * visualize.IMAGENET_STD + visualize.IMAGENET_MEAN
+    return np.clip(arr * 255, 0, 255).astype(np.uint8)
+
+
+def _ref_normalize_map(tensor: Any) -> np.ndarray:
+    arr = tensor.detach().cpu().float().squeeze().numpy()
+    lo, hi = float(arr.min()), float(arr.max())
+    arr = (arr - lo) / (hi - lo) if hi > lo else np.zeros_like(arr)
+    return (arr * 255).astype(np.uint8)
+
+
+def _ref_heatmap(amap: Any) -> np.ndarray:
+    colored = cv2.applyColorMap(_ref_normalize_map(amap), cv2.COLORMAP_JET)
+    return cv2.cvtColor(colored, cv2.COLOR_BGR2RGB)
+
+
+def _ref_mask(mask: Any) -> np.ndarray:
+    return mask.detach().cpu().squeeze().numpy().astype(np.uint8) * 255
+
+
+def _ref_overlay(img: Any, amap: Any, alpha: float = visualize.OVERLAY_ALPHA) -> np.ndarray:
+    img_arr = _ref_denormalize(img)
+    heat_rgb = _ref_heatmap(amap)
+    return cv2.addWeighted(img_arr, 1 - alpha, heat_rgb, alpha, 0)
+
+
+def run_reference(batches: list[dict], out_dir: Path) -> int:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    count = 0
+    for batch in batches:
+        for i, path in enumerate(batch["image_path"]):
+            name = Path(path).stem
+            img, amap, mask = batch["image"][i], batch["anomaly_map"][i], batch["pred_mask"][i]
+            Image.fromarray(_ref_denormalize(img)).save(out_dir / f"{name}_original.png")
+            Image.fromarray(_ref_heatmap(amap)).save(out_dir / f"{name}_heatmap.png")
+            Image.fromarray(_ref_mask(mask), mode="L").save(out_dir / f"{name}_mask.png")
+            Image.fromarray(_ref_overlay(img, amap)).save(out_dir / f"{name}_overlay.png")
+            count += 1
+    return count
+
+
+# ===================================================================
+# Benchmark
+# ===================================================================
+
+
+def check_parity(batches: list[dict]) -> None:
+    """現行実装の描画結果が旧実装と一致することを確認する。"""
+    batch = batches[0]
+    rendered = visualize._render_batch(batch["image"], batch["anomaly_map"], batch["pred_mask"])
+    for i in range(len(batch["image_path"])):
+        img, amap = batch["image"][i], batch["anomaly_map"][i]
+        assert np.array_equal(rendered.originals[i], _ref_denormalize(img))
+        assert np.array_equal(rendered.heatmaps[i], _ref_heatmap(amap))
+        assert np.array_equal(rendered.masks[i], _ref_mask(batch["pred_mask"][i]))
+        diff = np.abs(rendered.overlays[i].astype(int) - _ref_overlay(img, amap).astype(int))
+        assert int(diff.max()) <= 1, "overlay differs by more than rounding"
+
+
+def _timed(fn: Any, *args: Any) -> float:
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark visualization rendering")
+    parser.add_argument("--batches", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--size", type=int, default=256)
+    args = parser.parse_args()
+
+    batches = make_batches(args.batches, args.batch_size, args.size)
+    n_images = args.batches * args.batch_size
+    check_parity(batches)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        baseline = _timed(run_reference, batches, root / "reference")
+        print(f"images={n_images} size={args.size}x{args.size}")
+        print(f"{'variant':<20}{'seconds':>10}{'img/s':>10}{'speedup':>10}{'disk MB':>10}")
+        _report("serial (reference)", baseline, n_images, baseline, root / "reference")
+        elapsed = _timed(visualize._write_predictions, batches, root / "png", True)
+        _report("batched png", elapsed, n_images, baseline, root / "png")
+        elapsed = _timed(visualize._write_predictions, batches, root / "raw")
+        _report("raw store", elapsed, n_images, baseline, root / "raw")
+        store_dir = root / "raw" / "visualizations" / visualize.RAW_STORE_DIRNAME
+        print(f"raw map store: {_disk_mb(store_dir):.1f} MB")
+
+
+def _report(label: str, elapsed: float, n_images: int, baseline: float, out_dir: Path) -> None:
+    print(
+        f"{label:<20}{elapsed:>10.2f}{n_images / elapsed:>10.1f}"
+        f"{baseline / elapsed:>10.2f}{_disk_mb(out_dir):>10.1f}"
+    )
+
+
+def _disk_mb(path: Path) -> float:
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file()) / 1e6
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""pixel_metrics.py の検証スクリプト。
+
+小さな合成データでストリーミング集計 (ビン量子化) の結果を
+全画素をソートする厳密計算と比較し、データ数を増やしても
+集計中のメモリ使用量 (tracemalloc のピーク) が増えないことを確認する。
+
+Usage:
+    python demo_anomalib2/check_pixel_metrics.py --images 16 --size 64 --bins 10000
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import cv2  # type: ignore[import]
+import numpy as np  # type: ignore[import]
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import pixel_metrics  # noqa: E402
+
+
+def make_batches(
+    num_images: int, size: int, batch_size: int = 4, seed: int = 0
+) -> list[tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """楕円状の異常領域を持つ合成マスクと、領域内でスコアが高めになる異常マップを作る。"""
+    rng = np.random.default_rng(seed)
+    batches = []
+    for start in range(0, num_images, batch_size):
+        count = min(batch_size, num_images - start)
+        maps = np.empty((count, 1, size, size), dtype=np.float32)
+        masks = np.zeros((count, 1, size, size), dtype=np.uint8)
+        for i in range(count):
+            for _ in range(rng.integers(0, 4)):
+                center = (int(rng.integers(0, size)), int(rng.integers(0, size)))
+                axes = (int(rng.integers(2, size // 6 + 3)), int(rng.integers(2, size // 6 + 3)))
+                cv2.ellipse(masks[i, 0], center, axes, float(rng.uniform(0, 180)), 0, 360, 1, -1)
+            noise = rng.beta(2.0, 5.0, size=(size, size))
+            maps[i, 0] = np.clip(noise + masks[i, 0] * rng.uniform(0.1, 0.5), 0.0, 1.0)
+        batches.append((maps, masks, (maps > 0.5).astype(np.uint8)))
+    return batches
+
+
+# ===================================================================
+# Reference: 全画素をメモリに載せてソートする厳密計算
+# ===================================================================
+
+
+def exact_metrics(
+    batches: list[tuple[np.ndarray, np.ndarray, np.ndarray]], fpr_limit: float
+) -> dict[str, float]:
+    scores = np.concatenate([maps.ravel() for maps, _, _ in batches]).astype(np.float64)
+    labels = np.concatenate([masks.ravel() for _, masks, _ in batches]) != 0
+    preds = np.concatenate([pred.ravel() for _, _, pred in batches]) != 0
+
+    thresholds = np.unique(scores)[::-1]
+    pos_sorted = np.sort(scores[labels])
+    neg_sorted = np.sort(scores[~labels])
+    tp = np.concatenate([[0], pos_sorted.size - np.searchsorted(pos_sorted, thresholds)])
+    fp = np.concatenate([[0], neg_sorted.size - np.searchsorted(neg_sorted, thresholds)])
+    tpr = tp / pos_sorted.size
+    fpr = fp / neg_sorted.size
+
+    predicted = np.maximum(tp + fp, 1)
+    precision = np.where(tp + fp > 0, tp / predicted, 1.0)
+    average_precision = float(np.sum(np.diff(tpr, prepend=0.0) * precision))
+
+    overlaps = []
+    for maps, masks, _ in batches:
+        for score_map, mask in zip(maps[:, 0], masks[:, 0], strict=True):
+            num_labels, regions = cv2.connectedComponents(mask, connectivity=8)
+            for region in range(1, num_labels):
+                region_scores = np.sort(score_map[regions == region].astype(np.float64))
+                hits = region_scores.size - np.searchsorted(region_scores, thresholds)
+                overlaps.append(np.concatenate([[0], hits]) / region_scores.size)
+    pro = np.mean(overlaps, axis=0)
+
+    f1 = 2 * np.count_nonzero(preds & labels)
+    f1 /= f1 + np.count_nonzero(preds & ~labels) + np.count_nonzero(~preds & labels)
+    return {
+        "pixel_AUROC": pixel_metrics._trapezoid(tpr, fpr),
+        "pixel_AUPR": average_precision,
+        "pixel_pro": pixel_metrics._partial_auc(fpr, pro, fpr_limit),
+        "pixel_F1Score": float(f1),
+    }
+
+
+def streaming_metrics(
+    batches: list[tuple[np.ndarray, np.ndarray, np.ndarray]], num_bins: int
+) -> tuple[dict[str, float], int, float]:
+    """ストリーミング集計の結果、集計中のメモリピーク (bytes)、処理時間 (秒) を返す。"""
+    accumulator = pixel_metrics.PixelMetricAccumulator(num_bins=num_bins)
+    tracemalloc.start()
+    start = time.perf_counter()
+    for maps, masks, preds in batches:
+        accumulator.update(maps, masks, preds)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return accumulator.compute(), peak, elapsed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images", type=int, default=16)
+    parser.add_argument("--size", type=int, default=64)
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--bins", type=int, default=pixel_metrics.DEFAULT_NUM_BINS)
+    parser.add_argument("--tolerance", type=float, default=2e-3)
+    args = parser.parse_args()
+
+    batches = make_batches(args.images, args.size, args.batch_size)
+    exact = exact_metrics(batches, pixel_metrics.DEFAULT_PRO_FPR_LIMIT)
+    streamed, peak, elapsed = streaming_metrics(batches, args.bins)
+
+    failed = False
+    print(f"{'metric':<15}{'streaming':>12}{'exact':>12}{'abs diff':>12}")
+    for name, expected in exact.items():
+        actual = streamed.get(name, float("nan"))
+        diff = abs(actual - expected)
+        failed |= not diff <= args.tolerance
+        print(f"{name:<15}{actual:>12.6f}{expected:>12.6f}{diff:>12.2e}")
+
+    # 画像数を 4 倍にしてもピークメモリはバッチ 1 つ分の一時配列で頭打ちになる
+    larger = make_batches(args.images * 4, args.size, args.batch_size, seed=1)
+    _, larger_peak, larger_elapsed = streaming_metrics(larger, args.bins)
+    print(
+        f"\npeak memory: {peak / 1024:.0f} KiB ({args.images} images, {elapsed:.3f}s)"
+        f" / {larger_peak / 1024:.0f} KiB ({args.images * 4} images, {larger_elapsed:.3f}s)"
+    )
+    if failed:
+        print(f"FAILED: difference exceeds tolerance {args.tolerance}")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""バックボーン特徴量キャッシュ (anomalib.feature_cache) を Padim / PatchCore の学習に組み込む。
+
+学習データの特徴量は (データセット・前処理・バックボーン・層・重み) が同じなら
+どのジョブでも同じになるため、model.model.feature_extractor を差し替えて
+1 回目のジョブで計算した特徴量を共有ボリュームに保存し、以降のジョブは読み出すだけにする。
+
+キャッシュのヒット・ミスで結果が変わらないよう、計算した特徴量も保存と同じ float16 に
+丸めてから使う。キャッシュは Worker 上で src/anomalib のシムが提供する
+`anomalib.feature_cache` を使い、見つからない環境 (素の anomalib) では何もしない。
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+import torch  # type: ignore[import]
+from lightning.pytorch.callbacks import Callback  # type: ignore[import]
+
+try:
+    from anomalib.feature_cache import (  # type: ignore[import]
+        FeatureCache,
+        FeatureCacheKey,
+        FeatureCacheWriter,
+        dataset_fingerprint,
+        weights_hash,
+    )
+except ImportError:  # pragma: no cover - Worker 以外の環境
+    FeatureCache = None
+
+LOGGER = logging.getLogger("demo_anomalib.feature_cache")
+
+
+class CachedFeatureExtractor(torch.nn.Module):
+    """学習バッチの画像パスが分かっているときはキャッシュから特徴量を返す。"""
+
+    def __init__(self, extractor: torch.nn.Module, cache_result: Any) -> None:
+        super().__init__()
+        self.extractor = extractor
+        self.entry = None if isinstance(cache_result, FeatureCacheWriter) else cache_result
+        self.writer = cache_result if isinstance(cache_result, FeatureCacheWriter) else None
+        self.current_paths: list[str] | None = None
+        self.hits = 0
+
+    def forward(self, images: torch.Tensor) -> dict[str, torch.Tensor]:
+        paths = self.current_paths
+        if paths and self.entry is not None and all(p in self.entry for p in paths):
+            self.hits += len(paths)
+            return {
+                name: torch.from_numpy(values).to(images.device, images.dtype)
+                for name, values in self.entry.features(paths).items()
+            }
+        features = self.extractor(images)
+        if paths and self.writer is not None and all(p in self.writer for p in paths):
+            features = {name: value.half() for name, value in features.items()}
+            self.writer.write(paths, {name: v.cpu().numpy() for name, v in features.items()})
+            features = {name: value.to(images.dtype) for name, value in features.items()}
+        return features
+
+    def commit(self) -> None:
+        if self.writer is None:
+            return
+        self.entry = self.writer.commit()
+        self.writer = None
+        if self.entry is not None:
+            LOGGER.info(f"Stored backbone features in {self.entry.path}")
+
+    def abort(self) -> None:
+        if self.writer is not None:
+            self.writer.abort()
+            self.writer = None
+
+
+class FeatureCacheCallback(Callback):
+    """学習バッチの画像パスを特徴量抽出器に渡し、エポック終了時にエントリを公開する。"""
+
+    def __init__(self, extractor: CachedFeatureExtractor) -> None:
+        self.extractor = extractor
+
+    def on_train_batch_start(self, trainer, pl_module, batch, batch_idx) -> None:  # type: ignore[no-untyped-def]
+        paths = (
+            batch.get("image_path")
+            if isinstance(batch, dict)
+            else getattr(batch, "image_path", None)
+        )
+        self.extractor.current_paths = [str(p) for p in paths] if paths is not None else None
+
+    def on_train_batch_end(self, trainer, pl_module, outputs, batch, batch_idx) -> None:  # type: ignore[no-untyped-def]
+        self.extractor.current_paths = None
+
+    def on_train_epoch_end(self, trainer, pl_module) -> None:  # type: ignore[no-untyped-def]
+        if self.extractor.writer is not None and self.extractor.writer.complete:
+            self.extractor.commit()
+
+    def on_fit_end(self, trainer, pl_module) -> None:  # type: ignore[no-untyped-def]
+        # 全サンプルが揃わなかった場合 (limit_train_batches < 1 など) は破棄される
+        self.extractor.commit()
+        if self.extractor.hits:
+            LOGGER.info(f"Feature cache hits: {self.extractor.hits} samples")
+
+    def on_exception(self, trainer, pl_module, exception) -> None:  # type: ignore[no-untyped-def]
+        self.extractor.abort()
+
+
+def enable_feature_cache(  # type: ignore[no-untyped-def]
+    model, datamodule, config, manifest=None
+) -> FeatureCacheCallback | None:
+    """凍結バックボーンを持つモデルなら特徴量キャッシュを有効にし、登録する Callback を返す。
+
+    登録済みデータセットのマニフェストがあれば、ファイルを stat せずにその
+    ダイジェストをデータセットのキーにする。
+    """
+    if FeatureCache is None:
+        LOGGER.info("anomalib.feature_cache is not available; feature cache disabled")
+        return None
+    extractor = getattr(getattr(model, "model", None), "feature_extractor", None)
+    if not isinstance(extractor, torch.nn.Module):
+        LOGGER.info("Model has no feature_extractor; feature cache disabled")
+        return None
+    try:
+        datamodule.setup()
+        samples = sorted(str(p) for p in datamodule.train_data.samples["image_path"])
+        init_args = config.model.get("init_args") or {}
+        key = FeatureCacheKey(
+            dataset=manifest.digest if manifest is not None else dataset_fingerprint(samples),
+            transform=f"{getattr(model, 'pre_processor', None)!r}"
+            f"|{config.data.get('init_args', {}).get('image_size')}",
+            backbone=str(init_args.get("backbone", "")),
+            layers=tuple(str(layer) for layer in init_args.get("layers") or []),
+            weights=weights_hash(extractor),
+        )
+        result = FeatureCache().open(key, samples)
+    except Exception as e:
+        LOGGER.warning(f"Feature cache disabled: {e}")
+        return None
+    if result is None:
+        return None
+    cached = CachedFeatureExtractor(extractor, result)
+    model.model.feature_extractor = cached
+    state = "computing" if cached.writer is not None else "reusing"
+    LOGGER.info(f"Feature cache {state} entry {key.digest()} ({len(samples)} train images)")
+    return FeatureCacheCallback(cached)
@@ -5,26 +5,223 @@ from __future__ import annotations
 import argparse
 import json
 import logging
+import os
 import time
 from pathlib import Path
 
+import numpy as np  # type: ignore[import]
 import torch  # type: ignore[import]
 from anomalib.data import get_datamodule  # type: ignore[import]
 from anomalib.metrics import AUPR, AUROC, Evaluator, F1Score  # type: ignore[import]
 from anomalib.models import get_model  # type: ignore[import]
+from feature_cache_hook import enable_feature_cache
+from lightning.pytorch.callbacks import Callback  # type: ignore[import]
 from omegaconf import DictConfig, OmegaConf  # type: ignore[import]
+from pixel_metrics import DEFAULT_NUM_BINS, PixelMetricAccumulator
+from sharded_data import get_manifest_datamodule, get_sharded_datamodule, load_dataset_manifest
 from visualize import save_visualization_artifacts
 
 from anomalib.trainers import get_trainer  # type: ignore[import]
 
 LOGGER = logging.getLogger("demo_anomalib.padim")
 
+# config.metrics.pixel の名前と metrics.json のキーの対応
+PIXEL_METRIC_KEYS = {
+    "AUROC": "pixel_AUROC",
+    "AUPR": "pixel_AUPR",
+    "F1Score": "pixel_F1Score",
+    "PRO": "pixel_pro",
+}
+
+# config.export.formats の既定値 (PyTorch のモデルは常に書き出す)
+EXPORT_FORMATS = ("onnx", "openvino")
+
+# 事前検証のスモーク実行で Worker が設定する (ピクセル評価・特徴量キャッシュ・エクスポート・可視化を省略する)
+SMOKE_RUN_ENV = "LEADERBOARD_SMOKE_RUN"
+
+
+class PixelMetricsCallback(Callback):
+    """trainer.test() の各バッチの異常マップをその場で集計する (全件をメモリに保持しない)。"""
+
+    def __init__(self, accumulator: PixelMetricAccumulator) -> None:
+        self.accumulator = accumulator
+        self.skipped_batches = 0
+
+    def on_test_batch_end(  # type: ignore[no-untyped-def]
+        self, trainer, pl_module, outputs, batch, batch_idx, dataloader_idx=0
+    ):
+        source = outputs if outputs is not None else batch
+        anomaly_map = _batch_field(source, "anomaly_map")
+        gt_mask = _batch_field(source, "gt_mask")
+        if anomaly_map is None or gt_mask is None:
+            self.skipped_batches += 1
+            return
+        self.accumulator.update(anomaly_map, gt_mask, _batch_field(source, "pred_mask"))
+
+
+def _batch_field(batch, name: str):  # type: ignore[no-untyped-def]
+    if isinstance(batch, dict):
+        return batch.get(name)
+    return getattr(batch, name, None)
+
+
+def export_model(  # type: ignore[no-untyped-def]
+    model,
+    output_dir: Path,
+    input_size: tuple[int, int],
+    formats: tuple[str, ...] = EXPORT_FORMATS,
+    inputs: dict | None = None,
+) -> None:
+    """推論用モデルを書き出す (Worker の CPU 推論ベンチマークが読み込む)。
+
+    torch.export (model.pt2) を優先し、失敗した場合は TorchScript (model.pt) にする。
+    formats に onnx / openvino があれば model.onnx と OpenVINO IR (model.xml/.bin) も書き出す。
+    inputs には export.json のキーと配列を渡し、{キー}.npy として保存する。
+    Worker は sample_input (テスト画像の数枚) で ONNX / OpenVINO の出力が PyTorch と
+    一致するかを確認し、calibration_input (学習画像の一部) と evaluation_input /
+    evaluation_labels (テスト画像の一部と正解ラベル) で INT8 量子化後の精度を評価する。
+    出力: exported/{モデル} と exported/export.json (モデル一覧・入力形状)
+    失敗してもメトリクス記録を妨げないよう警告のみとする。
+    """
+    export_dir = output_dir / "exported"
+    export_dir.mkdir(parents=True, exist_ok=True)
+    inference_model = model.model.eval().cpu()
+    # バッチサイズ 1 で export すると 1 に特殊化されるため 2 で書き出し、バッチ次元を可変にする
+    example = torch.zeros(2, 3, *input_size)
+    batch = torch.export.Dim("batch", min=1, max=1024)
+    models = []
+    try:
+        program = torch.export.export(inference_model, (example,), dynamic_shapes=({0: batch},))
+        torch.export.save(program, str(export_dir / "model.pt2"))
+        models.append({"format": "torch_export", "file": "model.pt2"})
+    except Exception as e:
+        LOGGER.info(f"torch.export failed ({e}), falling back to TorchScript")
+        try:
+            with torch.inference_mode():
+                traced = torch.jit.trace(inference_model, example, strict=False, check_trace=False)
+            torch.jit.save(traced, str(export_dir / "model.pt"))
+            models.append({"format": "torchscript", "file": "model.pt"})
+        except Exception as e:
+            LOGGER.warning(f"Failed to export model: {e}")
+
+    if "onnx" in formats or "openvino" in formats:
+        onnx_path = export_dir / "model.onnx"
+        try:
+            torch.onnx.export(
+                inference_model,
+                (example,),
+                str(onnx_path),
+                input_names=["input"],
+                dynamo=True,
+                dynamic_shapes=({0: batch},),
+            )
+            if "onnx" in formats:
+                models.append({"format": "onnx", "file": "model.onnx"})
+        except Exception as e:
+            LOGGER.warning(f"Failed to export ONNX model: {e}")
+        if "openvino" in formats and onnx_path.is_file():
+            try:
+                import openvino as ov  # type: ignore[import]
+
+                ov.save_model(ov.convert_model(str(onnx_path)), str(export_dir / "model.xml"))
+                models.append({"format": "openvino", "file": "model.xml"})
+            except ImportError:
+                LOGGER.info("openvino is not installed; skipping OpenVINO export")
+            except Exception as e:
+                LOGGER.warning(f"Failed to export OpenVINO model: {e}")
 
-def resolve_paths(config_path: Path, output: Path, config: DictConfig) -> None:
+    if not models:
+        return
+    manifest: dict = {"models": models, "input_shape": [3, *input_size]}
+    for key, array in (inputs or {}).items():
+        if array is not None:
+            np.save(export_dir / f"{key}.npy", array)
+            manifest[key] = f"{key}.npy"
+    (export_dir / "export.json").write_text(json.dumps(manifest, indent=2))
+    LOGGER.info(f"Exported {[m['format'] for m in models]} models to {export_dir}")
+
+
+def collect_export_images(
+    dataloader, input_size: tuple[int, int], limit: int, stratify: bool = False
+):  # type: ignore[no-untyped-def]
+    """limit 枚の画像 [N, 3, H, W] と正解ラベル [N] (無ければ None) を集める。
+
+    stratify=True では正常・異常をそれぞれ limit の半分まで取り、足りない側はもう一方で埋める。
+    テストセットは正常画像が先に並ぶことが多く、先頭から取るだけでは 1 クラスになり
+    量子化評価の AUROC / AUPR が求まらない。
+    画像は入力サイズにそろえ、容量を抑えるため float16 で返す (Worker が float32 に戻す)。
+    """
+    quota = (limit + 1) // 2 if stratify else limit
+    kept: list[tuple[torch.Tensor, bool | None]] = []
+    spare: list[tuple[torch.Tensor, bool | None]] = []
+    counts: dict[bool | None, int] = {}
+    try:
+        for batch in dataloader:
+            image = _batch_field(batch, "image")
+            if image is None:
+                break
+            label = _batch_field(batch, "gt_label")
+            for i in range(len(image)):
+                value = None if label is None else bool(label[i])
+                if counts.get(value, 0) < (limit if value is None else quota):
+                    kept.append((image[i].float().cpu().clone(), value))
+                    counts[value] = counts.get(value, 0) + 1
+                elif len(spare) < limit:
+                    spare.append((image[i].float().cpu().clone(), value))
+            if len(kept) >= limit:
+                break
+    except Exception as e:
+        LOGGER.warning(f"Failed to collect images for export: {e}")
+        return None, None
+    kept += spare[: limit - len(kept)]
+    if not kept:
+        return None, None
+    images = torch.nn.functional.interpolate(
+        torch.stack([image for image, _ in kept]),
+        size=input_size,
+        mode="bilinear",
+        align_corners=False,
+    )
+    array = images.numpy().astype(np.float16)
+    if any(value is None for _, value in kept):
+        return array, None
+    labels = np.array([value for _, value in kept], dtype=bool)
+    if stratify and (labels.all() or not labels.any()):
+        LOGGER.warning(
+            f"Export evaluation images contain a single class ({int(labels.sum())} of "
+            f"{len(labels)} anomalous); quantization AUROC/AUPR deltas will be unavailable"
+        )
+    return array, labels
+
+
+def export_inputs(datamodule, input_size: tuple[int, int], export_config) -> dict:  # type: ignore[no-untyped-def]
+    """export.json に載せる入力データ (数値一致の確認・量子化の較正と評価用) を作る。"""
+    evaluation, labels = collect_export_images(
+        datamodule.test_dataloader(),
+        input_size,
+        int(export_config.get("evaluation_samples", 64)),
+        stratify=True,
+    )
+    calibration, _ = collect_export_images(
+        datamodule.train_dataloader(), input_size, int(export_config.get("calibration_samples", 32))
+    )
+    return {
+        "sample_input": None if evaluation is None else evaluation[:4],
+        "calibration_input": calibration,
+        "evaluation_input": evaluation if labels is not None else None,
+        "evaluation_labels": labels,
+    }
+
+
+def resolve_paths(config_path: Path, output: Path, config: DictConfig, manifest=None) -> None:  # type: ignore[no-untyped-def]
     """Normalize dataset/output paths. Dataset path is specified in config.yaml."""
     ensure_data_class_path(config)
 
-    if "init_args" in config.data and "root" in config.data.init_args:
+    if manifest is not None:
+        # 登録済みデータセットはマニフェストのルートを使う (ディレクトリの走査はしない)
+        config.data.init_args.root = manifest.root
+        _ensure_dataset_exists(Path(manifest.root))
+    elif "init_args" in config.data and "root" in config.data.init_args:
         dataset_root = Path(config.data.init_args.root)
         _ensure_dataset_exists(dataset_root)
 
@@ -79,9 +276,12 @@ def _ensure_dataset_exists(dataset_root: Path) -> None:
         )
 
 
-def run_training(config: DictConfig, output_dir: Path) -> None:
+def run_training(config: DictConfig, output_dir: Path, manifest=None) -> None:  # type: ignore[no-untyped-def]
     """Train and evaluate the Padim model defined in the config."""
     performance_metrics: dict[str, float] = {}
+    smoke_run = os.environ.get(SMOKE_RUN_ENV) == "1"
+    if smoke_run:
+        LOGGER.info("Smoke run: skipping pixel metrics, feature cache, export and visualization")
 
     if torch.cuda.is_available():
         torch.cuda.reset_peak_memory_stats()
@@ -91,7 +291,11 @@ def run_training(config: DictConfig, output_dir: Path) -> None:
 
     # 1. データモジュール、モデル、トレーナーを取得
     LOGGER.info("Loading datamodule, model, and trainer")
-    datamodule = get_datamodule(config.data)
+    datamodule = (
+        get_sharded_datamodule(config, manifest)
+        or get_manifest_datamodule(config, manifest)
+        or get_datamodule(config.data)
+    )
     model = get_model(config.model)
     trainer = get_trainer(config)
 
@@ -106,6 +310,26 @@ def run_training(config: DictConfig, output_dir: Path) -> None:
     )
     model.evaluator = evaluator
 
+    # 1.6. ピクセル単位メトリクスはテスト中にストリーミング集計する
+    metrics_config = config.get("metrics") or {}
+    pixel_metric_names = [str(name) for name in metrics_config.get("pixel") or []]
+    if smoke_run:
+        pixel_metric_names = []
+    pixel_callback = None
+    if pixel_metric_names:
+        pixel_callback = PixelMetricsCallback(
+            PixelMetricAccumulator(
+                num_bins=int(metrics_config.get("pixel_num_bins", DEFAULT_NUM_BINS))
+            )
+        )
+        trainer.callbacks.append(pixel_callback)
+
+    # 1.7. 凍結バックボーンの特徴量をジョブ間で共有する
+    if not smoke_run and (config.get("feature_cache") or {}).get("enabled", True):
+        feature_cache_callback = enable_feature_cache(model, datamodule, config, manifest)
+        if feature_cache_callback is not None:
+            trainer.callbacks.append(feature_cache_callback)
+
     # 2. 学習を実行
     LOGGER.info("Starting training")
     training_start_time = time.time()
@@ -170,6 +394,19 @@ def run_training(config: DictConfig, output_dir: Path) -> None:
             except Exception as e:
                 LOGGER.error(f"Failed to process metric {key}: {e}")
 
+    if pixel_callback is not None:
+        if pixel_callback.skipped_batches:
+            LOGGER.warning(
+                f"{pixel_callback.skipped_batches} test batches had no anomaly_map/gt_mask"
+            )
+        pixel_results = pixel_callback.accumulator.compute()
+        for name in pixel_metric_names:
+            key = PIXEL_METRIC_KEYS.get(name)
+            if key is None:
+                LOGGER.warning(f"Unsupported pixel metric: {name}")
+            elif key in pixel_results:
+                metrics[key] = pixel_results[key]
+
     LOGGER.info(f"Extracted metrics: {metrics}")
 
     # 5. metrics.json を保存
@@ -190,8 +427,30 @@ def run_training(config: DictConfig, output_dir: Path) -> None:
         json.dump(metrics_data, f, indent=2)
     LOGGER.info(f"Metrics saved to {metrics_path}")
 
-    # 6. 可視化アーティファクトを生成（失敗してもメトリクスには影響しない）
-    save_visualization_artifacts(model, datamodule, trainer, output_dir)
+    # 6. CPU 推論ベンチマーク用にモデルを書き出す
+    export_config = config.get("export") or {}
+    if not smoke_run and export_config.get("enabled", True):
+        input_size = tuple(int(v) for v in export_config.get("input_size", [256, 256]))
+        size = (input_size[0], input_size[1])
+        export_model(
+            model,
+            output_dir,
+            size,
+            formats=tuple(str(f) for f in export_config.get("formats", EXPORT_FORMATS)),
+            inputs=export_inputs(datamodule, size, export_config),
+        )
+
+    # 7. 可視化アーティファクトを生成（失敗してもメトリクスには影響しない）
+    viz_config = config.get("visualization") or {}
+    if not smoke_run and viz_config.get("enabled", True):
+        save_visualization_artifacts(
+            model,
+            datamodule,
+            trainer,
+            output_dir,
+            max_images=viz_config.get("max_images"),
+            strategy=str(viz_config.get("strategy", "all")),
+        )
 
 
 def main() -> None:
@@ -220,8 +479,9 @@ def main() -> None:
     )
 
     config = OmegaConf.load(args.config)
-    resolve_paths(args.config, args.output, config)
-    run_training(config, args.output)
+    manifest = load_dataset_manifest(config)
+    resolve_paths(args.config, args.output, config, manifest)
+    run_training(config, args.output, manifest)
 
     LOGGER.info(f"Training log saved to {log_file}")
 
@@ -0,0 +1,208 @@
+"""ピクセル単位メトリクス (AUROC / AUPR / F1 / PRO) をストリーミングで計算する。
+
+異常マップを全件メモリに保持せず、バッチごとにスコアを固定幅のビンへ振り分けて
+正常 / 異常ピクセル数を累積する。PRO は正解マスクの連結成分 (領域) ごとに
+「領域内で閾値以上となる画素の割合」を求め、その総和をビンごとに累積する。
+保持する状態はビン数ぶんの配列だけで、データセットの大きさに依存しない。
+
+閾値はビン境界に量子化されるため、同じビンに入る画素は同順位として扱う。
+num_bins=10000 なら厳密計算との差はおおむね 1e-3 未満
+(check_pixel_metrics.py で小さな合成データに対する厳密計算と比較できる)。
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+import cv2  # type: ignore[import]
+import numpy as np  # type: ignore[import]
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_NUM_BINS = 10000
+# MVTec AD の評価と同じく FPR 0.3 までの PRO 曲線下面積を 0.3 で正規化する
+DEFAULT_PRO_FPR_LIMIT = 0.3
+
+
+class PixelMetricAccumulator:
+    """異常マップと正解マスクをバッチ単位で受け取り、ピクセル単位メトリクスを集計する。
+
+    Args:
+        num_bins: スコアを量子化するビン数
+        score_range: ビンを張るスコア範囲。範囲外のスコアは両端のビンに丸める
+            (anomalib の後処理で正規化された異常マップは [0, 1])
+        pro_fpr_limit: PRO 曲線を積分する FPR の上限
+    """
+
+    def __init__(
+        self,
+        num_bins: int = DEFAULT_NUM_BINS,
+        score_range: tuple[float, float] = (0.0, 1.0),
+        pro_fpr_limit: float = DEFAULT_PRO_FPR_LIMIT,
+    ) -> None:
+        low, high = float(score_range[0]), float(score_range[1])
+        if num_bins < 1:
+            raise ValueError("num_bins must be positive")
+        if not high > low:
+            raise ValueError("score_range must be increasing")
+        if not 0.0 < pro_fpr_limit <= 1.0:
+            raise ValueError("pro_fpr_limit must be in (0, 1]")
+        self.num_bins = num_bins
+        self.low = low
+        self.high = high
+        self.pro_fpr_limit = pro_fpr_limit
+        self._positives = np.zeros(num_bins, dtype=np.int64)
+        self._negatives = np.zeros(num_bins, dtype=np.int64)
+        # 各領域の画素を 1/領域面積 で重み付けしたヒストグラムの総和
+        self._region_weights = np.zeros(num_bins, dtype=np.float64)
+        self._num_regions = 0
+        # 予測マスク (pred_mask) の TP / FP / FN
+        self._mask_counts = np.zeros(3, dtype=np.int64)
+        self._has_pred_masks = False
+        self._out_of_range = 0
+
+    def update(
+        self,
+        anomaly_maps: Any,
+        gt_masks: Any,
+        pred_masks: Any | None = None,
+    ) -> None:
+        """1 バッチ分を累積する。
+
+        Args:
+            anomaly_maps: 異常マップ [B, H, W] / [B, 1, H, W] (torch.Tensor または ndarray)。
+                画像サイズが揃わない場合は画像ごとの配列のリスト
+            gt_masks: 正解マスク (anomaly_maps と同じ形状、0 以外を異常とみなす)
+            pred_masks: 予測マスク。指定すると pixel_F1Score を計算する
+        """
+        maps = _as_images(anomaly_maps)
+        masks = _as_images(gt_masks)
+        if len(maps) != len(masks):
+            raise ValueError(f"batch size mismatch: {len(maps)} maps, {len(masks)} masks")
+        preds = _as_images(pred_masks) if pred_masks is not None else None
+        for i, (score_map, gt_mask) in enumerate(zip(maps, masks, strict=True)):
+            pred_mask = preds[i] if preds is not None and i < len(preds) else None
+            self._update_image(score_map, gt_mask, pred_mask)
+
+    def compute(self) -> dict[str, float]:
+        """累積結果からメトリクスを計算する。定義できないメトリクスは含めない。"""
+        metrics: dict[str, float] = {}
+        if self._out_of_range:
+            logger.warning(
+                "%d pixel scores were outside [%g, %g] and clipped",
+                self._out_of_range,
+                self.low,
+                self.high,
+            )
+        total_pos = int(self._positives.sum())
+        total_neg = int(self._negatives.sum())
+        if total_pos == 0 or total_neg == 0:
+            logger.warning("Pixel metrics need both normal and anomalous pixels")
+        else:
+            # 閾値をビン境界 k (スコア >= edges[k] を異常) とし、k を大きい順に並べる
+            tp = _tail_counts(self._positives)[::-1]
+            fp = _tail_counts(self._negatives)[::-1]
+            tpr = tp / total_pos
+            fpr = fp / total_neg
+            metrics["pixel_AUROC"] = _trapezoid(tpr, fpr)
+            metrics["pixel_AUPR"] = _average_precision(tp, fp, total_pos)
+            if self._num_regions:
+                pro = _tail_counts(self._region_weights)[::-1] / self._num_regions
+                metrics["pixel_pro"] = _partial_auc(fpr, pro, self.pro_fpr_limit)
+        if self._has_pred_masks:
+            mask_tp, mask_fp, mask_fn = (int(c) for c in self._mask_counts)
+            denominator = 2 * mask_tp + mask_fp + mask_fn
+            metrics["pixel_F1Score"] = 2 * mask_tp / denominator if denominator else 0.0
+        return metrics
+
+    def _update_image(self, score_map: np.ndarray, gt_mask: np.ndarray, pred_mask: Any) -> None:
+        scores = np.asarray(score_map, dtype=np.float64)
+        gt = np.asarray(gt_mask).reshape(scores.shape) != 0
+        valid = np.isfinite(scores)
+        bins = self._bin(scores)
+
+        self._positives += np.bincount(bins[gt & valid], minlength=self.num_bins)
+        self._negatives += np.bincount(bins[~gt & valid], minlength=self.num_bins)
+
+        if gt.any():
+            num_labels, labels = cv2.connectedComponents(gt.astype(np.uint8), connectivity=8)
+            region_ids = labels[gt & valid] - 1
+            areas = np.bincount(labels[gt] - 1, minlength=num_labels - 1)
+            self._region_weights += np.bincount(
+                bins[gt & valid],
+                weights=1.0 / areas[region_ids],
+                minlength=self.num_bins,
+            )
+            self._num_regions += num_labels - 1
+
+        if pred_mask is not None:
+            pred = np.asarray(pred_mask).reshape(scores.shape) != 0
+            self._mask_counts += (
+                np.count_nonzero(pred & gt),
+                np.count_nonzero(pred & ~gt),
+                np.count_nonzero(~pred & gt),
+            )
+            self._has_pred_masks = True
+
+    def _bin(self, scores: np.ndarray) -> np.ndarray:
+        finite = np.where(np.isfinite(scores), scores, self.low)
+        self._out_of_range += int(np.count_nonzero((finite < self.low) | (finite > self.high)))
+        scaled = (finite - self.low) * (self.num_bins / (self.high - self.low))
+        return np.clip(scaled.astype(np.int64), 0, self.num_bins - 1)
+
+
+def _as_images(batch: Any) -> list[np.ndarray]:
+    """バッチを画像ごとの 2 次元配列のリストにする (チャネル次元 1 は落とす)。"""
+    if isinstance(batch, (list, tuple)):
+        return [_squeeze(_to_numpy(item)) for item in batch]
+    arr = _to_numpy(batch)
+    if arr.ndim == 2:
+        arr = arr[None]
+    return [_squeeze(item) for item in arr]
+
+
+def _to_numpy(value: Any) -> np.ndarray:
+    if hasattr(value, "detach"):
+        value = value.detach().cpu()
+        if value.dtype.is_floating_point:
+            value = value.float()
+        return np.asarray(value.numpy())
+    return np.asarray(value)
+
+
+def _squeeze(arr: np.ndarray) -> np.ndarray:
+    while arr.ndim > 2 and arr.shape[0] == 1:
+        arr = arr[0]
+    if arr.ndim != 2:
+        raise ValueError(f"expected a 2-D map per image, got shape {arr.shape}")
+    return arr
+
+
+def _tail_counts(hist: np.ndarray) -> np.ndarray:
+    """閾値インデックス k (0..num_bins) ごとの「ビン k 以上」の累積値。末尾は 0。"""
+    tail = np.cumsum(hist[::-1])[::-1]
+    return np.concatenate([tail, np.zeros(1, dtype=tail.dtype)]).astype(np.float64)
+
+
+def _trapezoid(y: np.ndarray, x: np.ndarray) -> float:
+    return float(np.sum(np.diff(x) * (y[1:] + y[:-1]) / 2.0))
+
+
+def _average_precision(tp: np.ndarray, fp: np.ndarray, total_pos: int) -> float:
+    """閾値の高い順に並んだ TP / FP から平均適合率 (Σ ΔRecall × Precision) を求める。"""
+    predicted = tp + fp
+    precision = np.divide(tp, predicted, out=np.ones_like(tp), where=predicted > 0)
+    recall = tp / total_pos
+    return float(np.sum(np.diff(recall, prepend=0.0) * precision))
+
+
+def _partial_auc(fpr: np.ndarray, values: np.ndarray, limit: float) -> float:
+    """FPR が limit までの曲線下面積を limit で正規化する (limit の点は線形補間)。"""
+    inside = fpr <= limit
+    x = fpr[inside]
+    y = values[inside]
+    if x.size == 0 or x[-1] < limit:
+        x = np.append(x, limit)
+        y = np.append(y, np.interp(limit, fpr, values))
+    return _trapezoid(y, x) / limit
@@ -0,0 +1,199 @@
+"""前処理済みシャード (anomalib.shards) や登録済みデータセット (anomalib.dataset_registry) を
+読む anomalib.data.Folder 互換のデータモジュール。
+
+シャードにはデコード・リサイズ済みの uint8 画像とマスクが入っているため、
+各バッチはメモリマップ上の配列を torch.from_numpy でコピー無しに参照し、
+float への変換 (/255) だけを行う。マニフェストの場合はディレクトリを走査せず、
+マニフェストのファイル一覧から画像をデコードする。出力は Folder と同じ ImageItem / ImageBatch。
+
+シャード・マニフェストはファイルの供給元として使うだけで、train / val / test の分割は
+anomalib.folder_split で Folder と同じ手順 (config.data.init_args の val_split_mode /
+val_split_ratio / test_split_mode / seed / extensions) を再現する。評価に使う画像は
+Folder をそのまま使った場合と変わらない。
+"""
+
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+from typing import Any
+
+import torch  # type: ignore[import]
+from anomalib.data import ImageBatch, ImageItem  # type: ignore[import]
+from lightning.pytorch import LightningDataModule  # type: ignore[import]
+from torch.utils.data import DataLoader, Dataset  # type: ignore[import]
+
+try:
+    from anomalib.dataset_registry import DatasetRegistry, ManifestDataset  # type: ignore[import]
+    from anomalib.folder_split import FolderSplitOptions, folder_splits  # type: ignore[import]
+    from anomalib.shards import INDEX_FILE, ShardDataset  # type: ignore[import]
+except ImportError:  # pragma: no cover - Worker 以外の環境
+    DatasetRegistry = None
+    ShardDataset = None
+    INDEX_FILE = "index.json"
+
+LOGGER = logging.getLogger("demo_anomalib.sharded_data")
+
+
+class ShardImageDataset(Dataset):
+    """ShardDataset / ManifestDataset の dict を ImageItem に変換する。
+
+    items (anomalib.folder_split.SplitItem) の順に、元の split (sources[item.split]) から読む。
+    """
+
+    def __init__(self, sources: dict[str, Any], items: list[Any]) -> None:
+        self.sources = sources
+        self.items = items
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    @property
+    def samples(self) -> dict[str, list[str]]:
+        # Folder の samples (DataFrame) と同じく samples["image_path"] で参照できるようにする
+        return {"image_path": [item.path for item in self.items]}
+
+    def __getitem__(self, index: int) -> ImageItem:
+        split_item = self.items[index]
+        item = self.sources[split_item.split][split_item.index]
+        return ImageItem(
+            image=torch.from_numpy(item["image"]).float().div_(255),
+            gt_mask=torch.from_numpy(item["gt_mask"]).bool(),
+            gt_label=torch.tensor(item["gt_label"], dtype=torch.bool),
+            image_path=item["image_path"],
+            mask_path=item["mask_path"],
+        )
+
+
+class ShardedDataModule(LightningDataModule):
+    """元の train / test split から Folder と同じ train / val / test を作るデータモジュール。"""
+
+    def __init__(
+        self,
+        train: Any,
+        test: Any,
+        options: Any = None,
+        name: str = "shards",
+        train_batch_size: int = 32,
+        eval_batch_size: int = 32,
+        num_workers: int = 0,
+    ) -> None:
+        super().__init__()
+        self.name = name
+        self.category = name
+        self.train_batch_size = train_batch_size
+        self.eval_batch_size = eval_batch_size
+        self.num_workers = num_workers
+        splits = folder_splits(train, test, options)
+        sources = {"train": train, "test": test}
+        self.train_data = ShardImageDataset(sources, splits.train)
+        self.val_data = ShardImageDataset(sources, splits.val)
+        self.test_data = ShardImageDataset(sources, splits.test)
+        LOGGER.info(
+            f"Dataset split: {len(splits.train)} train, {len(splits.val)} val, "
+            f"{len(splits.test)} test images"
+        )
+
+    def setup(self, stage: str | None = None) -> None:
+        return None
+
+    def _loader(self, dataset: ShardImageDataset, batch_size: int, shuffle: bool) -> DataLoader:
+        return DataLoader(
+            dataset,
+            batch_size=batch_size,
+            shuffle=shuffle,
+            num_workers=self.num_workers,
+            collate_fn=ImageBatch.collate,
+            persistent_workers=self.num_workers > 0,
+        )
+
+    def train_dataloader(self) -> DataLoader:
+        return self._loader(self.train_data, self.train_batch_size, shuffle=True)
+
+    def val_dataloader(self) -> DataLoader:
+        return self._loader(self.val_data, self.eval_batch_size, shuffle=False)
+
+    def test_dataloader(self) -> DataLoader:
+        return self._loader(self.test_data, self.eval_batch_size, shuffle=False)
+
+    def predict_dataloader(self) -> DataLoader:
+        return self.test_dataloader()
+
+
+def load_dataset_manifest(config) -> Any | None:  # type: ignore[no-untyped-def]
+    """config.dataset (name[@version]) のマニフェストをレジストリから読む。
+
+    未登録の場合は config.data の root をそのまま使うため None を返す。
+    """
+    ref = config.get("dataset")
+    if not ref:
+        return None
+    if DatasetRegistry is None:
+        LOGGER.info("anomalib.dataset_registry is not available; using config.data as is")
+        return None
+    try:
+        manifest = DatasetRegistry().get(str(ref))
+    except KeyError as e:
+        LOGGER.warning(f"{e}; using config.data as is")
+        return None
+    LOGGER.info(f"Dataset {manifest.ref}: {len(manifest.files)} files ({manifest.digest})")
+    return manifest
+
+
+def _datamodule_args(config) -> dict[str, Any]:  # type: ignore[no-untyped-def]
+    """config.data.init_args から ShardedDataModule の引数を作る。
+
+    Raises:
+        ValueError: Folder の分割を再現できないモード (synthetic など)
+    """
+    init_args = config.data.get("init_args") or {}
+    return {
+        "options": FolderSplitOptions.from_init_args(init_args),
+        "name": str(init_args.get("name", "shards")),
+        "train_batch_size": int(init_args.get("train_batch_size", 32)),
+        "eval_batch_size": int(init_args.get("eval_batch_size", 32)),
+        "num_workers": int(init_args.get("num_workers", 0)),
+    }
+
+
+def get_sharded_datamodule(config, manifest: Any = None) -> ShardedDataModule | None:  # type: ignore[no-untyped-def]
+    """config.shards.path にシャードがあれば、config.data の設定でデータモジュールを作る。
+
+    manifest を渡した場合、別のマニフェストから作られたシャードは使わない。
+    """
+    shards_config = config.get("shards") or {}
+    path = shards_config.get("path")
+    if not path or not shards_config.get("enabled", True):
+        return None
+    if ShardDataset is None:
+        LOGGER.info("anomalib.shards is not available; using the configured datamodule")
+        return None
+    if not (Path(path) / INDEX_FILE).is_file():
+        LOGGER.info(f"No dataset shards at {path}; using the configured datamodule")
+        return None
+    train = ShardDataset(Path(path), "train")
+    if manifest is not None and train.dataset_digest not in (None, manifest.digest):
+        LOGGER.warning(f"Shards at {path} were built from another version of {manifest.ref}")
+        return None
+    try:
+        args = _datamodule_args(config)
+    except ValueError as e:
+        LOGGER.info(f"{e}; using the configured datamodule")
+        return None
+    LOGGER.info(f"Loading preprocessed dataset shards from {path}")
+    return ShardedDataModule(train, ShardDataset(Path(path), "test"), **args)
+
+
+def get_manifest_datamodule(config, manifest: Any) -> ShardedDataModule | None:  # type: ignore[no-untyped-def]
+    """登録済みデータセットのマニフェストからファイル一覧を読むデータモジュールを作る。"""
+    if manifest is None:
+        return None
+    try:
+        args = _datamodule_args(config)
+    except ValueError as e:
+        LOGGER.info(f"{e}; using the configured datamodule")
+        return None
+    LOGGER.info(f"Loading dataset {manifest.ref} from its manifest")
+    return ShardedDataModule(
+        ManifestDataset(manifest, "train"), ManifestDataset(manifest, "test"), **args
+    )
@@ -5,17 +5,30 @@ trainer.predict() の結果から可視化画像と CSV を生成する。
 
 出力:
   visualizations/{image_name}_original.png
+  visualizations/raw/index.json          画像名と元サイズ
+  visualizations/raw/anomaly_maps.npz    画像ごとに圧縮した生の異常マップ (map_<i>: float16 の
+                                         バイトプレーン) と予測マスク (mask_<i>: np.packbits)
+  image_predictions.csv
+  pixel_predictions.csv                  anomaly_maps.npz のメンバー番号 (map_index) を持つ
+  image_predictions.parquet              型付き列 (pyarrow がある場合のみ。API の集計クエリ用)
+  pixel_predictions.parquet
+
+heatmap / mask / overlay の PNG は API がリクエスト時にストアから描画する。
+render_png=True の場合のみ従来どおり以下も書き出す:
   visualizations/{image_name}_heatmap.png
   visualizations/{image_name}_mask.png
   visualizations/{image_name}_overlay.png
-  image_predictions.csv
-  pixel_predictions.csv
 """
 
 from __future__ import annotations
 
 import csv
+import json
 import logging
+import os
+import zipfile
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
@@ -24,6 +37,19 @@ import numpy as np  # type: ignore[import]
 import torch  # type: ignore[import]
 from PIL import Image  # type: ignore[import]
 
+from anomalib.visualization_selection import (  # type: ignore[import]
+    ImageRecord,
+    parse_label,
+    select_images,
+)
+
+try:
+    import pyarrow as pa  # type: ignore[import]
+    import pyarrow.parquet as pq  # type: ignore[import]
+except ImportError:  # pragma: no cover - pyarrow が無い環境では CSV のみ出力する
+    pa = None
+    pq = None
+
 logger = logging.getLogger(__name__)
 
 
@@ -37,13 +63,19 @@ def save_visualization_artifacts(
     datamodule: Any,
     trainer: Any,
     output_dir: Path,
+    render_png: bool = False,
+    max_images: int | None = None,
+    strategy: str = "all",
 ) -> None:
     """可視化アーティファクトを生成する。
 
     失敗してもメトリクス記録を妨げないようエラーを握りつぶす。
+    render_png=True で heatmap / mask / overlay の PNG も事前に描画する。
+    max_images / strategy (config.yaml の visualization セクションと同じ値) を指定すると、
+    スコアから対象画像を選んでから描画する。CSV には全画像の予測を書き出す。
     """
     try:
-        _generate(model, datamodule, trainer, output_dir)
+        _generate(model, datamodule, trainer, output_dir, render_png, max_images, strategy)
     except Exception as exc:
         logger.warning("Visualization generation failed (non-blocking): %s", exc)
 
@@ -58,91 +90,181 @@ def _generate(
     datamodule: Any,
     trainer: Any,
     output_dir: Path,
+    render_png: bool = False,
+    max_images: int | None = None,
+    strategy: str = "all",
 ) -> None:
-    viz_dir = output_dir / "visualizations"
-    viz_dir.mkdir(parents=True, exist_ok=True)
-
     logger.info("Running prediction for visualization artifacts")
     predictions = trainer.predict(model=model, datamodule=datamodule)
     if not predictions:
         logger.warning("No predictions returned, skipping visualization")
         return
+    _write_predictions(predictions, output_dir, render_png, max_images, strategy)
+
+
+def _write_predictions(
+    predictions: Iterable[Any],
+    output_dir: Path,
+    render_png: bool = False,
+    max_images: int | None = None,
+    strategy: str = "all",
+) -> int:
+    """予測バッチ列から可視化画像・異常マップストア・CSV を書き出し、可視化した画像数を返す。"""
+    predictions = list(predictions)
+    viz_dir = output_dir / "visualizations"
+    viz_dir.mkdir(parents=True, exist_ok=True)
+
+    # 描画前にスコアだけで対象画像を決める
+    selected = _select_indices(_image_records(predictions), strategy, max_images)
 
     image_rows: list[dict[str, Any]] = []
     pixel_rows: list[dict[str, Any]] = []
     count = 0
+    offset = 0
+    store = _RawMapStore.create(viz_dir / RAW_STORE_DIRNAME, predictions, selected)
 
     for batch in predictions:
-        images = _field(batch, "image")
-        anomaly_maps = _field(batch, "anomaly_map")
-        pred_masks = _field(batch, "pred_mask")
         pred_scores = _field(batch, "pred_score")
         pred_labels = _field(batch, "pred_label")
+        gt_labels = _field(batch, "gt_label")
         image_paths = _field(batch, "image_path")
-
+        anomaly_maps = _field(batch, "anomaly_map")
+        pred_masks = _field(batch, "pred_mask")
         batch_size = _batch_len(image_paths, anomaly_maps, pred_masks)
+
+        picked = [i for i in range(batch_size) if offset + i in selected]
+        rendered = _RenderedBatch()
+        if picked:
+            subset = None if len(picked) == batch_size else picked
+            rendered = _render_batch(
+                _take(_field(batch, "image"), subset),
+                _take(anomaly_maps, subset),
+                _take(pred_masks, subset),
+                render_png=render_png,
+            )
+        position = {i: j for j, i in enumerate(picked)}
+
         for i in range(batch_size):
             img_name = (
                 Path(image_paths[i]).stem
                 if image_paths is not None and i < len(image_paths)
-                else f"image_{count:04d}"
+                else f"image_{offset + i:04d}"
             )
-
-            img = _at(images, i)
-            amap = _at(anomaly_maps, i)
-            mask = _at(pred_masks, i)
-
-            if img is not None:
-                _save_denormalized(img, viz_dir / f"{img_name}_original.png")
-            else:
-                logger.warning("No image tensor for: %s", img_name)
-
-            if amap is not None:
-                _save_heatmap(amap, viz_dir / f"{img_name}_heatmap.png")
-
-            if mask is not None:
-                _save_mask(mask, viz_dir / f"{img_name}_mask.png")
-
-            if img is not None and amap is not None:
-                _save_overlay(img, amap, viz_dir / f"{img_name}_overlay.png")
-
-            score = _scalar(pred_scores, i, 0.0)
-            label = _scalar(pred_labels, i, "unknown")
             path_str = (
                 str(image_paths[i])
                 if image_paths is not None and i < len(image_paths)
                 else img_name
             )
+            gt_label = _scalar(gt_labels, i, None)
             image_rows.append(
                 {
                     "image_path": path_str,
-                    "anomaly_score": float(score),
-                    "pred_label": str(label),
+                    "anomaly_score": float(_scalar(pred_scores, i, 0.0)),
+                    "pred_label": str(_scalar(pred_labels, i, "unknown")),
+                    "gt_label": "" if gt_label is None else str(gt_label),
+                    "category": Path(path_str).parent.name,
                 }
             )
-            if amap is not None:
+            if i not in position:
+                continue
+
+            j = position[i]
+            original = _at(rendered.originals, j)
+            raw_map = _at(rendered.raw_maps, j)
+            heatmap = _at(rendered.heatmaps, j)
+            mask = _at(rendered.masks, j)
+            overlay = _at(rendered.overlays, j)
+
+            if original is not None:
+                _save_png(original, viz_dir / f"{img_name}_original.png")
+            else:
+                logger.warning("No image tensor for: %s", img_name)
+            if heatmap is not None:
+                _save_png(heatmap, viz_dir / f"{img_name}_heatmap.png")
+            if mask is not None:
+                _save_png(mask, viz_dir / f"{img_name}_mask.png")
+            if overlay is not None:
+                _save_png(overlay, viz_dir / f"{img_name}_overlay.png")
+
+            if raw_map is not None and store is not None:
+                row = store.add(img_name, raw_map, _at(rendered.raw_masks, j))
                 pixel_rows.append(
                     {
                         "image_path": path_str,
-                        "height": int(amap.shape[-2]),
-                        "width": int(amap.shape[-1]),
-                        "anomaly_map_path": f"visualizations/{img_name}_heatmap.png",
+                        "height": int(raw_map.shape[0]),
+                        "width": int(raw_map.shape[1]),
+                        "anomaly_map_path": store.maps_relative_path,
+                        "map_index": row,
                     }
                 )
-
             count += 1
+        offset += batch_size
 
+    if store is not None:
+        store.close()
     _write_csv(
         output_dir / "image_predictions.csv",
         image_rows,
-        ["image_path", "anomaly_score", "pred_label"],
+        ["image_path", "anomaly_score", "pred_label", "gt_label", "category"],
     )
     _write_csv(
         output_dir / "pixel_predictions.csv",
         pixel_rows,
-        ["image_path", "height", "width", "anomaly_map_path"],
+        ["image_path", "height", "width", "anomaly_map_path", "map_index"],
     )
-    logger.info("Generated %d visualization artifact sets", count)
+    _write_image_parquet(output_dir / "image_predictions.parquet", image_rows)
+    _write_pixel_parquet(output_dir / "pixel_predictions.parquet", pixel_rows)
+    logger.info("Generated %d of %d visualization artifact sets", count, offset)
+    return count
+
+
+# ===================================================================
+# Image selection (規則は Worker の収集時と共通の anomalib.visualization_selection)
+# ===================================================================
+
+
+def _image_records(predictions: list[Any]) -> list[ImageRecord]:
+    """全バッチのスコアとラベルだけを集める (画像・異常マップは転送しない)。
+
+    name には全バッチを通した画像の通し番号を入れる。
+    """
+    records: list[ImageRecord] = []
+    for batch in predictions:
+        scores = _as_list(_field(batch, "pred_score"))
+        preds = _as_list(_field(batch, "pred_label"))
+        gts = _as_list(_field(batch, "gt_label"))
+        batch_size = _batch_len(
+            _field(batch, "image_path"), _field(batch, "anomaly_map"), _field(batch, "pred_mask")
+        )
+        for i in range(batch_size):
+            score = scores[i] if i < len(scores) else None
+            pred = preds[i] if i < len(preds) else None
+            gt = gts[i] if i < len(gts) else None
+            records.append(
+                ImageRecord(
+                    name=str(len(records)),
+                    score=None if score is None else float(score),
+                    pred_label=None if pred is None else str(pred),
+                    gt_label=None if gt is None else str(gt),
+                )
+            )
+    return records
+
+
+def _select_indices(records: list[ImageRecord], strategy: str, max_images: int | None) -> set[int]:
+    """max_images / strategy に従って可視化する画像の通し番号を選ぶ。"""
+    chosen = select_images(records, strategy, max_images)
+    if len(chosen) < len(records):
+        logger.info("Selected %d of %d images (strategy=%s)", len(chosen), len(records), strategy)
+    return {int(name) for name in chosen}
+
+
+def _as_list(field: Any) -> list[Any]:
+    if field is None:
+        return []
+    if isinstance(field, torch.Tensor):
+        return list(field.detach().cpu().reshape(-1).tolist())
+    return [v.item() if hasattr(v, "item") else v for v in field]
 
 
 # ===================================================================
@@ -174,6 +296,15 @@ def _at(tensor: Any, idx: int) -> Any:
         return None
 
 
+def _take(field: Any, indices: list[int] | None) -> Any:
+    """バッチのフィールドから indices のサンプルだけを取り出す (None なら全件)。"""
+    if field is None or indices is None:
+        return field
+    if isinstance(field, (list, tuple)):
+        return [field[i] for i in indices]
+    return field[indices]
+
+
 def _scalar(field: Any, idx: int, default: Any = 0.0) -> Any:
     if field is None:
         return default
@@ -184,90 +315,280 @@ def _scalar(field: Any, idx: int, default: Any = 0.0) -> Any:
         return default
 
 
+# 同一形状で stack できたバッチは ndarray、画像サイズが揃わない場合はサンプル毎の list
+BatchArray = np.ndarray | list[np.ndarray]
+
+
+def _to_numpy(tensor: Any, keep_dtype: bool = False) -> np.ndarray:
+    """テンソルを CPU 上の ndarray に 1 回で転送する。"""
+    if isinstance(tensor, torch.Tensor):
+        t = tensor.detach().cpu()
+        if not keep_dtype or t.dtype not in (torch.bool, torch.uint8):
+            t = t.float()
+        return t.numpy()
+    arr = np.asarray(tensor)
+    return arr if keep_dtype else arr.astype(np.float32, copy=False)
+
+
+def _batch_array(field: Any, keep_dtype: bool = False) -> BatchArray | None:
+    """バッチのフィールドを [B, ...] の ndarray にまとめる。"""
+    if field is None:
+        return None
+    if isinstance(field, (list, tuple)):
+        items = [_to_numpy(x, keep_dtype) for x in field]
+        if not items:
+            return None
+        if all(x.shape == items[0].shape for x in items):
+            return np.stack(items)
+        return items
+    arr = _to_numpy(field, keep_dtype)
+    return arr if arr.ndim > 0 else None
+
+
+def _map_batch(fn: Callable[[np.ndarray], np.ndarray], data: BatchArray | None) -> Any:
+    """バッチ関数を適用する。サイズ不揃いの list はサンプル毎に [1, ...] として処理する。"""
+    if data is None:
+        return None
+    if isinstance(data, list):
+        return [fn(x[np.newaxis])[0] for x in data]
+    return fn(data)
+
+
 # ===================================================================
-# Image saving helpers
+# Batch rendering
 # ===================================================================
 
 
 IMAGENET_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
 IMAGENET_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
 
+# cv2.applyColorMap(COLORMAP_JET) + BGR2RGB と同値の 256 色 LUT
+_JET_LUT_BGR = cv2.applyColorMap(np.arange(256, dtype=np.uint8).reshape(256, 1), cv2.COLORMAP_JET)
+_JET_LUT_RGB: np.ndarray = np.ascontiguousarray(_JET_LUT_BGR[:, 0, ::-1])
+
+OVERLAY_ALPHA = 0.4
+
+
+@dataclass
+class _RenderedBatch:
+    """1 バッチ分の描画済み画像 (uint8) と、ストアに保存する生データ。"""
+
+    originals: Any = None  # [B, H, W, 3]
+    raw_maps: Any = None  # [B, h, w] float32 (正規化前の異常スコア)
+    raw_masks: Any = None  # [B, H, W]
+    heatmaps: Any = None  # [B, h, w, 3] (render_png=True のみ)
+    masks: Any = None  # [B, H, W] (render_png=True のみ)
+    overlays: Any = None  # [B, H, W, 3] (render_png=True のみ)
+
 
-def _denormalize(tensor: Any) -> np.ndarray:
-    """ImageNet 正規化済み [C,H,W] テンソルを [H,W,3] uint8 に逆変換する。"""
-    arr = tensor.detach().cpu().float().numpy()
-    if arr.ndim == 3 and arr.shape[0] in (1, 3):
-        arr = np.transpose(arr, (1, 2, 0))
-    if arr.ndim == 2:
-        arr = arr[:, :, np.newaxis]
+def _render_batch(
+    images: Any,
+    anomaly_maps: Any,
+    pred_masks: Any,
+    render_png: bool = True,
+) -> _RenderedBatch:
+    """バッチ単位で逆正規化・正規化・カラーマップ適用を行う。
+
+    original / heatmap の中間配列を overlay でもそのまま再利用する。
+    render_png=False では original の逆正規化と生データの取り出しのみ行う。
+    """
+    originals = _map_batch(_denormalize_batch, _batch_array(images))
+    raw_maps = _map_batch(_squeeze_channel, _batch_array(anomaly_maps))
+    raw_masks = _map_batch(_squeeze_channel, _batch_array(pred_masks, keep_dtype=True))
+    rendered = _RenderedBatch(originals=originals, raw_maps=raw_maps, raw_masks=raw_masks)
+    if not render_png:
+        return rendered
+
+    gray = _map_batch(_normalize_maps, raw_maps)
+    rendered.heatmaps = None if gray is None else _map_batch(_colorize, gray)
+    rendered.masks = _map_batch(_mask_batch, raw_masks)
+    heatmaps = rendered.heatmaps
+    if originals is not None and heatmaps is not None:
+        if isinstance(originals, np.ndarray) and isinstance(heatmaps, np.ndarray):
+            rendered.overlays = _blend_batch(originals, heatmaps)
+        else:
+            n = min(len(originals), len(heatmaps))
+            rendered.overlays = [
+                _blend_batch(originals[i][np.newaxis], heatmaps[i][np.newaxis])[0] for i in range(n)
+            ]
+    return rendered
+
+
+def _denormalize_batch(arr: np.ndarray) -> np.ndarray:
+    """ImageNet 正規化済み [B,C,H,W] を [B,H,W,3] uint8 に逆変換する。"""
+    if arr.ndim == 4 and arr.shape[1] in (1, 3):
+        arr = np.transpose(arr, (0, 2, 3, 1))
+    if arr.ndim == 3:
+        arr = arr[..., np.newaxis]
     if arr.shape[-1] == 1:
         arr = np.repeat(arr, 3, axis=-1)
-    arr = arr * IMAGENET_STD + IMAGENET_MEAN
-    return np.clip(arr * 255, 0, 255).astype(np.uint8)
-
-
-def _normalize_map(tensor: Any) -> np.ndarray:
-    """異常マップテンソルを [0, 255] uint8 に正規化する。"""
-    arr = tensor.detach().cpu().float().squeeze().numpy()
-    lo, hi = float(arr.min()), float(arr.max())
-    if hi > lo:
-        arr = (arr - lo) / (hi - lo)
-    else:
-        arr = np.zeros_like(arr)
-    return (arr * 255).astype(np.uint8)
-
-
-def _save_denormalized(tensor: Any, path: Path) -> None:
-    """前処理後の画像テンソルを逆正規化して保存する。"""
-    arr = _denormalize(tensor)
-    logger.info(
-        "Original (denorm): shape=%s, range=[%d, %d]", arr.shape, int(arr.min()), int(arr.max())
-    )
-    Image.fromarray(arr).save(path)
+    out = arr * IMAGENET_STD
+    out += IMAGENET_MEAN
+    out *= 255
+    np.clip(out, 0, 255, out=out)
+    return out.astype(np.uint8)
 
 
-def _save_heatmap(amap: Any, path: Path) -> None:
-    gray = _normalize_map(amap)
-    colored = cv2.applyColorMap(gray, cv2.COLORMAP_JET)
-    Image.fromarray(cv2.cvtColor(colored, cv2.COLOR_BGR2RGB)).save(path)
+def _squeeze_channel(arr: np.ndarray) -> np.ndarray:
+    """[B,1,H,W] / [B,H,W,1] を [B,H,W] にする。"""
+    if arr.ndim == 4 and arr.shape[1] == 1:
+        arr = arr[:, 0]
+    if arr.ndim == 4 and arr.shape[-1] == 1:
+        arr = arr[..., 0]
+    return arr
 
 
-def _save_mask(mask: Any, path: Path) -> None:
-    arr = mask.detach().cpu().squeeze()
-    if arr.dtype == torch.bool:
-        np_arr = arr.numpy().astype(np.uint8) * 255
-    else:
-        farr = arr.float().numpy()
-        lo, hi = float(farr.min()), float(farr.max())
-        if hi > lo:
-            farr = (farr - lo) / (hi - lo) * 255.0
-        else:
-            farr = farr * 255.0
-        np_arr = np.clip(farr, 0, 255).astype(np.uint8)
-    logger.info(
-        "Mask: shape=%s nonzero=%d/%d",
-        np_arr.shape,
-        int(np.count_nonzero(np_arr)),
-        np_arr.size,
-    )
-    Image.fromarray(np_arr, mode="L").save(path)
+def _minmax_scale(arr: np.ndarray, fill_constant: bool) -> np.ndarray:
+    """サンプル毎に [0, 1] へ min-max 正規化する (float32)。
+
+    値が一定のサンプルは fill_constant=True なら 0、False なら元の値のまま返す。
+    """
+    axes = tuple(range(1, arr.ndim))
+    lo = arr.min(axis=axes, keepdims=True)
+    hi = arr.max(axis=axes, keepdims=True)
+    rng = hi - lo
+    varying = rng > 0
+    scaled = (arr - lo) / np.where(varying, rng, 1)
+    return np.where(varying, scaled, 0 if fill_constant else arr).astype(np.float32, copy=False)
 
 
-def _save_overlay(
-    img_tensor: Any,
-    amap: Any,
-    path: Path,
-    alpha: float = 0.4,
-) -> None:
-    """前処理後の画像テンソルとヒートマップを重ね合わせて保存する。"""
-    img_arr = _denormalize(img_tensor)
-    gray = _normalize_map(amap)
-    heat = cv2.applyColorMap(gray, cv2.COLORMAP_JET)
-    heat_rgb = cv2.cvtColor(heat, cv2.COLOR_BGR2RGB)
-    if heat_rgb.shape[:2] != img_arr.shape[:2]:
-        heat_rgb = cv2.resize(heat_rgb, (img_arr.shape[1], img_arr.shape[0]))
-    blended = cv2.addWeighted(img_arr, 1 - alpha, heat_rgb, alpha, 0)
-    Image.fromarray(blended).save(path)
+def _normalize_maps(arr: np.ndarray) -> np.ndarray:
+    """異常マップ [B,(1,)H,W] をサンプル毎に [0, 255] uint8 に正規化する。"""
+    scaled = _minmax_scale(_squeeze_channel(arr), fill_constant=True)
+    return (scaled * 255).astype(np.uint8)
+
+
+def _colorize(gray: np.ndarray) -> np.ndarray:
+    """[B,H,W] uint8 に JET カラーマップを適用し [B,H,W,3] RGB を返す。"""
+    return _JET_LUT_RGB[gray]
+
+
+def _mask_batch(arr: np.ndarray) -> np.ndarray:
+    """予測マスク [B,(1,)H,W] を [B,H,W] uint8 に変換する。"""
+    arr = _squeeze_channel(arr)
+    if arr.dtype == np.bool_:
+        return arr.astype(np.uint8) * 255
+    scaled = _minmax_scale(arr.astype(np.float32, copy=False), fill_constant=False) * 255.0
+    return np.clip(scaled, 0, 255).astype(np.uint8)
+
+
+def _blend_batch(
+    originals: np.ndarray, heatmaps: np.ndarray, alpha: float = OVERLAY_ALPHA
+) -> np.ndarray:
+    """画像とヒートマップを重ね合わせる (cv2.addWeighted 相当)。"""
+    if heatmaps.shape[1:3] != originals.shape[1:3]:
+        height, width = originals.shape[1:3]
+        heatmaps = np.stack([cv2.resize(h, (width, height)) for h in heatmaps])
+    blended = originals.astype(np.float32) * (1 - alpha)
+    blended += heatmaps.astype(np.float32) * alpha
+    np.rint(blended, out=blended)
+    np.clip(blended, 0, 255, out=blended)
+    return blended.astype(np.uint8)
+
+
+# ===================================================================
+# Raw anomaly map store
+# ===================================================================
+
+
+RAW_STORE_DIRNAME = "raw"
+RAW_STORE_VERSION = 2
+_FLOAT16_MAX = float(np.finfo(np.float16).max)
+
+
+def _map_sizes(field: Any) -> list[tuple[int, int]]:
+    """異常マップフィールドからサンプル毎の (H, W) をデータ転送せずに得る。"""
+    if field is None:
+        return []
+    if isinstance(field, (list, tuple)):
+        return [(int(x.shape[-2]), int(x.shape[-1])) for x in field]
+    shape = tuple(field.shape)
+    if len(shape) < 3:
+        return []
+    return [(int(shape[-2]), int(shape[-1]))] * int(shape[0])
+
+
+def _shuffle_float16(arr: np.ndarray) -> np.ndarray:
+    """float16 [H, W] を little-endian のバイトプレーン uint8 [2, H, W] (下位, 上位) にする。"""
+    height, width = arr.shape
+    planes = np.ascontiguousarray(arr, dtype="<f2").view(np.uint8).reshape(height, width, 2)
+    return np.moveaxis(planes, -1, 0)
+
+
+def _binarize(mask: np.ndarray) -> np.ndarray:
+    return mask if mask.dtype == np.bool_ else mask > 0.5
+
+
+class _RawMapStore:
+    """生の異常マップとマスクを、画像ごとに deflate 圧縮した 1 つの .npz に書き出す。
+
+    API は 1 画像分のメンバーだけを展開して描画する。異常マップは float16 を
+    下位/上位バイトのプレーン uint8 [2, H, W] に並べ替えてから圧縮する
+    (滑らかなマップでは上位バイトがよく揃い、そのままの float16 より小さくなる)。
+    画像ごとに元サイズのまま保存するため 0 埋めは不要。
+    """
+
+    STORE_FILENAME = "anomaly_maps.npz"
+    INDEX_FILENAME = "index.json"
+
+    def __init__(self, store_dir: Path) -> None:
+        store_dir.mkdir(parents=True, exist_ok=True)
+        self._store_dir = store_dir
+        self._tmp_path = store_dir / f"{self.STORE_FILENAME}.tmp"
+        self._zip = zipfile.ZipFile(self._tmp_path, "w", compression=zipfile.ZIP_DEFLATED)
+        self._has_masks = False
+        self._images: list[dict[str, Any]] = []
+        self.maps_relative_path = f"visualizations/{store_dir.name}/{self.STORE_FILENAME}"
+
+    @classmethod
+    def create(
+        cls, store_dir: Path, predictions: list[Any], selected: set[int]
+    ) -> _RawMapStore | None:
+        """選択された画像に異常マップがある場合だけストアを作る。"""
+        all_sizes = [s for batch in predictions for s in _map_sizes(_field(batch, "anomaly_map"))]
+        if not any(i in selected for i in range(len(all_sizes))):
+            return None
+        return cls(store_dir)
+
+    def add(self, name: str, raw_map: np.ndarray, mask: np.ndarray | None) -> int:
+        """1 画像分を書き込み、行番号を返す。"""
+        row = len(self._images)
+        height, width = raw_map.shape
+        finite = np.nan_to_num(raw_map, nan=0.0, posinf=_FLOAT16_MAX, neginf=-_FLOAT16_MAX)
+        clipped = np.clip(finite, -_FLOAT16_MAX, _FLOAT16_MAX)
+        self._write(f"map_{row}", _shuffle_float16(clipped))
+        if mask is not None and mask.shape == raw_map.shape:
+            self._write(f"mask_{row}", np.packbits(_binarize(mask), axis=-1))
+            self._has_masks = True
+        self._images.append({"name": name, "height": int(height), "width": int(width)})
+        return row
+
+    def _write(self, member: str, arr: np.ndarray) -> None:
+        with self._zip.open(f"{member}.npy", "w", force_zip64=True) as f:
+            np.lib.format.write_array(f, np.ascontiguousarray(arr), allow_pickle=False)
+
+    def close(self) -> None:
+        self._zip.close()
+        os.replace(self._tmp_path, self._store_dir / self.STORE_FILENAME)
+        index = {
+            "version": RAW_STORE_VERSION,
+            "maps": self.STORE_FILENAME,
+            "masks": self.STORE_FILENAME if self._has_masks else None,
+            "images": self._images,
+        }
+        # index.json は最後に書き出し、配列が揃ってから API に見えるようにする
+        tmp = self._store_dir / f"{self.INDEX_FILENAME}.tmp"
+        tmp.write_text(json.dumps(index, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self._store_dir / self.INDEX_FILENAME)
+
+
+# ===================================================================
+# PNG encoding
+# ===================================================================
+
+
+def _save_png(arr: np.ndarray, path: Path) -> None:
+    Image.fromarray(np.ascontiguousarray(arr)).save(path)
 
 
 def _write_csv(
@@ -282,3 +603,63 @@ def _write_csv(
         writer.writeheader()
         writer.writerows(rows)
     logger.info("Saved %s (%d rows)", path.name, len(rows))
+
+
+# Parquet の行グループの行数。API は行グループ単位でストリーム集計し、
+# ヒストグラムの範囲は行グループ統計 (min/max) から求める
+PARQUET_ROW_GROUP_SIZE = 65536
+
+
+def _write_image_parquet(path: Path, rows: list[dict[str, Any]]) -> None:
+    """画像単位予測を型付き列で書き出す (score float32 / ラベル bool / category 辞書符号化)。"""
+    if pa is None or not rows:
+        return
+    schema = pa.schema(
+        [
+            ("image_path", pa.string()),
+            ("category", pa.dictionary(pa.int32(), pa.string())),
+            ("anomaly_score", pa.float32()),
+            ("pred_label", pa.bool_()),
+            ("gt_label", pa.bool_()),
+        ]
+    )
+    columns = {
+        "image_path": [r["image_path"] for r in rows],
+        "category": [r["category"] or None for r in rows],
+        "anomaly_score": [r["anomaly_score"] for r in rows],
+        "pred_label": [parse_label(r["pred_label"]) for r in rows],
+        "gt_label": [parse_label(r["gt_label"]) for r in rows],
+    }
+    _write_parquet(path, pa.table(columns, schema=schema))
+
+
+def _write_pixel_parquet(path: Path, rows: list[dict[str, Any]]) -> None:
+    if pa is None or not rows:
+        return
+    schema = pa.schema(
+        [
+            ("image_path", pa.string()),
+            ("height", pa.int32()),
+            ("width", pa.int32()),
+            ("anomaly_map_path", pa.dictionary(pa.int32(), pa.string())),
+            ("map_index", pa.int32()),
+        ]
+    )
+    columns = {name: [r[name] for r in rows] for name in schema.names}
+    _write_parquet(path, pa.table(columns, schema=schema))
+
+
+def _write_parquet(path: Path, table: Any) -> None:
+    try:
+        pq.write_table(
+            table,
+            path,
+            row_group_size=PARQUET_ROW_GROUP_SIZE,
+            compression="zstd",
+            write_statistics=True,
+        )
+    except (OSError, pa.ArrowException) as exc:
+        # CSV は書けているため Parquet の失敗はジョブを止めない
+        logger.warning("Failed to write %s: %s", path.name, exc)
+        return
+    logger.info("Saved %s (%d rows)", path.name, table.num_rows)
@@ -0,0 +1,301 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import stat
+import sys
+import tarfile
+import tempfile
+import threading
+import zipfile
+import zlib
+from collections.abc import Iterator
+from pathlib import Path, PurePosixPath
+from typing import IO
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_SUFFIXES = (".zip", ".tar.gz", ".tgz")
+_CHUNK_SIZE = 1024 * 1024
+# Linux の ioctl FICLONE (copy-on-write 複製)
+_FICLONE = 0x40049409
+
+
+class ArchiveError(ValueError):
+    """安全に展開できないアーカイブ."""
+
+
+def is_archive(filename: str) -> bool:
+    return filename.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ArchiveExtractor:
+    """zip / tar.gz の提出物を展開し、アーカイブの sha256 ごとにキャッシュする.
+
+    - メンバー名は相対パスのみ許可し、絶対パス・".."・シンボリックリンク・デバイスは拒否する
+    - ヘッダの申告値ではなく実際に書き出したバイト数で、合計サイズ・ファイル数・
+      圧縮率の上限 (zip bomb 対策) を検査する
+    - 展開は一時ディレクトリに対してストリーミングで行い、完了後に rename して公開する
+    - 展開時に各ファイルの sha256 を <sha256>.json に記録し、再利用の前にツリーと照合する
+      (共有ボリューム上で書き換えられたツリーは捨てて展開し直す)
+    - 合計サイズが上限を超えたら、最終利用の古い展開ツリーから削除する (LRU)
+    """
+
+    DEFAULT_MAX_UNPACKED_BYTES = 2 * 1024**3
+    DEFAULT_MAX_FILES = 10_000
+    DEFAULT_MAX_RATIO = 100.0
+    DEFAULT_CACHE_MAX_BYTES = 20 * 1024**3
+
+    def __init__(
+        self,
+        cache_root: Path | None = None,
+        max_unpacked_bytes: int | None = None,
+        max_files: int | None = None,
+        max_ratio: float | None = None,
+        cache_max_bytes: int | None = None,
+    ) -> None:
+        self.cache_root = Path(
+            cache_root or os.getenv("ARCHIVE_CACHE_DIR", "/shared/archive_cache")
+        )
+        self.max_unpacked_bytes = max_unpacked_bytes or int(
+            os.getenv("ARCHIVE_MAX_UNPACKED_BYTES", str(self.DEFAULT_MAX_UNPACKED_BYTES))
+        )
+        self.max_files = max_files or int(
+            os.getenv("ARCHIVE_MAX_FILES", str(self.DEFAULT_MAX_FILES))
+        )
+        self.max_ratio = max_ratio or float(
+            os.getenv("ARCHIVE_MAX_RATIO", str(self.DEFAULT_MAX_RATIO))
+        )
+        self.cache_max_bytes = cache_max_bytes or int(
+            os.getenv("ARCHIVE_CACHE_MAX_BYTES", str(self.DEFAULT_CACHE_MAX_BYTES))
+        )
+        self._lock = threading.Lock()
+
+    def extract(self, archive: Path) -> Path:
+        """アーカイブを展開したディレクトリ (キャッシュ上) を返す."""
+        digest = file_sha256(archive)
+        target = self.cache_root / digest
+        if target.is_dir():
+            if self._verify(target):
+                os.utime(target)
+                logger.info("Archive %s is cached at %s", archive.name, target)
+                return target
+            logger.warning("Cached tree %s does not match its manifest; re-extracting", target)
+            shutil.rmtree(target, ignore_errors=True)
+
+        self.cache_root.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(dir=self.cache_root, prefix=".extract-"))
+        try:
+            if archive.name.lower().endswith(".zip"):
+                budget = self._extract_zip(archive, tmp)
+            else:
+                budget = self._extract_tar(archive, tmp)
+            # ツリーより先に書き、マニフェストの無いツリーが見えないようにする
+            self._write_manifest(target, budget.digests)
+            try:
+                os.replace(tmp, target)
+            except OSError:
+                # 同じアーカイブを他のプロセスが先に展開し終えた
+                if not target.is_dir():
+                    raise
+                shutil.rmtree(tmp, ignore_errors=True)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        logger.info("Extracted %s to %s", archive.name, target)
+        self._evict(keep=target)
+        return target
+
+    @staticmethod
+    def _manifest_path(tree: Path) -> Path:
+        return tree.with_name(f"{tree.name}.json")
+
+    def _write_manifest(self, tree: Path, digests: dict[str, str]) -> None:
+        manifest = self._manifest_path(tree)
+        tmp = manifest.with_name(f".{manifest.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"files": digests}, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, manifest)
+
+    def _verify(self, tree: Path) -> bool:
+        """展開済みツリーのファイル構成と内容がマニフェストの sha256 と一致するか."""
+        try:
+            expected = json.loads(self._manifest_path(tree).read_text(encoding="utf-8"))["files"]
+            actual = {
+                path.relative_to(tree).as_posix(): path
+                for path in tree.rglob("*")
+                if path.is_symlink() or not path.is_dir()
+            }
+            if set(actual) != set(expected):
+                return False
+            return all(
+                path.is_file() and not path.is_symlink() and file_sha256(path) == expected[name]
+                for name, path in actual.items()
+            )
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+
+    def _extract_zip(self, archive: Path, destination: Path) -> _Budget:
+        budget = _Budget(self, archive.stat().st_size, destination)
+        try:
+            with zipfile.ZipFile(archive) as zf:
+                for info in zf.infolist():
+                    mode = info.external_attr >> 16
+                    if stat.S_ISLNK(mode):
+                        raise ArchiveError(f"symbolic links are not allowed: {info.filename}")
+                    path = _safe_path(destination, info.filename)
+                    if info.is_dir():
+                        path.mkdir(parents=True, exist_ok=True)
+                        continue
+                    budget.add_file(info.filename)
+                    with zf.open(info) as source:
+                        written = _copy_stream(source, path, budget)
+                    if info.compress_size and written / info.compress_size > self.max_ratio:
+                        raise ArchiveError(f"suspicious compression ratio: {info.filename}")
+        except (zipfile.BadZipFile, zlib.error, EOFError, NotImplementedError, RuntimeError) as exc:
+            # RuntimeError は暗号化されたメンバー、NotImplementedError は未対応の圧縮方式
+            raise ArchiveError(f"{archive.name} is not a valid zip file: {exc}") from exc
+        return budget
+
+    def _extract_tar(self, archive: Path, destination: Path) -> _Budget:
+        budget = _Budget(self, archive.stat().st_size, destination)
+        try:
+            # "r|gz" はシークせずに先頭から順に読むストリーミングモード
+            with tarfile.open(archive, mode="r|gz") as tar:
+                for member in tar:
+                    path = _safe_path(destination, member.name)
+                    if member.isdir():
+                        path.mkdir(parents=True, exist_ok=True)
+                        continue
+                    if not member.isfile():
+                        raise ArchiveError(f"only regular files are allowed: {member.name}")
+                    budget.add_file(member.name)
+                    source = tar.extractfile(member)
+                    if source is None:
+                        raise ArchiveError(f"cannot read {member.name}")
+                    with source:
+                        _copy_stream(source, path, budget)
+        except (tarfile.TarError, EOFError, zlib.error) as exc:
+            raise ArchiveError(f"{archive.name} is not a valid tar.gz file: {exc}") from exc
+        return budget
+
+    def _entries(self) -> Iterator[Path]:
+        for entry in self.cache_root.iterdir():
+            if entry.is_dir() and not entry.name.startswith("."):
+                yield entry
+
+    def _evict(self, keep: Path) -> None:
+        with self._lock:
+            sized = []
+            for entry in self._entries():
+                size = sum(p.stat().st_size for p in entry.rglob("*") if p.is_file())
+                sized.append((entry.stat().st_mtime_ns, size, entry))
+            total = sum(size for _, size, _ in sized)
+            for _, size, entry in sorted(sized):
+                if total <= self.cache_max_bytes:
+                    break
+                if entry == keep:
+                    continue
+                # 提出ディレクトリへは複製して配置しているため、削除しても提出物は残る
+                shutil.rmtree(entry, ignore_errors=True)
+                self._manifest_path(entry).unlink(missing_ok=True)
+                total -= size
+
+
+class _Budget:
+    """展開中の合計サイズ・ファイル数の上限を検査する."""
+
+    def __init__(self, extractor: ArchiveExtractor, archive_bytes: int, destination: Path) -> None:
+        self.extractor = extractor
+        self.destination = destination
+        self.max_bytes = min(
+            extractor.max_unpacked_bytes, int(max(archive_bytes, 1) * extractor.max_ratio)
+        )
+        self.files = 0
+        self.bytes = 0
+        # 展開したファイルの相対パス → sha256 (キャッシュのマニフェストになる)
+        self.digests: dict[str, str] = {}
+
+    def add_file(self, name: str) -> None:
+        self.files += 1
+        if self.files > self.extractor.max_files:
+            raise ArchiveError(f"archive has more than {self.extractor.max_files} files")
+
+    def add_bytes(self, count: int) -> None:
+        self.bytes += count
+        if self.bytes > self.max_bytes:
+            raise ArchiveError(f"archive expands to more than {self.max_bytes} bytes")
+
+
+def _safe_path(destination: Path, name: str) -> Path:
+    member = PurePosixPath(name.replace("\\", "/"))
+    if member.is_absolute() or ".." in member.parts:
+        raise ArchiveError(f"unsafe path in archive: {name}")
+    if member.parts and member.parts[0].endswith(":"):  # Windows のドライブ指定
+        raise ArchiveError(f"unsafe path in archive: {name}")
+    return destination.joinpath(*member.parts)
+
+
+def _copy_stream(source: IO[bytes], path: Path, budget: _Budget) -> int:
+    if path == budget.destination:
+        raise ArchiveError("archive member has an empty name")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    written = 0
+    digest = hashlib.sha256()
+    with open(path, "wb") as target:
+        while chunk := source.read(_CHUNK_SIZE):
+            budget.add_bytes(len(chunk))
+            target.write(chunk)
+            digest.update(chunk)
+            written += len(chunk)
+    budget.digests[path.relative_to(budget.destination).as_posix()] = digest.hexdigest()
+    return written
+
+
+def copy_tree(source: Path, destination: Path) -> list[str]:
+    """展開済みツリーを提出ディレクトリに複製する (既存のファイルは上書きしない).
+
+    キャッシュとは別のファイルにするため、ジョブが提出物を書き換えても
+    キャッシュや同じアーカイブを使う他の提出物には影響しない。
+    reflink (copy-on-write) に対応したファイルシステムでは複製時にデータをコピーしない。
+    配置した相対パスを返す。
+    """
+    placed: list[str] = []
+    for path in sorted(source.rglob("*")):
+        relative = path.relative_to(source)
+        target = destination / relative
+        if path.is_dir():
+            target.mkdir(parents=True, exist_ok=True)
+            continue
+        if target.exists():
+            continue
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if not _reflink(path, target):
+            shutil.copyfile(path, target)
+        placed.append(relative.as_posix())
+    return placed
+
+
+def _reflink(source: Path, target: Path) -> bool:
+    """Linux の FICLONE で copy-on-write 複製する。非対応の環境では False を返す。"""
+    if sys.platform != "linux":
+        return False
+    import fcntl
+
+    try:
+        with open(source, "rb") as s, open(target, "wb") as d:
+            fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+        return True
+    except OSError:
+        target.unlink(missing_ok=True)
+        return False
@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import csv
+import heapq
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from src.ports.prediction_query_port import (
+    PredictionFilter,
+    PredictionQueryPort,
+    PredictionRecord,
+    ScoreHistogram,
+)
+
+SCORE_COLUMN = "anomaly_score"
+RECORD_COLUMNS = ["image_path", SCORE_COLUMN, "pred_label", "gt_label", "category"]
+
+_TRUE_LABELS = {"true", "1", "1.0", "anomalous", "abnormal"}
+_FALSE_LABELS = {"false", "0", "0.0", "normal", "good"}
+
+
+def _parse_bool(value: str | None) -> bool | None:
+    if value is None:
+        return None
+    text = value.strip().lower()
+    if text in _TRUE_LABELS:
+        return True
+    if text in _FALSE_LABELS:
+        return False
+    return None
+
+
+class ArrowPredictionQueryAdapter(PredictionQueryPort):
+    """画像単位予測を列指向のまま集計するアダプタ.
+
+    Parquet は必要な列だけを行グループ単位でストリーム読みし、ファイル全体を
+    メモリに載せない。ヒストグラムの範囲は行グループ統計 (min/max) から求める。
+    Parquet の無い旧ジョブ向けに CSV も 1 行ずつ読んで同じ集計を行う。
+    """
+
+    BATCH_ROWS = 65536
+
+    def histogram(self, source: Path, bins: int, filters: PredictionFilter) -> ScoreHistogram:
+        if bins < 1:
+            raise ValueError("bins must be positive")
+        score_range = self._score_range(source)
+        if score_range is None:
+            return ScoreHistogram(bin_edges=[], counts=[], total=0)
+        lo, hi = score_range
+        edges = np.histogram_bin_edges(np.array([lo, hi], dtype=np.float64), bins=bins)
+        counts = np.zeros(bins, dtype=np.int64)
+        for scores in self._scores(source, filters):
+            counts += np.histogram(scores, bins=edges)[0]
+        return ScoreHistogram(
+            bin_edges=[float(e) for e in edges],
+            counts=[int(c) for c in counts],
+            total=int(counts.sum()),
+        )
+
+    def top_scores(
+        self,
+        source: Path,
+        n: int,
+        ascending: bool,
+        filters: PredictionFilter,
+    ) -> list[PredictionRecord]:
+        if n < 1:
+            raise ValueError("n must be positive")
+        if source.suffix == ".csv":
+            records = self._csv_records(source, filters)
+            pick = heapq.nsmallest if ascending else heapq.nlargest
+            return pick(n, records, key=lambda r: r.anomaly_score)
+
+        order = "ascending" if ascending else "descending"
+        sort_keys = [(SCORE_COLUMN, order)]
+        best: pa.Table | None = None
+        for batch in self._parquet_batches(source, RECORD_COLUMNS, filters):
+            if batch.num_rows == 0:
+                continue
+            candidates = pa.Table.from_batches([batch.take(self._top_k(batch, n, sort_keys))])
+            best = candidates if best is None else pa.concat_tables([best, candidates])
+            best = best.take(self._top_k(best, n, sort_keys))
+        if best is None:
+            return []
+        best = best.sort_by(sort_keys)
+        return [self._to_record(row) for row in best.to_pylist()]
+
+    # ------------------------------------------------------------------
+    # Parquet
+    # ------------------------------------------------------------------
+
+    def _parquet_batches(
+        self,
+        source: Path,
+        columns: list[str],
+        filters: PredictionFilter,
+    ) -> Iterator[pa.RecordBatch]:
+        # ジェネレーターを最後まで読むか閉じたときにファイルハンドルを閉じる
+        with pq.ParquetFile(source) as parquet_file:
+            available = set(parquet_file.schema_arrow.names)
+            conditions = self._conditions(filters)
+            if any(name not in available for name, _ in conditions):
+                return
+            needed = [c for c in columns if c in available]
+            needed += [name for name, _ in conditions if name not in needed]
+            for batch in parquet_file.iter_batches(batch_size=self.BATCH_ROWS, columns=needed):
+                mask = pc.is_valid(batch.column(SCORE_COLUMN))
+                for name, value in conditions:
+                    column = batch.column(name)
+                    if pa.types.is_dictionary(column.type):
+                        column = column.cast(column.type.value_type)
+                    mask = pc.and_(mask, pc.equal(column, pa.scalar(value, column.type)))
+                yield batch.filter(mask)
+
+    @staticmethod
+    def _top_k(data: pa.RecordBatch | pa.Table, n: int, sort_keys: list[tuple[str, str]]) -> Any:
+        return pc.select_k_unstable(data, k=min(n, data.num_rows), sort_keys=sort_keys)
+
+    @staticmethod
+    def _parquet_range(source: Path) -> tuple[float, float] | None:
+        """行グループ統計から min/max を得る。統計が無ければ None。"""
+        with pq.ParquetFile(source) as parquet_file:
+            metadata = parquet_file.metadata
+        names = [metadata.schema.column(i).name for i in range(metadata.num_columns)]
+        if SCORE_COLUMN not in names:
+            return None
+        index = names.index(SCORE_COLUMN)
+        lows: list[float] = []
+        highs: list[float] = []
+        for rg in range(metadata.num_row_groups):
+            stats = metadata.row_group(rg).column(index).statistics
+            if stats is None or not stats.has_min_max:
+                return None
+            if stats.num_values > 0:
+                lows.append(float(stats.min))
+                highs.append(float(stats.max))
+        if not lows:
+            return None
+        return min(lows), max(highs)
+
+    # ------------------------------------------------------------------
+    # 共通
+    # ------------------------------------------------------------------
+
+    def _score_range(self, source: Path) -> tuple[float, float] | None:
+        if source.suffix != ".csv":
+            score_range = self._parquet_range(source)
+            if score_range is not None:
+                return score_range
+        lo, hi = np.inf, -np.inf
+        for scores in self._scores(source, PredictionFilter()):
+            if scores.size:
+                lo, hi = min(lo, float(scores.min())), max(hi, float(scores.max()))
+        return None if lo > hi else (lo, hi)
+
+    def _scores(self, source: Path, filters: PredictionFilter) -> Iterator[np.ndarray]:
+        if source.suffix == ".csv":
+            scores = [r.anomaly_score for r in self._csv_records(source, filters)]
+            yield np.asarray(scores, dtype=np.float64)
+            return
+        for batch in self._parquet_batches(source, [SCORE_COLUMN], filters):
+            yield batch.column(SCORE_COLUMN).to_numpy(zero_copy_only=False).astype(np.float64)
+
+    @staticmethod
+    def _conditions(filters: PredictionFilter) -> list[tuple[str, Any]]:
+        conditions: list[tuple[str, Any]] = []
+        if filters.pred_label is not None:
+            conditions.append(("pred_label", filters.pred_label))
+        if filters.gt_label is not None:
+            conditions.append(("gt_label", filters.gt_label))
+        if filters.category is not None:
+            conditions.append(("category", filters.category))
+        return conditions
+
+    @staticmethod
+    def _to_record(row: dict[str, Any]) -> PredictionRecord:
+        return PredictionRecord(
+            image_path=str(row["image_path"]),
+            anomaly_score=float(row[SCORE_COLUMN]),
+            pred_label=row.get("pred_label"),
+            gt_label=row.get("gt_label"),
+            category=row.get("category"),
+        )
+
+    # ------------------------------------------------------------------
+    # CSV (Parquet の無い旧ジョブ)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _csv_records(source: Path, filters: PredictionFilter) -> Iterator[PredictionRecord]:
+        with open(source, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                try:
+                    score = float(row.get(SCORE_COLUMN) or "")
+                except ValueError:
+                    continue
+                image_path = row.get("image_path") or ""
+                record = PredictionRecord(
+                    image_path=image_path,
+                    anomaly_score=score,
+                    pred_label=_parse_bool(row.get("pred_label")),
+                    gt_label=_parse_bool(row.get("gt_label")),
+                    category=row.get("category") or Path(image_path).parent.name or None,
+                )
+                if filters.pred_label is not None and record.pred_label != filters.pred_label:
+                    continue
+                if filters.gt_label is not None and record.gt_label != filters.gt_label:
+                    continue
+                if filters.category is not None and record.category != filters.category:
+                    continue
+                yield record
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import zipfile
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, BinaryIO
+
+import numpy as np
+from PIL import Image, UnidentifiedImageError
+
+from src.adapters.filesystem_lru_cache import FileSystemLruCache
+from src.ports.anomaly_map_port import AnomalyMapPort
+
+# 投稿コード (demo_anomalib2/visualize.py) が書き出すストアの構成
+RAW_INDEX_FILENAME = "index.json"
+# 1: 非圧縮の .npy (memmap)、2: 画像ごとに deflate した .npz
+RAW_STORE_VERSIONS = (1, 2)
+# バージョンごとのストアのファイル名. index.json は投稿が書くので、パスには index の値を使わない
+# (index の "maps" / "masks" は保存の有無だけを見る)
+RAW_STORE_FILES: dict[int, dict[str, str]] = {
+    1: {"maps": "anomaly_maps.npy", "masks": "pred_masks.npy"},
+    2: {"maps": "anomaly_maps.npz", "masks": "anomaly_maps.npz"},
+}
+
+OVERLAY_ALPHA = 0.4
+
+
+def unshuffle_float16(planes: np.ndarray) -> np.ndarray:
+    """[2, H, W] のバイトプレーン (下位バイト, 上位バイト) を little-endian float16 [H, W] に戻す。"""
+    return np.ascontiguousarray(np.moveaxis(planes, 0, -1)).view("<f2")[..., 0]
+
+
+def _jet_lut() -> np.ndarray:
+    """cv2.COLORMAP_JET (RGB) と各チャネル誤差 1 以内で一致する 256 色 LUT。"""
+    x = np.arange(256, dtype=np.float64) / 255.0
+    channels = [np.clip(1.5 - np.abs(4.0 * x - k), 0.0, 1.0) for k in (3.0, 2.0, 1.0)]
+    return np.rint(np.stack(channels, axis=1) * 255).astype(np.uint8)
+
+
+_JET_LUT_RGB = _jet_lut()
+
+
+@lru_cache(maxsize=64)
+def _read_index(path: str, mtime_ns: int) -> dict[str, Any]:
+    """ストアのインデックスを読み込む。(path, mtime) をキーにプロセス内でキャッシュする。"""
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    if not isinstance(data, dict) or data.get("version") not in RAW_STORE_VERSIONS:
+        raise ValueError("unsupported anomaly map store")
+    rows = {str(entry["name"]): i for i, entry in enumerate(data.get("images", []))}
+    return {**data, "rows": rows}
+
+
+class FileSystemAnomalyMapAdapter(FileSystemLruCache, AnomalyMapPort):
+    """float16 の異常マップストアから要求された画像だけを読み、PNG に描画する.
+
+    ストアは投稿コードがジョブごとに 1 つ書き出す:
+      index.json         画像名・元サイズとストアのファイル名
+      anomaly_maps.npz   (version 2) 画像ごとのメンバー
+                         map_<row>.npy   float16 のバイトプレーン uint8 [2, H, W]
+                         mask_<row>.npy  np.packbits でビット圧縮した予測マスク uint8 [H, ceil(W/8)]
+    version 1 (anomaly_maps.npy float16 [N, H, W] / pred_masks.npy を memmap) も読める。
+    描画結果は FileSystemLruCache でキャッシュする。
+    """
+
+    def render(
+        self,
+        store_dir: Path,
+        image_name: str,
+        artifact_type: str,
+        original: Path | None = None,
+    ) -> Path:
+        if artifact_type not in self.RENDERABLE_TYPES:
+            raise ValueError(f"unsupported artifact type: {artifact_type}")
+        if artifact_type == "overlay" and original is None:
+            raise ValueError("overlay requires the original image")
+        index_path = store_dir / RAW_INDEX_FILENAME
+        try:
+            index = _read_index(str(index_path), index_path.stat().st_mtime_ns)
+        except (KeyError, TypeError, json.JSONDecodeError) as exc:
+            raise ValueError(f"invalid anomaly map store: {exc}") from exc
+        row = index["rows"].get(image_name)
+        if row is None:
+            raise FileNotFoundError(f"{image_name} is not in the anomaly map store")
+        kind = "masks" if artifact_type == "mask" else "maps"
+        if not index.get(kind):
+            raise FileNotFoundError(f"{artifact_type} is not stored for {image_name}")
+        array_path = store_dir / RAW_STORE_FILES[int(index["version"])][kind]
+
+        filename = f"{self._cache_key(array_path, image_name, artifact_type, original)}.png"
+        cached = self._lookup(filename)
+        if cached is not None:
+            return cached
+
+        entry = index["images"][row]
+        height, width = int(entry["height"]), int(entry["width"])
+        is_mask = artifact_type == "mask"
+        try:
+            stored = self._load(array_path, int(index["version"]), row, height, width, is_mask)
+            if is_mask:
+                image = Image.fromarray(self._mask(stored, width), mode="L")
+            else:
+                heatmap = self._heatmap(stored)
+                if artifact_type == "overlay" and original is not None:
+                    heatmap = self._overlay(original, heatmap)
+                image = Image.fromarray(heatmap)
+        except (IndexError, OSError, UnidentifiedImageError, zipfile.BadZipFile) as exc:
+            raise ValueError(f"cannot render {artifact_type} for {image_name}: {exc}") from exc
+
+        def write(f: BinaryIO) -> None:
+            image.save(f, format="PNG", compress_level=3)
+
+        return self._store(filename, write)
+
+    def _cache_key(
+        self,
+        array_path: Path,
+        image_name: str,
+        artifact_type: str,
+        original: Path | None,
+    ) -> str:
+        parts = [str(array_path.resolve()), str(array_path.stat().st_mtime_ns)]
+        parts += [image_name, artifact_type]
+        if artifact_type == "overlay" and original is not None:
+            parts += [str(original.resolve()), str(original.stat().st_mtime_ns)]
+        return hashlib.sha256("|".join(parts).encode()).hexdigest()
+
+    @staticmethod
+    def _load(
+        array_path: Path, version: int, row: int, height: int, width: int, is_mask: bool
+    ) -> np.ndarray:
+        """1 画像分の異常マップ (float16 [H, W]) またはパック済みマスク ([H, ceil(W/8)])。"""
+        if version == 1:
+            stored = np.load(array_path, mmap_mode="r")
+            cols = (width + 7) // 8 if is_mask else width
+            return np.asarray(stored[row, :height, :cols])
+        member = f"{'mask' if is_mask else 'map'}_{row}"
+        # NpzFile はメンバーを参照したときにその 1 枚分だけ展開する
+        with np.load(array_path, allow_pickle=False) as store:
+            if member not in store.files:
+                raise FileNotFoundError(f"{member} is not in {array_path.name}")
+            stored = store[member]
+        return stored if is_mask else unshuffle_float16(stored)
+
+    @staticmethod
+    def _heatmap(raw_map: np.ndarray) -> np.ndarray:
+        """生スコアを画像ごとに min-max 正規化し JET カラーマップを適用する。"""
+        arr = np.asarray(raw_map, dtype=np.float32)
+        lo, hi = float(arr.min()), float(arr.max())
+        if hi > lo:
+            arr = (arr - lo) / (hi - lo)
+        else:
+            arr = np.zeros_like(arr)
+        return _JET_LUT_RGB[(arr * 255).astype(np.uint8)]
+
+    @staticmethod
+    def _mask(packed: np.ndarray, width: int) -> np.ndarray:
+        bits = np.unpackbits(packed, axis=-1, count=width)
+        return bits * np.uint8(255)
+
+    @staticmethod
+    def _overlay(original: Path, heatmap: np.ndarray) -> np.ndarray:
+        with Image.open(original) as img:
+            base = np.asarray(img.convert("RGB"), dtype=np.float32)
+        if heatmap.shape[:2] != base.shape[:2]:
+            resized = Image.fromarray(heatmap).resize(
+                (base.shape[1], base.shape[0]), Image.Resampling.BILINEAR
+            )
+            heatmap = np.asarray(resized)
+        blended = base * (1 - OVERLAY_ALPHA) + heatmap.astype(np.float32) * OVERLAY_ALPHA
+        return np.clip(np.rint(blended), 0, 255).astype(np.uint8)
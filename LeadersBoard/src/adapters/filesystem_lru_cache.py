@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import logging
+import os
+import tempfile
+import threading
+from collections.abc import Callable
+from pathlib import Path
+from typing import BinaryIO
+
+logger = logging.getLogger(__name__)
+
+
+class FileSystemLruCache:
+    """共有ボリューム上の派生ファイルキャッシュの基底クラス.
+
+    ヒット時に mtime を更新し、合計サイズが上限を超えたら
+    mtime の古い順に削除する (LRU)。書き込みは一時ファイル経由でアトミックに行う。
+    """
+
+    DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+    def __init__(self, cache_root: Path, max_bytes: int | None = None) -> None:
+        self.cache_root = Path(cache_root)
+        self.max_bytes = max_bytes if max_bytes is not None else self.DEFAULT_MAX_BYTES
+        self._lock = threading.Lock()
+        self._total_bytes: int | None = None
+
+    def _lookup(self, filename: str) -> Path | None:
+        target = self.cache_root / filename
+        if target.is_file():
+            os.utime(target)
+            return target
+        return None
+
+    def _store(self, filename: str, write: Callable[[BinaryIO], None]) -> Path:
+        """write でファイル内容を書き出し、キャッシュに登録してパスを返す。"""
+        self.cache_root.mkdir(parents=True, exist_ok=True)
+        target = self.cache_root / filename
+        fd, tmp_name = tempfile.mkstemp(dir=self.cache_root, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(tmp_name, target)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        self._account(target.stat().st_size)
+        return target
+
+    def _account(self, added_bytes: int) -> None:
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(entry.stat().st_size for entry in self._entries())
+            else:
+                self._total_bytes += added_bytes
+            if self._total_bytes > self.max_bytes:
+                self._total_bytes = self._evict()
+
+    def _entries(self) -> list[os.DirEntry[str]]:
+        with os.scandir(self.cache_root) as it:
+            return [e for e in it if e.is_file() and not e.name.endswith(".tmp")]
+
+    def _evict(self) -> int:
+        """mtime の古い順に削除し、上限の 9 割まで縮める。残りの合計サイズを返す。"""
+        entries = sorted(
+            ((e.stat().st_mtime_ns, e.stat().st_size, e.path) for e in self._entries()),
+        )
+        total = sum(size for _, size, _ in entries)
+        low_water = int(self.max_bytes * 0.9)
+        for _, size, path in entries:
+            if total <= low_water:
+                break
+            Path(path).unlink(missing_ok=True)
+            total -= size
+        logger.info("%s evicted down to %d bytes", type(self).__name__, total)
+        return total
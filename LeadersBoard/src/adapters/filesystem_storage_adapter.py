@@ -2,10 +2,12 @@ from __future__ import annotations
 
 import json
 import os
+import shutil
 from collections.abc import Iterable
 from pathlib import Path
-from typing import BinaryIO, cast
+from typing import Any, BinaryIO, cast
 
+from src.adapters.archive_extractor import ArchiveError, ArchiveExtractor, copy_tree, is_archive
 from src.ports.storage_port import StoragePort
 
 
@@ -17,6 +19,7 @@ class FileSystemStorageAdapter(StoragePort):
         submissions_root: Path,
         logs_root: Path | None = None,
         artifacts_root: Path | None = None,
+        extractor: ArchiveExtractor | None = None,
     ):
         self.submissions_root = Path(submissions_root)
         self.submissions_root.mkdir(parents=True, exist_ok=True)
@@ -28,6 +31,11 @@ class FileSystemStorageAdapter(StoragePort):
         self.artifacts_root = artifacts_root or Path(
             os.getenv("ARTIFACT_ROOT", "/shared/artifacts")
         )
+        self.extractor = extractor or ArchiveExtractor(
+            Path(
+                os.getenv("ARCHIVE_CACHE_DIR", str(self.submissions_root.parent / "archive_cache"))
+            )
+        )
 
     def save(
         self,
@@ -39,16 +47,36 @@ class FileSystemStorageAdapter(StoragePort):
         submission_dir.mkdir(parents=True, exist_ok=True)
 
         stored_files: list[str] = []
+        archives: list[Path] = []
         for file in files:
             target_name = self._determine_filename(file)
             stored_files.append(target_name)
             target_path = submission_dir / target_name
             file.seek(0)
-            target_path.write_bytes(file.read())
+            with open(target_path, "wb") as target:
+                shutil.copyfileobj(file, target, 1024 * 1024)
+            if is_archive(target_name):
+                archives.append(target_path)
+
+        # zip / tar.gz はここで展開し、アーカイブのハッシュごとのキャッシュから配置する
+        extracted: dict[str, str] = {}
+        try:
+            for archive in archives:
+                tree = self.extractor.extract(archive)
+                copy_tree(tree, submission_dir)
+                extracted[archive.name] = tree.name
+        except ArchiveError:
+            shutil.rmtree(submission_dir, ignore_errors=True)
+            raise
 
         metadata_path = submission_dir / "metadata.json"
-        dump = {"files": stored_files, **metadata}
-        metadata_path.write_text(json.dumps(dump, ensure_ascii=False))
+        dump: dict[str, Any] = {"files": stored_files, **metadata}
+        if extracted:
+            dump["archives"] = extracted
+        # 一時ファイルから置き換え、既存の metadata.json (アーカイブ由来など) には書き込まない
+        tmp_path = submission_dir / ".metadata.json.tmp"
+        tmp_path.write_text(json.dumps(dump, ensure_ascii=False))
+        os.replace(tmp_path, metadata_path)
 
     def load(self, submission_id: str) -> str:
         submission_dir = self.submissions_root / submission_id
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import hashlib
+import os
+from pathlib import Path
+from typing import BinaryIO
+
+from PIL import Image, UnidentifiedImageError
+
+from src.adapters.filesystem_lru_cache import FileSystemLruCache
+from src.ports.thumbnail_port import ThumbnailPort
+
+
+class FileSystemThumbnailAdapter(FileSystemLruCache, ThumbnailPort):
+    """縮小プレビューを共有ボリューム上にキャッシュするアダプタ.
+
+    キャッシュキーは (元ファイルのパス・サイズ・mtime, 幅, 形式)。
+    容量管理は FileSystemLruCache の LRU 削除に従う。
+    """
+
+    _PIL_FORMATS = {"webp": "WEBP", "jpeg": "JPEG", "png": "PNG"}
+    _SAVE_OPTIONS: dict[str, dict[str, int | bool]] = {
+        "webp": {"quality": 80, "method": 4},
+        "jpeg": {"quality": 85, "optimize": True},
+        "png": {"optimize": True},
+    }
+
+    def get_thumbnail(self, source: Path, width: int | None, image_format: str) -> Path:
+        if image_format not in self._PIL_FORMATS:
+            raise ValueError(f"unsupported format: {image_format}")
+        stat_result = source.stat()
+        filename = f"{self._cache_key(source, stat_result, width)}.{image_format}"
+        cached = self._lookup(filename)
+        if cached is not None:
+            return cached
+        try:
+            with Image.open(source) as img:
+                preview = self._resize(img, width, image_format)
+                if preview is img:
+                    preview = img.copy()
+        except (UnidentifiedImageError, OSError) as exc:
+            raise ValueError(f"cannot render preview for {source.name}: {exc}") from exc
+
+        def write(f: BinaryIO) -> None:
+            preview.save(
+                f, format=self._PIL_FORMATS[image_format], **self._SAVE_OPTIONS[image_format]
+            )
+
+        return self._store(filename, write)
+
+    def _cache_key(self, source: Path, stat_result: os.stat_result, width: int | None) -> str:
+        raw = f"{source.resolve()}|{stat_result.st_size}|{stat_result.st_mtime_ns}|{width}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    @staticmethod
+    def _resize(img: Image.Image, width: int | None, image_format: str) -> Image.Image:
+        if width is not None and width < img.width:
+            height = max(1, round(img.height * width / img.width))
+            # JPEG はデコード時点で縮小できるため大きな元画像でも安価
+            img.draft(img.mode, (width, height))
+            img = img.resize((width, height), Image.Resampling.LANCZOS, reducing_gap=2.0)
+        if image_format == "jpeg" and img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        return img
@@ -1,24 +1,32 @@
 from __future__ import annotations
 
 import os
+import time
 from typing import Any
 
 import mlflow
+from mlflow.entities import Metric
 
-from src.ports.tracking_port import TrackingPort
+from src.ports.tracking_port import MetricRecord, TrackingPort
 
 
 class MLflowTrackingAdapter(TrackingPort):
     """MLflow Tracking Server への書き込みをラップするアダプタ."""
 
+    # MLflow の log_batch が 1 リクエストで受け付けるメトリクス数の上限
+    MAX_BATCH_METRICS = 1000
+
     def __init__(self, tracking_uri: str | None = None) -> None:
         self._tracking_uri = tracking_uri or os.environ.get("MLFLOW_TRACKING_URI")
         if self._tracking_uri:
             mlflow.set_tracking_uri(self._tracking_uri)
         self._current_run_id: str | None = None
 
-    def start_run(self, run_name: str) -> str:
-        run = mlflow.start_run(run_name=run_name)
+    def start_run(self, run_name: str, run_id: str | None = None) -> str:
+        if run_id:
+            run = mlflow.start_run(run_id=run_id)
+        else:
+            run = mlflow.start_run(run_name=run_name)
         self._current_run_id = run.info.run_id or ""
         return self._current_run_id
 
@@ -31,6 +39,27 @@ class MLflowTrackingAdapter(TrackingPort):
     def log_artifact(self, local_path: str) -> None:
         mlflow.log_artifact(local_path)
 
+    def log_metric_batch(self, records: list[MetricRecord]) -> None:
+        if not records or not self._current_run_id:
+            return
+        # fluent API のアクティブな run はスレッドごとなので、run_id を指定してクライアントで書く
+        client = mlflow.MlflowClient(self._tracking_uri)
+        now_ms = int(time.time() * 1000)
+        metrics = [Metric(r.key, r.value, r.timestamp_ms or now_ms, r.step) for r in records]
+        for start in range(0, len(metrics), self.MAX_BATCH_METRICS):
+            client.log_batch(
+                self._current_run_id, metrics=metrics[start : start + self.MAX_BATCH_METRICS]
+            )
+
     def end_run(self) -> str:
         mlflow.end_run()
         return self._current_run_id or ""
+
+    def fail_run(self) -> str:
+        mlflow.end_run(status="FAILED")
+        return self._current_run_id or ""
+
+    def interrupt_run(self) -> str:
+        # 再開されるまでは KILLED として表示し、start_run(run_id=...) で RUNNING に戻る
+        mlflow.end_run(status="KILLED")
+        return self._current_run_id or ""
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import json
+import logging
+from collections.abc import AsyncGenerator
+from typing import Any
+
+from redis.asyncio import Redis
+
+from src.adapters.redis_job_status_adapter import RedisJobStatusAdapter
+from src.ports.job_event_port import JobEventPort
+
+logger = logging.getLogger(__name__)
+
+
+class RedisJobEventAdapter(JobEventPort):
+    """RedisJobStatusAdapter が publish する状態変更を Pub/Sub で購読するアダプタ."""
+
+    def __init__(self, redis_client: Redis):
+        self.redis = redis_client
+
+    async def listen(
+        self, user_id: str, heartbeat_seconds: float = 15.0
+    ) -> AsyncGenerator[dict[str, Any] | None]:
+        channel = RedisJobStatusAdapter.event_channel_for(user_id)
+        pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(channel)
+        try:
+            while True:
+                message = await pubsub.get_message(timeout=heartbeat_seconds)
+                if message is None:
+                    yield None
+                    continue
+                data = message.get("data")
+                if isinstance(data, bytes):
+                    data = data.decode()
+                try:
+                    event = json.loads(data)
+                except (TypeError, json.JSONDecodeError):
+                    logger.warning("Ignoring malformed job event on %s: %r", channel, data)
+                    continue
+                if isinstance(event, dict):
+                    yield event
+        finally:
+            await pubsub.unsubscribe(channel)
+            await pubsub.aclose()
@@ -12,6 +12,8 @@ class RedisJobQueueAdapter(JobQueuePort):
     """Redis List によるジョブキューの実装."""
 
     DEFAULT_QUEUE = "leaderboard:jobs"
+    # 事前検証レーン (src.worker.preflight_main が検証後に DEFAULT_QUEUE へ回す)
+    PREFLIGHT_QUEUE = "leaderboard:preflight"
     _TIMEOUT_SECONDS = 30
 
     def __init__(self, redis_client: Redis, queue_name: str | None = None):
@@ -44,3 +46,14 @@ class RedisJobQueueAdapter(JobQueuePort):
         _, payload_bytes = result
         payload_json = payload_bytes.decode()
         return json.loads(payload_json)
+
+    def requeue(self, job: dict[str, Any]) -> None:
+        # brpop は末尾から取り出すため、rpush で次に取り出されるよう先頭に戻す
+        self.redis.rpush(self.queue_name, json.dumps(job, ensure_ascii=False))
+
+    def peek(self) -> dict[str, Any] | None:
+        # lpush で積み brpop で取り出すため、次のジョブはリストの末尾
+        payload_bytes = self.redis.lindex(self.queue_name, -1)
+        if payload_bytes is None:
+            return None
+        return json.loads(payload_bytes.decode())
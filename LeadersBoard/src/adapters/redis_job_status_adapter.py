@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import json
 from datetime import UTC, datetime
 from typing import Any
 
@@ -12,15 +13,40 @@ class RedisJobStatusAdapter(JobStatusPort):
     """Redis Hash を使ってジョブ状態を保持するアダプタ."""
 
     KEY_PREFIX = "leaderboard:job:"
+    USER_INDEX_PREFIX = "leaderboard:user_jobs:"
+    EVENT_CHANNEL_PREFIX = "leaderboard:job_events:"
     TTL_SECONDS = 90 * 24 * 60 * 60
+    _LIST_BATCH_SIZE = 100
 
-    def __init__(self, redis_client: Redis, prefix: str | None = None):
+    def __init__(
+        self,
+        redis_client: Redis,
+        prefix: str | None = None,
+        user_index_prefix: str | None = None,
+    ):
         self.redis = redis_client
         self.key_prefix = prefix or self.KEY_PREFIX
+        self.user_index_prefix = user_index_prefix or self.USER_INDEX_PREFIX
 
     def key_for(self, job_id: str) -> str:
         return f"{self.key_prefix}{job_id}"
 
+    def user_index_key_for(self, user_id: str) -> str:
+        return f"{self.user_index_prefix}{user_id}"
+
+    @classmethod
+    def event_channel_for(cls, user_id: str) -> str:
+        return f"{cls.EVENT_CHANNEL_PREFIX}{user_id}"
+
+    def _publish_event(self, user_id: str, payload: dict[str, str]) -> None:
+        """状態変更をユーザー別チャネルへ通知する。購読者がいなくても失敗しない。"""
+        self.redis.publish(self.event_channel_for(user_id), json.dumps(payload, ensure_ascii=False))
+
+    @staticmethod
+    def _score_for(timestamp: datetime) -> int:
+        # マイクロ秒整数にしておけば double でも桁落ちせず、カーソル比較が厳密になる
+        return int(timestamp.timestamp() * 1_000_000)
+
     def _ensure_ttl(self, key: str) -> None:
         self.redis.expire(key, self.TTL_SECONDS)
 
@@ -29,7 +55,8 @@ class RedisJobStatusAdapter(JobStatusPort):
 
     def create(self, job_id: str, submission_id: str, user_id: str) -> None:
         key = self.key_for(job_id)
-        created_at = datetime.now(UTC).isoformat()
+        now = datetime.now(UTC)
+        created_at = now.isoformat()
         payload = {
             "job_id": job_id,
             "submission_id": submission_id,
@@ -40,6 +67,21 @@ class RedisJobStatusAdapter(JobStatusPort):
         }
         self.redis.hset(key, mapping={k: str(v) for k, v in payload.items()})
         self._ensure_ttl(key)
+        self._index_job(user_id, job_id, now)
+        self._publish_event(user_id, payload)
+
+    def _index_job(self, user_id: str, job_id: str, created_at: datetime) -> None:
+        """ユーザー別 Sorted Set に created_at をスコアとして登録する。
+
+        ジョブ Hash と同じ TTL を過ぎたエントリはここで刈り取る。
+        """
+        index_key = self.user_index_key_for(user_id)
+        score = self._score_for(created_at)
+        pipe = self.redis.pipeline()
+        pipe.zadd(index_key, {job_id: score})
+        pipe.zremrangebyscore(index_key, "-inf", score - self.TTL_SECONDS * 1_000_000)
+        pipe.expire(index_key, self.TTL_SECONDS)
+        pipe.execute()
 
     def update(self, job_id: str, status: JobStatus, **kwargs: Any) -> None:
         key = self.key_for(job_id)
@@ -51,8 +93,13 @@ class RedisJobStatusAdapter(JobStatusPort):
         # allow additional fields but do not let callers override updated_at
         filtered_kwargs = {k: v for k, v in kwargs.items() if k != "updated_at"}
         payload.update(self._str_kwargs(filtered_kwargs))
-        self.redis.hset(key, mapping={k: str(v) for k, v in payload.items()})
-        self._ensure_ttl(key)
+        pipe = self.redis.pipeline()
+        pipe.hset(key, mapping={k: str(v) for k, v in payload.items()})
+        pipe.expire(key, self.TTL_SECONDS)
+        pipe.hget(key, "user_id")
+        _, _, owner = pipe.execute()
+        if owner:
+            self._publish_event(owner.decode(), {"job_id": job_id, **payload})
 
     def get_status(self, job_id: str) -> dict[str, str] | None:
         key = self.key_for(job_id)
@@ -78,3 +125,77 @@ class RedisJobStatusAdapter(JobStatusPort):
             ):
                 running += 1
         return running
+
+    def list_jobs(
+        self,
+        user_id: str,
+        cursor: str | None = None,
+        limit: int = 20,
+        status: JobStatus | None = None,
+    ) -> tuple[list[dict[str, Any]], str | None]:
+        """ユーザー別 Sorted Set を created_at 降順に辿ってジョブを返す。
+
+        カーソルは直前に返したジョブの "スコア:job_id"。同じスコアのジョブは job_id の
+        降順に並ぶので、スコアを含む範囲から読み直し、そのジョブまでを読み飛ばす
+        （スコアだけの旧形式は排他的上限として扱う）。キー空間の SCAN は行わず、
+        Hash の取得はバッチ単位でパイプライン化する。
+        """
+        if limit <= 0:
+            return [], None
+        index_key = self.user_index_key_for(user_id)
+        upper, offset = self._cursor_position(index_key, cursor)
+        jobs: list[dict[str, Any]] = []
+        while True:
+            entries = self.redis.zrevrangebyscore(
+                index_key,
+                upper,
+                "-inf",
+                start=offset,
+                num=self._LIST_BATCH_SIZE,
+                withscores=True,
+            )
+            if not entries:
+                return jobs, None
+
+            pipe = self.redis.pipeline()
+            for member, _ in entries:
+                pipe.hgetall(self.key_for(member.decode()))
+            hashes = pipe.execute()
+
+            expired: list[bytes] = []
+            for (member, score), raw in zip(entries, hashes, strict=True):
+                if not raw:
+                    expired.append(member)
+                    continue
+                job = {k.decode(): v.decode() for k, v in raw.items()}
+                if status is not None and job.get("status") != status.value:
+                    continue
+                jobs.append(job)
+                if len(jobs) >= limit:
+                    if expired:
+                        self.redis.zrem(index_key, *expired)
+                    return jobs, f"{int(score)}:{member.decode()}"
+            if expired:
+                self.redis.zrem(index_key, *expired)
+            if len(entries) < self._LIST_BATCH_SIZE:
+                return jobs, None
+            # 次のバッチは最後のスコアから読み、そのスコアで読んだ分だけ読み飛ばす
+            # (刈り取ったエントリは Sorted Set から消えているので数えない)
+            last_score = int(entries[-1][1])
+            same_score = sum(
+                1 for member, score in entries if int(score) == last_score and member not in expired
+            )
+            offset = offset + same_score if str(last_score) == upper else same_score
+            upper = str(last_score)
+
+    def _cursor_position(self, index_key: str, cursor: str | None) -> tuple[str, int]:
+        """カーソルを (zrevrangebyscore の上限, その上限からの読み飛ばし件数) にする。"""
+        if not cursor:
+            return "+inf", 0
+        score, _, last_job_id = cursor.partition(":")
+        if not last_job_id:
+            return f"({int(score)}", 0
+        # 同じスコアでは job_id の降順なので、直前のジョブ以上の job_id は返却済み
+        tied = self.redis.zrangebyscore(index_key, score, score)
+        returned = sum(1 for member in tied if member.decode() >= last_job_id)
+        return score, returned
@@ -1,40 +1,78 @@
-"""Shim package that wraps upstream anomalib while providing local trainers module."""
+"""Shim package that wraps upstream anomalib while providing local trainers module.
+
+Upstream anomalib is loaded lazily: importing this package (or local submodules such as
+`anomalib.trainers`) only locates upstream in site-packages, and its `__init__` runs on the
+first access to an upstream attribute (`from anomalib import TaskType`) via module `__getattr__`.
+Upstream subpackages (`anomalib.data`, `anomalib.models`, ...) resolve through `__path__`.
+"""
 
 from __future__ import annotations
 
 import importlib
+import importlib.machinery
+import importlib.util
 import sys
+import threading
 from pathlib import Path
+from types import ModuleType
+from typing import Any
 
+_SHIM_DIR = Path(__file__).parent.resolve()
+# 上流から引き継ぐ dunder 属性 (それ以外の dunder は上流を読み込まずに AttributeError)
+_UPSTREAM_DUNDERS = frozenset({"__all__", "__version__"})
 
-def _load_upstream():
-    """Load real anomalib from site-packages, excluding this shim path to avoid recursion."""
-    shim_dir = Path(__file__).parent.resolve()
-    shim_root = shim_dir.parent.resolve()
 
-    original_sys_path = sys.path.copy()
-    shim_module = sys.modules.get(__name__)
-    try:
-        # Remove shim paths so import resolves to upstream anomalib in site-packages.
-        sys.path = [p for p in original_sys_path if Path(p).resolve() not in {shim_dir, shim_root}]
-        # Temporarily remove this shim from sys.modules to avoid returning self.
-        sys.modules.pop(__name__, None)
-        upstream = importlib.import_module("anomalib")
-        return upstream
-    finally:
-        # Restore sys.modules entry for the shim
-        if shim_module is not None:
-            sys.modules[__name__] = shim_module
-        sys.path = original_sys_path
+def _find_upstream_spec() -> importlib.machinery.ModuleSpec | None:
+    """Locate real anomalib in site-packages without importing it or touching sys.path."""
+    shim_paths = {_SHIM_DIR, _SHIM_DIR.parent}
+    search_path = [p for p in sys.path if Path(p or ".").resolve() not in shim_paths]
+    return importlib.machinery.PathFinder.find_spec("anomalib", search_path)
 
 
-_upstream = _load_upstream()
+_upstream_spec = _find_upstream_spec()
+_upstream: ModuleType | None = None
+_upstream_lock = threading.RLock()
 
 # Ensure our shim path is searched first (for trainers), then upstream paths.
-__path__ = [str(Path(__file__).parent.resolve())] + list(getattr(_upstream, "__path__", []))  # type: ignore[list-item]
-__all__ = getattr(_upstream, "__all__", [])
+__path__ = [str(_SHIM_DIR)]
+if _upstream_spec is not None:
+    __path__ += list(_upstream_spec.submodule_search_locations or [])
+
+
+def _load_upstream() -> ModuleType | None:
+    """Execute upstream anomalib/__init__.py once (None if upstream is not installed)."""
+    global _upstream
+    with _upstream_lock:
+        if _upstream is None and _upstream_spec is not None and _upstream_spec.loader:
+            module = importlib.util.module_from_spec(_upstream_spec)
+            # 実行中に上流のサブモジュールが `from anomalib import X` しても再入しないよう先に登録する
+            _upstream = module
+            try:
+                _upstream_spec.loader.exec_module(module)
+            except BaseException:
+                _upstream = None
+                raise
+        return _upstream
+
+
+def __getattr__(name: str) -> Any:
+    if name.startswith("__") and name not in _UPSTREAM_DUNDERS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    upstream = _load_upstream()
+    if upstream is not None and hasattr(upstream, name):
+        value = getattr(upstream, name)
+        globals()[name] = value
+        return value
+    if not name.startswith("__"):
+        # `import anomalib; anomalib.models` のような未 import のサブパッケージへのアクセス
+        try:
+            return importlib.import_module(f"{__name__}.{name}")
+        except ModuleNotFoundError as exc:
+            if exc.name != f"{__name__}.{name}":
+                raise
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
-# Re-export everything from upstream (except dunders)
-for _name in dir(_upstream):
-    if not _name.startswith("__"):
-        globals().setdefault(_name, getattr(_upstream, _name))
+def __dir__() -> list[str]:
+    upstream = _load_upstream()
+    return sorted(set(globals()) | set(dir(upstream) if upstream is not None else ()))
@@ -0,0 +1,374 @@
+"""名前付きデータセットのレジストリ (バージョン付き・チェックサム付きマニフェスト)。
+
+config.yaml で生のパスを指定してデータモジュールが毎回ディレクトリを走査する代わりに、
+データセットを一度だけ登録してファイル一覧 (相対パス・サイズ・sha256・ラベル・split・マスク)
+をマニフェストとして保存する。読み込み側はマニフェストを 1 ファイル読むだけでよく、
+特徴量キャッシュやシャードのキーにはマニフェストのダイジェスト (ファイル内容のハッシュ) を使う。
+
+レイアウト:
+    <registry>/<name>/<version>.json
+
+登録 (データセットは Worker から読み取り専用でマウントする想定のため、ホスト側で実行する):
+    python -m anomalib.dataset_registry register --name pcb1 --version 1 \\
+        --root /shared/data/pcb1/Data/Images --normal-dir Normal --abnormal-dir Anomaly \\
+        --normal-test-dir Normal
+    python -m anomalib.dataset_registry verify pcb1@1 --full
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from collections.abc import Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from .shards import IMAGE_EXTENSIONS, _decode, _Source, discover_folder
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REGISTRY_DIR = "/shared/datasets"
+FORMAT_VERSION = 1
+_NAME_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]*$")
+_HASH_CHUNK = 1 << 20
+
+
+@dataclass(frozen=True)
+class ManifestFile:
+    """マニフェストの 1 画像。パスはデータセットルートからの相対パス。"""
+
+    path: str
+    size: int
+    sha256: str
+    split: str
+    label: int
+    mask: str | None = None
+    mask_sha256: str | None = None
+
+
+@dataclass(frozen=True)
+class DatasetManifest:
+    name: str
+    version: str
+    root: str
+    files: tuple[ManifestFile, ...]
+    created_at: float = field(default=0.0, compare=False)
+
+    @property
+    def digest(self) -> str:
+        """ファイル一覧と内容のハッシュ。ルートの場所や登録時刻には依存しない。"""
+        payload = json.dumps([asdict(f) for f in self.files], sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+    @property
+    def ref(self) -> str:
+        return f"{self.name}@{self.version}"
+
+    def split(self, split: str) -> list[ManifestFile]:
+        return [f for f in self.files if f.split == split]
+
+    def image_path(self, file: ManifestFile) -> Path:
+        return Path(self.root) / file.path
+
+    def mask_path(self, file: ManifestFile) -> Path | None:
+        return Path(self.root) / file.mask if file.mask else None
+
+    def sources(self, split: str | None = None) -> list[_Source]:
+        """anomalib.shards.build_shards に渡せる形の一覧。"""
+        return [
+            _Source(self.image_path(f), f.split, f.label, self.mask_path(f))
+            for f in self.files
+            if split is None or f.split == split
+        ]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "format_version": FORMAT_VERSION,
+            "name": self.name,
+            "version": self.version,
+            "root": self.root,
+            "created_at": self.created_at,
+            "digest": self.digest,
+            "files": [asdict(f) for f in self.files],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> DatasetManifest:
+        if data.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"unsupported manifest format version: {data.get('format_version')}")
+        manifest = cls(
+            name=str(data["name"]),
+            version=str(data["version"]),
+            root=str(data["root"]),
+            files=tuple(ManifestFile(**f) for f in data["files"]),
+            created_at=float(data.get("created_at", 0.0)),
+        )
+        if data.get("digest") not in (None, manifest.digest):
+            raise ValueError(f"manifest {manifest.ref} is corrupted (digest mismatch)")
+        return manifest
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(_HASH_CHUNK):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_manifest(
+    name: str,
+    version: str,
+    root: Path,
+    normal_dir: str,
+    abnormal_dir: str | None = None,
+    normal_test_dir: str | None = None,
+    mask_dir: str | None = None,
+    extensions: Sequence[str] = IMAGE_EXTENSIONS,
+    workers: int | None = None,
+    stored_root: str | None = None,
+) -> DatasetManifest:
+    """anomalib.data.Folder と同じ規則でディレクトリを走査し、全ファイルのハッシュを取る。
+
+    stored_root にはマニフェストに記録するルート (Worker から見たパス) を指定する。
+    省略時は root の絶対パス。
+    """
+    root = Path(root).resolve()
+    sources = discover_folder(root, normal_dir, abnormal_dir, normal_test_dir, mask_dir, extensions)
+
+    def describe(source: _Source) -> ManifestFile:
+        mask = source.mask_path
+        return ManifestFile(
+            path=source.path.relative_to(root).as_posix(),
+            size=source.path.stat().st_size,
+            sha256=file_sha256(source.path),
+            split=source.split,
+            label=source.label,
+            mask=mask.relative_to(root).as_posix() if mask else None,
+            mask_sha256=file_sha256(mask) if mask else None,
+        )
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        files = tuple(pool.map(describe, sources))
+    return DatasetManifest(
+        name, str(version), stored_root or str(root), files, created_at=time.time()
+    )
+
+
+def verify_manifest(
+    manifest: DatasetManifest, full: bool = False, workers: int | None = None
+) -> list[str]:
+    """マニフェストと実ファイルの不一致を返す。
+
+    既定ではファイルの存在とサイズだけを確認し、full=True のときは sha256 も照合する。
+    """
+
+    def check(file: ManifestFile) -> list[str]:
+        problems = []
+        targets = [(file.path, file.sha256, file.size)]
+        if file.mask:
+            targets.append((file.mask, file.mask_sha256 or "", -1))
+        for relative, expected, size in targets:
+            path = Path(manifest.root) / relative
+            try:
+                actual_size = path.stat().st_size
+            except FileNotFoundError:
+                problems.append(f"missing: {relative}")
+                continue
+            if size >= 0 and actual_size != size:
+                problems.append(f"size mismatch: {relative}")
+            elif full and file_sha256(path) != expected:
+                problems.append(f"checksum mismatch: {relative}")
+        return problems
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        return [problem for problems in pool.map(check, manifest.files) for problem in problems]
+
+
+def _version_key(version: str) -> tuple[Any, ...]:
+    # "2" < "10" になるよう数値部分は数値として比較する
+    return tuple(
+        (0, int(part), "") if part.isdigit() else (1, 0, part)
+        for part in re.split(r"[.\-_]", version)
+    )
+
+
+class DatasetRegistry:
+    """<registry>/<name>/<version>.json に保存されたマニフェストを引く。"""
+
+    def __init__(self, root: Path | None = None) -> None:
+        self.root = Path(root or os.getenv("DATASET_REGISTRY_DIR", DEFAULT_REGISTRY_DIR))
+
+    def manifest_path(self, name: str, version: str) -> Path:
+        for value in (name, version):
+            if not _NAME_PATTERN.match(value):
+                raise ValueError(f"invalid dataset name or version: {value!r}")
+        return self.root / name / f"{version}.json"
+
+    def versions(self, name: str) -> list[str]:
+        directory = self.root / name
+        if not directory.is_dir():
+            return []
+        return sorted((p.stem for p in directory.glob("*.json")), key=_version_key)
+
+    def names(self) -> list[str]:
+        if not self.root.is_dir():
+            return []
+        return sorted(p.name for p in self.root.iterdir() if p.is_dir() and self.versions(p.name))
+
+    def get(self, ref: str) -> DatasetManifest:
+        """ "name@version" (version 省略時は最新) のマニフェストを読む。"""
+        name, _, version = ref.partition("@")
+        if not version:
+            versions = self.versions(name)
+            if not versions:
+                raise KeyError(f"dataset {name!r} is not registered in {self.root}")
+            version = versions[-1]
+        path = self.manifest_path(name, version)
+        if not path.is_file():
+            raise KeyError(f"dataset {name}@{version} is not registered in {self.root}")
+        return DatasetManifest.from_dict(json.loads(path.read_text(encoding="utf-8")))
+
+    def register(self, manifest: DatasetManifest, overwrite: bool = False) -> Path:
+        """マニフェストを保存する。登録済みのバージョンは内容が同じ場合のみ上書きを許す。"""
+        path = self.manifest_path(manifest.name, manifest.version)
+        if path.exists() and not overwrite:
+            existing = self.get(manifest.ref)
+            if existing.digest != manifest.digest:
+                raise ValueError(
+                    f"dataset {manifest.ref} is already registered with different contents; "
+                    "register a new version instead"
+                )
+            return path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(manifest.to_dict()), encoding="utf-8")
+        os.replace(tmp, path)
+        return path
+
+
+class ManifestDataset:
+    """マニフェストの 1 split を読む。anomalib.shards.ShardDataset と同じ形の dict を返す。
+
+    image_size を指定するとデコード時にリサイズする (省略時は元のサイズのまま)。
+    """
+
+    def __init__(
+        self,
+        manifest: DatasetManifest,
+        split: str,
+        image_size: tuple[int, int] | None = None,
+    ) -> None:
+        self.manifest = manifest
+        self.split = split
+        self.image_size = image_size
+        self.files = manifest.split(split)
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    @property
+    def image_paths(self) -> list[str]:
+        return [str(self.manifest.image_path(f)) for f in self.files]
+
+    @property
+    def labels(self) -> list[int]:
+        return [f.label for f in self.files]
+
+    def image(self, index: int) -> np.ndarray:
+        return _decode(self.manifest.image_path(self.files[index]), self.image_size)
+
+    def mask(self, index: int, shape: tuple[int, int] | None = None) -> np.ndarray:
+        """マスク [H, W] (0/1)。マスクが無い画像はゼロ。"""
+        mask_path = self.manifest.mask_path(self.files[index])
+        if mask_path is not None:
+            return _decode(mask_path, self.image_size, grayscale=True)
+        if shape is None:
+            shape = self.image_size or self.image(index).shape[1:]
+        return np.zeros(shape, dtype=np.uint8)
+
+    def __getitem__(self, index: int) -> dict[str, Any]:
+        file = self.files[index]
+        image = self.image(index)
+        mask_path = self.manifest.mask_path(file)
+        return {
+            "image": image,
+            "gt_mask": self.mask(index, image.shape[1:]),
+            "gt_label": file.label,
+            "image_path": str(self.manifest.image_path(file)),
+            "mask_path": str(mask_path) if mask_path else None,
+        }
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        for index in range(len(self)):
+            yield self[index]
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Manage the dataset registry.")
+    parser.add_argument("--registry", type=Path, help="既定は DATASET_REGISTRY_DIR")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    register = commands.add_parser("register", help="scan a Folder-style dataset and register it")
+    register.add_argument("--name", required=True)
+    register.add_argument("--version", required=True)
+    register.add_argument("--root", type=Path, required=True)
+    register.add_argument("--normal-dir", required=True)
+    register.add_argument("--abnormal-dir")
+    register.add_argument("--normal-test-dir")
+    register.add_argument("--mask-dir")
+    register.add_argument("--stored-root", help="マニフェストに記録するルート (Worker 側のパス)")
+    register.add_argument("--workers", type=int)
+    register.add_argument("--overwrite", action="store_true")
+
+    verify = commands.add_parser("verify", help="check files against a registered manifest")
+    verify.add_argument("ref", help="name[@version]")
+    verify.add_argument("--full", action="store_true", help="sha256 も照合する")
+    verify.add_argument("--workers", type=int)
+
+    commands.add_parser("list", help="list registered datasets")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    registry = DatasetRegistry(args.registry)
+
+    if args.command == "register":
+        manifest = build_manifest(
+            args.name,
+            args.version,
+            args.root,
+            args.normal_dir,
+            args.abnormal_dir,
+            args.normal_test_dir,
+            args.mask_dir,
+            workers=args.workers,
+            stored_root=args.stored_root,
+        )
+        path = registry.register(manifest, overwrite=args.overwrite)
+        print(
+            f"Registered {manifest.ref} ({len(manifest.files)} files, {manifest.digest}) at {path}"
+        )
+    elif args.command == "verify":
+        manifest = registry.get(args.ref)
+        problems = verify_manifest(manifest, full=args.full, workers=args.workers)
+        for problem in problems:
+            print(problem)
+        print(f"{manifest.ref}: {len(manifest.files)} files, {len(problems)} problems")
+        if problems:
+            raise SystemExit(1)
+    else:
+        for name in registry.names():
+            print(f"{name}: {', '.join(registry.versions(name))}")
+
+
+if __name__ == "__main__":
+    main()
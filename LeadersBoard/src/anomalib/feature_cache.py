@@ -0,0 +1,318 @@
+"""凍結したバックボーンの特徴量をジョブ間で共有するキャッシュ。
+
+同じデータセット・前処理・バックボーン・層・重みの組み合わせ (FeatureCacheKey) では
+Padim / PatchCore の特徴量は毎回同じになるため、1 度計算した特徴量を共有ボリューム上に
+層ごとの float16 配列 (.npy) として保存し、以降のジョブはメモリマップで読み出す。
+
+- エントリは書き込み中は一時ディレクトリに置き、全サンプルが揃った時点で rename して公開する
+- キーごとのロックファイル (fcntl.flock) で、同じエントリを複数の Worker が同時に計算しない
+- 合計サイズが上限を超えたら、最終アクセスの古いエントリから削除する (LRU)
+
+投稿コードからは `anomalib.feature_cache` として import できる (Worker の PYTHONPATH に
+src があり、シムがこのディレクトリを先に探索するため)。numpy と標準ライブラリのみに依存し、
+torch は weights_hash でのみ使う。
+"""
+
+from __future__ import annotations
+
+import errno
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from collections.abc import Iterable, Sequence
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import IO, Any
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = "/shared/feature_cache"
+DEFAULT_MAX_BYTES = 20 * 1024**3
+# 他の Worker が同じエントリを計算中のとき、完了を待つ最大秒数 (超えたらキャッシュなしで計算)
+DEFAULT_LOCK_TIMEOUT = 1800.0
+META_FILE = "meta.json"
+FEATURE_DTYPE = np.float16
+
+
+@dataclass(frozen=True)
+class FeatureCacheKey:
+    """特徴量を一意に決める要素。"""
+
+    dataset: str
+    transform: str
+    backbone: str
+    layers: tuple[str, ...]
+    weights: str
+
+    def digest(self) -> str:
+        payload = json.dumps(asdict(self), sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def dataset_fingerprint(paths: Iterable[str | Path]) -> str:
+    """画像ファイルのパス・サイズ・更新時刻からデータセットの指紋を作る (内容は読まない)。"""
+    digest = hashlib.sha256()
+    for path in sorted(str(p) for p in paths):
+        stat = os.stat(path)
+        digest.update(f"{path}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()[:32]
+
+
+def weights_hash(module: Any) -> str:
+    """torch.nn.Module の state_dict (名前・形状・型・値) のハッシュ。"""
+    import torch
+
+    digest = hashlib.sha256()
+    for name, tensor in sorted(module.state_dict().items()):
+        data = tensor.detach().cpu().contiguous()
+        digest.update(f"{name}\0{tuple(data.shape)}\0{data.dtype}\n".encode())
+        digest.update(data.reshape(-1).view(torch.uint8).numpy().tobytes())
+    return digest.hexdigest()[:32]
+
+
+class FeatureEntry:
+    """公開済みのエントリ。特徴量はメモリマップで読み、必要な行だけコピーする。
+
+    全層のメモリマップを作成時に開いておく。開いた後は他の Worker が evict でエントリを
+    削除しても inode が残るため、学習の途中で読めなくなることはない。
+
+    Raises:
+        FileNotFoundError: 開く前にエントリが削除された
+    """
+
+    def __init__(self, path: Path, meta: dict[str, Any]) -> None:
+        self.path = path
+        self.meta = meta
+        self._rows = {sample: row for row, sample in enumerate(meta["samples"])}
+        self._layers: dict[str, np.ndarray] = {
+            name: np.load(path / f"{name}.npy", mmap_mode="r") for name in meta["layers"]
+        }
+
+    @property
+    def layers(self) -> tuple[str, ...]:
+        return tuple(self.meta["layers"])
+
+    def __contains__(self, sample: str) -> bool:
+        return sample in self._rows
+
+    def rows(self, samples: Sequence[str]) -> np.ndarray:
+        return np.fromiter(
+            (self._rows[str(s)] for s in samples), dtype=np.int64, count=len(samples)
+        )
+
+    def layer(self, name: str) -> np.ndarray:
+        return self._layers[name]
+
+    def features(self, samples: Sequence[str]) -> dict[str, np.ndarray]:
+        """samples の順に並べた層ごとの特徴量 (float16)。"""
+        rows = self.rows(samples)
+        return {name: self.layer(name)[rows] for name in self.layers}
+
+
+class FeatureCacheWriter:
+    """エントリの書き込み。キーのロックを保持し、commit / abort で解放する。
+
+    特徴量はバッチごとに write で渡す。層ごとの配列は最初のバッチで形状が決まった時点で
+    (サンプル数, *特徴量の形状) の .npy をメモリマップで確保し、該当行に書き込む。
+    """
+
+    def __init__(
+        self, cache: FeatureCache, key: FeatureCacheKey, samples: Sequence[str], lock: IO[str]
+    ) -> None:
+        self.cache = cache
+        self.key = key
+        self.samples = [str(s) for s in samples]
+        self._rows = {sample: row for row, sample in enumerate(self.samples)}
+        self._lock: IO[str] | None = lock
+        self._tmp = cache.root / f".tmp-{key.digest()}"
+        shutil.rmtree(self._tmp, ignore_errors=True)
+        self._tmp.mkdir(parents=True)
+        self._arrays: dict[str, np.ndarray] = {}
+        self._filled = np.zeros(len(self.samples), dtype=bool)
+
+    @property
+    def complete(self) -> bool:
+        return bool(self._filled.all())
+
+    def __contains__(self, sample: str) -> bool:
+        return sample in self._rows
+
+    def write(self, samples: Sequence[str], features: dict[str, np.ndarray]) -> None:
+        rows = np.fromiter(
+            (self._rows[str(s)] for s in samples), dtype=np.int64, count=len(samples)
+        )
+        for name, values in features.items():
+            array = self._arrays.get(name)
+            if array is None:
+                array = np.lib.format.open_memmap(
+                    self._tmp / f"{name}.npy",
+                    mode="w+",
+                    dtype=FEATURE_DTYPE,
+                    shape=(len(self.samples), *values.shape[1:]),
+                )
+                self._arrays[name] = array
+            array[rows] = values
+        self._filled[rows] = True
+
+    def commit(self) -> FeatureEntry | None:
+        """全サンプルが揃っていれば公開して返す。揃っていなければ破棄して None。"""
+        if not self.complete or not self._arrays:
+            logger.info(
+                "Feature cache entry incomplete (%d/%d)", self._filled.sum(), self._filled.size
+            )
+            self.abort()
+            return None
+        nbytes = 0
+        for array in self._arrays.values():
+            array.flush()  # type: ignore[attr-defined]
+            nbytes += array.nbytes
+        meta = {
+            "key": asdict(self.key),
+            "layers": list(self._arrays),
+            "samples": self.samples,
+            "bytes": nbytes,
+            "created_at": time.time(),
+        }
+        (self._tmp / META_FILE).write_text(json.dumps(meta), encoding="utf-8")
+        self._arrays.clear()
+        final = self.cache.entry_dir(self.key)
+        shutil.rmtree(final, ignore_errors=True)
+        os.replace(self._tmp, final)
+        self._release()
+        self.cache.evict(keep=final)
+        return self.cache.get(self.key)
+
+    def abort(self) -> None:
+        self._arrays.clear()
+        shutil.rmtree(self._tmp, ignore_errors=True)
+        self._release()
+
+    def _release(self) -> None:
+        if self._lock is not None:
+            fcntl.flock(self._lock, fcntl.LOCK_UN)
+            self._lock.close()
+            self._lock = None
+
+
+class FeatureCache:
+    """共有ボリューム上の特徴量キャッシュ。
+
+    Args:
+        root: 保存先 (既定は FEATURE_CACHE_DIR)
+        max_bytes: エントリの合計サイズの上限 (既定は FEATURE_CACHE_MAX_BYTES)
+        lock_timeout: 計算中の他 Worker を待つ秒数 (既定は FEATURE_CACHE_LOCK_TIMEOUT)
+    """
+
+    def __init__(
+        self,
+        root: Path | None = None,
+        max_bytes: int | None = None,
+        lock_timeout: float | None = None,
+    ) -> None:
+        self.root = root or Path(os.getenv("FEATURE_CACHE_DIR", DEFAULT_CACHE_DIR))
+        self.max_bytes = (
+            max_bytes
+            if max_bytes is not None
+            else int(os.getenv("FEATURE_CACHE_MAX_BYTES", str(DEFAULT_MAX_BYTES)))
+        )
+        self.lock_timeout = (
+            lock_timeout
+            if lock_timeout is not None
+            else float(os.getenv("FEATURE_CACHE_LOCK_TIMEOUT", str(DEFAULT_LOCK_TIMEOUT)))
+        )
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def entry_dir(self, key: FeatureCacheKey) -> Path:
+        return self.root / key.digest()
+
+    def get(self, key: FeatureCacheKey) -> FeatureEntry | None:
+        """公開済みのエントリを返す。アクセス時刻を更新して LRU の順序に反映する。"""
+        path = self.entry_dir(key)
+        meta_path = path / META_FILE
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            os.utime(meta_path)
+            return FeatureEntry(path, meta)
+        except FileNotFoundError:  # 無い、または読み始めた直後に evict された
+            return None
+        except (OSError, ValueError, KeyError) as exc:
+            logger.warning("Ignoring broken feature cache entry %s: %s", path, exc)
+            return None
+
+    def open(
+        self, key: FeatureCacheKey, samples: Sequence[str]
+    ) -> FeatureEntry | FeatureCacheWriter | None:
+        """エントリがあれば返し、無ければロックを取って書き込み用の Writer を返す。
+
+        他の Worker が同じキーを計算中なら完了を待つ。lock_timeout を超えた場合は None
+        (呼び出し側はキャッシュを使わずに計算する)。
+        """
+        entry = self.get(key)
+        if entry is not None:
+            return entry
+        lock = self._acquire(self.root / f"{key.digest()}.lock", self.lock_timeout)
+        if lock is None:
+            logger.warning("Timed out waiting for feature cache lock: %s", key.digest())
+            return None
+        entry = self.get(key)
+        if entry is not None:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+            lock.close()
+            return entry
+        return FeatureCacheWriter(self, key, samples, lock)
+
+    def evict(self, keep: Path | None = None) -> int:
+        """合計サイズが max_bytes 以下になるまで古いエントリを削除し、削除したバイト数を返す。"""
+        lock = self._acquire(self.root / ".evict.lock", timeout=None)
+        assert lock is not None
+        try:
+            entries = []
+            for meta_path in self.root.glob(f"*/{META_FILE}"):
+                try:
+                    nbytes = int(json.loads(meta_path.read_text(encoding="utf-8"))["bytes"])
+                    entries.append((meta_path.stat().st_mtime, nbytes, meta_path.parent))
+                except (OSError, ValueError, KeyError):
+                    continue
+            total = sum(nbytes for _, nbytes, _ in entries)
+            freed = 0
+            for _, nbytes, path in sorted(entries, key=lambda e: e[0]):
+                if total <= self.max_bytes:
+                    break
+                if keep is not None and path == keep:
+                    continue
+                # 読み出し中のプロセスは get() の時点で全層をメモリマップで開いており、
+                # 削除後も inode を参照し続けるため削除してよい
+                shutil.rmtree(path, ignore_errors=True)
+                total -= nbytes
+                freed += nbytes
+                logger.info("Evicted feature cache entry %s (%d bytes)", path.name, nbytes)
+            return freed
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+            lock.close()
+
+    @staticmethod
+    def _acquire(path: Path, timeout: float | None) -> IO[str] | None:
+        lock = open(path, "a+", encoding="utf-8")  # noqa: SIM115 - ロック解放まで開いたままにする
+        if timeout is None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            return lock
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return lock
+            except OSError as exc:
+                if exc.errno not in (errno.EAGAIN, errno.EACCES):
+                    lock.close()
+                    raise
+            if time.monotonic() >= deadline:
+                lock.close()
+                return None
+            time.sleep(0.2)
@@ -0,0 +1,180 @@
+"""anomalib.data.Folder と同じ手順で train / val / test を分ける。
+
+シャード (anomalib.shards) やマニフェスト (anomalib.dataset_registry) が持つのは Folder の
+train / test split のファイル一覧だけなので、それを読むデータモジュールは Folder の setup
+(AnomalibDataModule._create_test_split / _create_val_split) と同じ分割をここで再現する。
+既定では val_split_mode=from_test, val_split_ratio=0.5 でテスト画像の半分 (ラベルごと) を
+検証 (適応しきい値の決定) に回し、残りで評価する。
+
+再現している Folder の挙動:
+    - どの分割も画像パスの昇順に並べ直す (AnomalibDataset.samples の setter の sort_values)
+    - extensions は大文字小文字を区別せずに絞り込む
+    - テストに正常画像が無ければ test_split_ratio で学習画像から取る
+    - random_split はラベルごとに torch.randperm で選ぶ (seed が無ければ torch の既定の乱数)
+    - normal_split_ratio は Folder も保持するだけで分割には使わない
+
+synthetic モード (合成異常) は再現しないので ValueError にする (呼び出し側は Folder を使う)。
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+from collections.abc import Iterable, Mapping, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Protocol
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+TEST_SPLIT_MODES = ("none", "from_dir")
+VAL_SPLIT_MODES = ("none", "same_as_test", "from_train", "from_test", "from_dir")
+
+
+class SplitSource(Protocol):
+    """ShardDataset / ManifestDataset のように 1 split の画像パスとラベルを持つもの。"""
+
+    @property
+    def image_paths(self) -> list[str]: ...
+
+    @property
+    def labels(self) -> list[int]: ...
+
+
+@dataclass(frozen=True)
+class SplitItem:
+    """分割後の 1 画像。split / index は元のデータセット (train / test) 上の位置。"""
+
+    split: str
+    index: int
+    path: str
+    label: int
+
+
+@dataclass(frozen=True)
+class FolderSplitOptions:
+    """Folder の init_args のうち分割に関わるもの (既定値も Folder と同じ)。"""
+
+    extensions: tuple[str, ...] | None = None
+    test_split_mode: str = "from_dir"
+    test_split_ratio: float = 0.2
+    val_split_mode: str = "from_test"
+    val_split_ratio: float = 0.5
+    seed: int | None = None
+
+    @classmethod
+    def from_init_args(cls, init_args: Mapping[str, Any]) -> FolderSplitOptions:
+        """config.data.init_args から作る。
+
+        Raises:
+            ValueError: 再現できない分割モード (synthetic など)
+        """
+        extensions = init_args.get("extensions")
+        seed = init_args.get("seed")
+        options = cls(
+            extensions=tuple(str(ext) for ext in extensions) if extensions else None,
+            test_split_mode=str(init_args.get("test_split_mode", cls.test_split_mode)).lower(),
+            test_split_ratio=float(init_args.get("test_split_ratio", cls.test_split_ratio)),
+            val_split_mode=str(init_args.get("val_split_mode", cls.val_split_mode)).lower(),
+            val_split_ratio=float(init_args.get("val_split_ratio", cls.val_split_ratio)),
+            seed=None if seed is None else int(seed),
+        )
+        if options.test_split_mode not in TEST_SPLIT_MODES:
+            raise ValueError(f"unsupported test_split_mode: {options.test_split_mode}")
+        if options.val_split_mode not in VAL_SPLIT_MODES:
+            raise ValueError(f"unsupported val_split_mode: {options.val_split_mode}")
+        return options
+
+
+@dataclass(frozen=True)
+class FolderSplits:
+    train: list[SplitItem]
+    val: list[SplitItem]
+    test: list[SplitItem]
+
+
+def _sorted(items: Iterable[SplitItem]) -> list[SplitItem]:
+    return sorted(items, key=lambda item: item.path)
+
+
+def _items(split: str, source: SplitSource, extensions: tuple[str, ...] | None) -> list[SplitItem]:
+    suffixes = {ext.lower() for ext in extensions} if extensions else None
+    return _sorted(
+        SplitItem(split, index, path, int(label))
+        for index, (path, label) in enumerate(zip(source.image_paths, source.labels, strict=True))
+        if suffixes is None or Path(path).suffix.lower() in suffixes
+    )
+
+
+def random_split(
+    items: Sequence[SplitItem],
+    split_ratio: float,
+    label_aware: bool = False,
+    seed: int | None = None,
+) -> tuple[list[SplitItem], list[SplitItem]]:
+    """anomalib.data.utils.split.random_split と同じ規則で [1 - split_ratio, split_ratio] に分ける。"""
+    ratios = [1 - split_ratio, split_ratio]
+    if not all(0 < ratio < 1 for ratio in ratios):
+        raise ValueError(f"All split ratios must be between 0 and 1, found {ratios}")
+    if label_aware:
+        groups = [
+            [i for i in items if i.label == label] for label in sorted({i.label for i in items})
+        ]
+    else:
+        groups = [list(items)]
+
+    subsets: list[list[list[SplitItem]]] = []
+    for group in groups:
+        lengths = [math.floor(len(group) * ratio) for ratio in ratios]
+        for i in range(len(group) - sum(lengths)):
+            lengths[i % len(lengths)] += 1
+        if 0 in lengths:
+            logger.warning("Zero subset length encountered during splitting")
+        generator = torch.Generator().manual_seed(seed) if seed is not None else None
+        order = torch.randperm(len(group), generator=generator).tolist()
+        parts, start = [], 0
+        for length in lengths:
+            parts.append([group[j] for j in order[start : start + length]])
+            start += length
+        subsets.append(parts)
+    first, second = (_sorted(item for parts in subsets for item in parts[k]) for k in range(2))
+    return first, second
+
+
+def folder_splits(
+    train: SplitSource, test: SplitSource, options: FolderSplitOptions | None = None
+) -> FolderSplits:
+    """Folder の setup と同じ train / val / test を元の train / test split から作る。"""
+    options = options or FolderSplitOptions()
+    train_items = _items("train", train, options.extensions)
+    test_items = _items("test", test, options.extensions)
+
+    normal_test: list[SplitItem] = []
+    if any(item.label == 0 for item in test_items):
+        normal_test = [item for item in test_items if item.label == 0]
+        test_items = [item for item in test_items if item.label == 1]
+    elif options.test_split_mode != "none":
+        logger.info(
+            "No normal test images found. Sampling from training set using ratio of %0.2f",
+            options.test_split_ratio,
+        )
+        train_items, normal_test = random_split(
+            train_items, options.test_split_ratio, seed=options.seed
+        )
+    if options.test_split_mode == "from_dir":
+        test_items = _sorted(test_items + normal_test)
+
+    val_items: list[SplitItem] = []
+    if options.val_split_mode == "from_train":
+        train_items, val_items = random_split(
+            train_items, options.val_split_ratio, label_aware=True, seed=options.seed
+        )
+    elif options.val_split_mode == "from_test":
+        test_items, val_items = random_split(
+            test_items, options.val_split_ratio, label_aware=True, seed=options.seed
+        )
+    elif options.val_split_mode == "same_as_test":
+        val_items = list(test_items)
+    return FolderSplits(train_items, val_items, test_items)
@@ -0,0 +1,116 @@
+"""学習中のメトリクスを Worker に逐次送るための JSONL 書き出し.
+
+Worker は子プロセスに `LEADERBOARD_METRICS_STREAM` (出力ディレクトリの `metrics_stream.jsonl`)
+を渡し、追記された行を数秒ごとにまとめて MLflow に送る。1 行 1 レコード:
+
+    {"step": 120, "metrics": {"train_loss": 0.52, "epoch": 3}, "timestamp": 1700000000.0}
+
+`anomalib.trainers.get_trainer` のトレーナーは `MetricStreamCallback` で自動的に書き出す。
+Lightning を使わない投稿は `log_metrics({"loss": 0.5}, step=10)` を呼べばよい
+(環境変数が無いローカル実行では何もしない)。
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import math
+import os
+import threading
+import time
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any
+
+STREAM_ENV = "LEADERBOARD_METRICS_STREAM"
+
+
+def _to_float(value: Any) -> float | None:
+    if isinstance(value, bool):
+        return None
+    if hasattr(value, "numel") and value.numel() != 1:  # 要素が複数のテンソル
+        return None
+    if hasattr(value, "item"):
+        value = value.item()
+    if not isinstance(value, int | float) or not math.isfinite(value):
+        return None
+    return float(value)
+
+
+class MetricStreamWriter:
+    """メトリクスを 1 行ずつ JSONL に追記する (行単位で書き込むので Worker は途中の行を読まない)."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def write(self, metrics: Mapping[str, Any], step: int = 0) -> None:
+        values = {}
+        for key, value in metrics.items():
+            number = _to_float(value)
+            if number is not None:
+                values[str(key)] = number
+        if not values:
+            return
+        line = json.dumps({"step": int(step), "metrics": values, "timestamp": time.time()})
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+def writer_from_env() -> MetricStreamWriter | None:
+    path = os.getenv(STREAM_ENV)
+    return MetricStreamWriter(path) if path else None
+
+
+def log_metrics(metrics: Mapping[str, Any], step: int = 0) -> None:
+    """Worker にメトリクスを送る (Worker の外で実行した場合は何もしない)."""
+    writer = writer_from_env()
+    if writer is not None:
+        writer.write(metrics, step)
+
+
+@functools.cache
+def _callback_class() -> type:
+    from lightning.pytorch.callbacks import Callback  # type: ignore[import]
+
+    class MetricStreamCallback(Callback):  # type: ignore[misc, valid-type]
+        """trainer.callback_metrics を log_every_n_steps ごとと各エポック終了時に書き出す."""
+
+        def __init__(self, writer: MetricStreamWriter) -> None:
+            self.writer = writer
+
+        def _write(self, trainer: Any) -> None:
+            metrics = dict(trainer.callback_metrics)
+            metrics["epoch"] = trainer.current_epoch
+            self.writer.write(metrics, trainer.global_step)
+
+        def on_train_batch_end(self, trainer, pl_module, outputs, batch, batch_idx):  # type: ignore[no-untyped-def]
+            every = max(int(getattr(trainer, "log_every_n_steps", 50) or 1), 1)
+            if trainer.global_step % every == 0:
+                self._write(trainer)
+
+        def on_train_epoch_end(self, trainer, pl_module):  # type: ignore[no-untyped-def]
+            self._write(trainer)
+
+        def on_validation_epoch_end(self, trainer, pl_module):  # type: ignore[no-untyped-def]
+            if not trainer.sanity_checking:
+                self._write(trainer)
+
+    return MetricStreamCallback
+
+
+def metric_stream_callback() -> Any | None:
+    """Worker の下で実行されていれば Lightning のコールバックを返す (それ以外は None)."""
+    writer = writer_from_env()
+    return _callback_class()(writer) if writer is not None else None
+
+
+__all__ = [
+    "STREAM_ENV",
+    "MetricStreamWriter",
+    "log_metrics",
+    "metric_stream_callback",
+    "writer_from_env",
+]
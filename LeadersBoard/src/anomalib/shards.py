@@ -0,0 +1,299 @@
+"""前処理済みデータセットシャード (デコード・リサイズ済み画像のメモリマップ)。
+
+ジョブごとに JPEG / PNG をデコードしてリサイズし直す代わりに、データセットを一度だけ
+固定サイズの uint8 配列 (画像 [N, 3, H, W] RGB、マスク [M, H, W]) に変換して
+シャードファイル (.npy) に保存する。読み出し側はメモリマップで必要な行を参照するだけなので、
+デコード処理が無くなり、ページキャッシュ経由で複数ジョブから共有される。
+
+レイアウト:
+    <output>/index.json         画像ごとの (path, split, label, shard, row, mask_row)
+    <output>/images-00000.npy   uint8 [N, 3, H, W]
+    <output>/masks-00000.npy    uint8 [M, H, W] (同じシャードの画像のうちマスクを持つもの)
+
+ディレクトリ構成は anomalib.data.Folder と同じ (normal_dir は学習、normal_test_dir と
+abnormal_dir はテスト、mask_dir は異常画像と同名のマスク) として解釈する。
+
+作成:
+    python -m anomalib.shards --root /shared/data/pcb1/Data/Images --normal-dir Normal \\
+        --abnormal-dir Anomaly --normal-test-dir Normal --image-size 256 \\
+        --output /shared/shards/pcb1-256
+    python -m anomalib.shards --dataset pcb1@1 --image-size 256 --output /shared/shards/pcb1-256
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import shutil
+from collections.abc import Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "index.json"
+FORMAT_VERSION = 1
+DEFAULT_SHARD_SIZE = 1024
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff")
+
+
+@dataclass(frozen=True)
+class ShardRecord:
+    """index.json の 1 行。mask_row はマスクが無ければ -1。"""
+
+    path: str
+    split: str
+    label: int
+    shard: int
+    row: int
+    mask_row: int = -1
+    mask_path: str | None = None
+
+
+@dataclass(frozen=True)
+class _Source:
+    path: Path
+    split: str
+    label: int
+    mask_path: Path | None
+
+
+def _list_images(directory: Path, extensions: Sequence[str]) -> list[Path]:
+    suffixes = {ext.lower() for ext in extensions}
+    return sorted(
+        Path(entry.path)
+        for entry in os.scandir(directory)
+        if entry.is_file() and Path(entry.name).suffix.lower() in suffixes
+    )
+
+
+def discover_folder(
+    root: Path,
+    normal_dir: str,
+    abnormal_dir: str | None = None,
+    normal_test_dir: str | None = None,
+    mask_dir: str | None = None,
+    extensions: Sequence[str] = IMAGE_EXTENSIONS,
+) -> list[_Source]:
+    """anomalib.data.Folder と同じ規則で (画像, split, ラベル, マスク) を列挙する。"""
+    sources = [_Source(p, "train", 0, None) for p in _list_images(root / normal_dir, extensions)]
+    if normal_test_dir:
+        for path in _list_images(root / normal_test_dir, extensions):
+            sources.append(_Source(path, "test", 0, None))
+    if abnormal_dir:
+        masks: dict[str, Path] = {}
+        if mask_dir:
+            masks = {p.stem: p for p in _list_images(root / mask_dir, extensions)}
+        for path in _list_images(root / abnormal_dir, extensions):
+            sources.append(_Source(path, "test", 1, masks.get(path.stem)))
+    return sources
+
+
+def _decode(path: Path, size: tuple[int, int] | None, grayscale: bool = False) -> np.ndarray:
+    import cv2  # type: ignore[import]
+
+    flag = cv2.IMREAD_GRAYSCALE if grayscale else cv2.IMREAD_COLOR
+    image = cv2.imread(str(path), flag)
+    if image is None:
+        raise ValueError(f"failed to decode {path}")
+    if size is not None:
+        height, width = size
+        interpolation = cv2.INTER_NEAREST if grayscale else cv2.INTER_AREA
+        image = cv2.resize(image, (width, height), interpolation=interpolation)
+    if grayscale:
+        return (image > 0).astype(np.uint8)
+    return np.ascontiguousarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB).transpose(2, 0, 1))
+
+
+def build_shards(
+    sources: Sequence[_Source],
+    output: Path,
+    image_size: tuple[int, int],
+    shard_size: int = DEFAULT_SHARD_SIZE,
+    workers: int | None = None,
+    dataset_digest: str | None = None,
+) -> list[ShardRecord]:
+    """画像をデコード・リサイズしてシャードに書き出す。
+
+    一時ディレクトリに書き込んでから rename するため、途中で失敗しても
+    読み出し側が壊れたシャードを参照することはない。dataset_digest には
+    元にしたデータセットマニフェスト (anomalib.dataset_registry) のダイジェストを記録する。
+    """
+    if shard_size < 1:
+        raise ValueError("shard_size must be positive")
+    tmp = output.with_name(f".{output.name}.tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    height, width = image_size
+    records: list[ShardRecord] = []
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        for shard, start in enumerate(range(0, len(sources), shard_size)):
+            chunk = sources[start : start + shard_size]
+            images = np.lib.format.open_memmap(
+                tmp / f"images-{shard:05d}.npy",
+                mode="w+",
+                dtype=np.uint8,
+                shape=(len(chunk), 3, height, width),
+            )
+            # cv2 のデコード・リサイズは GIL を解放するためスレッドで並列化できる
+            for row, image in enumerate(pool.map(lambda s: _decode(s.path, image_size), chunk)):
+                images[row] = image
+            images.flush()
+            del images
+
+            with_masks = [s for s in chunk if s.mask_path is not None]
+            mask_rows: dict[Path, int] = {}
+            if with_masks:
+                masks = np.lib.format.open_memmap(
+                    tmp / f"masks-{shard:05d}.npy",
+                    mode="w+",
+                    dtype=np.uint8,
+                    shape=(len(with_masks), height, width),
+                )
+                decoded = pool.map(lambda s: _decode(s.mask_path, image_size, True), with_masks)
+                for mask_row, (source, mask) in enumerate(zip(with_masks, decoded, strict=True)):
+                    masks[mask_row] = mask
+                    mask_rows[source.path] = mask_row
+                masks.flush()
+                del masks
+
+            for row, source in enumerate(chunk):
+                records.append(
+                    ShardRecord(
+                        path=str(source.path),
+                        split=source.split,
+                        label=source.label,
+                        shard=shard,
+                        row=row,
+                        mask_row=mask_rows.get(source.path, -1),
+                        mask_path=str(source.mask_path) if source.mask_path else None,
+                    )
+                )
+            logger.info("Wrote shard %d (%d images)", shard, len(chunk))
+
+    index = {
+        "version": FORMAT_VERSION,
+        "image_size": [height, width],
+        "dataset": dataset_digest,
+        "records": [asdict(record) for record in records],
+    }
+    (tmp / INDEX_FILE).write_text(json.dumps(index), encoding="utf-8")
+    if output.exists():
+        shutil.rmtree(output)
+    os.replace(tmp, output)
+    return records
+
+
+class ShardDataset:
+    """シャードから 1 split 分を読む。__getitem__ はメモリマップ上のビューを返す。
+
+    シャードは copy-on-write (mmap_mode="c") で開くため、torch.from_numpy に
+    コピー無しで渡せる (書き込んでも元ファイルは変わらない)。
+    """
+
+    def __init__(self, root: Path, split: str) -> None:
+        self.root = Path(root)
+        index = json.loads((self.root / INDEX_FILE).read_text(encoding="utf-8"))
+        if index.get("version") != FORMAT_VERSION:
+            raise ValueError(f"unsupported shard format version: {index.get('version')}")
+        self.split = split
+        self.image_size = tuple(int(v) for v in index["image_size"])
+        self.dataset_digest: str | None = index.get("dataset")
+        self.records = [ShardRecord(**r) for r in index["records"] if r["split"] == split]
+        self._images: dict[int, np.ndarray] = {}
+        self._masks: dict[int, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def image_paths(self) -> list[str]:
+        return [record.path for record in self.records]
+
+    @property
+    def labels(self) -> list[int]:
+        return [record.label for record in self.records]
+
+    def _shard(self, cache: dict[int, np.ndarray], prefix: str, shard: int) -> np.ndarray:
+        # DataLoader のワーカーへは pickle で渡るため、メモリマップは使う側のプロセスで開く
+        if shard not in cache:
+            cache[shard] = np.load(self.root / f"{prefix}-{shard:05d}.npy", mmap_mode="c")
+        return cache[shard]
+
+    def image(self, index: int) -> np.ndarray:
+        record = self.records[index]
+        return self._shard(self._images, "images", record.shard)[record.row]
+
+    def mask(self, index: int) -> np.ndarray:
+        """マスク [H, W] (0/1)。マスクが無い画像はゼロ (正常画像は全面正常)。"""
+        record = self.records[index]
+        if record.mask_row < 0:
+            return np.zeros(self.image_size, dtype=np.uint8)
+        return self._shard(self._masks, "masks", record.shard)[record.mask_row]
+
+    def __getitem__(self, index: int) -> dict[str, Any]:
+        record = self.records[index]
+        return {
+            "image": self.image(index),
+            "gt_mask": self.mask(index),
+            "gt_label": record.label,
+            "image_path": record.path,
+            "mask_path": record.mask_path,
+        }
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_images"] = {}
+        state["_masks"] = {}
+        return state
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Build memory-mapped dataset shards.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--root", type=Path)
+    source.add_argument("--dataset", help="anomalib.dataset_registry に登録した name[@version]")
+    parser.add_argument("--normal-dir")
+    parser.add_argument("--abnormal-dir")
+    parser.add_argument("--normal-test-dir")
+    parser.add_argument("--mask-dir")
+    parser.add_argument("--image-size", type=int, nargs="+", required=True, help="H [W]")
+    parser.add_argument("--output", type=Path, required=True)
+    parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE)
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    size = args.image_size
+    image_size = (size[0], size[-1])
+    digest = None
+    if args.dataset:
+        from .dataset_registry import DatasetRegistry
+
+        manifest = DatasetRegistry().get(args.dataset)
+        sources = manifest.sources()
+        digest = manifest.digest
+    elif args.normal_dir:
+        sources = discover_folder(
+            args.root, args.normal_dir, args.abnormal_dir, args.normal_test_dir, args.mask_dir
+        )
+    else:
+        parser.error("--normal-dir is required with --root")
+    records = build_shards(
+        sources, args.output, image_size, args.shard_size, args.workers, dataset_digest=digest
+    )
+    print(f"Wrote {len(records)} images to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,75 @@
-"""Compatibility shim providing get_trainer for submissions expecting anomalib.trainers."""
+"""Compatibility shim providing get_trainer for submissions expecting anomalib.trainers.
+
+The returned trainer writes `checkpoints/last.ckpt` under `default_root_dir` every epoch and,
+when the worker requeues an interrupted job, resumes `fit` from that checkpoint automatically.
+Under the worker it also streams `callback_metrics` to the worker while training
+(see anomalib.metric_stream).
+"""
 
 from __future__ import annotations
 
-from typing import Any
+import functools
+import logging
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from ..metric_stream import metric_stream_callback
+from .resume import CHECKPOINT_DIR, RESUME_ENV, find_resume_checkpoint
+
+if TYPE_CHECKING:
+    from lightning.pytorch import Trainer  # type: ignore[import]
+
+logger = logging.getLogger(__name__)
+
+
+@functools.cache
+def _resumable_trainer_class() -> type[Trainer]:
+    from lightning.pytorch import Trainer  # type: ignore[import]
 
-from lightning.pytorch import Trainer  # type: ignore[import]
+    class ResumableTrainer(Trainer):  # type: ignore[misc, valid-type]
+        """最初の fit だけ、ckpt_path 未指定なら再開用チェックポイントから始める Trainer."""
+
+        resume_from: str | None = None
+
+        def fit(self, *args: Any, **kwargs: Any) -> Any:
+            # fit(model, train_dataloaders, val_dataloaders, datamodule, ckpt_path)
+            if self.resume_from and kwargs.get("ckpt_path") is None and len(args) < 5:
+                logger.info("Resuming training from %s", self.resume_from)
+                kwargs["ckpt_path"] = self.resume_from
+            self.resume_from = None
+            return super().fit(*args, **kwargs)
+
+    return ResumableTrainer
 
 
 def get_trainer(config: Any | None = None) -> Trainer:  # type: ignore[override]
     """Return a Lightning Trainer built from config.trainer if available."""
+    from lightning.pytorch.callbacks import ModelCheckpoint  # type: ignore[import]
+
     trainer_kwargs: dict[str, Any] = {}
     if config is not None:
         trainer_section = getattr(config, "trainer", None)
         if trainer_section:
             # OmegaConf objects expose dict-like access
             trainer_kwargs = dict(trainer_section)
-    return Trainer(**trainer_kwargs)
+
+    root_dir = trainer_kwargs.get("default_root_dir")
+    callbacks = list(trainer_kwargs.get("callbacks") or [])
+    if root_dir and trainer_kwargs.get("enable_checkpointing", True):
+        if not any(isinstance(callback, ModelCheckpoint) for callback in callbacks):
+            # 再開できるよう毎エポック last.ckpt を残す (Lightning 既定のチェックポイントの代わり)
+            callbacks.append(
+                ModelCheckpoint(dirpath=Path(root_dir) / CHECKPOINT_DIR, save_last=True)
+            )
+    stream_callback = metric_stream_callback()
+    if stream_callback is not None:
+        callbacks.append(stream_callback)
+    if callbacks:
+        trainer_kwargs["callbacks"] = callbacks
+
+    trainer = _resumable_trainer_class()(**trainer_kwargs)
+    trainer.resume_from = find_resume_checkpoint(root_dir)
+    return trainer
 
 
-__all__ = ["get_trainer"]
+__all__ = ["RESUME_ENV", "find_resume_checkpoint", "get_trainer"]
@@ -0,0 +1,37 @@
+"""中断したジョブの学習を再開するためのチェックポイント探索.
+
+Worker は再投入したジョブの出力ディレクトリにチェックポイントが残っていれば、そのパスを
+`LEADERBOARD_RESUME_CHECKPOINT` で子プロセスに渡す。`get_trainer` はこれ (無ければ
+`default_root_dir/checkpoints/last*.ckpt`) を `trainer.fit` の `ckpt_path` に使う。
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+RESUME_ENV = "LEADERBOARD_RESUME_CHECKPOINT"
+CHECKPOINT_DIR = "checkpoints"
+LAST_CHECKPOINT_PATTERN = "last*.ckpt"
+
+
+def latest_checkpoint(directory: Path) -> Path | None:
+    """directory 配下で最も新しい last*.ckpt を返す (Lightning の last-v1.ckpt なども含む)."""
+    if not directory.is_dir():
+        return None
+    candidates = [p for p in directory.rglob(LAST_CHECKPOINT_PATTERN) if p.is_file()]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda p: p.stat().st_mtime_ns)
+
+
+def find_resume_checkpoint(default_root_dir: str | Path | None = None) -> str | None:
+    """再開に使うチェックポイントのパスを返す (無ければ None)."""
+    hinted = os.getenv(RESUME_ENV)
+    if hinted and Path(hinted).is_file():
+        return hinted
+    if default_root_dir:
+        found = latest_checkpoint(Path(default_root_dir) / CHECKPOINT_DIR)
+        if found is not None:
+            return str(found)
+    return None
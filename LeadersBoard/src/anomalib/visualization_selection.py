@@ -0,0 +1,133 @@
+"""可視化する画像を max_images / strategy に従って選ぶ規則。
+
+投稿コード (demo_anomalib2/visualize.py の生成時の絞り込み) と Worker
+(src/worker/visualization_collector.py の収集時の絞り込み) が同じ規則を使うよう、
+投稿からも `anomalib.visualization_selection` として import できるシムに置く。
+標準ライブラリのみに依存する。strategy は config.yaml の visualization.strategy の値
+(all / top_k / worst_errors / stratified、src.worker.visualization_types.VisualizationStrategy)。
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Sequence
+from dataclasses import dataclass
+from itertools import zip_longest
+
+logger = logging.getLogger(__name__)
+
+_TRUE_LABELS = {"true", "1", "1.0", "anomalous", "abnormal"}
+_FALSE_LABELS = {"false", "0", "0.0", "normal", "good"}
+
+
+@dataclass(frozen=True)
+class ImageRecord:
+    """可視化対象を選ぶための 1 画像分の予測結果。"""
+
+    name: str
+    score: float | None = None
+    pred_label: str | None = None
+    gt_label: str | None = None
+
+
+def parse_label(label: object) -> bool | None:
+    """'True' / '1' / 'anomalous' などを異常=True に正規化する。判別できなければ None。"""
+    if label is None:
+        return None
+    value = str(label).strip().lower()
+    if value in _TRUE_LABELS:
+        return True
+    if value in _FALSE_LABELS:
+        return False
+    return None
+
+
+def select_images(
+    records: Sequence[ImageRecord],
+    strategy: str,
+    max_images: int | None,
+) -> list[str]:
+    """可視化する画像名を選ぶ。
+
+    max_images が None、または件数が上限以下なら全件をそのまま返す。
+    """
+    if max_images is None or len(records) <= max_images:
+        return [r.name for r in records]
+    if strategy == "top_k":
+        return [r.name for r in _by_score_desc(records)[:max_images]]
+    if strategy == "worst_errors":
+        return _worst_errors(records, max_images)
+    if strategy == "stratified":
+        return _stratified(records, max_images)
+    return [r.name for r in records[:max_images]]
+
+
+def _by_score_desc(records: Sequence[ImageRecord]) -> list[ImageRecord]:
+    # スコアの無い画像は末尾に置く
+    return sorted(records, key=lambda r: (r.score is None, -(r.score or 0.0)))
+
+
+def _worst_errors(records: Sequence[ImageRecord], max_images: int) -> list[str]:
+    """スコアの高い偽陽性と低い偽陰性を交互に選ぶ。
+
+    誤りが上限に満たなければ残りをスコア順で埋める。正解ラベルが無ければ top_k と同じ。
+    """
+    labeled = [
+        (r, parse_label(r.gt_label), parse_label(r.pred_label))
+        for r in records
+        if parse_label(r.gt_label) is not None and parse_label(r.pred_label) is not None
+    ]
+    if not labeled:
+        logger.warning("No ground-truth labels for worst_errors, falling back to top_k")
+        return [r.name for r in _by_score_desc(records)[:max_images]]
+    false_positives = _by_score_desc([r for r, gt, pred in labeled if not gt and pred])
+    false_negatives = _by_score_desc([r for r, gt, pred in labeled if gt and not pred])[::-1]
+    interleaved = [
+        r.name
+        for pair in zip_longest(false_positives, false_negatives)
+        for r in pair
+        if r is not None
+    ]
+    chosen = set(interleaved)
+    filler = [r.name for r in _by_score_desc(records) if r.name not in chosen]
+    return (interleaved + filler)[:max_images]
+
+
+def _stratified(records: Sequence[ImageRecord], max_images: int) -> list[str]:
+    """ラベル (正解ラベル優先、無ければ予測ラベル) ごとに枠を均等に割り当てる。
+
+    各ラベル内ではスコア順に並べて等間隔に選び、スコア分布全体をカバーする。
+    """
+    strata: dict[str, list[ImageRecord]] = {}
+    for r in records:
+        label = parse_label(r.gt_label)
+        if label is None:
+            label = parse_label(r.pred_label)
+        strata.setdefault(str(label), []).append(r)
+
+    quotas = dict.fromkeys(strata, 0)
+    remaining = max_images
+    while remaining > 0:
+        progressed = False
+        for key in sorted(strata):
+            if remaining > 0 and quotas[key] < len(strata[key]):
+                quotas[key] += 1
+                remaining -= 1
+                progressed = True
+        if not progressed:
+            break
+
+    selected: list[str] = []
+    for key in sorted(strata):
+        ranked = _by_score_desc(strata[key])
+        selected.extend(r.name for r in _evenly_spaced(ranked, quotas[key]))
+    return selected
+
+
+def _evenly_spaced(items: list[ImageRecord], count: int) -> list[ImageRecord]:
+    if count <= 0:
+        return []
+    if count == 1:
+        return items[:1]
+    last = len(items) - 1
+    return [items[round(i * last / (count - 1))] for i in range(count)]
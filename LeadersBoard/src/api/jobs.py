@@ -1,20 +1,29 @@
 from __future__ import annotations
 
+import json
 import os
+from collections.abc import AsyncIterator
+from contextlib import aclosing
 from functools import lru_cache
 from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
 
+from src.adapters.redis_job_event_adapter import RedisJobEventAdapter
 from src.adapters.redis_job_queue_adapter import RedisJobQueueAdapter
 from src.adapters.redis_job_status_adapter import RedisJobStatusAdapter
 from src.adapters.redis_rate_limit_adapter import RedisRateLimitAdapter
 from src.api.submissions import get_current_user, get_storage
+from src.config import get_preflight_enabled
 from src.domain.enqueue_job import EnqueueJob
 from src.domain.get_job_results import GetJobResults
 from src.domain.get_job_status import GetJobStatus
+from src.domain.list_jobs import JobListPage, ListJobs
+from src.ports.job_event_port import JobEventPort
 from src.ports.job_queue_port import JobQueuePort
 from src.ports.job_status_port import JobStatusPort
 from src.ports.rate_limit_port import RateLimitPort
@@ -34,10 +43,24 @@ def get_redis_client() -> Redis:
     return Redis.from_url(redis_url)
 
 
+@lru_cache(maxsize=1)
+def get_async_redis_client() -> AsyncRedis:
+    redis_url = os.getenv("REDIS_URL", "redis://redis:6379/0")
+    return AsyncRedis.from_url(redis_url)
+
+
+def get_sse_heartbeat_seconds() -> float:
+    return float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+
+
 redis_dep = Depends(get_redis_client)
+async_redis_dep = Depends(get_async_redis_client)
 
 
 def get_job_queue(redis_client: Redis = redis_dep) -> JobQueuePort:
+    if get_preflight_enabled():
+        # 事前検証ワーカーが検証を通したジョブだけ学習キューに回す
+        return RedisJobQueueAdapter(redis_client, RedisJobQueueAdapter.PREFLIGHT_QUEUE)
     return RedisJobQueueAdapter(redis_client)
 
 
@@ -49,6 +72,10 @@ def get_rate_limit(redis_client: Redis = redis_dep) -> RateLimitPort:
     return RedisRateLimitAdapter(redis_client)
 
 
+def get_job_events(redis_client: AsyncRedis = async_redis_dep) -> JobEventPort:
+    return RedisJobEventAdapter(redis_client)
+
+
 def get_mlflow_uri() -> str:
     return os.getenv("MLFLOW_TRACKING_URI", "http://mlflow:5010")
 
@@ -58,6 +85,8 @@ queue_dep = Depends(get_job_queue)
 status_dep = Depends(get_job_status)
 rate_limit_dep = Depends(get_rate_limit)
 mlflow_uri_dep = Depends(get_mlflow_uri)
+job_events_dep = Depends(get_job_events)
+heartbeat_dep = Depends(get_sse_heartbeat_seconds)
 
 
 def get_job_status_use_case(status: JobStatusPort = status_dep) -> GetJobStatus:
@@ -71,8 +100,13 @@ def get_job_results_use_case(
     return GetJobResults(status, mlflow_uri)
 
 
+def get_list_jobs_use_case(status: JobStatusPort = status_dep) -> ListJobs:
+    return ListJobs(status)
+
+
 job_status_use_case_dep = Depends(get_job_status_use_case)
 job_results_use_case_dep = Depends(get_job_results_use_case)
+list_jobs_use_case_dep = Depends(get_list_jobs_use_case)
 
 
 def get_enqueue_job(
@@ -104,6 +138,60 @@ async def create_job(
     }
 
 
+@router.get("/jobs")
+async def list_jobs(
+    cursor: str | None = None,
+    limit: int = Query(20, ge=1, le=ListJobs.MAX_LIMIT),
+    status: str | None = None,
+    user_id: str = Depends(get_current_user),
+    list_jobs_use_case: ListJobs = list_jobs_use_case_dep,
+) -> dict[str, Any]:
+    """認証ユーザーのジョブを作成日時の新しい順に返す。
+
+    Args:
+        cursor: 前回レスポンスの next_cursor（省略時は先頭から）
+        limit: 取得件数（1〜100）
+        status: 指定時はこの状態のジョブのみ返す
+    """
+    try:
+        page: JobListPage = list_jobs_use_case.execute(
+            user_id, cursor=cursor, limit=limit, status=status
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return {"jobs": page.jobs, "next_cursor": page.next_cursor}
+
+
+@router.get("/jobs/events")
+async def stream_job_events(
+    request: Request,
+    user_id: str = Depends(get_current_user),
+    events: JobEventPort = job_events_dep,
+    heartbeat_seconds: float = heartbeat_dep,
+) -> StreamingResponse:
+    """認証ユーザーのジョブ状態変更を Server-Sent Events で配信する。
+
+    変更が無い間は heartbeat_seconds ごとにコメント行を送り、
+    プロキシによる切断を防ぐ。
+    """
+
+    async def event_stream() -> AsyncIterator[str]:
+        async with aclosing(events.listen(user_id, heartbeat_seconds)) as stream:
+            async for event in stream:
+                if await request.is_disconnected():
+                    break
+                if event is None:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: job_status\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/jobs/{job_id}/status")
 async def get_job_status_endpoint(
     job_id: str,
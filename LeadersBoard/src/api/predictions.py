@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+from functools import lru_cache
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+
+from src.adapters.arrow_prediction_query_adapter import ArrowPredictionQueryAdapter
+from src.api.jobs import get_job_status
+from src.api.submissions import get_current_user, get_storage
+from src.domain.query_predictions import GetScoreHistogram, GetWorstPredictions, ScoreOrder
+from src.ports.job_status_port import JobStatusPort
+from src.ports.prediction_query_port import PredictionFilter, PredictionQueryPort
+from src.ports.storage_port import StoragePort
+
+router = APIRouter()
+
+
+class ScoreHistogramResponse(BaseModel):
+    job_id: str
+    bin_edges: list[float]
+    counts: list[int]
+    total: int
+
+
+class PredictionResponse(BaseModel):
+    image_path: str
+    anomaly_score: float
+    pred_label: bool | None = None
+    gt_label: bool | None = None
+    category: str | None = None
+
+
+class PredictionListResponse(BaseModel):
+    job_id: str
+    order: ScoreOrder
+    predictions: list[PredictionResponse]
+
+
+@lru_cache(maxsize=1)
+def get_prediction_query() -> PredictionQueryPort:
+    return ArrowPredictionQueryAdapter()
+
+
+storage_dep = Depends(get_storage)
+status_dep = Depends(get_job_status)
+query_dep = Depends(get_prediction_query)
+
+
+def get_score_histogram_use_case(
+    storage: StoragePort = storage_dep,
+    status: JobStatusPort = status_dep,
+    query: PredictionQueryPort = query_dep,
+) -> GetScoreHistogram:
+    return GetScoreHistogram(storage=storage, status=status, query=query)
+
+
+def get_worst_predictions_use_case(
+    storage: StoragePort = storage_dep,
+    status: JobStatusPort = status_dep,
+    query: PredictionQueryPort = query_dep,
+) -> GetWorstPredictions:
+    return GetWorstPredictions(storage=storage, status=status, query=query)
+
+
+histogram_use_case_dep = Depends(get_score_histogram_use_case)
+worst_use_case_dep = Depends(get_worst_predictions_use_case)
+
+
+@router.get("/jobs/{job_id}/predictions/histogram")
+async def get_score_histogram(
+    job_id: str,
+    bins: int = Query(20, ge=1, le=200),
+    pred_label: bool | None = None,
+    gt_label: bool | None = None,
+    category: str | None = None,
+    user_id: str = Depends(get_current_user),
+    use_case: GetScoreHistogram = histogram_use_case_dep,
+) -> ScoreHistogramResponse:
+    """画像単位の異常スコアのヒストグラムを返す。
+
+    image_predictions.parquet を列単位でストリーム集計する（Parquet の無い旧ジョブは CSV）。
+    pred_label / gt_label / category で絞り込める。
+    """
+    filters = PredictionFilter(pred_label=pred_label, gt_label=gt_label, category=category)
+    try:
+        result = await run_in_threadpool(use_case.execute, job_id, bins, filters)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    if result is None:
+        raise HTTPException(status_code=404, detail="predictions not found")
+    return ScoreHistogramResponse(
+        job_id=job_id,
+        bin_edges=result.bin_edges,
+        counts=result.counts,
+        total=result.total,
+    )
+
+
+@router.get("/jobs/{job_id}/predictions/worst")
+async def get_worst_predictions(
+    job_id: str,
+    n: int = Query(20, ge=1, le=1000),
+    order: ScoreOrder = "desc",
+    pred_label: bool | None = None,
+    gt_label: bool | None = None,
+    category: str | None = None,
+    user_id: str = Depends(get_current_user),
+    use_case: GetWorstPredictions = worst_use_case_dep,
+) -> PredictionListResponse:
+    """異常スコア順に上位 n 件の画像を返す。
+
+    order=desc で誤検知候補（高スコア）、order=asc で見逃し候補（低スコア）を確認できる。
+    例: gt_label=false&order=desc で正常画像のうち最もスコアが高いもの。
+    """
+    filters = PredictionFilter(pred_label=pred_label, gt_label=gt_label, category=category)
+    try:
+        result = await run_in_threadpool(use_case.execute, job_id, n, order, filters)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    if result is None:
+        raise HTTPException(status_code=404, detail="predictions not found")
+    return PredictionListResponse(
+        job_id=job_id,
+        order=order,
+        predictions=[
+            PredictionResponse(
+                image_path=r.image_path,
+                anomaly_score=r.anomaly_score,
+                pred_label=r.pred_label,
+                gt_label=r.gt_label,
+                category=r.category,
+            )
+            for r in result
+        ],
+    )
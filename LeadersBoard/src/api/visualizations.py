@@ -1,35 +1,88 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import FileResponse
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, Response
 from pydantic import BaseModel
 
+from src.adapters.filesystem_anomaly_map_adapter import (
+    RAW_INDEX_FILENAME,
+    FileSystemAnomalyMapAdapter,
+)
+from src.adapters.filesystem_thumbnail_adapter import FileSystemThumbnailAdapter
 from src.api.jobs import get_job_status
 from src.api.submissions import get_current_user, get_storage
 from src.domain.get_visualization_artifacts import (
     GetVisualizationArtifacts,
+    SortKey,
+    VisualizationArtifactInfo,
     VisualizationResult,
 )
-from src.ports.job_status_port import JobStatusPort
+from src.ports.anomaly_map_port import AnomalyMapPort
+from src.ports.job_status_port import JobStatus, JobStatusPort
 from src.ports.storage_port import StoragePort
+from src.ports.thumbnail_port import ThumbnailPort
 
 router = APIRouter()
 
+# 完了済みジョブの成果物は書き換わらないため、ブラウザ/クライアントに長期キャッシュさせる
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+
+# 投稿コードが生の異常マップを書き出すディレクトリ (ジョブ出力ディレクトリからの相対パス)
+RAW_STORE_DIR = "visualizations/raw"
+
 
 class VizArtifactResponse(BaseModel):
     filename: str
     artifact_type: str
     url: str
+    size_bytes: int | None = None
+
+
+class VizImageGroupResponse(BaseModel):
+    name: str
+    score: float | None = None
+    label: str | None = None
+    artifacts: list[VizArtifactResponse]
 
 
 class VizListResponse(BaseModel):
     job_id: str
     artifacts: list[VizArtifactResponse]
     csv_files: list[str]
+    images: list[VizImageGroupResponse] = []
+    total_images: int = 0
+
+
+@lru_cache(maxsize=1)
+def get_thumbnails() -> ThumbnailPort:
+    cache_root = Path(os.getenv("THUMBNAIL_CACHE_ROOT", "/shared/cache/thumbnails"))
+    max_bytes = int(
+        os.getenv("THUMBNAIL_CACHE_MAX_BYTES", str(FileSystemThumbnailAdapter.DEFAULT_MAX_BYTES))
+    )
+    return FileSystemThumbnailAdapter(cache_root, max_bytes=max_bytes)
+
+
+@lru_cache(maxsize=1)
+def get_anomaly_maps() -> AnomalyMapPort:
+    cache_root = Path(os.getenv("RENDER_CACHE_ROOT", "/shared/cache/anomaly_maps"))
+    max_bytes = int(
+        os.getenv("RENDER_CACHE_MAX_BYTES", str(FileSystemAnomalyMapAdapter.DEFAULT_MAX_BYTES))
+    )
+    return FileSystemAnomalyMapAdapter(cache_root, max_bytes=max_bytes)
 
 
 storage_dep = Depends(get_storage)
 status_dep = Depends(get_job_status)
+thumbnails_dep = Depends(get_thumbnails)
+anomaly_maps_dep = Depends(get_anomaly_maps)
 
 
 def get_visualization_artifacts_use_case(
@@ -42,57 +95,186 @@ def get_visualization_artifacts_use_case(
 use_case_dep = Depends(get_visualization_artifacts_use_case)
 
 
+def _to_artifact_response(artifact: VisualizationArtifactInfo) -> VizArtifactResponse:
+    return VizArtifactResponse(
+        filename=artifact.filename,
+        artifact_type=artifact.artifact_type,
+        url=artifact.url,
+        size_bytes=artifact.size_bytes,
+    )
+
+
 @router.get("/jobs/{job_id}/visualizations")
 async def list_visualizations(
     job_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int | None = Query(None, ge=1, le=1000),
+    sort: SortKey = "name",
     user_id: str = Depends(get_current_user),
     use_case: GetVisualizationArtifacts = use_case_dep,
 ) -> VizListResponse:
-    result: VisualizationResult = use_case.execute(job_id)
-    artifacts = [
-        VizArtifactResponse(
-            filename=a.filename,
-            artifact_type=a.artifact_type,
-            url=a.url,
-        )
-        for a in result.artifacts
-    ]
+    """可視化成果物を画像単位のグループで返す。
+
+    Worker が保存したマニフェストがあればそれを返し、ディレクトリ走査は行わない。
+    sort=score_desc で異常スコアの高い順に並べ、offset/limit でページングする。
+    """
+    result: VisualizationResult = use_case.execute(job_id, offset=offset, limit=limit, sort=sort)
     return VizListResponse(
         job_id=job_id,
-        artifacts=artifacts,
+        artifacts=[_to_artifact_response(a) for a in result.artifacts],
         csv_files=result.csv_files,
+        images=[
+            VizImageGroupResponse(
+                name=g.name,
+                score=g.score,
+                label=g.label,
+                artifacts=[_to_artifact_response(a) for a in g.artifacts],
+            )
+            for g in result.images
+        ],
+        total_images=result.total_images,
     )
 
 
-def _resolve_and_load_file(
-    storage: StoragePort,
-    status: JobStatusPort,
-    job_id: str,
-    filename: str,
-) -> str:
-    if not status.get_status(job_id):
+def _job_completed(status: JobStatusPort, job_id: str) -> bool:
+    """ジョブの存在を確認し、完了済みかどうかを返す。"""
+    job_info = status.get_status(job_id)
+    if not job_info:
         raise HTTPException(status_code=404, detail="job not found")
+    return job_info.get("status") == JobStatus.COMPLETED.value
+
+
+def _resolve_file(storage: StoragePort, job_id: str, filename: str) -> Path | None:
+    """ファイルの実体パスを返す。存在しなければ None。"""
     candidates = [f"visualizations/{filename}", filename]
     for path in candidates:
         try:
-            return str(storage.load_artifact_file(job_id, path))
+            return Path(storage.load_artifact_file(job_id, path))
         except FileNotFoundError:
             continue
         except ValueError:
             raise HTTPException(status_code=400, detail="invalid path") from None
-    raise HTTPException(status_code=404, detail="file not found")
+    return None
 
 
-@router.get("/jobs/{job_id}/visualizations/{filename:path}")
+def _resolve_raw_render(
+    storage: StoragePort, job_id: str, filename: str
+) -> tuple[Path, str, str, Path | None] | None:
+    """PNG が無い heatmap / mask / overlay を異常マップストアから描画できるか調べる。
+
+    描画できる場合は (ストアのディレクトリ, 画像名, 種類, 元画像パス) を返す。
+    """
+    stem, _, ext = filename.rpartition(".")
+    if ext != "png" or "/" in stem:
+        return None
+    image_name, _, artifact_type = stem.rpartition("_")
+    if not image_name or artifact_type not in AnomalyMapPort.RENDERABLE_TYPES:
+        return None
+    index = _resolve_file(storage, job_id, f"{RAW_STORE_DIR}/{RAW_INDEX_FILENAME}")
+    if index is None:
+        return None
+    original = _resolve_file(storage, job_id, f"{image_name}_original.png")
+    if artifact_type == "overlay" and original is None:
+        return None
+    return index.parent, image_name, artifact_type, original
+
+
+def _strong_etag(stat_result: os.stat_result, variant: str = "") -> str:
+    """サイズと mtime (ns) から強い ETag を生成する。内容のハッシュ計算は行わない。
+
+    縮小プレビューは元ファイルの ETag に variant（幅・形式）を付けて区別する。
+    """
+    suffix = f"-{variant}" if variant else ""
+    return f'"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}{suffix}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    candidates = {tag.strip() for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def _not_modified_since(if_modified_since: str, mtime: float) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    return int(mtime) <= since.timestamp()
+
+
+@router.get("/jobs/{job_id}/visualizations/{filename:path}", response_model=None)
 async def get_visualization_file(
     job_id: str,
     filename: str,
     user_id: str = Depends(get_current_user),
     storage: StoragePort = storage_dep,
     status: JobStatusPort = status_dep,
-) -> FileResponse:
-    try:
-        path = _resolve_and_load_file(storage, status, job_id, filename)
-    except HTTPException:
-        raise
-    return FileResponse(path=path, filename=filename)
+    thumbnails: ThumbnailPort = thumbnails_dep,
+    anomaly_maps: AnomalyMapPort = anomaly_maps_dep,
+    w: int | None = Query(None, ge=16, le=4096),
+    image_format: Literal["webp", "jpeg", "png"] | None = Query(None, alias="format"),
+    if_none_match: str | None = Header(None),
+    if_modified_since: str | None = Header(None),
+) -> Response:
+    """成果物ファイルを返す。
+
+    heatmap / mask / overlay の PNG が無く異常マップストアがある場合は、
+    要求された画像だけをその場で描画して返す（描画結果はキャッシュする）。
+    w / format を指定すると縮小プレビューを生成して返す（形式省略時は webp）。
+    ETag / Last-Modified による条件付きリクエストには 304 を返す。
+    Range リクエスト（大きな CSV の部分取得）は FileResponse が処理する。
+    """
+    completed = _job_completed(status, job_id)
+    path = _resolve_file(storage, job_id, filename)
+    raw_render = None
+    if path is None:
+        raw_render = _resolve_raw_render(storage, job_id, filename)
+        if raw_render is None:
+            raise HTTPException(status_code=404, detail="file not found")
+        # 遅延描画する画像はストアのインデックスを基準に ETag / Last-Modified を決める
+        path = raw_render[0] / RAW_INDEX_FILENAME
+    stat_result = path.stat()
+    preview_format = image_format or ("webp" if w is not None else None)
+    variant = f"w{w or 0}.{preview_format}" if preview_format else ""
+    if raw_render is not None:
+        variant = f"{raw_render[2]}.{variant}" if variant else raw_render[2]
+    etag = _strong_etag(stat_result, variant)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True),
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL if completed else REVALIDATE_CACHE_CONTROL,
+    }
+
+    # RFC 9110: If-None-Match がある場合は If-Modified-Since を無視する
+    if if_none_match is not None:
+        not_modified = _etag_matches(if_none_match, etag)
+    elif if_modified_since is not None:
+        not_modified = _not_modified_since(if_modified_since, stat_result.st_mtime)
+    else:
+        not_modified = False
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+
+    if raw_render is not None:
+        try:
+            path = await run_in_threadpool(anomaly_maps.render, *raw_render)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="file not found") from None
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    if preview_format:
+        try:
+            preview = await run_in_threadpool(thumbnails.get_thumbnail, path, w, preview_format)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        preview_name = f"{Path(filename).stem}.{preview_format}"
+        return FileResponse(
+            path=preview,
+            filename=preview_name,
+            media_type=f"image/{preview_format}",
+            headers=headers,
+        )
+
+    if raw_render is not None:
+        return FileResponse(path=path, filename=filename, media_type="image/png", headers=headers)
+    return FileResponse(path=path, filename=filename, headers=headers, stat_result=stat_result)
@@ -11,3 +11,8 @@ def get_max_submissions_per_hour() -> int:
 def get_max_concurrent_running() -> int:
     """Get maximum concurrent running jobs from environment."""
     return int(os.getenv("MAX_CONCURRENT_RUNNING", "2"))
+
+
+def get_preflight_enabled() -> bool:
+    """Whether new jobs go through the preflight lane before the training queue."""
+    return os.getenv("PREFLIGHT_ENABLED", "0") not in {"0", "false", "False", ""}
@@ -1,6 +1,10 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import json
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Literal
 
 from src.ports.job_status_port import JobStatus, JobStatusPort
 from src.ports.storage_port import StoragePort
@@ -12,18 +16,43 @@ SUFFIX_TO_TYPE: dict[str, str] = {
     "_overlay": "overlay",
 }
 
+# Worker の VisualizationCollector が書き出すマニフェスト (ジョブ出力ディレクトリからの相対パス)
+MANIFEST_PATH = "visualizations/manifest.json"
+
+SortKey = Literal["name", "score_desc", "score_asc"]
+
 
 @dataclass(frozen=True)
 class VisualizationArtifactInfo:
     filename: str
     artifact_type: str
     url: str
+    size_bytes: int | None = None
+
+
+@dataclass(frozen=True)
+class VisualizationImageGroup:
+    name: str
+    artifacts: list[VisualizationArtifactInfo]
+    score: float | None = None
+    label: str | None = None
 
 
 @dataclass(frozen=True)
 class VisualizationResult:
     artifacts: list[VisualizationArtifactInfo]
     csv_files: list[str]
+    images: list[VisualizationImageGroup] = field(default_factory=list)
+    total_images: int = 0
+
+
+@lru_cache(maxsize=32)
+def _read_manifest(path: str, mtime_ns: int) -> dict[str, Any]:
+    """マニフェストを読み込む。(path, mtime) をキーにプロセス内でキャッシュする。"""
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    if not isinstance(data, dict):
+        raise ValueError("manifest must be a JSON object")
+    return data
 
 
 class GetVisualizationArtifacts:
@@ -35,20 +64,124 @@ class GetVisualizationArtifacts:
         self._storage = storage
         self._status = status
 
-    def execute(self, job_id: str) -> VisualizationResult:
+    def execute(
+        self,
+        job_id: str,
+        offset: int = 0,
+        limit: int | None = None,
+        sort: SortKey = "name",
+    ) -> VisualizationResult:
         job_info = self._status.get_status(job_id)
         if not job_info or job_info.get("status") != JobStatus.COMPLETED.value:
             return VisualizationResult(artifacts=[], csv_files=[])
 
+        manifest = self._load_manifest(job_id)
+        if manifest is not None:
+            return self._from_manifest(job_id, manifest, offset, limit, sort)
+        return self._from_listing(job_id, offset, limit, sort)
+
+    def _load_manifest(self, job_id: str) -> dict[str, Any] | None:
+        try:
+            path = self._storage.load_artifact_file(job_id, MANIFEST_PATH)
+            return _read_manifest(str(path), path.stat().st_mtime_ns)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _from_manifest(
+        self,
+        job_id: str,
+        manifest: dict[str, Any],
+        offset: int,
+        limit: int | None,
+        sort: SortKey,
+    ) -> VisualizationResult:
+        entries: list[dict[str, Any]] = list(manifest.get("images", []))
+        page = self._paginate(self._sort(entries, sort), offset, limit)
+        groups: list[VisualizationImageGroup] = []
+        for entry in page:
+            name = str(entry["name"])
+            files: dict[str, int] = entry.get("files", {})
+            artifacts = [
+                VisualizationArtifactInfo(
+                    filename=f"{name}_{atype}.png",
+                    artifact_type=atype,
+                    url=f"/jobs/{job_id}/visualizations/{name}_{atype}.png",
+                    size_bytes=size,
+                )
+                for atype, size in files.items()
+            ]
+            groups.append(
+                VisualizationImageGroup(
+                    name=name,
+                    artifacts=artifacts,
+                    score=entry.get("score"),
+                    label=entry.get("label"),
+                )
+            )
+        return VisualizationResult(
+            artifacts=[a for g in groups for a in g.artifacts],
+            csv_files=list(manifest.get("csv_files", [])),
+            images=groups,
+            total_images=len(entries),
+        )
+
+    def _from_listing(
+        self,
+        job_id: str,
+        offset: int,
+        limit: int | None,
+        sort: SortKey,
+    ) -> VisualizationResult:
+        """マニフェストの無い旧ジョブ向け。ディレクトリ一覧から組み立てる (スコアなし)。"""
         image_files = self._storage.list_artifacts(job_id, "visualizations")
         artifacts = [
             self._to_artifact_info(job_id, fname) for fname in image_files if fname.endswith(".png")
         ]
 
+        grouped: dict[str, list[VisualizationArtifactInfo]] = {}
+        for artifact in artifacts:
+            grouped.setdefault(self._image_name(artifact.filename), []).append(artifact)
+        entries = [{"name": name, "score": None} for name in grouped]
+        page = self._paginate(self._sort(entries, sort), offset, limit)
+        groups = [
+            VisualizationImageGroup(name=e["name"], artifacts=grouped[e["name"]]) for e in page
+        ]
+        page_names = {g.name for g in groups}
+
         root_files = self._storage.list_artifacts(job_id, "")
         csv_files = [f for f in root_files if f.endswith(".csv")]
 
-        return VisualizationResult(artifacts=artifacts, csv_files=csv_files)
+        return VisualizationResult(
+            artifacts=[a for a in artifacts if self._image_name(a.filename) in page_names],
+            csv_files=csv_files,
+            images=groups,
+            total_images=len(entries),
+        )
+
+    @staticmethod
+    def _sort(entries: list[dict[str, Any]], sort: SortKey) -> list[dict[str, Any]]:
+        if sort == "name":
+            return sorted(entries, key=lambda e: str(e["name"]))
+        # スコアの無い画像は並び順に関わらず末尾に置く
+        scored = [e for e in entries if e.get("score") is not None]
+        unscored = [e for e in entries if e.get("score") is None]
+        scored.sort(key=lambda e: float(e["score"]), reverse=sort == "score_desc")
+        return scored + sorted(unscored, key=lambda e: str(e["name"]))
+
+    @staticmethod
+    def _paginate(
+        entries: list[dict[str, Any]], offset: int, limit: int | None
+    ) -> list[dict[str, Any]]:
+        end = None if limit is None else offset + limit
+        return entries[offset:end]
+
+    @staticmethod
+    def _image_name(filename: str) -> str:
+        stem = filename.rsplit(".", 1)[0] if "." in filename else filename
+        for suffix in SUFFIX_TO_TYPE:
+            if stem.endswith(suffix):
+                return stem[: -len(suffix)]
+        return stem
 
     def _to_artifact_info(self, job_id: str, filename: str) -> VisualizationArtifactInfo:
         stem = filename.rsplit(".", 1)[0] if "." in filename else filename
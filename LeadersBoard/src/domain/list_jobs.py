@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+from src.ports.job_status_port import JobStatus, JobStatusPort
+
+
+@dataclass(frozen=True)
+class JobListPage:
+    jobs: list[dict[str, Any]]
+    next_cursor: str | None
+
+
+class ListJobs:
+    """ユーザーのジョブ一覧をカーソルページングで返すユースケース."""
+
+    MAX_LIMIT = 100
+
+    def __init__(self, status: JobStatusPort) -> None:
+        self.status = status
+
+    def execute(
+        self,
+        user_id: str,
+        cursor: str | None = None,
+        limit: int = 20,
+        status: str | None = None,
+    ) -> JobListPage:
+        if limit < 1 or limit > self.MAX_LIMIT:
+            raise ValueError(f"limit must be between 1 and {self.MAX_LIMIT}")
+        if cursor is not None:
+            score, separator, last_job_id = cursor.partition(":")
+            if not score.isdigit() or (separator and not last_job_id):
+                raise ValueError("invalid cursor")
+        status_filter = None
+        if status:
+            try:
+                status_filter = JobStatus(status)
+            except ValueError as exc:
+                raise ValueError(f"unknown status: {status}") from exc
+
+        jobs, next_cursor = self.status.list_jobs(
+            user_id, cursor=cursor, limit=limit, status=status_filter
+        )
+        return JobListPage(jobs=jobs, next_cursor=next_cursor)
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Literal
+
+from src.ports.job_status_port import JobStatus, JobStatusPort
+from src.ports.prediction_query_port import (
+    PredictionFilter,
+    PredictionQueryPort,
+    PredictionRecord,
+    ScoreHistogram,
+)
+from src.ports.storage_port import StoragePort
+
+# 投稿コードが書き出す画像単位予測。列指向の Parquet を優先し、旧ジョブは CSV を読む
+PREDICTION_FILES = ("image_predictions.parquet", "image_predictions.csv")
+
+ScoreOrder = Literal["desc", "asc"]
+
+
+def resolve_prediction_file(
+    storage: StoragePort, status: JobStatusPort, job_id: str
+) -> Path | None:
+    """完了済みジョブの画像単位予測ファイルを返す。未完了・未出力なら None。"""
+    job_info = status.get_status(job_id)
+    if not job_info or job_info.get("status") != JobStatus.COMPLETED.value:
+        return None
+    for filename in PREDICTION_FILES:
+        try:
+            return Path(storage.load_artifact_file(job_id, filename))
+        except FileNotFoundError:
+            continue
+    return None
+
+
+class GetScoreHistogram:
+    def __init__(
+        self,
+        storage: StoragePort,
+        status: JobStatusPort,
+        query: PredictionQueryPort,
+    ) -> None:
+        self._storage = storage
+        self._status = status
+        self._query = query
+
+    def execute(
+        self,
+        job_id: str,
+        bins: int = 20,
+        filters: PredictionFilter | None = None,
+    ) -> ScoreHistogram | None:
+        source = resolve_prediction_file(self._storage, self._status, job_id)
+        if source is None:
+            return None
+        return self._query.histogram(source, bins, filters or PredictionFilter())
+
+
+class GetWorstPredictions:
+    def __init__(
+        self,
+        storage: StoragePort,
+        status: JobStatusPort,
+        query: PredictionQueryPort,
+    ) -> None:
+        self._storage = storage
+        self._status = status
+        self._query = query
+
+    def execute(
+        self,
+        job_id: str,
+        n: int = 20,
+        order: ScoreOrder = "desc",
+        filters: PredictionFilter | None = None,
+    ) -> list[PredictionRecord] | None:
+        """異常スコア順に n 件返す。order=asc は見逃し (低スコア) の確認用。"""
+        source = resolve_prediction_file(self._storage, self._status, job_id)
+        if source is None:
+            return None
+        return self._query.top_scores(
+            source, n, ascending=order == "asc", filters=filters or PredictionFilter()
+        )
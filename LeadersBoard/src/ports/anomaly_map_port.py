@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+
+class AnomalyMapPort(ABC):
+    RENDERABLE_TYPES: tuple[str, ...] = ("heatmap", "mask", "overlay")
+
+    @abstractmethod
+    def render(
+        self,
+        store_dir: Path,
+        image_name: str,
+        artifact_type: str,
+        original: Path | None = None,
+    ) -> Path:
+        """生の異常マップストアから PNG を描画（キャッシュ済みなら再利用）してパスを返す
+
+        Args:
+            store_dir: 異常マップストアのディレクトリ（visualizations/raw）
+            image_name: 画像名（ストアのインデックスに記録された名前）
+            artifact_type: heatmap / mask / overlay
+            original: overlay の下地にする元画像（overlay 以外では不要）
+
+        Raises:
+            FileNotFoundError: 画像がストアに存在しない場合
+            ValueError: 未対応の種類、またはストアが壊れている場合
+        """
+        ...
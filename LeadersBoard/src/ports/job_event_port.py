@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from collections.abc import AsyncGenerator
+from typing import Any
+
+
+class JobEventPort(ABC):
+    @abstractmethod
+    def listen(
+        self, user_id: str, heartbeat_seconds: float = 15.0
+    ) -> AsyncGenerator[dict[str, Any] | None]:
+        """指定ユーザーのジョブ状態変更イベントを購読
+
+        Args:
+            user_id: ユーザーID
+            heartbeat_seconds: イベントが無い間に None を返す間隔
+
+        Returns:
+            状態変更イベント (job_id, status, updated_at 等)。
+            None はハートビートを表す
+        """
+        ...
@@ -21,3 +21,17 @@ class JobQueuePort(ABC):
     def dequeue(self, timeout: int = 0) -> dict[str, Any] | None:
         """ジョブをキューから取り出し (ブロッキング)"""
         ...
+
+    def requeue(self, job: dict[str, Any]) -> None:
+        """中断したジョブを再投入 (先頭に戻せない実装は末尾に投入)"""
+        self.enqueue(
+            job["job_id"],
+            job["submission_id"],
+            job["entrypoint"],
+            job["config_file"],
+            job.get("config", {}),
+        )
+
+    def peek(self) -> dict[str, Any] | None:
+        """次に dequeue されるジョブを取り出さずに返す (未対応の実装は None)"""
+        return None
@@ -32,3 +32,24 @@ class JobStatusPort(ABC):
     def count_running(self, user_id: str) -> int:
         """指定ユーザーの running 状態の件数を取得"""
         ...
+
+    @abstractmethod
+    def list_jobs(
+        self,
+        user_id: str,
+        cursor: str | None = None,
+        limit: int = 20,
+        status: JobStatus | None = None,
+    ) -> tuple[list[dict[str, Any]], str | None]:
+        """指定ユーザーのジョブを新しい順に取得
+
+        Args:
+            user_id: ユーザーID
+            cursor: 前ページの next_cursor（省略時は先頭から）
+            limit: 1ページあたりの最大件数
+            status: 指定時はこの状態のジョブのみ返す
+
+        Returns:
+            (ジョブ状態のリスト, 次ページのカーソル。最終ページならNone)
+        """
+        ...
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+
+
+@dataclass(frozen=True)
+class PredictionFilter:
+    """画像単位予測の絞り込み条件 (None は条件なし)。"""
+
+    pred_label: bool | None = None
+    gt_label: bool | None = None
+    category: str | None = None
+
+
+@dataclass(frozen=True)
+class ScoreHistogram:
+    bin_edges: list[float]
+    counts: list[int]
+    total: int
+
+
+@dataclass(frozen=True)
+class PredictionRecord:
+    image_path: str
+    anomaly_score: float
+    pred_label: bool | None = None
+    gt_label: bool | None = None
+    category: str | None = None
+
+
+class PredictionQueryPort(ABC):
+    @abstractmethod
+    def histogram(self, source: Path, bins: int, filters: PredictionFilter) -> ScoreHistogram:
+        """異常スコアのヒストグラムを集計
+
+        Args:
+            source: 画像単位予測ファイル (image_predictions.parquet または .csv)
+            bins: ビン数
+            filters: 絞り込み条件
+        """
+        ...
+
+    @abstractmethod
+    def top_scores(
+        self,
+        source: Path,
+        n: int,
+        ascending: bool,
+        filters: PredictionFilter,
+    ) -> list[PredictionRecord]:
+        """異常スコア順に上位 n 件を返す (ascending=True で低い順)"""
+        ...
@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+
+class ThumbnailPort(ABC):
+    SUPPORTED_FORMATS: tuple[str, ...] = ("webp", "jpeg", "png")
+
+    @abstractmethod
+    def get_thumbnail(self, source: Path, width: int | None, image_format: str) -> Path:
+        """縮小プレビューを生成（キャッシュ済みなら再利用）してパスを返す
+
+        Args:
+            source: 元画像の絶対パス
+            width: 出力幅（Noneまたは元画像以上なら縮小しない）
+            image_format: 出力形式（webp / jpeg / png）
+
+        Raises:
+            ValueError: 画像として読み込めない、または未対応の形式の場合
+        """
+        ...
@@ -1,13 +1,25 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
+from collections import defaultdict
+from dataclasses import dataclass
 from typing import Any
 
 
+@dataclass(frozen=True)
+class MetricRecord:
+    """学習中に記録されたステップ付きメトリクス"""
+
+    key: str
+    value: float
+    step: int = 0
+    timestamp_ms: int | None = None
+
+
 class TrackingPort(ABC):
     @abstractmethod
-    def start_run(self, run_name: str) -> str:
-        """MLflow runを開始"""
+    def start_run(self, run_name: str, run_id: str | None = None) -> str:
+        """MLflow runを開始 (run_id を渡すと中断した既存の run を再開する)"""
         ...
 
     @abstractmethod
@@ -29,3 +41,19 @@ class TrackingPort(ABC):
     def end_run(self) -> str:
         """MLflow runを終了し、run_idを返す"""
         ...
+
+    def log_metric_batch(self, records: list[MetricRecord]) -> None:
+        """ステップ付きメトリクスをまとめて記録 (別スレッドから呼ばれる。未対応の実装はステップを捨てる)"""
+        by_step: dict[int, dict[str, float]] = defaultdict(dict)
+        for record in records:
+            by_step[record.step][record.key] = record.value
+        for step in sorted(by_step):
+            self.log_metrics(by_step[step])
+
+    def fail_run(self) -> str:
+        """失敗したジョブの run を終了し、run_idを返す (記録済みのメトリクスは残す)"""
+        return self.end_run()
+
+    def interrupt_run(self) -> str:
+        """中断したジョブの run を終了し、run_idを返す (再投入後に start_run(run_id=...) で再開する)"""
+        return self.fail_run()
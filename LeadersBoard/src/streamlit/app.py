@@ -2,7 +2,9 @@ from __future__ import annotations
 
 import json
 import os
-from collections.abc import Iterable
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
 from typing import Any, cast
 
 import requests
@@ -71,17 +73,84 @@ def fetch_job_status(api_url: str, token: str, job_id: str) -> dict[str, Any] |
     return cast(dict[str, Any], response.json())
 
 
-def fetch_visualizations(api_url: str, token: str, job_id: str) -> dict[str, Any]:
+def fetch_jobs(
+    api_url: str,
+    token: str,
+    cursor: str | None = None,
+    limit: int = 20,
+    status: str | None = None,
+) -> dict[str, Any]:
+    """GET /jobs を呼び出してユーザーのジョブ一覧（新しい順）を取得する。"""
+    url = api_url.rstrip("/") + "/jobs"
+    headers = {"Authorization": f"Bearer {token}"}
+    params: dict[str, str | int] = {"limit": limit}
+    if cursor:
+        params["cursor"] = cursor
+    if status:
+        params["status"] = status
+    response = requests.get(url, headers=headers, params=params, timeout=15)
+    response.raise_for_status()
+    return cast(dict[str, Any], response.json())
+
+
+def fetch_visualizations(
+    api_url: str,
+    token: str,
+    job_id: str,
+    offset: int = 0,
+    limit: int | None = None,
+    sort: str = "name",
+) -> dict[str, Any]:
     """GET /jobs/{job_id}/visualizations を取得する。"""
     url = api_url.rstrip("/") + f"/jobs/{job_id}/visualizations"
     headers = {"Authorization": f"Bearer {token}"}
-    response = requests.get(url, headers=headers, timeout=15)
+    params: dict[str, str | int] = {"offset": offset, "sort": sort}
+    if limit is not None:
+        params["limit"] = limit
+    response = requests.get(url, headers=headers, params=params, timeout=15)
     if response.status_code == 404:
         return {"job_id": job_id, "artifacts": [], "csv_files": []}
     response.raise_for_status()
     return cast(dict[str, Any], response.json())
 
 
+VIZ_PAGE_SIZE = 100
+ARTIFACT_CACHE_MAX_ENTRIES = 64
+# 4列表示用の縮小プレビュー幅（API 側でリサイズ・WebP 変換される）
+PREVIEW_WIDTH = 384
+
+
+def fetch_artifact_bytes(
+    url: str,
+    token: str,
+    cache: dict[str, tuple[str, bool, bytes]],
+) -> bytes | None:
+    """成果物ファイルを ETag 付き条件付きリクエストで取得する。
+
+    cache は URL -> (ETag, immutable, 本体) の辞書。immutable な応答は再検証せず
+    そのまま返し、それ以外は If-None-Match を送って 304 なら本体を再利用する。
+    """
+    cached = cache.get(url)
+    if cached and cached[1]:
+        return cached[2]
+    headers = {"Authorization": f"Bearer {token}"}
+    if cached:
+        headers["If-None-Match"] = cached[0]
+    response = requests.get(url, headers=headers, timeout=15)
+    if response.status_code == 304 and cached:
+        return cached[2]
+    if response.status_code != 200:
+        return None
+    etag = response.headers.get("ETag")
+    if etag:
+        immutable = "immutable" in response.headers.get("Cache-Control", "")
+        cache.pop(url, None)
+        cache[url] = (etag, immutable, response.content)
+        while len(cache) > ARTIFACT_CACHE_MAX_ENTRIES:
+            cache.pop(next(iter(cache)))
+    return response.content
+
+
 def fetch_job_logs(api_url: str, token: str, job_id: str, tail_lines: int | None = None) -> str:
     """GET /jobs/{job_id}/logs を取得する。
 
@@ -102,6 +171,196 @@ def fetch_job_logs(api_url: str, token: str, job_id: str, tail_lines: int | None
     return cast(str, data.get("logs", ""))
 
 
+def parse_sse_events(lines: Iterable[str]) -> Iterator[dict[str, Any]]:
+    """SSE の行ストリームから data フィールドの JSON イベントを取り出す。
+
+    コメント行（keepalive）と JSON でないイベントは読み飛ばす。
+    """
+    data_lines: list[str] = []
+    for line in lines:
+        if line == "":
+            if data_lines:
+                try:
+                    event = json.loads("\n".join(data_lines))
+                except json.JSONDecodeError:
+                    event = None
+                if isinstance(event, dict):
+                    yield event
+                data_lines = []
+            continue
+        if line.startswith("data:"):
+            data_lines.append(line[len("data:") :].lstrip())
+
+
+class JobEventListener:
+    """GET /jobs/events を購読し、受信した状態変更をジョブIDごとに蓄積する。
+
+    Streamlit の再描画スレッドとは別スレッドで動き、描画側は drain() で
+    変更分だけを受け取る。切断時は間隔を置いて再接続する。
+    接続していない間に発行されたイベントは届かないため、(再)接続のたびに
+    take_resync() が一度だけ True を返し、描画側はステータスを取り直す。
+    session_alive が False を返すと (ブラウザのセッション終了) 接続を閉じて終了する。
+    """
+
+    RECONNECT_SECONDS = 5.0
+
+    def __init__(
+        self, api_url: str, token: str, session_alive: Callable[[], bool] | None = None
+    ) -> None:
+        self.api_url = api_url
+        self.token = token
+        self.session_alive = session_alive
+        self._pending: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._connected = threading.Event()
+        self._resync = threading.Event()
+        self._response: requests.Response | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def connected(self) -> bool:
+        return self._connected.is_set()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def take_resync(self) -> bool:
+        """(再)接続後に一度だけ True を返す。"""
+        resync = self._resync.is_set()
+        self._resync.clear()
+        return resync
+
+    def _mark_connected(self) -> None:
+        self._connected.set()
+        self._resync.set()
+
+    def _alive(self) -> bool:
+        if self._stop.is_set():
+            return False
+        if self.session_alive is not None and not self.session_alive():
+            self._stop.set()
+            return False
+        return True
+
+    def _lines_while_alive(self, lines: Iterable[str]) -> Iterator[str]:
+        # SSE の keepalive ごとにセッションの生存を確認する
+        for line in lines:
+            if not self._alive():
+                return
+            yield line
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        response = self._response
+        if response is not None:
+            # 読み取り中の接続を閉じてスレッドをすぐに終わらせる
+            response.close()
+
+    def drain(self) -> dict[str, dict[str, Any]]:
+        """前回呼び出し以降に届いたジョブごとの最新イベントを返す。"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return pending
+
+    def handle_event(self, event: dict[str, Any]) -> None:
+        job_id = event.get("job_id")
+        if not job_id:
+            return
+        with self._lock:
+            self._pending.setdefault(str(job_id), {}).update(event)
+
+    def _run(self) -> None:  # pragma: no cover - ネットワーク接続を伴う
+        url = self.api_url.rstrip("/") + "/jobs/events"
+        headers = {"Authorization": f"Bearer {self.token}"}
+        while self._alive():
+            try:
+                with requests.get(url, headers=headers, stream=True, timeout=(5, 60)) as resp:
+                    self._response = resp
+                    resp.raise_for_status()
+                    self._mark_connected()
+                    lines = resp.iter_lines(decode_unicode=True)
+                    for event in parse_sse_events(
+                        self._lines_while_alive(line or "" for line in lines)
+                    ):
+                        self.handle_event(event)
+            except Exception:
+                pass
+            finally:
+                self._response = None
+                self._connected.clear()
+            self._stop.wait(self.RECONNECT_SECONDS)
+
+
+# SSE 接続中でも、取りこぼしに備えてこの間隔でステータスを取り直す
+STATUS_RESYNC_SECONDS = 60.0
+
+
+def needs_status_fetch(
+    jobs: list[dict[str, Any]],
+    listener: JobEventListener | None,
+    last_fetched: float | None,
+    now: float,
+) -> bool:
+    """ステータス API を呼ぶべきかを返す。
+
+    実行中のジョブが無ければ呼ばない。SSE 未接続ならポーリングし、接続中は
+    (再)接続の直後と STATUS_RESYNC_SECONDS ごとにだけ取り直す。
+    """
+    if not has_running_jobs(jobs):
+        return False
+    if listener is None or not listener.connected:
+        return True
+    if listener.take_resync() or last_fetched is None:
+        return True
+    return now - last_fetched >= STATUS_RESYNC_SECONDS
+
+
+def apply_job_events(jobs: list[dict[str, Any]], events: dict[str, dict[str, Any]]) -> bool:
+    """受信済みイベントをジョブ一覧に反映し、変更があったかを返す。"""
+    changed = False
+    for job in jobs:
+        event = events.get(str(job.get("job_id")))
+        if not event:
+            continue
+        for key in ("status", "run_id", "error"):
+            if key in event and job.get(key) != event[key]:
+                job[key] = event[key]
+                changed = True
+    return changed
+
+
+def group_visualizations(viz_data: dict[str, Any]) -> dict[str, dict[str, Any]]:
+    """API の images グループを 画像名 -> {artifact_type: artifact} に変換する。
+
+    images を返さない旧 API の場合はファイル名から推定してまとめる。
+    """
+    image_groups: dict[str, dict[str, Any]] = {}
+    images = viz_data.get("images")
+    if images:
+        for image in images:
+            image_groups[image["name"]] = {
+                art.get("artifact_type", "unknown"): art for art in image.get("artifacts", [])
+            }
+        return image_groups
+    for art in viz_data.get("artifacts", []):
+        img_name = art["filename"].rsplit("_", 1)[0] if "_" in art["filename"] else art["filename"]
+        image_groups.setdefault(img_name, {})[art.get("artifact_type", "unknown")] = art
+    return dict(sorted(image_groups.items()))
+
+
+def format_image_label(name: str, score: float | None) -> str:
+    """選択肢の表示名（スコアがあれば併記）。"""
+    return f"{name} (score {score:.4f})" if score is not None else name
+
+
 def add_job_to_state(state: dict[str, Any], job: dict[str, Any]) -> list[dict[str, Any]]:
     """セッションステートのジョブ一覧を先頭挿入し、重複は前方に寄せる。"""
     jobs: list[dict[str, Any]] = state.setdefault("jobs", [])
@@ -113,6 +372,18 @@ def add_job_to_state(state: dict[str, Any], job: dict[str, Any]) -> list[dict[st
     return jobs
 
 
+def append_jobs_to_state(
+    state: dict[str, Any], jobs: list[dict[str, Any]], next_cursor: str | None
+) -> list[dict[str, Any]]:
+    """APIから取得したジョブを既存一覧の末尾に追加し、次ページのカーソルを保持する。"""
+    current: list[dict[str, Any]] = state.setdefault("jobs", [])
+    known = {j.get("job_id") for j in current}
+    current.extend(j for j in jobs if j.get("job_id") not in known)
+    state["jobs"] = current
+    state["jobs_next_cursor"] = next_cursor
+    return current
+
+
 def has_running_jobs(jobs: list[dict[str, Any]]) -> bool:
     """実行中（pending/running）のジョブが存在するか確認する。"""
     return any(job.get("status") in ("pending", "running") for job in jobs)
@@ -241,7 +512,21 @@ def _render_visualization_panel(
     if not token:
         return
 
-    viz_data = fetch_visualizations(api_url, token, job_id)
+    # 異常スコアの高い順にページ単位で取得する。完了済みジョブの一覧は変化しないため
+    # 再描画ごとの再取得を避ける
+    page = int(st.session_state.get(f"viz_page_{job_id}", 1))
+    viz_cache: dict[tuple[str, int], dict[str, Any]] = st.session_state.setdefault("viz_cache", {})
+    viz_data = viz_cache.get((job_id, page))
+    if viz_data is None:
+        viz_data = fetch_visualizations(
+            api_url,
+            token,
+            job_id,
+            offset=(page - 1) * VIZ_PAGE_SIZE,
+            limit=VIZ_PAGE_SIZE,
+            sort="score_desc",
+        )
+        viz_cache[(job_id, page)] = viz_data
     artifacts = viz_data.get("artifacts", [])
     csv_files = viz_data.get("csv_files", [])
 
@@ -253,18 +538,21 @@ def _render_visualization_panel(
         link = build_mlflow_artifacts_link(mlflow_url, run_id)
         st.markdown(f"📦 [MLflow Artifacts]({link})")
 
-    image_groups: dict[str, dict[str, Any]] = {}
-    for art in artifacts:
-        img_name = art["filename"].rsplit("_", 1)[0] if "_" in art["filename"] else art["filename"]
-        atype = art.get("artifact_type", "unknown")
-        if img_name not in image_groups:
-            image_groups[img_name] = {}
-        image_groups[img_name][atype] = art
+    total_images = int(viz_data.get("total_images") or 0)
+    if total_images > VIZ_PAGE_SIZE:
+        st.number_input(
+            f"ページ（全 {total_images} 画像、スコア降順）",
+            min_value=1,
+            max_value=(total_images + VIZ_PAGE_SIZE - 1) // VIZ_PAGE_SIZE,
+            key=f"viz_page_{job_id}",
+        )
 
-    image_names = sorted(image_groups.keys())
+    image_groups = group_visualizations(viz_data)
+    scores = {img["name"]: img.get("score") for img in viz_data.get("images") or []}
     selected = st.selectbox(
         "対象画像を選択",
-        image_names,
+        list(image_groups.keys()),
+        format_func=lambda name: format_image_label(name, scores.get(name)),
         key=f"viz_select_{job_id}",
     )
 
@@ -277,15 +565,12 @@ def _render_visualization_panel(
                 st.caption(vtype.capitalize())
                 if vtype in group:
                     art = group[vtype]
-                    img_url = api_url.rstrip("/") + art["url"]
+                    img_url = api_url.rstrip("/") + art["url"] + f"?w={PREVIEW_WIDTH}&format=webp"
+                    artifact_cache = st.session_state.setdefault("artifact_cache", {})
                     try:
-                        resp = requests.get(
-                            img_url,
-                            headers={"Authorization": f"Bearer {token}"},
-                            timeout=15,
-                        )
-                        if resp.status_code == 200:
-                            st.image(resp.content, use_container_width=True)
+                        content = fetch_artifact_bytes(img_url, token, artifact_cache)
+                        if content is not None:
+                            st.image(content, use_container_width=True)
                         else:
                             st.warning("画像を取得できません")
                     except Exception:
@@ -297,6 +582,40 @@ def _render_visualization_panel(
         st.caption("📊 CSV: " + ", ".join(csv_files))
 
 
+def _session_alive_checker() -> Callable[[], bool] | None:  # pragma: no cover - UI経由のみ
+    """現在のブラウザセッションが終了していないかを返す関数 (取得できなければ None)。"""
+    try:
+        from streamlit.runtime import get_instance  # type: ignore[import-not-found]
+        from streamlit.runtime.scriptrunner import (  # type: ignore[import-not-found]
+            get_script_run_ctx,
+        )
+    except ImportError:
+        return None
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return None
+    runtime = get_instance()
+    session_id = ctx.session_id
+    return lambda: bool(runtime.is_active_session(session_id))
+
+
+def _ensure_event_listener(api_url: str, token: str) -> JobEventListener | None:
+    """セッションごとに1つの JobEventListener を起動して返す。
+
+    リスナーはセッションが終了すると自分で接続を閉じて止まる。
+    """
+    if st is None or not token:  # pragma: no cover
+        return None
+    listener = cast(JobEventListener | None, st.session_state.get("job_event_listener"))
+    if listener is None or listener.token != token:
+        if listener is not None:
+            listener.stop()
+        listener = JobEventListener(api_url, token, session_alive=_session_alive_checker())
+        st.session_state["job_event_listener"] = listener
+    listener.start()
+    return listener
+
+
 def _render_jobs(api_url: str, mlflow_url: str) -> None:
     if st is None:  # pragma: no cover
         return
@@ -310,16 +629,32 @@ def _render_jobs(api_url: str, mlflow_url: str) -> None:
             st.rerun()
 
     token = st.session_state.get("token_input", "")
+    # リロード後もジョブを失わないよう、初回のみ API からジョブ一覧を復元する
+    if token and not st.session_state.get("jobs_restored"):
+        st.session_state["jobs_restored"] = True
+        try:
+            listing = fetch_jobs(api_url, token)
+            append_jobs_to_state(
+                st.session_state, listing.get("jobs", []), listing.get("next_cursor")
+            )
+        except Exception:  # pragma: no cover - UI経由のみ
+            pass
     jobs: list[dict[str, Any]] = st.session_state.get("jobs", [])
     if not jobs:
         st.info("まだジョブがありません。フォームから投稿してください。")
         return
 
-    # 実行中ジョブの検出用（最初にセッションステートから判定）
-    has_pending_or_running = any(job.get("status") in ("pending", "running") for job in jobs)
-
-    # 実行中ジョブがない場合は、APIリクエストをスキップしてキャッシュデータのみ使用
-    fetch_status = has_pending_or_running
+    # SSE で状態変更を受信できている間は届いたイベントだけを反映し、ステータスAPIは
+    # (再)接続の直後と一定間隔でだけ呼ぶ。未接続時は従来のポーリングにフォールバック。
+    listener = _ensure_event_listener(api_url, token)
+    if listener is not None and listener.connected:
+        apply_job_events(jobs, listener.drain())
+    now = time.monotonic()
+    fetch_status = needs_status_fetch(
+        jobs, listener, st.session_state.get("jobs_status_fetched_at"), now
+    )
+    if fetch_status:
+        st.session_state["jobs_status_fetched_at"] = now
     running_jobs_detected = False
 
     for job in list(jobs):
@@ -389,6 +724,21 @@ def _render_jobs(api_url: str, mlflow_url: str) -> None:
 
             st.divider()
 
+    next_cursor = st.session_state.get("jobs_next_cursor")
+    if token and next_cursor and st.button("さらに読み込む"):
+        try:
+            listing = fetch_jobs(api_url, token, cursor=next_cursor)
+            append_jobs_to_state(
+                st.session_state, listing.get("jobs", []), listing.get("next_cursor")
+            )
+            st.rerun()
+        except Exception as exc:  # pragma: no cover - UI経由のみ
+            st.error(f"ジョブ一覧の取得に失敗しました: {exc}")
+
+    # 実行中ジョブの有無が変わったら、自動更新の有無を切り替えるためアプリ全体を再実行する
+    if running_jobs_detected != st.session_state.get("jobs_auto_refresh", False):
+        st.rerun()
+
     # 自動更新の状態表示
     if running_jobs_detected:
         st.caption("⏳ 実行中のジョブがあります。5秒ごとに自動更新されます。")
@@ -410,9 +760,11 @@ def main() -> None:  # pragma: no cover - UI起動時に実行
     _render_submission_form(api_url, mlflow_url)
     st.divider()
 
-    # Fragment自動更新を適用（ただし実行中ジョブがない場合はAPIリクエストをスキップ）
-    render_jobs_with_auto_refresh = st.fragment(run_every="5s")(_render_jobs)
-    render_jobs_with_auto_refresh(api_url, mlflow_url)
+    # 実行中のジョブがある間だけ Fragment を5秒ごとに再実行する（全て終了していれば再実行しない）
+    auto_refresh = has_running_jobs(st.session_state.get("jobs", []))
+    st.session_state["jobs_auto_refresh"] = auto_refresh
+    render_jobs = st.fragment(run_every="5s" if auto_refresh else None)(_render_jobs)
+    render_jobs(api_url, mlflow_url)
 
 
 if __name__ == "__main__":  # pragma: no cover
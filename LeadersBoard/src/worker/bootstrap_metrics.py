@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import csv
+import logging
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from src.anomalib.visualization_selection import parse_label
+
+logger = logging.getLogger(__name__)
+
+# 投稿コードの test_results と同じメトリクス名 (anomalib の Evaluator が付ける名前)
+METRIC_NAMES = ("image_AUROC", "image_AUPR", "image_F1Score")
+
+# max_workers 未指定時のプロセス数の上限 (学習と同じホストで動くため CPU を使い切らない)
+DEFAULT_MAX_WORKERS = 4
+
+
+@dataclass(frozen=True)
+class ImagePredictions:
+    """画像単位の予測 (スコア・正解ラベル・予測ラベル)。"""
+
+    scores: np.ndarray
+    gt_labels: np.ndarray
+    pred_labels: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        return int(self.scores.shape[0])
+
+
+@dataclass(frozen=True)
+class ConfidenceInterval:
+    estimate: float
+    lower: float
+    upper: float
+    std: float
+
+
+@dataclass(frozen=True)
+class _Prepared:
+    """スコア昇順に並べ替え、同スコアをまとめたグループ境界を持つ評価用データ。"""
+
+    is_positive: np.ndarray
+    group_starts: np.ndarray
+    true_positive: np.ndarray | None
+    false_positive: np.ndarray | None
+    false_negative: np.ndarray | None
+
+
+def load_image_predictions(csv_path: Path) -> ImagePredictions | None:
+    """image_predictions.csv を読み込む。正解ラベルを持つ行が無ければ None。"""
+    if not csv_path.is_file():
+        return None
+    scores: list[float] = []
+    gts: list[bool] = []
+    preds: list[bool | None] = []
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            gt = parse_label(row.get("gt_label"))
+            try:
+                score = float(row.get("anomaly_score") or "")
+            except ValueError:
+                continue
+            if gt is None or not math.isfinite(score):
+                continue
+            scores.append(score)
+            gts.append(gt)
+            preds.append(parse_label(row.get("pred_label")))
+    if not scores:
+        return None
+    pred_labels = None
+    if all(p is not None for p in preds):
+        pred_labels = np.array(preds, dtype=bool)
+    return ImagePredictions(
+        scores=np.array(scores, dtype=np.float64),
+        gt_labels=np.array(gts, dtype=bool),
+        pred_labels=pred_labels,
+    )
+
+
+def image_metrics(predictions: ImagePredictions) -> dict[str, float]:
+    """全件での画像単位メトリクス。定義できないもの (F1 で予測ラベルが無い等) は含めない。"""
+    counts = np.ones((1, len(predictions)), dtype=np.int64)
+    values = _metrics_for_counts(_prepare(predictions), counts)[0]
+    return {
+        name: float(value)
+        for name, value in zip(METRIC_NAMES, values, strict=True)
+        if math.isfinite(value)
+    }
+
+
+def bootstrap_confidence_intervals(
+    predictions: ImagePredictions,
+    n_resamples: int = 10000,
+    confidence: float = 0.95,
+    seed: int = 0,
+    max_workers: int | None = None,
+    chunk_size: int = 256,
+) -> dict[str, ConfidenceInterval]:
+    """画像単位メトリクスのブートストラップ信頼区間 (パーセンタイル法) を求める。
+
+    リサンプルはチャンクごとに (chunk_size, N) のインデックス行列で一括生成し、
+    重み付き集計で全リサンプルのメトリクスをまとめて計算する。
+    チャンクはプロセスプールに分散し、各チャンクの乱数列は seed から派生させるため
+    結果はワーカー数に依存しない。プールは forkserver (使えなければ spawn) で起動する。
+    JobWorker はスレッド (プリステージ・停止タイマー) を持つため、fork だと子プロセスが
+    ロックを握ったままの状態を引き継いでデッドロックしうる。
+    """
+    if n_resamples < 1:
+        raise ValueError("n_resamples must be positive")
+    if not 0.0 < confidence < 1.0:
+        raise ValueError("confidence must be between 0 and 1")
+    prepared = _prepare(predictions)
+    estimates = _metrics_for_counts(prepared, np.ones((1, len(predictions)), dtype=np.int64))[0]
+
+    sizes = [min(chunk_size, n_resamples - start) for start in range(0, n_resamples, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    workers = max_workers or min(DEFAULT_MAX_WORKERS, os.cpu_count() or 1)
+    if workers <= 1 or len(sizes) == 1:
+        chunks = [_resample_chunk(prepared, s, size) for s, size in zip(seeds, sizes, strict=True)]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(sizes)), mp_context=_pool_context()
+        ) as pool:
+            chunks = list(pool.map(_resample_chunk, [prepared] * len(sizes), seeds, sizes))
+    samples = np.concatenate(chunks, axis=0)
+
+    alpha = (1.0 - confidence) / 2.0
+    intervals: dict[str, ConfidenceInterval] = {}
+    for column, name in enumerate(METRIC_NAMES):
+        values = samples[:, column]
+        values = values[np.isfinite(values)]
+        if values.size == 0 or not math.isfinite(estimates[column]):
+            continue
+        lower, upper = np.quantile(values, [alpha, 1.0 - alpha])
+        intervals[name] = ConfidenceInterval(
+            estimate=float(estimates[column]),
+            lower=float(lower),
+            upper=float(upper),
+            std=float(values.std(ddof=1)) if values.size > 1 else 0.0,
+        )
+    return intervals
+
+
+def intervals_to_metrics(intervals: dict[str, ConfidenceInterval]) -> dict[str, float]:
+    """MLflow に記録するメトリクス名に展開する (例: image_AUROC_ci_lower)。"""
+    metrics: dict[str, float] = {}
+    for name, interval in intervals.items():
+        metrics[f"{name}_ci_lower"] = interval.lower
+        metrics[f"{name}_ci_upper"] = interval.upper
+        metrics[f"{name}_std"] = interval.std
+    return metrics
+
+
+def _pool_context() -> multiprocessing.context.BaseContext:
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+def _prepare(predictions: ImagePredictions) -> _Prepared:
+    order = np.argsort(predictions.scores, kind="stable")
+    scores = predictions.scores[order]
+    group_starts = np.flatnonzero(np.r_[True, scores[1:] != scores[:-1]])
+    gt = predictions.gt_labels[order]
+    if predictions.pred_labels is None:
+        return _Prepared(gt.astype(np.float32), group_starts, None, None, None)
+    pred = predictions.pred_labels[order]
+    return _Prepared(
+        is_positive=gt.astype(np.float32),
+        group_starts=group_starts,
+        true_positive=(pred & gt).astype(np.float32),
+        false_positive=(pred & ~gt).astype(np.float32),
+        false_negative=(~pred & gt).astype(np.float32),
+    )
+
+
+def _resample_chunk(prepared: _Prepared, seed: np.random.SeedSequence, size: int) -> np.ndarray:
+    """size 回分のリサンプルを (size, N) のインデックス行列で生成し、メトリクスを返す。"""
+    n = prepared.is_positive.shape[0]
+    rng = np.random.default_rng(seed)
+    indices = rng.integers(0, n, size=(size, n))
+    indices += np.arange(size, dtype=indices.dtype)[:, None] * n
+    counts = np.bincount(indices.ravel(), minlength=size * n).reshape(size, n).astype(np.int32)
+    return _metrics_for_counts(prepared, counts)
+
+
+def _metrics_for_counts(prepared: _Prepared, counts: np.ndarray) -> np.ndarray:
+    """各行を「各画像の出現回数」とみなし、行ごとの AUROC / AUPR / F1 を返す。
+
+    AUROC は同スコアを 0.5 として数える Mann-Whitney U、AUPR は平均適合率。
+    重みの累積和は画像数 (< 2**24) を超えないため float32 で正確に保持できる。
+    """
+    weights = counts.astype(np.float32)
+    positive_weights = weights * prepared.is_positive
+    if prepared.group_starts.shape[0] < weights.shape[1]:
+        total = np.add.reduceat(weights, prepared.group_starts, axis=1)
+        pos = np.add.reduceat(positive_weights, prepared.group_starts, axis=1)
+    else:
+        total, pos = weights, positive_weights
+    pos_cum = np.cumsum(pos, axis=1)
+    total_cum = np.cumsum(total, axis=1)
+    total_pos = pos_cum[:, -1].astype(np.float64)
+    total_all = total_cum[:, -1].astype(np.float64)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # 各正例グループより低いスコアの負例数 (同スコアの負例は 0.5 として数える)
+        neg_below = total_cum - pos_cum - 0.5 * (total - pos)
+        auroc = _row_dot(pos, neg_below) / (total_pos * (total_all - total_pos))
+
+        # 閾値をグループ g のスコアまで下げたときの適合率 (= g 以上の正例数 / g 以上の件数)
+        above = total_all[:, None].astype(np.float32) - total_cum + total
+        precision = (total_pos[:, None].astype(np.float32) - pos_cum + pos) / np.maximum(above, 1)
+        aupr = _row_dot(pos, precision) / total_pos
+
+        if prepared.true_positive is None:
+            f1 = np.full(counts.shape[0], np.nan)
+        else:
+            tp_mask = weights @ prepared.true_positive
+            fp_mask = weights @ prepared.false_positive
+            fn_mask = weights @ prepared.false_negative
+            f1 = 2 * tp_mask / (2 * tp_mask + fp_mask + fn_mask)
+
+    return np.stack([auroc, aupr, f1], axis=1).astype(np.float64)
+
+
+def _row_dot(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return np.einsum("ij,ij->i", a, b, dtype=np.float64)
@@ -0,0 +1,285 @@
+from __future__ import annotations
+
+import compileall
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import platform
+import re
+import shutil
+import stat
+import subprocess
+import sys
+import tempfile
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+REQUIREMENTS_FILE = "requirements.txt"
+_CHUNK_SIZE = 1024 * 1024
+# "name[extra]==1.0 ; marker" 形式の要件のみ許可する (URL・ローカルパス・pip オプションは不可)
+_REQUIREMENT_PATTERN = re.compile(
+    r"^[A-Za-z0-9][A-Za-z0-9._-]*(\[[A-Za-z0-9._,\s-]+\])?\s*[^/\\@]*$"
+)
+
+
+def parse_requirements(text: str) -> list[str]:
+    """requirements.txt を正規化した要件のリストにする (コメント・空行を除き、順序を揃える).
+
+    Raises:
+        ValueError: pip オプション・URL・ローカルパスなど、オーバーレイで扱えない行がある
+    """
+    requirements = set()
+    for raw in text.splitlines():
+        line = raw.split("#", 1)[0].strip()
+        if not line:
+            continue
+        local_file = line.lower().endswith((".whl", ".zip", ".tar.gz"))
+        if line.startswith("-") or local_file or not _REQUIREMENT_PATTERN.match(line):
+            raise ValueError(f"unsupported line in {REQUIREMENTS_FILE}: {line}")
+        requirements.add(" ".join(line.split()))
+    return sorted(requirements, key=str.lower)
+
+
+def base_image_id() -> str:
+    """ベースイメージの識別子 (BASE_IMAGE_ID が無ければ Python のバージョンとプラットフォーム)."""
+    return os.getenv("BASE_IMAGE_ID") or f"{sys.version}|{platform.platform()}"
+
+
+class DependencyOverlay:
+    """提出物の requirements.txt を `pip install --target` のオーバーレイに解決する.
+
+    - オーバーレイは要件とベースイメージのハッシュごとに 1 度だけビルドし、以降は再利用する
+    - パッケージはローカルの wheelhouse (またはオフラインのインデックス) からのみ取得する
+    - 依存はベースイメージの torch などを隠さないよう `--no-deps` で入れず、必要なものは明示させる
+    - ビルドしたオーバーレイは書き込み不可にして公開し、各ファイルの sha256 を <key>.json に
+      記録する。使う前に毎回照合し、書き換えられていれば作り直す (別の提出物のジョブが
+      共有ボリューム上のオーバーレイにコードを仕込んでも、次のジョブには読み込ませない)
+    - ジョブは hold() の間オーバーレイの共有ロックを持ち、使用中のものは削除しない
+    - 合計サイズが上限を超えたら、最終利用の古いオーバーレイから削除する (LRU)
+    """
+
+    DEFAULT_CACHE_MAX_BYTES = 20 * 1024**3
+    DEFAULT_INSTALL_TIMEOUT = 15 * 60
+
+    def __init__(
+        self,
+        overlay_root: Path | None = None,
+        wheelhouse: Path | None = None,
+        index_url: str | None = None,
+        cache_max_bytes: int | None = None,
+        install_timeout: float | None = None,
+    ) -> None:
+        self.overlay_root = Path(
+            overlay_root or os.getenv("DEPENDENCY_OVERLAY_DIR", "/shared/overlays")
+        )
+        self.wheelhouse = Path(
+            wheelhouse or os.getenv("DEPENDENCY_WHEELHOUSE", "/shared/wheelhouse")
+        )
+        self.index_url = index_url or os.getenv("DEPENDENCY_INDEX_URL") or None
+        self.cache_max_bytes = cache_max_bytes or int(
+            os.getenv("DEPENDENCY_OVERLAY_MAX_BYTES", str(self.DEFAULT_CACHE_MAX_BYTES))
+        )
+        self.install_timeout = install_timeout or float(
+            os.getenv("DEPENDENCY_INSTALL_TIMEOUT", str(self.DEFAULT_INSTALL_TIMEOUT))
+        )
+
+    def key(self, requirements: list[str]) -> str:
+        payload = "\n".join([base_image_id(), *requirements])
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def resolve(self, submission_dir: Path) -> Path | None:
+        """提出物のオーバーレイのディレクトリを返す (requirements.txt が無ければ None).
+
+        子プロセスに使わせる間は削除されないよう hold() を使う。
+
+        Raises:
+            ValueError: requirements.txt が不正、またはインストールに失敗した
+        """
+        requirements = self._requirements(submission_dir)
+        if not requirements:
+            return None
+        return self._prepare(requirements)
+
+    @contextmanager
+    def hold(self, submission_dir: Path) -> Iterator[Path | None]:
+        """オーバーレイを解決し、ブロックを抜けるまで共有ロックで削除 (LRU) から守る."""
+        requirements = self._requirements(submission_dir)
+        if not requirements:
+            yield None
+            return
+        self.overlay_root.mkdir(parents=True, exist_ok=True)
+        with open(self._use_lock_path(self.key(requirements)), "w") as use_lock:
+            fcntl.flock(use_lock, fcntl.LOCK_SH)
+            try:
+                yield self._prepare(requirements)
+            finally:
+                fcntl.flock(use_lock, fcntl.LOCK_UN)
+
+    def _requirements(self, submission_dir: Path) -> list[str]:
+        requirements_path = submission_dir / REQUIREMENTS_FILE
+        if not requirements_path.is_file():
+            return []
+        return parse_requirements(requirements_path.read_text(encoding="utf-8"))
+
+    def _prepare(self, requirements: list[str]) -> Path:
+        target = self.overlay_root / self.key(requirements)
+        self.overlay_root.mkdir(parents=True, exist_ok=True)
+        # 複数のワーカーが同じ要件を同時にビルド・照合しないようにファイルロックで直列化する
+        with open(self.overlay_root / f".{target.name}.lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                if target.is_dir() and self._verify(target):
+                    os.utime(target)
+                    logger.info("Dependency overlay is cached at %s", target)
+                    return target
+                if target.is_dir():
+                    logger.warning("Dependency overlay %s was modified; rebuilding", target)
+                    # 使用中のジョブがあるため同じディレクトリ内で退避してから削除する
+                    # (書き込み不可のディレクトリは別の親へは rename できない)
+                    stale = target.with_name(f".stale-{target.name}-{os.getpid()}")
+                    _remove_tree(stale)
+                    os.replace(target, stale)
+                    _remove_tree(stale)
+                self._build(requirements, target)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+        self._evict(keep=target)
+        return target
+
+    def _use_lock_path(self, key: str) -> Path:
+        return self.overlay_root / f".{key}.use"
+
+    def _manifest_path(self, target: Path) -> Path:
+        return target.with_name(f"{target.name}.json")
+
+    def _verify(self, target: Path) -> bool:
+        """オーバーレイのファイル構成と内容が、ビルド時に記録した sha256 と一致するか."""
+        try:
+            expected = json.loads(self._manifest_path(target).read_text(encoding="utf-8"))
+            return _tree_digests(target) == expected["files"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+
+    def _install_command(self, requirements: list[str], destination: Path) -> list[str]:
+        command = [sys.executable, "-m", "pip", "install", "--no-deps", "--no-compile"]
+        command += ["--disable-pip-version-check", "--target", str(destination)]
+        if self.index_url:
+            command += ["--index-url", self.index_url]
+        else:
+            command += ["--no-index"]
+        if self.wheelhouse.is_dir():
+            command += ["--find-links", str(self.wheelhouse)]
+        return command + requirements
+
+    def _build(self, requirements: list[str], target: Path) -> None:
+        tmp = Path(tempfile.mkdtemp(dir=self.overlay_root, prefix=".build-"))
+        command = self._install_command(requirements, tmp)
+        logger.info("Building dependency overlay %s: %s", target.name, " ".join(requirements))
+        try:
+            result = subprocess.run(
+                command,
+                capture_output=True,
+                text=True,
+                timeout=self.install_timeout,
+                check=False,
+            )
+            if result.returncode != 0:
+                detail = (result.stderr or result.stdout).strip().splitlines()
+                message = detail[-1] if detail else f"pip exited with {result.returncode}"
+                raise ValueError(f"failed to install {REQUIREMENTS_FILE}: {message}")
+            # 書き込み不可にすると実行時に __pycache__ を作れないため、ここでバイトコンパイルする
+            compileall.compile_dir(str(tmp), quiet=1)
+            manifest = self._manifest_path(target)
+            manifest_tmp = tmp.with_name(f"{tmp.name}.json")
+            manifest_tmp.write_text(json.dumps({"files": _tree_digests(tmp)}), encoding="utf-8")
+            os.replace(manifest_tmp, manifest)
+            _make_read_only(tmp)
+            os.replace(tmp, target)
+        except subprocess.TimeoutExpired as exc:
+            _remove_tree(tmp)
+            raise ValueError(
+                f"installing {REQUIREMENTS_FILE} took longer than {exc.timeout} seconds"
+            ) from exc
+        except BaseException:
+            _remove_tree(tmp)
+            raise
+        logger.info("Built dependency overlay at %s", target)
+
+    def _entries(self) -> Iterator[Path]:
+        for entry in self.overlay_root.iterdir():
+            if entry.is_dir() and not entry.name.startswith("."):
+                yield entry
+
+    def _evict(self, keep: Path) -> None:
+        # 他の Worker プロセスの削除と重ならないようファイルロックで直列化する
+        with open(self.overlay_root / ".evict.lock", "w") as evict_lock:
+            fcntl.flock(evict_lock, fcntl.LOCK_EX)
+            try:
+                sized = []
+                for entry in self._entries():
+                    size = sum(p.stat().st_size for p in entry.rglob("*") if p.is_file())
+                    sized.append((entry.stat().st_mtime_ns, size, entry))
+                total = sum(size for _, size, _ in sized)
+                for _, size, entry in sorted(sized):
+                    if total <= self.cache_max_bytes:
+                        break
+                    if entry != keep and self._remove_unused(entry):
+                        total -= size
+            finally:
+                fcntl.flock(evict_lock, fcntl.LOCK_UN)
+
+    def _remove_unused(self, entry: Path) -> bool:
+        """hold() 中のジョブが無ければオーバーレイを削除する (使用中なら False)."""
+        with open(self._use_lock_path(entry.name), "w") as use_lock:
+            try:
+                fcntl.flock(use_lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                logger.info("Dependency overlay %s is in use; not evicting", entry.name)
+                return False
+            try:
+                _remove_tree(entry)
+                self._manifest_path(entry).unlink(missing_ok=True)
+            finally:
+                fcntl.flock(use_lock, fcntl.LOCK_UN)
+        return True
+
+
+def _tree_digests(root: Path) -> dict[str, str]:
+    """ディレクトリ以下の全エントリの相対パス → sha256 (シンボリックリンクは "symlink")."""
+    digests: dict[str, str] = {}
+    for path in sorted(root.rglob("*")):
+        name = path.relative_to(root).as_posix()
+        if path.is_symlink():
+            digests[name] = "symlink"
+        elif path.is_file():
+            digest = hashlib.sha256()
+            with open(path, "rb") as f:
+                while chunk := f.read(_CHUNK_SIZE):
+                    digest.update(chunk)
+            digests[name] = digest.hexdigest()
+    return digests
+
+
+def _make_read_only(root: Path) -> None:
+    write_bits = stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH
+    for dirpath, dirnames, filenames in os.walk(root, topdown=False):
+        for name in [*filenames, *dirnames]:
+            path = os.path.join(dirpath, name)
+            if not os.path.islink(path):
+                os.chmod(path, os.stat(path).st_mode & ~write_bits)
+    os.chmod(root, os.stat(root).st_mode & ~write_bits)
+
+
+def _remove_tree(root: Path) -> None:
+    """書き込み不可にしたディレクトリも含めて削除する."""
+    for dirpath, dirnames, _ in os.walk(root):
+        for name in [".", *dirnames]:
+            path = os.path.join(dirpath, name)
+            if not os.path.islink(path):
+                os.chmod(path, os.stat(path).st_mode | stat.S_IWUSR)
+    shutil.rmtree(root, ignore_errors=True)
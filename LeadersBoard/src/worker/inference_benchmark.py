@@ -0,0 +1,563 @@
+"""投稿モデルの CPU 推論ベンチマーク。
+
+投稿コードが出力ディレクトリに書き出したエクスポート済みモデル
+(exported/export.json に列挙された torch.export / TorchScript / ONNX / OpenVINO IR) を、
+プラットフォーム側で決めたバッチサイズ・スレッド数の組み合わせごとに別プロセスで読み込み、
+ウォームアップ後の推論時間だけを計測する。データ読み込みやメトリクス計算を
+含まないため、投稿間で比較できる。
+
+PyTorch のモデル (eager) を基準とし、ONNX Runtime / OpenVINO のモデルは
+同じ入力に対する出力の差 (数値一致) を確認してから計測する。
+
+計測プロセスは `python -m src.worker.inference_benchmark` として起動され、
+torch / onnxruntime / openvino はそのプロセス内でのみ import する
+(Worker 本体はこれらに依存しない)。
+"""
+
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import json
+import logging
+import os
+import resource
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# `python -m src.worker...` を解決できるディレクトリ (src の親)
+PACKAGE_ROOT = Path(__file__).resolve().parents[2]
+
+# 投稿コードが書き出すエクスポート情報 (ジョブ出力ディレクトリからの相対パス)
+EXPORT_DIRNAME = "exported"
+EXPORT_MANIFEST = "export.json"
+# 基準 (eager) として扱う PyTorch の形式
+TORCH_FORMATS = ("torch_export", "torchscript")
+ACCELERATED_FORMATS = ("onnx", "openvino")
+SUPPORTED_FORMATS = TORCH_FORMATS + ACCELERATED_FORMATS
+
+Runner = Callable[[np.ndarray], list[np.ndarray]]
+# 計測・量子化プロセスの起動方法 (command, env, timeout)。Worker は停止要求で
+# 終了できるよう自前の実装を渡す
+ProcessRunner = Callable[[list[str], dict[str, str], float], subprocess.CompletedProcess[str]]
+
+
+def run_process(
+    command: list[str], env: dict[str, str], timeout: float
+) -> subprocess.CompletedProcess[str]:
+    """PACKAGE_ROOT で子プロセスを実行し、標準出力・標準エラーを文字列で返す。"""
+    return subprocess.run(
+        command,
+        capture_output=True,
+        text=True,
+        env=env,
+        cwd=PACKAGE_ROOT,
+        timeout=timeout,
+        check=False,
+    )
+
+
+def _parse_ints(raw: str, default: tuple[int, ...]) -> tuple[int, ...]:
+    try:
+        values = tuple(int(v) for v in raw.split(",") if v.strip())
+    except ValueError:
+        logger.warning("Invalid integer list: %s, using %s", raw, default)
+        return default
+    if not values or any(v <= 0 for v in values):
+        logger.warning("Invalid integer list: %s, using %s", raw, default)
+        return default
+    return values
+
+
+@dataclass(frozen=True)
+class BenchmarkSettings:
+    """全投稿で共通の計測条件 (環境変数で設定)。"""
+
+    enabled: bool = True
+    batch_sizes: tuple[int, ...] = (1, 8)
+    threads: tuple[int, ...] = (1,)
+    warmup: int = 10
+    iterations: int = 50
+    timeout_seconds: float = 300.0
+    # ONNX / OpenVINO の出力を eager と比べるときの許容誤差 (|差| <= atol + rtol * |eager|)
+    parity_atol: float = 1e-3
+    parity_rtol: float = 1e-3
+
+    @classmethod
+    def from_env(cls) -> BenchmarkSettings:
+        defaults = cls()
+        return cls(
+            enabled=os.getenv("INFERENCE_BENCHMARK_ENABLED", "1").lower() not in {"0", "false"},
+            batch_sizes=_parse_ints(
+                os.getenv("INFERENCE_BENCHMARK_BATCH_SIZES", "1,8"), defaults.batch_sizes
+            ),
+            threads=_parse_ints(os.getenv("INFERENCE_BENCHMARK_THREADS", "1"), defaults.threads),
+            warmup=int(os.getenv("INFERENCE_BENCHMARK_WARMUP", str(defaults.warmup))),
+            iterations=int(os.getenv("INFERENCE_BENCHMARK_ITERATIONS", str(defaults.iterations))),
+            timeout_seconds=float(
+                os.getenv("INFERENCE_BENCHMARK_TIMEOUT", str(defaults.timeout_seconds))
+            ),
+            parity_atol=float(os.getenv("INFERENCE_PARITY_ATOL", str(defaults.parity_atol))),
+            parity_rtol=float(os.getenv("INFERENCE_PARITY_RTOL", str(defaults.parity_rtol))),
+        )
+
+
+@dataclass(frozen=True)
+class ExportedModel:
+    format: str
+    path: Path
+
+    @property
+    def is_reference(self) -> bool:
+        return self.format in TORCH_FORMATS
+
+
+@dataclass(frozen=True)
+class ExportManifest:
+    """exported/export.json の内容。
+
+    形式は 2 通り受け付ける:
+    - 単一モデル: {"format": ..., "file": ..., "input_shape": [...]}
+    - 複数モデル: {"models": [{"format": ..., "file": ...}, ...], "input_shape": [...],
+      "sample_input": "sample_input.npy"}
+
+    量子化評価 (quantization_eval) 用に、学習データの一部 (calibration_input) と
+    正解ラベル付きのテストデータの一部 (evaluation_input / evaluation_labels) を持てる。
+    score_output は画像スコアとして使う出力の位置 (平坦化した出力の何番目か)。
+    """
+
+    models: tuple[ExportedModel, ...]
+    input_shape: tuple[int, ...]
+    sample_input: Path | None = None
+    calibration_input: Path | None = None
+    evaluation_input: Path | None = None
+    evaluation_labels: Path | None = None
+    score_output: int = 0
+
+    @property
+    def reference(self) -> ExportedModel | None:
+        """数値一致の基準にする PyTorch モデル (先頭のもの)。"""
+        return next((m for m in self.models if m.is_reference), None)
+
+    @classmethod
+    def from_output_dir(cls, output_dir: Path) -> ExportManifest | None:
+        """exported/export.json を読む。無ければ None、内容が不正なら ValueError。"""
+        manifest_path = output_dir / EXPORT_DIRNAME / EXPORT_MANIFEST
+        if not manifest_path.is_file():
+            return None
+        export_dir = manifest_path.parent
+        try:
+            data = json.loads(manifest_path.read_text(encoding="utf-8"))
+            entries = data["models"] if "models" in data else [data]
+            formats = [(str(entry["format"]), str(entry["file"])) for entry in entries]
+            input_shape = tuple(int(v) for v in data["input_shape"])
+            optional_files = {key: data.get(key) for key in _OPTIONAL_FILES}
+            score_output = int(data.get("score_output", 0))
+        except (KeyError, TypeError, ValueError, AttributeError) as exc:
+            raise ValueError(f"invalid {EXPORT_MANIFEST}: {exc}") from exc
+        if not formats:
+            raise ValueError(f"invalid {EXPORT_MANIFEST}: no models")
+
+        models = []
+        for model_format, filename in formats:
+            if model_format not in SUPPORTED_FORMATS:
+                raise ValueError(f"unsupported export format: {model_format}")
+            models.append(ExportedModel(format=model_format, path=_resolve(export_dir, filename)))
+        files = {
+            key: _resolve(export_dir, str(name)) if name else None
+            for key, name in optional_files.items()
+        }
+        return cls(
+            models=tuple(models),
+            input_shape=input_shape,
+            sample_input=files["sample_input"],
+            calibration_input=files["calibration_input"],
+            evaluation_input=files["evaluation_input"],
+            evaluation_labels=files["evaluation_labels"],
+            score_output=score_output,
+        )
+
+    def model(self, model_format: str) -> ExportedModel | None:
+        return next((m for m in self.models if m.format == model_format), None)
+
+
+# export.json で任意に指定できる入力データ (.npy) のキー
+_OPTIONAL_FILES = ("sample_input", "calibration_input", "evaluation_input", "evaluation_labels")
+
+
+def _resolve(export_dir: Path, filename: str) -> Path:
+    if Path(filename).is_absolute() or ".." in Path(filename).parts:
+        raise ValueError(f"invalid path in {EXPORT_MANIFEST}: {filename}")
+    path = export_dir / filename
+    if not path.exists():
+        raise ValueError(f"exported file not found: {filename}")
+    return path
+
+
+class InferenceBenchmark:
+    """バッチサイズ × スレッド数ごとに計測プロセスを起動し、結果をメトリクスにまとめる."""
+
+    def __init__(self, settings: BenchmarkSettings | None = None) -> None:
+        self.settings = settings or BenchmarkSettings.from_env()
+
+    def run(self, output_dir: Path, runner: ProcessRunner = run_process) -> dict[str, float]:
+        """エクスポート済みモデルがあれば計測し、performance メトリクスを返す。
+
+        キー (Worker が system/ を付けて MLflow に記録する):
+        - PyTorch モデル: cpu_bs{バッチサイズ}_t{スレッド数}_{項目}
+        - ONNX / OpenVINO: cpu_{形式}_bs{バッチサイズ}_t{スレッド数}_{項目}
+        - 数値一致: export_{形式}_max_abs_diff / export_{形式}_parity_ok (1.0 / 0.0)
+
+        ONNX / OpenVINO の読み込みや計測に失敗した場合はそのモデルだけ警告して飛ばす。
+        計測プロセスは runner で起動する。
+        """
+        if not self.settings.enabled:
+            return {}
+        manifest = ExportManifest.from_output_dir(output_dir)
+        if manifest is None:
+            logger.info("No exported model in %s; skipping inference benchmark", output_dir)
+            return {}
+
+        metrics: dict[str, float] = {}
+        reference = manifest.reference
+        for exported in manifest.models:
+            if exported.is_reference:
+                if exported is reference:
+                    metrics.update(self._benchmark_all(manifest, exported, "cpu", runner))
+                continue
+            try:
+                if reference is not None:
+                    metrics.update(self._check_parity(manifest, reference, exported, runner))
+                prefix = f"cpu_{exported.format}"
+                metrics.update(self._benchmark_all(manifest, exported, prefix, runner))
+            except (RuntimeError, subprocess.TimeoutExpired) as exc:
+                logger.warning("Skipping %s model: %s", exported.format, exc)
+        return metrics
+
+    def _benchmark_all(
+        self, manifest: ExportManifest, exported: ExportedModel, prefix: str, runner: ProcessRunner
+    ) -> dict[str, float]:
+        metrics: dict[str, float] = {}
+        for threads in self.settings.threads:
+            for batch_size in self.settings.batch_sizes:
+                result = self._measure(manifest, exported, batch_size, threads, runner)
+                name = f"{prefix}_bs{batch_size}_t{threads}"
+                metrics.update({f"{name}_{key}": value for key, value in result.items()})
+        return metrics
+
+    def _check_parity(
+        self,
+        manifest: ExportManifest,
+        reference: ExportedModel,
+        exported: ExportedModel,
+        runner: ProcessRunner,
+    ) -> dict[str, float]:
+        arguments = ["--compare-model", str(exported.path), "--compare-format", exported.format]
+        if manifest.sample_input is not None:
+            arguments += ["--sample-input", str(manifest.sample_input)]
+        threads = self.settings.threads[0]
+        result = self._run_process(manifest, reference, arguments, threads, "parity check", runner)
+        max_abs_diff = result["max_abs_diff"]
+        tolerance = (
+            self.settings.parity_atol + self.settings.parity_rtol * result["max_abs_reference"]
+        )
+        parity_ok = max_abs_diff <= tolerance
+        if not parity_ok:
+            logger.warning(
+                "%s output differs from eager: max_abs_diff=%g (tolerance %g)",
+                exported.format,
+                max_abs_diff,
+                tolerance,
+            )
+        return {
+            f"export_{exported.format}_max_abs_diff": max_abs_diff,
+            f"export_{exported.format}_parity_ok": 1.0 if parity_ok else 0.0,
+        }
+
+    def _measure(
+        self,
+        manifest: ExportManifest,
+        exported: ExportedModel,
+        batch_size: int,
+        threads: int,
+        runner: ProcessRunner,
+    ) -> dict[str, float]:
+        arguments = [
+            "--batch-size",
+            str(batch_size),
+            "--warmup",
+            str(self.settings.warmup),
+            "--iterations",
+            str(self.settings.iterations),
+        ]
+        return self._run_process(
+            manifest,
+            exported,
+            arguments,
+            threads,
+            f"benchmark (format={exported.format}, batch_size={batch_size}, threads={threads})",
+            runner,
+        )
+
+    def _run_process(
+        self,
+        manifest: ExportManifest,
+        exported: ExportedModel,
+        arguments: list[str],
+        threads: int,
+        description: str,
+        runner: ProcessRunner,
+    ) -> dict[str, float]:
+        command = [
+            sys.executable,
+            "-m",
+            "src.worker.inference_benchmark",
+            "--model",
+            str(exported.path),
+            "--format",
+            exported.format,
+            "--input-shape",
+            ",".join(str(v) for v in manifest.input_shape),
+            "--threads",
+            str(threads),
+            *arguments,
+        ]
+        env = os.environ.copy()
+        # GPU を使わせず、BLAS/OpenMP のスレッド数も固定する
+        env["CUDA_VISIBLE_DEVICES"] = ""
+        for name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+            env[name] = str(threads)
+        completed = runner(command, env, self.settings.timeout_seconds)
+        if completed.returncode != 0:
+            raise RuntimeError(f"{description} failed: {completed.stderr.strip()[-500:]}")
+        lines = completed.stdout.strip().splitlines()
+        return {str(k): float(v) for k, v in json.loads(lines[-1]).items()}
+
+
+# ===================================================================
+# 計測プロセス
+# ===================================================================
+
+
+def summarize(latencies: list[float], batch_size: int, elapsed: float) -> dict[str, float]:
+    """1 バッチあたりの推論時間 (秒) から統計量を求める。"""
+    ordered = sorted(latencies)
+
+    def percentile(q: float) -> float:
+        # 線形補間 (numpy.percentile の既定と同じ)
+        position = (len(ordered) - 1) * q
+        low = int(position)
+        high = min(low + 1, len(ordered) - 1)
+        return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+    return {
+        "latency_p50_ms": percentile(0.50) * 1000,
+        "latency_p95_ms": percentile(0.95) * 1000,
+        "latency_p99_ms": percentile(0.99) * 1000,
+        "throughput_ips": batch_size * len(ordered) / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def peak_rss_mb() -> float:
+    # Linux の ru_maxrss は KiB 単位
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def max_abs_difference(reference: list[np.ndarray], outputs: list[np.ndarray]) -> float:
+    """浮動小数点の出力どうしの最大絶対誤差。
+
+    ラベルやマスクなど閾値処理後の出力は境界付近の僅かな差で反転するため比較しない。
+    """
+    if len(reference) != len(outputs):
+        raise ValueError(f"output count mismatch: {len(reference)} vs {len(outputs)}")
+    diff = 0.0
+    for expected, actual in zip(reference, outputs, strict=True):
+        if not np.issubdtype(expected.dtype, np.floating):
+            continue
+        if expected.shape != actual.shape:
+            raise ValueError(f"output shape mismatch: {expected.shape} vs {actual.shape}")
+        delta = np.abs(expected.astype(np.float64) - actual.astype(np.float64))
+        diff = max(diff, float(np.nanmax(delta)) if delta.size else 0.0)
+    return diff
+
+
+def _flatten_outputs(output: Any) -> list[np.ndarray]:
+    """PyTorch の出力 (テンソル・タプル・dict・dataclass) をテンソルの並び順に平坦化する。
+
+    torch.onnx.export が出力を平坦化する順序と同じになる。
+    """
+    if output is None:
+        return []
+    if hasattr(output, "detach"):
+        return [output.detach().cpu().numpy()]
+    if isinstance(output, dict):
+        items: Any = output.values()
+    elif isinstance(output, (list, tuple)):
+        items = output
+    elif dataclasses.is_dataclass(output):
+        items = [getattr(output, field.name) for field in dataclasses.fields(output)]
+    else:
+        return [np.asarray(output)]
+    return [array for item in items for array in _flatten_outputs(item)]
+
+
+def load_runner(model_path: Path, model_format: str, threads: int) -> Runner:
+    """形式ごとの推論関数 (ndarray のバッチ → 出力の ndarray のリスト) を作る。"""
+    if model_format in TORCH_FORMATS:
+        import torch
+
+        torch.set_num_threads(threads)
+        if model_format == "torch_export":
+            model = torch.export.load(str(model_path)).module()
+        else:
+            model = torch.jit.load(str(model_path), map_location="cpu")
+            model.eval()
+
+        def run_torch(batch: np.ndarray) -> list[np.ndarray]:
+            with torch.inference_mode():
+                return _flatten_outputs(model(torch.from_numpy(batch)))
+
+        return run_torch
+
+    if model_format == "onnx":
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        session = ort.InferenceSession(str(model_path), options, providers=["CPUExecutionProvider"])
+        input_name = session.get_inputs()[0].name
+
+        def run_onnx(batch: np.ndarray) -> list[np.ndarray]:
+            return [np.asarray(value) for value in session.run(None, {input_name: batch})]
+
+        return run_onnx
+
+    if model_format == "openvino":
+        import openvino as ov
+
+        compiled = ov.Core().compile_model(
+            str(model_path), "CPU", {"INFERENCE_NUM_THREADS": threads}
+        )
+
+        def run_openvino(batch: np.ndarray) -> list[np.ndarray]:
+            return [np.asarray(value) for value in compiled([batch]).to_tuple()]
+
+        return run_openvino
+
+    raise ValueError(f"unsupported export format: {model_format}")
+
+
+def _random_batch(batch_size: int, input_shape: tuple[int, ...]) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    return rng.standard_normal((batch_size, *input_shape), dtype=np.float32)
+
+
+def benchmark(
+    model_path: Path,
+    model_format: str,
+    input_shape: tuple[int, ...],
+    batch_size: int,
+    threads: int,
+    warmup: int,
+    iterations: int,
+) -> dict[str, float]:
+    run = load_runner(model_path, model_format, threads)
+    batch = _random_batch(batch_size, input_shape)
+
+    for _ in range(warmup):
+        run(batch)
+    latencies: list[float] = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        tick = time.perf_counter()
+        run(batch)
+        latencies.append(time.perf_counter() - tick)
+    elapsed = time.perf_counter() - start
+
+    result = summarize(latencies, batch_size, elapsed)
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def compare(
+    reference_path: Path,
+    reference_format: str,
+    model_path: Path,
+    model_format: str,
+    input_shape: tuple[int, ...],
+    threads: int,
+    sample_input: Path | None = None,
+) -> dict[str, float]:
+    """同じ入力に対する 2 つのモデルの出力を比べる (sample_input が無ければ乱数 2 枚)。"""
+    if sample_input is not None:
+        batch = np.ascontiguousarray(np.load(sample_input), dtype=np.float32)
+        if tuple(batch.shape[1:]) != input_shape:
+            raise ValueError(f"sample input shape {batch.shape} does not match {input_shape}")
+    else:
+        batch = _random_batch(2, input_shape)
+    expected = load_runner(reference_path, reference_format, threads)(batch)
+    actual = load_runner(model_path, model_format, threads)(batch)
+    floating = [e for e in expected if np.issubdtype(e.dtype, np.floating) and e.size]
+    return {
+        "max_abs_diff": max_abs_difference(expected, actual),
+        "max_abs_reference": max((float(np.nanmax(np.abs(e))) for e in floating), default=0.0),
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Measure CPU inference of an exported model.")
+    parser.add_argument("--model", type=Path, required=True)
+    parser.add_argument("--format", default="torchscript", choices=SUPPORTED_FORMATS)
+    parser.add_argument("--input-shape", required=True, help="例: 3,256,256")
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument(
+        "--compare-model", type=Path, help="指定すると計測の代わりに --model との出力差を求める"
+    )
+    parser.add_argument("--compare-format", choices=SUPPORTED_FORMATS)
+    parser.add_argument("--sample-input", type=Path, help="比較に使う入力バッチ (.npy)")
+    args = parser.parse_args(argv)
+    if args.iterations < 1:
+        parser.error("--iterations must be positive")
+    input_shape = tuple(int(v) for v in args.input_shape.split(","))
+
+    if args.compare_model is not None:
+        if args.compare_format is None:
+            parser.error("--compare-format is required with --compare-model")
+        result = compare(
+            reference_path=args.model,
+            reference_format=args.format,
+            model_path=args.compare_model,
+            model_format=args.compare_format,
+            input_shape=input_shape,
+            threads=args.threads,
+            sample_input=args.sample_input,
+        )
+    else:
+        result = benchmark(
+            model_path=args.model,
+            model_format=args.format,
+            input_shape=input_shape,
+            batch_size=args.batch_size,
+            threads=args.threads,
+            warmup=args.warmup,
+            iterations=args.iterations,
+        )
+    # 結果は最終行の JSON で親プロセスに返す
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""次のジョブの事前準備 (プリステージング)。
+
+JobWorker が現在のジョブを実行している間に、キューの先頭 (次に取り出されるジョブ) を
+peek して、提出ディレクトリの解決・エントリポイントと config.yaml の確認・config の解析・
+データセット (シャードと登録済みマニフェストのファイル) のページキャッシュへの先読みを
+済ませておく。キューからは取り出さないため、別の Worker が先に取り出した場合は
+準備結果が使われずに捨てられるだけになる。
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import yaml
+
+from src.ports.job_queue_port import JobQueuePort
+from src.ports.storage_port import StoragePort
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PrestageSettings:
+    enabled: bool = True
+    # キューの先頭を確認する間隔 (秒)
+    interval: float = 5.0
+    # 1 ジョブあたりに先読みするデータセットの最大バイト数
+    warm_bytes: int = 8 * 1024**3
+    # 保持する準備済みジョブの数 (他の Worker に取られたジョブは古い順に捨てる)
+    max_staged: int = 4
+
+    @classmethod
+    def from_env(cls) -> PrestageSettings:
+        return cls(
+            enabled=os.getenv("PRESTAGE_ENABLED", "1") not in {"0", "false", "False"},
+            interval=float(os.getenv("PRESTAGE_INTERVAL", "5")),
+            warm_bytes=int(os.getenv("PRESTAGE_WARM_BYTES", str(8 * 1024**3))),
+        )
+
+
+@dataclass
+class StagedJob:
+    job_id: str
+    submission_dir: Path | None
+    config: dict[str, Any]
+    warmed_files: int = 0
+    warmed_bytes: int = 0
+    missing_files: int = 0
+    elapsed: float = 0.0
+    error: str | None = None
+
+
+def dataset_files(config: dict[str, Any]) -> list[Path]:
+    """config.yaml が参照するデータセットのファイル (シャード、マニフェストの画像・マスク)。"""
+    paths: list[Path] = []
+    shards_path = (config.get("shards") or {}).get("path")
+    if shards_path and Path(shards_path).is_dir():
+        paths.extend(sorted(Path(shards_path).glob("*.npy")))
+    ref = config.get("dataset")
+    if ref:
+        try:
+            from src.anomalib.dataset_registry import DatasetRegistry
+        except ImportError as exc:
+            logger.info("Dataset registry is not available: %s", exc)
+            return paths
+        try:
+            manifest = DatasetRegistry().get(str(ref))
+        except (KeyError, OSError, ValueError) as exc:
+            logger.info("Dataset %s is not pre-staged: %s", ref, exc)
+            return paths
+        for file in manifest.files:
+            paths.append(manifest.image_path(file))
+            mask = manifest.mask_path(file)
+            if mask is not None:
+                paths.append(mask)
+    return paths
+
+
+def warm_page_cache(paths: list[Path], max_bytes: int) -> tuple[int, int, int]:
+    """ファイルの先読みを要求し、(ファイル数, バイト数, 見つからなかった数) を返す。
+
+    posix_fadvise(WILLNEED) はカーネルに非同期の先読みを依頼するだけなので、
+    呼び出し自体はすぐに戻る。
+    """
+    files = warmed = missing = 0
+    for path in paths:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except FileNotFoundError:
+            missing += 1
+            continue
+        except OSError:
+            continue
+        try:
+            size = os.fstat(fd).st_size
+            if warmed + size > max_bytes:
+                break
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+            files += 1
+            warmed += size
+        finally:
+            os.close(fd)
+    return files, warmed, missing
+
+
+class JobPrestager:
+    """キューの先頭のジョブをバックグラウンドスレッドで準備する。"""
+
+    def __init__(self, storage: StoragePort, settings: PrestageSettings | None = None) -> None:
+        self.storage = storage
+        self.settings = settings or PrestageSettings.from_env()
+        self._staged: OrderedDict[str, StagedJob] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self, queue: JobQueuePort) -> None:
+        if not self.settings.enabled or (self._thread and self._thread.is_alive()):
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._loop, args=(queue,), name="job-prestager", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.settings.interval + 1)
+            self._thread = None
+
+    def _loop(self, queue: JobQueuePort) -> None:
+        while not self._stop_event.is_set():
+            try:
+                job = queue.peek()
+            except Exception as exc:  # pragma: no cover - Redis 障害時もジョブ実行は続ける
+                logger.warning("Failed to peek the job queue: %s", exc)
+                job = None
+            if isinstance(job, dict) and job.get("job_id"):
+                with self._lock:
+                    staged = str(job["job_id"]) in self._staged
+                if not staged:
+                    self.stage(job)
+            self._stop_event.wait(self.settings.interval)
+
+    def stage(self, job: dict[str, Any]) -> StagedJob:
+        """ジョブを準備して保持する。失敗しても例外は送出せず error に記録する。"""
+        start = time.perf_counter()
+        job_id = str(job["job_id"])
+        try:
+            submission_dir = Path(self.storage.load(str(job["submission_id"])))
+            for name in (str(job["entrypoint"]), str(job["config_file"])):
+                if name.startswith("/") or ".." in Path(name).parts:
+                    raise ValueError(f"不正なファイルパスです: {name}")
+                if not (submission_dir / name).is_file():
+                    raise FileNotFoundError(f"{name} not found in submission")
+            config_path = submission_dir / str(job["config_file"])
+            config = yaml.safe_load(config_path.read_text(encoding="utf-8")) or {}
+            if not isinstance(config, dict):
+                raise ValueError("config.yaml must be a mapping")
+            staged = StagedJob(job_id, submission_dir, config)
+            files, warmed, missing = warm_page_cache(
+                dataset_files(config), self.settings.warm_bytes
+            )
+            staged.warmed_files, staged.warmed_bytes, staged.missing_files = files, warmed, missing
+        except (KeyError, OSError, ValueError, yaml.YAMLError) as exc:
+            staged = StagedJob(job_id, None, {}, error=str(exc))
+        staged.elapsed = time.perf_counter() - start
+        logger.info(
+            "Pre-staged job %s in %.2fs (%d dataset files, %.1f MB)%s",
+            job_id,
+            staged.elapsed,
+            staged.warmed_files,
+            staged.warmed_bytes / 1024**2,
+            f": {staged.error}" if staged.error else "",
+        )
+        with self._lock:
+            self._staged[job_id] = staged
+            while len(self._staged) > self.settings.max_staged:
+                self._staged.popitem(last=False)
+        return staged
+
+    def take(self, job_id: str) -> StagedJob | None:
+        """準備済みのジョブを取り出す (準備されていなければ None)。"""
+        with self._lock:
+            return self._staged.pop(job_id, None)
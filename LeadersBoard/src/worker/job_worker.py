@@ -5,13 +5,25 @@ import logging
 import os
 import subprocess
 import threading
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 from typing import Any, cast
 
+from src.anomalib.trainers.resume import RESUME_ENV, latest_checkpoint
 from src.ports.job_queue_port import JobQueuePort
 from src.ports.job_status_port import JobStatus, JobStatusPort
 from src.ports.storage_port import StoragePort
 from src.ports.tracking_port import TrackingPort
+from src.worker.bootstrap_metrics import (
+    bootstrap_confidence_intervals,
+    intervals_to_metrics,
+    load_image_predictions,
+)
+from src.worker.dependency_overlay import DependencyOverlay
+from src.worker.inference_benchmark import PACKAGE_ROOT, InferenceBenchmark
+from src.worker.job_prestager import JobPrestager
+from src.worker.metric_stream import METRICS_STREAM_ENV, METRICS_STREAM_FILE, MetricStreamTailer
+from src.worker.quantization_eval import QuantizationEvaluator
 from src.worker.visualization_collector import VisualizationCollector
 from src.worker.visualization_config import VisualizationConfig
 from src.worker.visualization_types import VisualizationError, VisualizationManifest
@@ -23,6 +35,10 @@ class JobStatusAlreadyReported(RuntimeError):
     """Raised when a failure has already been recorded to the status store."""
 
 
+class JobInterrupted(RuntimeError):
+    """Raised when the worker is stopped while a job is running; the job has been requeued."""
+
+
 class JobWorker:
     """Job queue consumer that executes submitted jobs."""
 
@@ -33,6 +49,13 @@ class JobWorker:
         "unlimited": None,
     }
     DEFAULT_TIMEOUT = RESOURCE_TIMEOUTS["small"]
+    # image_predictions.csv からのブートストラップ信頼区間 (0 で無効)
+    BOOTSTRAP_RESAMPLES = int(os.getenv("BOOTSTRAP_RESAMPLES", "10000"))
+    BOOTSTRAP_WORKERS = int(os.getenv("BOOTSTRAP_WORKERS", "0")) or None
+    # 停止要求時に子プロセスへ SIGTERM を送ってから SIGKILL するまでの猶予
+    STOP_GRACE_SECONDS = float(os.getenv("JOB_STOP_GRACE_SECONDS", "20"))
+    # 再投入したジョブの再開用チェックポイントを子プロセスに渡す環境変数 (anomalib.trainers が参照)
+    RESUME_CHECKPOINT_ENV = RESUME_ENV
 
     def __init__(
         self,
@@ -42,6 +65,10 @@ class JobWorker:
         tracking: TrackingPort,
         artifacts_root: Path | None = None,
         dequeue_timeout: float = 30.0,
+        benchmark: InferenceBenchmark | None = None,
+        quantization: QuantizationEvaluator | None = None,
+        prestager: JobPrestager | None = None,
+        dependencies: DependencyOverlay | None = None,
     ) -> None:
         self.queue = queue
         self.status = status
@@ -50,17 +77,37 @@ class JobWorker:
         self.artifacts_root = artifacts_root or self.DEFAULT_ARTIFACT_ROOT
         self.cleanup()
         self._stop_event = threading.Event()
+        self._process: subprocess.Popen[Any] | None = None
         self.dequeue_timeout = dequeue_timeout
+        self.benchmark = benchmark or InferenceBenchmark()
+        self.quantization = quantization or QuantizationEvaluator()
+        self.prestager = prestager or JobPrestager(storage)
+        self.dependencies = dependencies or DependencyOverlay()
 
     def cleanup(self) -> None:
         self.artifacts_root.mkdir(parents=True, exist_ok=True)
 
     def stop(self) -> None:
+        """停止を要求する. 実行中のジョブは中断し、キューに戻して次回チェックポイントから再開する."""
         self._stop_event.set()
+        process = self._process
+        if process is not None and process.poll() is None:
+            logger.info("Stopping running job (pid %s)", process.pid)
+            process.terminate()
+            timer = threading.Timer(self.STOP_GRACE_SECONDS, self._kill, args=(process,))
+            timer.daemon = True
+            timer.start()
+
+    @staticmethod
+    def _kill(process: subprocess.Popen[Any]) -> None:
+        if process.poll() is None:
+            process.kill()
 
     def run(self) -> None:
         """Block until stop is requested, processing jobs from the queue."""
         logger.info("JobWorker started.")
+        # 実行中に次のジョブ (キューの先頭) の提出物とデータセットを準備しておく
+        self.prestager.start(self.queue)
         try:
             while not self._stop_event.is_set():
                 job = self.queue.dequeue(timeout=int(self.dequeue_timeout))
@@ -69,6 +116,8 @@ class JobWorker:
                 job_id = job.get("job_id")
                 try:
                     self.execute_job(job)
+                except JobInterrupted:
+                    logger.info("Job %s was interrupted and requeued", job_id)
                 except JobStatusAlreadyReported:  # failure already recorded; avoid double update
                     logger.exception("Failed to execute job %s (status already recorded)", job_id)
                 except Exception as exc:  # pragma: no cover - guards worker crash
@@ -85,6 +134,7 @@ class JobWorker:
                         self.status.update(job_id, JobStatus.FAILED, error=str(exc))
                     logger.exception("Failed to execute job %s", job_id)
         finally:
+            self.prestager.stop()
             logger.info("JobWorker stopped.")
 
     def execute_job(self, job: dict[str, Any]) -> str | None:
@@ -97,14 +147,33 @@ class JobWorker:
         logger.info(f"Processing job {job_id} for submission {submission_id}")
         self.status.update(job_id, JobStatus.RUNNING)
 
-        submission_dir = Path(self.storage.load(submission_id))
+        staged = self.prestager.take(job_id)
+        if staged is not None and staged.error:
+            logger.warning(f"Pre-staging of job {job_id} reported: {staged.error}")
+            staged = None
+        elif staged is not None:
+            logger.info(
+                f"Job {job_id} was pre-staged ({staged.warmed_files} dataset files warmed, "
+                f"{staged.missing_files} missing)"
+            )
+        # 事前準備で解決済みの提出ディレクトリと解析済みの config はそのまま使う
+        if staged is not None and staged.submission_dir is not None:
+            submission_dir = staged.submission_dir
+        else:
+            submission_dir = Path(self.storage.load(submission_id))
         output_dir = self.artifacts_root / job_id
+        # 再投入されたジョブは前回の MLflow run を再開し、学習曲線を 1 本に保つ
+        tracking_run_id: str | None = job.get("run_id")
+        run_active = False
 
         try:
             self._validate_path(entrypoint)
             self._validate_path(config_file)
 
             command = self._build_command(submission_dir, entrypoint, config_file, job_id)
+            resume_from = latest_checkpoint(output_dir)
+            if resume_from is not None:
+                logger.info(f"Job {job_id} resumes from checkpoint {resume_from}")
             timeout_seconds = self._timeout_for_resource(
                 job.get("config", {}).get("resource_class")
             )
@@ -116,15 +185,44 @@ class JobWorker:
             # リアルタイムログ出力用のログファイルパスを取得
             log_path = self._get_log_path(job_id)
 
-            # subprocess.Popenでリアルタイムログ出力を実装
-            self._execute_subprocess(command, log_path, timeout_seconds)
+            # 子プロセスの実行中は依存オーバーレイが他の Worker に削除されないよう保持する
+            with self.dependencies.hold(submission_dir) as overlay:
+                env = self._build_env(overlay, resume_from)
+
+                # 学習中のメトリクスを逐次送れるよう、子プロセスの起動前に run を開始する
+                tracking_run_id = self._start_run(job_id, tracking_run_id)
+                run_active = True
+                stream_path = output_dir / METRICS_STREAM_FILE
+                if job.get("attempt"):
+                    self._rotate_metric_stream(stream_path, int(job["attempt"]))
+                env[METRICS_STREAM_ENV] = str(stream_path)
+                tailer = MetricStreamTailer(stream_path, self.tracking)
+                tailer.start()
+
+                # subprocess.Popenでリアルタイムログ出力を実装
+                # 再投入されたジョブは前回までのログに追記する
+                try:
+                    self._execute_subprocess(
+                        command, log_path, timeout_seconds, env, append=bool(job.get("attempt"))
+                    )
+                finally:
+                    tailer.stop()
 
             # Load metrics.json and log to MLflow
             logger.info(f"Loading metrics from {output_dir}/metrics.json")
             metrics_data = self._load_metrics(output_dir)
             config_path = submission_dir / config_file
-            self._collect_visualizations(output_dir, config_path)
+            self._collect_visualizations(
+                output_dir, config_path, staged.config if staged is not None else None
+            )
+            metrics_data["bootstrap"] = self._bootstrap_metrics(output_dir)
+            benchmark_metrics = self._benchmark_inference(output_dir)
+            if benchmark_metrics:
+                metrics_data.setdefault("performance", {}).update(benchmark_metrics)
+            metrics_data["quantization"] = self._evaluate_quantization(output_dir)
+            self._raise_if_stopped()
             run_id = self._record_metrics(job_id, metrics_data, output_dir)
+            run_active = False
 
             logger.info(f"Job {job_id} completed successfully! MLflow run_id: {run_id}")
             self.status.update(job_id, JobStatus.COMPLETED, run_id=run_id)
@@ -138,12 +236,28 @@ class JobWorker:
             logger.error(f"Job {job_id} {error_message}")
             self.status.update(job_id, JobStatus.FAILED, error=error_message)
             raise
+        except JobInterrupted:
+            attempt = int(job.get("attempt", 0)) + 1
+            logger.warning(f"Job {job_id} was interrupted by worker shutdown; requeueing")
+            self.status.update(job_id, JobStatus.PENDING)
+            if run_active:
+                self._interrupt_run(job_id)
+                run_active = False
+            requeued = {**job, "attempt": attempt}
+            if tracking_run_id:
+                requeued["run_id"] = tracking_run_id
+            self.queue.requeue(requeued)
+            raise
         except subprocess.CalledProcessError as exc:
             stderr = exc.stderr.decode(errors="ignore") if exc.stderr else ""
             error_message = self._oom_message(stderr) or stderr or str(exc)
             logger.error(f"Job {job_id} failed: {error_message}")
             self.status.update(job_id, JobStatus.FAILED, error=error_message)
             raise
+        finally:
+            if run_active:
+                # 失敗・中断したジョブも、それまでに送ったメトリクスは run に残す
+                self._fail_run(job_id)
 
     def _get_log_path(self, job_id: str) -> Path:
         """ログファイルのパスを取得する。
@@ -160,6 +274,8 @@ class JobWorker:
         command: list[str],
         log_path: Path,
         timeout_seconds: float | None,
+        env: dict[str, str] | None = None,
+        append: bool = False,
     ) -> None:
         """サブプロセスを実行し、出力をログファイルにストリーミング。
 
@@ -167,33 +283,43 @@ class JobWorker:
             command: 実行するコマンド
             log_path: ログ出力先ファイルパス
             timeout_seconds: タイムアウト秒数（Noneで無制限）
+            env: 子プロセスの環境変数（Noneで現在の環境）
+            append: ログファイルを上書きせず追記する
 
         Raises:
             subprocess.TimeoutExpired: タイムアウト時
             subprocess.CalledProcessError: 非ゼロ終了コード時
+            JobInterrupted: 停止要求で子プロセスを終了させた時
         """
         # ログディレクトリを作成
         log_path.parent.mkdir(parents=True, exist_ok=True)
 
         # 環境変数を設定（Pythonのバッファリングを無効化）
-        env = os.environ.copy()
+        env = dict(os.environ if env is None else env)
         env["PYTHONUNBUFFERED"] = "1"
 
         # ログファイルを開いてサブプロセスを起動
-        with open(log_path, "w", encoding="utf-8") as log_file:
+        with open(log_path, "a" if append else "w", encoding="utf-8") as log_file:
             process = subprocess.Popen(
                 command,
                 stdout=log_file,
                 stderr=subprocess.STDOUT,
                 env=env,
             )
+            self._process = process
             try:
+                if self._stop_event.is_set():  # 起動中に停止要求が来ていた
+                    process.terminate()
                 process.wait(timeout=timeout_seconds)
             except subprocess.TimeoutExpired:
                 process.kill()
                 process.wait()
                 raise
+            finally:
+                self._process = None
 
+            if process.returncode != 0 and self._stop_event.is_set():
+                raise JobInterrupted(f"stopped with exit code {process.returncode}")
             if process.returncode != 0:
                 # エラー時はログファイルからstderrを読み取る
                 stderr_content = log_path.read_text() if log_path.exists() else ""
@@ -201,6 +327,41 @@ class JobWorker:
                     process.returncode, command, stderr=stderr_content.encode()
                 )
 
+    def _run_post_process(
+        self, command: list[str], env: dict[str, str], timeout: float
+    ) -> subprocess.CompletedProcess[str]:
+        """後処理 (推論ベンチマーク・量子化評価) の子プロセスを実行する.
+
+        学習と同じく _process に登録し、stop() で終了させられるようにする。
+        停止要求で終わった場合は JobInterrupted を送出してジョブを再投入させる。
+        """
+        self._raise_if_stopped()
+        with subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            env=env,
+            cwd=PACKAGE_ROOT,
+        ) as process:
+            self._process = process
+            try:
+                if self._stop_event.is_set():
+                    process.terminate()
+                stdout, stderr = process.communicate(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.communicate()
+                raise
+            finally:
+                self._process = None
+        self._raise_if_stopped()
+        return subprocess.CompletedProcess(command, process.returncode, stdout, stderr)
+
+    def _raise_if_stopped(self) -> None:
+        if self._stop_event.is_set():
+            raise JobInterrupted("stopped during post-processing")
+
     def _build_command(
         self, submission_dir: Path, entrypoint: str, config_file: str, job_id: str
     ) -> list[str]:
@@ -213,16 +374,68 @@ class JobWorker:
             str(self.artifacts_root / job_id),
         ]
 
+    def _build_env(self, overlay: Path | None, resume_from: Path | None = None) -> dict[str, str]:
+        """子プロセスの環境変数を組み立てる.
+
+        依存オーバーレイ (提出物の requirements.txt から解決したもの) があれば PYTHONPATH に追加する。
+        既存の PYTHONPATH (/app/src の anomalib shim) より後ろ、ベースの site-packages より前になる。
+        再開用チェックポイントがあれば RESUME_CHECKPOINT_ENV で渡す。
+        """
+        env = os.environ.copy()
+        env.pop(self.RESUME_CHECKPOINT_ENV, None)
+        if resume_from is not None:
+            env[self.RESUME_CHECKPOINT_ENV] = str(resume_from)
+        if overlay is not None:
+            paths = [p for p in env.get("PYTHONPATH", "").split(os.pathsep) if p]
+            env["PYTHONPATH"] = os.pathsep.join([*paths, str(overlay)])
+            logger.info(f"Using dependency overlay {overlay}")
+        return env
+
+    def _rotate_metric_stream(self, stream_path: Path, attempt: int) -> None:
+        """前回までのメトリクスストリームを退避する.
+
+        前回の行は再開する run に送信済みなので、tailer が先頭から読み直して曲線を二重に
+        記録しないよう metrics_stream.<attempt>.jsonl に改名しておく。
+        """
+        if stream_path.exists():
+            stream_path.replace(stream_path.with_suffix(f".{attempt}{stream_path.suffix}"))
+
     def _timeout_for_resource(self, resource_class: str | None) -> float | None:
         if resource_class:
             return self.RESOURCE_TIMEOUTS.get(resource_class, self.DEFAULT_TIMEOUT)
         return self.DEFAULT_TIMEOUT
 
+    def _start_run(self, job_id: str, run_id: str | None = None) -> str:
+        try:
+            if run_id:
+                logger.info(f"Resuming MLflow run {run_id}")
+            else:
+                logger.info("Starting MLflow run")
+            return self.tracking.start_run(job_id, run_id=run_id)
+        except Exception as exc:
+            raise self._tracking_failed(job_id, exc) from exc
+
+    def _fail_run(self, job_id: str) -> None:
+        try:
+            self.tracking.fail_run()
+        except Exception:
+            logger.exception(f"Failed to close MLflow run of job {job_id}")
+
+    def _interrupt_run(self, job_id: str) -> None:
+        try:
+            self.tracking.interrupt_run()
+        except Exception:
+            logger.exception(f"Failed to suspend MLflow run of job {job_id}")
+
+    def _tracking_failed(self, job_id: str, exc: Exception) -> JobStatusAlreadyReported:
+        error_message = f"MLflow recording failed: {exc}"
+        logger.error(error_message)
+        self.status.update(job_id, JobStatus.FAILED, error=error_message)
+        return JobStatusAlreadyReported(error_message)
+
     def _record_metrics(self, job_id: str, metrics_data: dict[str, Any], output_dir: Path) -> str:
         """Log metrics/artifacts via the tracking adapter and handle failures."""
         try:
-            logger.info("Starting MLflow run")
-            self.tracking.start_run(job_id)
             self.tracking.log_params(metrics_data["params"])
             self.tracking.log_metrics(metrics_data["metrics"])
 
@@ -233,14 +446,20 @@ class JobWorker:
                 }
                 self.tracking.log_metrics(performance_metrics)
 
+            if metrics_data.get("bootstrap"):
+                self.tracking.log_metrics(metrics_data["bootstrap"])
+
+            if metrics_data.get("quantization"):
+                quantization_metrics = {
+                    f"quant/{k}": v for k, v in metrics_data["quantization"].items()
+                }
+                self.tracking.log_metrics(quantization_metrics)
+
             self.tracking.log_artifact(str(output_dir))
             run_id = self.tracking.end_run()
             return run_id
         except Exception as exc:
-            error_message = f"MLflow recording failed: {exc}"
-            logger.error(error_message)
-            self.status.update(job_id, JobStatus.FAILED, error=error_message)
-            raise JobStatusAlreadyReported(error_message) from exc
+            raise self._tracking_failed(job_id, exc) from exc
 
     def _oom_message(self, stderr: str) -> str | None:
         normalized = stderr.lower()
@@ -272,10 +491,17 @@ class JobWorker:
         self,
         output_dir: Path,
         config_path: Path,
+        staged_config: dict[str, Any] | None = None,
     ) -> VisualizationManifest | None:
-        """可視化アーティファクトを収集する。エラー時はログ記録してNoneを返す。"""
+        """可視化アーティファクトを収集する。エラー時はログ記録してNoneを返す。
+
+        事前準備で解析済みの config があれば config.yaml を読み直さない。
+        """
         try:
-            config = VisualizationConfig.from_config_file(config_path)
+            if staged_config is not None:
+                config = VisualizationConfig.from_config(staged_config)
+            else:
+                config = VisualizationConfig.from_config_file(config_path)
             if not config.enabled:
                 logger.info("Visualization disabled by config")
                 return None
@@ -291,6 +517,57 @@ class JobWorker:
             logger.warning("Visualization collection failed: %s", exc)
             return None
 
+    def _benchmark_inference(self, output_dir: Path) -> dict[str, float]:
+        """エクスポート済みモデルの CPU 推論を計測する。失敗してもジョブは失敗させない。"""
+        try:
+            metrics = self.benchmark.run(output_dir, self._run_post_process)
+        except JobInterrupted:
+            raise
+        except (OSError, RuntimeError, ValueError, subprocess.TimeoutExpired) as exc:
+            logger.warning("Inference benchmark failed: %s", exc)
+            return {}
+        if metrics:
+            logger.info("Inference benchmark: %s", metrics)
+        return metrics
+
+    def _evaluate_quantization(self, output_dir: Path) -> dict[str, float]:
+        """エクスポート済み ONNX モデルを INT8 量子化して評価する。失敗してもジョブは失敗させない。"""
+        try:
+            metrics = self.quantization.run(output_dir, self._run_post_process)
+        except JobInterrupted:
+            raise
+        except (OSError, RuntimeError, ValueError, subprocess.TimeoutExpired) as exc:
+            logger.warning("Quantization evaluation failed: %s", exc)
+            return {}
+        if metrics:
+            logger.info("Quantization evaluation: %s", metrics)
+        return metrics
+
+    def _bootstrap_metrics(self, output_dir: Path) -> dict[str, float]:
+        """画像単位メトリクスの信頼区間を計算する。失敗してもジョブは失敗させない。"""
+        if self.BOOTSTRAP_RESAMPLES <= 0:
+            return {}
+        try:
+            predictions = load_image_predictions(output_dir / "image_predictions.csv")
+            if predictions is None:
+                logger.info("No labeled image predictions; skipping bootstrap intervals")
+                return {}
+            intervals = bootstrap_confidence_intervals(
+                predictions,
+                n_resamples=self.BOOTSTRAP_RESAMPLES,
+                max_workers=self.BOOTSTRAP_WORKERS,
+            )
+        except (BrokenProcessPool, OSError, ValueError) as exc:
+            logger.warning("Bootstrap confidence intervals failed: %s", exc)
+            return {}
+        logger.info(
+            "Bootstrap intervals (%d resamples, %d images): %s",
+            self.BOOTSTRAP_RESAMPLES,
+            len(predictions),
+            {name: (round(ci.lower, 4), round(ci.upper, 4)) for name, ci in intervals.items()},
+        )
+        return intervals_to_metrics(intervals)
+
     def _load_metrics(self, output_dir: Path) -> dict[str, Any]:
         """Load metrics.json from output directory.
 
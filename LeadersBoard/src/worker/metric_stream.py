@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import threading
+from pathlib import Path
+
+from src.ports.tracking_port import MetricRecord, TrackingPort
+
+logger = logging.getLogger(__name__)
+
+# 子プロセスが学習中のメトリクスを追記する JSONL (出力ディレクトリ直下)
+METRICS_STREAM_FILE = "metrics_stream.jsonl"
+# 子プロセスに JSONL のパスを渡す環境変数 (anomalib.metric_stream が参照)
+METRICS_STREAM_ENV = "LEADERBOARD_METRICS_STREAM"
+
+
+def parse_stream_line(line: bytes) -> list[MetricRecord]:
+    """1 行 ({"step": 10, "metrics": {"train_loss": 0.52}, "timestamp": 1.7e9}) を解釈する.
+
+    不正な行は空リスト、数値でない値は読み飛ばす。
+    """
+    try:
+        payload = json.loads(line)
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        return []
+    if not isinstance(payload, dict) or not isinstance(payload.get("metrics"), dict):
+        return []
+    step = payload.get("step", 0)
+    step = step if isinstance(step, int) and not isinstance(step, bool) else 0
+    timestamp = payload.get("timestamp")
+    timestamp_ms = int(timestamp * 1000) if isinstance(timestamp, int | float) else None
+    records = []
+    for key, value in payload["metrics"].items():
+        if isinstance(value, bool) or not isinstance(value, int | float):
+            continue
+        if not math.isfinite(value):
+            continue
+        records.append(MetricRecord(str(key), float(value), step, timestamp_ms))
+    return records
+
+
+class MetricStreamTailer:
+    """子プロセスが追記するメトリクスの JSONL を tail し、まとめて TrackingPort に送る.
+
+    - 一定間隔でファイルの続きを読み、改行で終わらない書きかけの末尾は次回に回す
+    - 送信に失敗してもジョブは止めない (警告を出してそのバッチは捨てる)
+    - stop() で残りを読み切ってから終了する
+    """
+
+    DEFAULT_INTERVAL = 5.0
+
+    def __init__(
+        self,
+        path: Path,
+        tracking: TrackingPort,
+        interval: float | None = None,
+        max_batch: int = 1000,
+    ) -> None:
+        self.path = path
+        self.tracking = tracking
+        self.interval = interval or float(
+            os.getenv("METRICS_STREAM_INTERVAL", str(self.DEFAULT_INTERVAL))
+        )
+        self.max_batch = max_batch
+        self.forwarded = 0
+        self._offset = 0
+        self._partial = b""
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="metric-stream", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.poll()
+        if self.forwarded:
+            logger.info("Streamed %d metric values from %s", self.forwarded, self.path.name)
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            self.poll()
+
+    def poll(self) -> int:
+        """新しく追記された行を送り、送ったメトリクス数を返す."""
+        records = self._read_new_records()
+        sent = 0
+        for start in range(0, len(records), self.max_batch):
+            batch = records[start : start + self.max_batch]
+            try:
+                self.tracking.log_metric_batch(batch)
+            except Exception as exc:
+                logger.warning("Failed to stream %d metric values: %s", len(batch), exc)
+                continue
+            sent += len(batch)
+        self.forwarded += sent
+        return sent
+
+    def _read_new_records(self) -> list[MetricRecord]:
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(self._offset)
+                data = f.read()
+        except FileNotFoundError:
+            return []
+        self._offset += len(data)
+        lines = (self._partial + data).split(b"\n")
+        self._partial = lines.pop()
+        records: list[MetricRecord] = []
+        for line in lines:
+            if line.strip():
+                records.extend(parse_stream_line(line))
+        return records
@@ -0,0 +1,419 @@
+from __future__ import annotations
+
+import importlib
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import yaml
+
+from src.ports.job_queue_port import JobQueuePort
+from src.ports.job_status_port import JobStatus, JobStatusPort
+from src.ports.storage_port import StoragePort
+from src.worker.dependency_overlay import REQUIREMENTS_FILE, DependencyOverlay
+
+logger = logging.getLogger(__name__)
+
+# スモーク実行で trainer に上書きする設定 (1 バッチだけ CPU で通す)
+SMOKE_TRAINER_OVERRIDES: dict[str, Any] = {
+    "accelerator": "cpu",
+    "devices": 1,
+    "max_epochs": 1,
+    "limit_train_batches": 1,
+    "limit_val_batches": 1,
+    "limit_test_batches": 1,
+    "limit_predict_batches": 1,
+    "num_sanity_val_steps": 0,
+}
+# スモーク実行では時間のかかる任意処理 (エクスポート・可視化など) を無効にする
+SMOKE_DISABLED_SECTIONS = ("export", "feature_cache", "visualization")
+# スモーク実行であることを投稿に知らせる環境変数 (config を経由しない重い処理を省略させる)
+SMOKE_RUN_ENV = "LEADERBOARD_SMOKE_RUN"
+# Worker が子プロセスに渡す環境変数のうち、スモーク実行には引き継がないもの
+_JOB_ONLY_ENV = ("LEADERBOARD_RESUME_CHECKPOINT", "LEADERBOARD_METRICS_STREAM")
+
+
+class PreflightInterrupted(RuntimeError):
+    """Raised when the preflight worker is stopped during a smoke run; the job must be requeued."""
+
+
+@dataclass
+class PreflightSettings:
+    # 1 バッチのスモーク実行を行う (0 で静的な検証のみ)
+    smoke_run: bool = True
+    smoke_timeout: float = 600.0
+
+    @classmethod
+    def from_env(cls) -> PreflightSettings:
+        return cls(
+            smoke_run=os.getenv("PREFLIGHT_SMOKE_RUN", "1") not in {"0", "false", "False"},
+            smoke_timeout=float(os.getenv("PREFLIGHT_SMOKE_TIMEOUT", "600")),
+        )
+
+
+@dataclass
+class PreflightResult:
+    errors: list[str] = field(default_factory=list)
+    warnings: list[str] = field(default_factory=list)
+    # スモーク実行の標準出力・標準エラー
+    output: str = ""
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def message(self) -> str:
+        return "preflight failed: " + "; ".join(self.errors)
+
+
+def iter_class_paths(value: Any, prefix: str = "") -> Iterator[tuple[str, str]]:
+    """config 内の全ての class_path を (設定上の位置, class_path) で返す."""
+    if isinstance(value, dict):
+        for key, child in value.items():
+            location = f"{prefix}.{key}" if prefix else str(key)
+            if key == "class_path" and isinstance(child, str):
+                yield location, child
+            else:
+                yield from iter_class_paths(child, location)
+    elif isinstance(value, list):
+        for index, child in enumerate(value):
+            yield from iter_class_paths(child, f"{prefix}[{index}]")
+
+
+def resolve_class_path(class_path: str) -> None:
+    """class_path (module.Attr) を import して属性の存在を確かめる.
+
+    Raises:
+        ImportError: モジュールまたは属性が見つからない
+    """
+    module_name, _, attribute = class_path.rpartition(".")
+    if not module_name:
+        raise ImportError(f"{class_path} is not a dotted path")
+    module = importlib.import_module(module_name)
+    if not hasattr(module, attribute):
+        raise ImportError(f"module {module_name!r} has no attribute {attribute!r}")
+
+
+class PreflightChecker:
+    """GPU を確保する前に投稿を検証する.
+
+    1. config.yaml の解析と必須ファイルの確認
+    2. class_path の import 確認 (このプロセスで import 済みのモジュールを使い回すので 2 回目以降は速い)
+    3. 登録済みデータセットのマニフェストとファイルの照合 (存在とサイズ)
+    4. trainer を 1 バッチ・CPU に上書きしたスモーク実行
+    """
+
+    # 停止要求時にスモーク実行へ SIGTERM を送ってから SIGKILL するまでの猶予
+    # (docker stop の既定の猶予 10 秒より短くし、ジョブを再投入してから終了できるようにする)
+    STOP_GRACE_SECONDS = 5.0
+
+    def __init__(
+        self,
+        settings: PreflightSettings | None = None,
+        dependencies: DependencyOverlay | None = None,
+    ) -> None:
+        self.settings = settings or PreflightSettings.from_env()
+        self.dependencies = dependencies or DependencyOverlay()
+        self._stop_event = threading.Event()
+        self._process: subprocess.Popen[str] | None = None
+
+    def stop(self) -> None:
+        """停止を要求する. 実行中のスモーク実行は終了させ、check() は PreflightInterrupted を送出する."""
+        self._stop_event.set()
+        process = self._process
+        if process is not None and process.poll() is None:
+            logger.info("Stopping smoke run (pid %s)", process.pid)
+            process.terminate()
+            timer = threading.Timer(self.STOP_GRACE_SECONDS, self._kill, args=(process,))
+            timer.daemon = True
+            timer.start()
+
+    @staticmethod
+    def _kill(process: subprocess.Popen[str]) -> None:
+        if process.poll() is None:
+            process.kill()
+
+    def check(self, submission_dir: Path, job: dict[str, Any]) -> PreflightResult:
+        started = time.perf_counter()
+        result = PreflightResult()
+        config = self._check_files(submission_dir, job, result)
+        if config is not None:
+            self._check_class_paths(submission_dir, config, result)
+            self._check_dataset(config, result)
+        if result.ok and self.settings.smoke_run and config is not None:
+            self._smoke_run(submission_dir, job, config, result)
+        result.elapsed = time.perf_counter() - started
+        return result
+
+    def _check_files(
+        self, submission_dir: Path, job: dict[str, Any], result: PreflightResult
+    ) -> dict[str, Any] | None:
+        entrypoint = submission_dir / job["entrypoint"]
+        if not entrypoint.is_file():
+            result.errors.append(f"entrypoint {job['entrypoint']} not found")
+        config_path = submission_dir / job["config_file"]
+        if not config_path.is_file():
+            result.errors.append(f"{job['config_file']} not found")
+            return None
+        try:
+            config = yaml.safe_load(config_path.read_text(encoding="utf-8"))
+        except (yaml.YAMLError, UnicodeDecodeError) as exc:
+            result.errors.append(f"{job['config_file']} is not valid YAML: {exc}")
+            return None
+        if not isinstance(config, dict):
+            result.errors.append(f"{job['config_file']} must be a mapping")
+            return None
+        for section in ("trainer", "data", "model"):
+            if section in config and not isinstance(config[section], dict):
+                result.errors.append(f"{section} must be a mapping")
+        data = config.get("data")
+        if isinstance(data, dict) and "class_path" not in data:
+            result.warnings.append("data.class_path is not set; the entrypoint must resolve it")
+        return config
+
+    def _check_class_paths(
+        self, submission_dir: Path, config: dict[str, Any], result: PreflightResult
+    ) -> None:
+        has_requirements = (submission_dir / REQUIREMENTS_FILE).is_file()
+        for location, class_path in iter_class_paths(config):
+            top_level = class_path.split(".", 1)[0]
+            if (submission_dir / f"{top_level}.py").is_file() or (
+                submission_dir / top_level
+            ).is_dir():
+                # 投稿自身のモジュールはこのプロセスでは import しない (スモーク実行で確認する)
+                continue
+            try:
+                resolve_class_path(class_path)
+            except ModuleNotFoundError as exc:
+                if has_requirements and exc.name == top_level:
+                    result.warnings.append(f"{location}: {top_level} is not installed here")
+                    continue
+                result.errors.append(f"{location}: cannot import {class_path} ({exc})")
+            except Exception as exc:
+                result.errors.append(f"{location}: cannot import {class_path} ({exc})")
+
+    def _check_dataset(self, config: dict[str, Any], result: PreflightResult) -> None:
+        data = config.get("data")
+        init_args = data.get("init_args") if isinstance(data, dict) else None
+        root = init_args.get("root") if isinstance(init_args, dict) else None
+        shards = config.get("shards")
+        shards_path = shards.get("path") if isinstance(shards, dict) else None
+        if shards_path and not Path(shards_path).is_dir():
+            result.errors.append(f"shards.path {shards_path} does not exist")
+        ref = config.get("dataset")
+        if ref:
+            try:
+                from src.anomalib.dataset_registry import DatasetRegistry, verify_manifest
+            except ImportError as exc:
+                result.warnings.append(f"dataset registry is not available: {exc}")
+                return
+            try:
+                manifest = DatasetRegistry().get(str(ref))
+            except KeyError:
+                # 投稿側は未登録ならば data.init_args.root をそのまま使う
+                if not root or not Path(root).exists():
+                    result.errors.append(
+                        f"dataset {ref} is not registered and data.init_args.root does not exist"
+                    )
+                return
+            except (OSError, ValueError) as exc:
+                result.errors.append(f"dataset {ref}: invalid manifest ({exc})")
+                return
+            problems = verify_manifest(manifest)
+            if problems:
+                shown = ", ".join(problems[:3])
+                result.errors.append(f"dataset {manifest.ref}: {len(problems)} problems ({shown})")
+        elif root and not Path(root).exists():
+            result.errors.append(f"data.init_args.root {root} does not exist")
+
+    def smoke_config(self, config: dict[str, Any]) -> dict[str, Any]:
+        smoke = dict(config)
+        trainer = dict(smoke.get("trainer") or {})
+        trainer.pop("strategy", None)
+        trainer.update(SMOKE_TRAINER_OVERRIDES)
+        smoke["trainer"] = trainer
+        for section in SMOKE_DISABLED_SECTIONS:
+            if isinstance(smoke.get(section), dict):
+                smoke[section] = {**smoke[section], "enabled": False}
+        return smoke
+
+    def _smoke_env(self, overlay: Path | None) -> dict[str, str]:
+        env = os.environ.copy()
+        for name in _JOB_ONLY_ENV:
+            env.pop(name, None)
+        env["PYTHONUNBUFFERED"] = "1"
+        env["CUDA_VISIBLE_DEVICES"] = ""
+        env[SMOKE_RUN_ENV] = "1"
+        if overlay is not None:
+            paths = [p for p in env.get("PYTHONPATH", "").split(os.pathsep) if p]
+            env["PYTHONPATH"] = os.pathsep.join([*paths, str(overlay)])
+        return env
+
+    def _smoke_run(
+        self,
+        submission_dir: Path,
+        job: dict[str, Any],
+        config: dict[str, Any],
+        result: PreflightResult,
+    ) -> None:
+        # 相対パスの解決が変わらないよう、スモーク用の config は元の config の隣に置く
+        config_path = submission_dir / job["config_file"]
+        smoke_config = config_path.with_name(f".preflight-{job['job_id']}.yaml")
+        try:
+            smoke_config.write_text(yaml.safe_dump(self.smoke_config(config)), encoding="utf-8")
+            with (
+                self.dependencies.hold(submission_dir) as overlay,
+                tempfile.TemporaryDirectory(prefix="preflight-") as output,
+            ):
+                env = self._smoke_env(overlay)
+                command = [
+                    sys.executable,
+                    str(submission_dir / job["entrypoint"]),
+                    "--config",
+                    str(smoke_config),
+                    "--output",
+                    output,
+                ]
+                returncode, result.output = self._run_smoke_process(command, submission_dir, env)
+            if self._stop_event.is_set():
+                raise PreflightInterrupted("stopped during smoke run")
+            if returncode != 0:
+                output_lines = result.output.strip().splitlines()
+                tail = output_lines[-1] if output_lines else ""
+                result.errors.append(f"smoke run exited with {returncode}: {tail}")
+        except subprocess.TimeoutExpired as exc:
+            if isinstance(exc.stdout, bytes):
+                result.output = exc.stdout.decode(errors="replace")
+            else:
+                result.output = exc.stdout or ""
+            result.errors.append(
+                f"smoke run did not finish within {self.settings.smoke_timeout:.0f} seconds"
+            )
+        except ValueError as exc:  # requirements.txt の解決に失敗
+            result.errors.append(str(exc))
+        finally:
+            smoke_config.unlink(missing_ok=True)
+
+    def _run_smoke_process(
+        self, command: list[str], cwd: Path, env: dict[str, str]
+    ) -> tuple[int, str]:
+        """スモーク実行の子プロセスを停止要求で終了できるよう登録して実行する.
+
+        Raises:
+            subprocess.TimeoutExpired: smoke_timeout 以内に終わらない時 (子プロセスは終了させる)
+        """
+        process = subprocess.Popen(
+            command,
+            cwd=cwd,
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+        )
+        self._process = process
+        try:
+            if self._stop_event.is_set():  # 起動中に停止要求が来ていた
+                process.terminate()
+            try:
+                output, _ = process.communicate(timeout=self.settings.smoke_timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                output, _ = process.communicate()
+                raise subprocess.TimeoutExpired(
+                    command, self.settings.smoke_timeout, output=output
+                ) from None
+        finally:
+            self._process = None
+        return process.returncode, output or ""
+
+
+class PreflightWorker:
+    """検証レーンのキューからジョブを取り出し、通ったものだけ学習キューに回す."""
+
+    def __init__(
+        self,
+        queue: JobQueuePort,
+        jobs_queue: JobQueuePort,
+        status: JobStatusPort,
+        storage: StoragePort,
+        checker: PreflightChecker | None = None,
+        dequeue_timeout: float = 30.0,
+    ) -> None:
+        self.queue = queue
+        self.jobs_queue = jobs_queue
+        self.status = status
+        self.storage = storage
+        self.checker = checker or PreflightChecker()
+        self.dequeue_timeout = dequeue_timeout
+        self._stop_event = threading.Event()
+
+    def stop(self) -> None:
+        """停止を要求する. 検証中のジョブは中断して検証レーンの先頭に戻す."""
+        self._stop_event.set()
+        self.checker.stop()
+
+    def run(self) -> None:
+        logger.info("PreflightWorker started.")
+        while not self._stop_event.is_set():
+            job = self.queue.dequeue(timeout=int(self.dequeue_timeout))
+            if not job:
+                continue
+            try:
+                self.process(job)
+            except PreflightInterrupted:
+                logger.info("Preflight of job %s was interrupted; requeueing", job.get("job_id"))
+                self.queue.requeue(job)
+            except Exception:  # pragma: no cover - guards worker crash
+                logger.exception("Preflight of job %s crashed", job.get("job_id"))
+                # 検証できなかったジョブは学習側の検証に任せる
+                self._forward(job)
+        logger.info("PreflightWorker stopped.")
+
+    def process(self, job: dict[str, Any]) -> PreflightResult:
+        job_id = job["job_id"]
+        submission_dir = Path(self.storage.load(job["submission_id"]))
+        result = self.checker.check(submission_dir, job)
+        for warning in result.warnings:
+            logger.warning("Preflight of job %s: %s", job_id, warning)
+        if result.ok:
+            logger.info("Job %s passed preflight in %.1fs", job_id, result.elapsed)
+            self._forward(job)
+        else:
+            logger.info("Job %s rejected by preflight: %s", job_id, result.message())
+            self._write_log(job_id, result)
+            self.status.update(job_id, JobStatus.FAILED, error=result.message())
+        return result
+
+    def _write_log(self, job_id: str, result: PreflightResult) -> None:
+        """弾いたジョブの検証結果を通常のジョブログと同じ場所に書く (GET /jobs/{id}/logs で読める)."""
+        logs_root = getattr(self.storage, "logs_root", None)
+        if not logs_root:
+            return
+        lines = [f"[preflight] error: {error}" for error in result.errors]
+        lines += [f"[preflight] warning: {warning}" for warning in result.warnings]
+        if result.output:
+            lines += ["[preflight] smoke run output:", result.output.rstrip("\n")]
+        try:
+            log_path = Path(logs_root) / f"{job_id}.log"
+            log_path.parent.mkdir(parents=True, exist_ok=True)
+            log_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        except OSError as exc:
+            logger.warning("Failed to write preflight log for job %s: %s", job_id, exc)
+
+    def _forward(self, job: dict[str, Any]) -> None:
+        self.jobs_queue.enqueue(
+            job["job_id"],
+            job["submission_id"],
+            job["entrypoint"],
+            job["config_file"],
+            job.get("config", {}),
+        )
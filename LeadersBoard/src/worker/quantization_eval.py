@@ -0,0 +1,316 @@
+"""エクスポート済み ONNX モデルの INT8 量子化評価。
+
+投稿コードが exported/ に書き出した ONNX モデルを ONNX Runtime で INT8 に量子化し
+(static は学習データの一部 calibration_input で較正、dynamic は重みのみ)、
+正解ラベル付きのテストデータの一部 (evaluation_input / evaluation_labels) で
+FP32 / INT8 の画像単位メトリクス・モデルサイズ・CPU 推論時間を比べる。
+
+計測は inference_benchmark と同じく `python -m src.worker.quantization_eval` として
+別プロセスで行い、onnxruntime はそのプロセス内でのみ import する。
+量子化したモデルは exported/model.int8.onnx に保存され、他の出力と一緒に記録される。
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from src.worker.bootstrap_metrics import ImagePredictions, image_metrics
+from src.worker.inference_benchmark import (
+    ExportManifest,
+    ProcessRunner,
+    benchmark,
+    load_runner,
+    run_process,
+)
+
+logger = logging.getLogger(__name__)
+
+QUANTIZED_FILENAME = "model.int8.onnx"
+QUANTIZATION_MODES = ("static", "dynamic")
+# INT8 - FP32 の差を記録する画像単位メトリクス (評価データが 1 クラスだけだと求まらない)
+DELTA_METRICS = ("image_AUROC", "image_AUPR")
+# 評価時に一度に推論する画像数
+EVALUATION_BATCH_SIZE = 8
+
+
+@dataclass(frozen=True)
+class QuantizationSettings:
+    """量子化評価の条件 (環境変数で設定)。"""
+
+    enabled: bool = True
+    mode: str = "static"
+    calibration_samples: int = 32
+    threads: int = 1
+    warmup: int = 5
+    iterations: int = 20
+    timeout_seconds: float = 600.0
+
+    @classmethod
+    def from_env(cls) -> QuantizationSettings:
+        defaults = cls()
+        mode = os.getenv("QUANTIZATION_MODE", defaults.mode).lower()
+        if mode not in QUANTIZATION_MODES:
+            logger.warning("Invalid QUANTIZATION_MODE: %s, using %s", mode, defaults.mode)
+            mode = defaults.mode
+        return cls(
+            enabled=os.getenv("QUANTIZATION_ENABLED", "1").lower() not in {"0", "false"},
+            mode=mode,
+            calibration_samples=int(
+                os.getenv("QUANTIZATION_CALIBRATION_SAMPLES", str(defaults.calibration_samples))
+            ),
+            threads=int(os.getenv("QUANTIZATION_THREADS", str(defaults.threads))),
+            timeout_seconds=float(os.getenv("QUANTIZATION_TIMEOUT", str(defaults.timeout_seconds))),
+        )
+
+
+class QuantizationEvaluator:
+    """ONNX モデルを量子化して FP32 との差をメトリクスにまとめる."""
+
+    def __init__(self, settings: QuantizationSettings | None = None) -> None:
+        self.settings = settings or QuantizationSettings.from_env()
+
+    def run(self, output_dir: Path, runner: ProcessRunner = run_process) -> dict[str, float]:
+        """量子化評価を行い、quantization メトリクスを返す (Worker が quant/ を付けて記録する)。
+
+        キー:
+        - fp32_image_{AUROC,AUPR} / int8_image_{...} / image_{...}_delta (INT8 - FP32)
+        - fp32_size_mb / int8_size_mb / size_ratio (INT8 / FP32)
+        - fp32_latency_p50_ms / int8_latency_p50_ms / latency_delta_ms / latency_speedup
+        """
+        if not self.settings.enabled:
+            return {}
+        manifest = ExportManifest.from_output_dir(output_dir)
+        onnx_model = manifest.model("onnx") if manifest is not None else None
+        if manifest is None or onnx_model is None:
+            logger.info("No exported ONNX model in %s; skipping quantization", output_dir)
+            return {}
+        if manifest.evaluation_input is None or manifest.evaluation_labels is None:
+            logger.info("No evaluation data in export manifest; skipping quantization")
+            return {}
+        mode = self.settings.mode
+        if mode == "static" and manifest.calibration_input is None:
+            logger.info("No calibration data; falling back to dynamic quantization")
+            mode = "dynamic"
+
+        command = [
+            sys.executable,
+            "-m",
+            "src.worker.quantization_eval",
+            "--model",
+            str(onnx_model.path),
+            "--output",
+            str(onnx_model.path.parent / QUANTIZED_FILENAME),
+            "--mode",
+            mode,
+            "--input-shape",
+            ",".join(str(v) for v in manifest.input_shape),
+            "--evaluation-input",
+            str(manifest.evaluation_input),
+            "--evaluation-labels",
+            str(manifest.evaluation_labels),
+            "--score-output",
+            str(manifest.score_output),
+            "--calibration-samples",
+            str(self.settings.calibration_samples),
+            "--threads",
+            str(self.settings.threads),
+            "--warmup",
+            str(self.settings.warmup),
+            "--iterations",
+            str(self.settings.iterations),
+        ]
+        if manifest.calibration_input is not None:
+            command += ["--calibration-input", str(manifest.calibration_input)]
+        env = os.environ.copy()
+        env["CUDA_VISIBLE_DEVICES"] = ""
+        for name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+            env[name] = str(self.settings.threads)
+        completed = runner(command, env, self.settings.timeout_seconds)
+        if completed.returncode != 0:
+            raise RuntimeError(f"quantization failed: {completed.stderr.strip()[-500:]}")
+        lines = completed.stdout.strip().splitlines()
+        metrics = {str(k): float(v) for k, v in json.loads(lines[-1]).items()}
+        missing = [name for name in DELTA_METRICS if f"{name}_delta" not in metrics]
+        if missing:
+            logger.warning(
+                "Quantization delta of %s is unavailable: %d of %d evaluation images "
+                "are anomalous (both classes are required)",
+                ", ".join(missing),
+                int(metrics.get("evaluation_anomalous_images", 0)),
+                int(metrics.get("evaluation_images", 0)),
+            )
+        return metrics
+
+
+# ===================================================================
+# 量子化プロセス
+# ===================================================================
+
+
+def _load_array(path: Path) -> np.ndarray:
+    return np.ascontiguousarray(np.load(path), dtype=np.float32)
+
+
+def quantize(
+    model_path: Path,
+    output_path: Path,
+    mode: str,
+    calibration: np.ndarray | None = None,
+) -> None:
+    """ONNX Runtime で INT8 に量子化する (static は QDQ 形式・活性値 uint8・重み int8)."""
+    from onnxruntime.quantization import (
+        CalibrationDataReader,
+        QuantFormat,
+        QuantType,
+        quantize_dynamic,
+        quantize_static,
+    )
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    if mode == "dynamic":
+        quantize_dynamic(str(model_path), str(output_path), weight_type=QuantType.QInt8)
+        return
+    if calibration is None:
+        raise ValueError("static quantization needs calibration data")
+
+    import onnxruntime as ort
+
+    input_name = (
+        ort.InferenceSession(str(model_path), providers=["CPUExecutionProvider"])
+        .get_inputs()[0]
+        .name
+    )
+
+    class _Reader(CalibrationDataReader):  # type: ignore[misc]
+        def __init__(self) -> None:
+            self._batches: Iterator[np.ndarray] = iter(
+                calibration[i : i + 1] for i in range(len(calibration))
+            )
+
+        def get_next(self) -> dict[str, np.ndarray] | None:
+            batch = next(self._batches, None)
+            return None if batch is None else {input_name: batch}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # 較正前に形状推論・グラフ最適化を済ませる (ONNX Runtime の推奨手順)
+        prepared = Path(tmp) / "prepared.onnx"
+        quant_pre_process(str(model_path), str(prepared))
+        quantize_static(
+            str(prepared),
+            str(output_path),
+            _Reader(),
+            quant_format=QuantFormat.QDQ,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+        )
+
+
+def image_scores(
+    model_path: Path, images: np.ndarray, score_output: int, threads: int
+) -> np.ndarray:
+    """画像ごとのスコア。出力が異常マップなど画像より大きい場合は最大値をスコアとする。"""
+    run = load_runner(model_path, "onnx", threads)
+    scores = []
+    for start in range(0, len(images), EVALUATION_BATCH_SIZE):
+        output = run(images[start : start + EVALUATION_BATCH_SIZE])[score_output]
+        scores.append(output.reshape(output.shape[0], -1).max(axis=1))
+    return np.concatenate(scores).astype(np.float64)
+
+
+def _size_mb(path: Path) -> float:
+    return path.stat().st_size / (1024 * 1024)
+
+
+def evaluate(
+    model_path: Path,
+    output_path: Path,
+    mode: str,
+    input_shape: tuple[int, ...],
+    evaluation_input: Path,
+    evaluation_labels: Path,
+    score_output: int = 0,
+    calibration_input: Path | None = None,
+    calibration_samples: int = 32,
+    threads: int = 1,
+    warmup: int = 5,
+    iterations: int = 20,
+) -> dict[str, float]:
+    calibration = None
+    if calibration_input is not None:
+        calibration = _load_array(calibration_input)[:calibration_samples]
+    quantize(model_path, output_path, mode, calibration)
+
+    images = _load_array(evaluation_input)
+    labels = np.load(evaluation_labels).astype(bool).ravel()
+    if len(images) != len(labels):
+        raise ValueError(f"{len(images)} evaluation images but {len(labels)} labels")
+
+    result: dict[str, float] = {}
+    latencies: dict[str, float] = {}
+    for name, path in (("fp32", model_path), ("int8", output_path)):
+        scores = image_scores(path, images, score_output, threads)
+        for metric, value in image_metrics(ImagePredictions(scores, labels)).items():
+            result[f"{name}_{metric}"] = value
+        result[f"{name}_size_mb"] = _size_mb(path)
+        timing = benchmark(path, "onnx", input_shape, 1, threads, warmup, iterations)
+        latencies[name] = timing["latency_p50_ms"]
+        result[f"{name}_latency_p50_ms"] = latencies[name]
+
+    for metric in DELTA_METRICS:
+        if f"fp32_{metric}" in result and f"int8_{metric}" in result:
+            result[f"{metric}_delta"] = result[f"int8_{metric}"] - result[f"fp32_{metric}"]
+    result["size_ratio"] = result["int8_size_mb"] / result["fp32_size_mb"]
+    result["latency_delta_ms"] = latencies["int8"] - latencies["fp32"]
+    if latencies["int8"] > 0:
+        result["latency_speedup"] = latencies["fp32"] / latencies["int8"]
+    result["evaluation_images"] = float(len(labels))
+    result["evaluation_anomalous_images"] = float(labels.sum())
+    return result
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Quantize an ONNX model and compare with FP32.")
+    parser.add_argument("--model", type=Path, required=True)
+    parser.add_argument("--output", type=Path, required=True)
+    parser.add_argument("--mode", default="static", choices=QUANTIZATION_MODES)
+    parser.add_argument("--input-shape", required=True, help="例: 3,256,256")
+    parser.add_argument("--evaluation-input", type=Path, required=True)
+    parser.add_argument("--evaluation-labels", type=Path, required=True)
+    parser.add_argument("--score-output", type=int, default=0)
+    parser.add_argument("--calibration-input", type=Path)
+    parser.add_argument("--calibration-samples", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    result = evaluate(
+        model_path=args.model,
+        output_path=args.output,
+        mode=args.mode,
+        input_shape=tuple(int(v) for v in args.input_shape.split(",")),
+        evaluation_input=args.evaluation_input,
+        evaluation_labels=args.evaluation_labels,
+        score_output=args.score_output,
+        calibration_input=args.calibration_input,
+        calibration_samples=args.calibration_samples,
+        threads=args.threads,
+        warmup=args.warmup,
+        iterations=args.iterations,
+    )
+    # 結果は最終行の JSON で親プロセスに返す
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,22 @@
 from __future__ import annotations
 
+import csv
+import json
 import logging
+import os
 import shutil
+import sys
+import tempfile
 from pathlib import Path
+from typing import Any
 
+from src.anomalib.visualization_selection import ImageRecord, select_images
 from src.worker.visualization_config import VisualizationConfig
 from src.worker.visualization_types import (
+    MANIFEST_FILENAME,
+    MANIFEST_VERSION,
+    RAW_INDEX_FILENAME,
+    RAW_STORE_DIRNAME,
     VisualizationArtifact,
     VisualizationError,
     VisualizationManifest,
@@ -14,6 +25,15 @@ from src.worker.visualization_types import (
 
 logger = logging.getLogger(__name__)
 
+# 可視化 PNG を探索しないディレクトリ (Lightning のチェックポイント・ログなど)
+PRUNED_DIR_NAMES = frozenset(
+    {"checkpoints", "lightning_logs", "weights", "tensorboard", "wandb", "mlruns", "__pycache__"}
+)
+MAX_SCAN_DEPTH = 8
+
+# linux/fs.h: FICLONE = _IOW(0x94, 9, int)
+_FICLONE = 0x40049409
+
 SUFFIX_TO_TYPE: dict[str, VisualizationType] = {
     "_original": VisualizationType.ORIGINAL,
     "_heatmap": VisualizationType.HEATMAP,
@@ -50,25 +70,58 @@ class VisualizationCollector:
             for path, vtype, img_name in classified
             if vtype in allowed_types
         ]
+        raw_names, raw_has_masks = self._read_raw_store(viz_dir)
+        if config.max_images is not None:
+            names = {img_name for _, _, img_name in filtered} | set(raw_names)
+            selected = self._select_images(output_dir, names, config)
+            filtered = [item for item in filtered if item[2] in selected]
+            raw_names = [name for name in raw_names if name in selected]
         deduped = self._deduplicate_prefer_viz(filtered, viz_dir)
         artifacts = self._organize_files(deduped, viz_dir)
+        artifacts += self._raw_store_artifacts(raw_names, raw_has_masks, artifacts, allowed_types)
         csv_files = self._detect_csv_files(output_dir)
         unique_images = {a.original_image_name for a in artifacts}
-        return VisualizationManifest(
+        manifest = VisualizationManifest(
             artifacts=tuple(artifacts),
             csv_files=tuple(csv_files),
             total_images=len(unique_images),
         )
+        if artifacts:
+            self._write_manifest(output_dir, viz_dir, manifest)
+        return manifest
 
     def _scan_png_files(self, output_dir: Path) -> list[Path]:
-        """Recursively find all PNG files in output_dir."""
-        if not output_dir.exists():
+        """output_dir 配下の PNG を os.scandir で探す。
+
+        チェックポイントやログ等の重いディレクトリ、隠しディレクトリ、異常マップストアは
+        降りずに飛ばし、深さも MAX_SCAN_DEPTH までに制限する。
+        シンボリックリンクは出力ディレクトリ外を指し得るため辿らない。
+        """
+        if not output_dir.is_dir():
             return []
+        raw_store = output_dir / "visualizations" / RAW_STORE_DIRNAME
         result: list[Path] = []
-        for png in output_dir.rglob("*.png"):
-            result.append(png)
+        stack: list[tuple[Path, int]] = [(output_dir, 0)]
+        while stack:
+            directory, depth = stack.pop()
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            path = Path(entry.path)
+                            if depth < MAX_SCAN_DEPTH and not self._is_pruned(entry.name):
+                                if path != raw_store:
+                                    stack.append((path, depth + 1))
+                        elif entry.name.endswith(".png") and entry.is_file(follow_symlinks=False):
+                            result.append(Path(entry.path))
+            except OSError as exc:
+                logger.debug("Skipping unreadable directory %s: %s", directory, exc)
         return result
 
+    @staticmethod
+    def _is_pruned(name: str) -> bool:
+        return name.startswith(".") or name in PRUNED_DIR_NAMES
+
     def _classify_files(self, png_files: list[Path]) -> list[tuple[Path, VisualizationType, str]]:
         """Classify PNG files by suffix pattern."""
         result: list[tuple[Path, VisualizationType, str]] = []
@@ -100,7 +153,7 @@ class VisualizationCollector:
         classified: list[tuple[Path, VisualizationType, str]],
         viz_dir: Path,
     ) -> list[VisualizationArtifact]:
-        """Copy files to visualizations/ directory."""
+        """Place files in visualizations/ (hardlink, reflink, then copy as fallback)."""
         if not classified:
             return []
         viz_dir.mkdir(parents=True, exist_ok=True)
@@ -109,18 +162,184 @@ class VisualizationCollector:
             filename = f"{img_name}_{vtype.value}.png"
             dest = viz_dir / filename
             if not dest.exists():
-                shutil.copy2(src_path, dest)
+                self._place_file(src_path, dest)
             artifacts.append(
                 VisualizationArtifact(
                     filename=filename,
                     artifact_type=vtype,
                     original_image_name=img_name,
                     relative_path=f"visualizations/{filename}",
+                    size_bytes=dest.stat().st_size,
                 )
             )
         return artifacts
 
+    def _read_raw_store(self, viz_dir: Path) -> tuple[list[str], bool]:
+        """異常マップストアに記録された画像名と、マスクを保存しているかを返す。"""
+        index_path = viz_dir / RAW_STORE_DIRNAME / RAW_INDEX_FILENAME
+        if not index_path.is_file():
+            return [], False
+        try:
+            index = json.loads(index_path.read_text(encoding="utf-8"))
+            names = [str(entry["name"]) for entry in index.get("images", [])]
+            return names, bool(index.get("masks"))
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as exc:
+            logger.warning("Ignoring unreadable anomaly map store %s: %s", index_path, exc)
+            return [], False
+
+    @classmethod
+    def _place_file(cls, src: Path, dest: Path) -> None:
+        """ディスクを二重に消費しないよう hardlink → reflink → コピーの順に試す。"""
+        try:
+            os.link(src, dest)
+            return
+        except OSError:
+            pass
+        if cls._reflink(src, dest):
+            return
+        shutil.copy2(src, dest)
+
+    @staticmethod
+    def _reflink(src: Path, dest: Path) -> bool:
+        """Linux の FICLONE で copy-on-write 複製する。非対応の環境では False を返す。"""
+        if sys.platform != "linux":
+            return False
+        import fcntl
+
+        try:
+            with open(src, "rb") as s, open(dest, "wb") as d:
+                fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+            shutil.copystat(src, dest)
+            return True
+        except OSError:
+            dest.unlink(missing_ok=True)
+            return False
+
+    def _raw_store_artifacts(
+        self,
+        names: list[str],
+        has_masks: bool,
+        existing: list[VisualizationArtifact],
+        allowed_types: set[VisualizationType],
+    ) -> list[VisualizationArtifact]:
+        """異常マップストアから遅延描画できる画像をアーティファクトとして列挙する。
+
+        PNG が既にある種類は除く。ファイルはまだ存在しないため size_bytes は 0。
+        overlay は下地となる original がある画像のみ対象にする。
+        """
+        if not names:
+            return []
+        present = {(a.original_image_name, a.artifact_type) for a in existing}
+        originals = {
+            a.original_image_name for a in existing if a.artifact_type == VisualizationType.ORIGINAL
+        }
+        renderable = [VisualizationType.HEATMAP, VisualizationType.OVERLAY]
+        if has_masks:
+            renderable.append(VisualizationType.MASK)
+
+        artifacts: list[VisualizationArtifact] = []
+        for name in names:
+            for vtype in renderable:
+                if vtype not in allowed_types or (name, vtype) in present:
+                    continue
+                if vtype == VisualizationType.OVERLAY and name not in originals:
+                    continue
+                filename = f"{name}_{vtype.value}.png"
+                artifacts.append(
+                    VisualizationArtifact(
+                        filename=filename,
+                        artifact_type=vtype,
+                        original_image_name=name,
+                        relative_path=f"visualizations/{filename}",
+                    )
+                )
+        return artifacts
+
     def _detect_csv_files(self, output_dir: Path) -> list[str]:
         """Detect CSV prediction files in output directory root."""
         csv_names = ["image_predictions.csv", "pixel_predictions.csv"]
         return [name for name in csv_names if (output_dir / name).is_file()]
+
+    def _load_image_records(self, output_dir: Path) -> dict[str, ImageRecord]:
+        """image_predictions.csv から画像名 -> 予測結果 (スコア・予測/正解ラベル) を読み取る。"""
+        csv_path = output_dir / "image_predictions.csv"
+        if not csv_path.is_file():
+            return {}
+        records: dict[str, ImageRecord] = {}
+        with open(csv_path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                image_path = row.get("image_path")
+                if not image_path:
+                    continue
+                try:
+                    score: float | None = float(row.get("anomaly_score") or "")
+                except ValueError:
+                    score = None
+                name = Path(image_path).stem
+                records[name] = ImageRecord(
+                    name=name,
+                    score=score,
+                    pred_label=row.get("pred_label"),
+                    gt_label=row.get("gt_label") or None,
+                )
+        return records
+
+    def _select_images(
+        self,
+        output_dir: Path,
+        names: set[str],
+        config: VisualizationConfig,
+    ) -> set[str]:
+        """max_images / strategy に従い、コピー・アップロードする画像を絞り込む。"""
+        records = self._load_image_records(output_dir)
+        candidates = [records.get(name, ImageRecord(name=name)) for name in sorted(names)]
+        selected = select_images(candidates, config.strategy, config.max_images)
+        if len(selected) < len(candidates):
+            logger.info(
+                "Selected %d of %d images for visualization (strategy=%s)",
+                len(selected),
+                len(candidates),
+                config.strategy.value,
+            )
+        return set(selected)
+
+    def _write_manifest(
+        self,
+        output_dir: Path,
+        viz_dir: Path,
+        manifest: VisualizationManifest,
+    ) -> None:
+        """画像単位にまとめたマニフェストを visualizations/manifest.json に保存する。
+
+        API はこれを読むだけで一覧・スコア順ソートに答えられる。
+        """
+        groups: dict[str, dict[str, int]] = {}
+        for artifact in manifest.artifacts:
+            files = groups.setdefault(artifact.original_image_name, {})
+            files[artifact.artifact_type.value] = artifact.size_bytes
+        records = self._load_image_records(output_dir)
+        images: list[dict[str, Any]] = []
+        for name in sorted(groups):
+            record = records.get(name, ImageRecord(name=name))
+            images.append(
+                {
+                    "name": name,
+                    "score": record.score,
+                    "label": record.pred_label,
+                    "files": groups[name],
+                }
+            )
+        payload = {
+            "version": MANIFEST_VERSION,
+            "total_images": manifest.total_images,
+            "csv_files": list(manifest.csv_files),
+            "images": images,
+        }
+        fd, tmp_name = tempfile.mkstemp(dir=viz_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_name, viz_dir / MANIFEST_FILENAME)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
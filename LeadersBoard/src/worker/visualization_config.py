@@ -3,10 +3,15 @@ from __future__ import annotations
 import logging
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Any
 
 import yaml
 
-from src.worker.visualization_types import ALL_VIZ_TYPES, VisualizationType
+from src.worker.visualization_types import (
+    ALL_VIZ_TYPES,
+    VisualizationStrategy,
+    VisualizationType,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +20,8 @@ logger = logging.getLogger(__name__)
 class VisualizationConfig:
     enabled: bool = True
     types: tuple[VisualizationType, ...] = tuple(ALL_VIZ_TYPES)
+    max_images: int | None = None
+    strategy: VisualizationStrategy = VisualizationStrategy.ALL
 
     @classmethod
     def from_config_file(
@@ -35,7 +42,11 @@ class VisualizationConfig:
         except yaml.YAMLError:
             logger.warning("Failed to parse %s, using defaults", config_path)
             return cls.default()
+        return cls.from_config(data)
 
+    @classmethod
+    def from_config(cls, data: dict[str, Any]) -> VisualizationConfig:
+        """解析済みの config (事前準備で読み込んだもの等) から visualization 設定を読み取る。"""
         viz_section = data.get("visualization")
         if viz_section is None:
             return cls.default()
@@ -45,13 +56,23 @@ class VisualizationConfig:
             logger.warning("Invalid 'enabled' value: %s, using default", enabled)
             enabled = True
 
-        raw_types = viz_section.get("types")
+        max_images = cls._parse_max_images(viz_section.get("max_images"))
+        strategy = cls._parse_strategy(viz_section.get("strategy"))
+        return cls(
+            enabled=enabled,
+            types=cls._parse_types(viz_section.get("types")),
+            max_images=max_images,
+            strategy=strategy,
+        )
+
+    @staticmethod
+    def _parse_types(raw_types: object) -> tuple[VisualizationType, ...]:
         if raw_types is None:
-            return cls(enabled=enabled)
+            return tuple(ALL_VIZ_TYPES)
 
         if not isinstance(raw_types, list) or len(raw_types) == 0:
             logger.warning("Invalid 'types' value: %s, using all types", raw_types)
-            return cls(enabled=enabled)
+            return tuple(ALL_VIZ_TYPES)
 
         valid_values = {t.value for t in VisualizationType}
         parsed_types: list[VisualizationType] = []
@@ -63,9 +84,28 @@ class VisualizationConfig:
 
         if not parsed_types:
             logger.warning("No valid types found, using all types")
-            return cls(enabled=enabled)
-
-        return cls(enabled=enabled, types=tuple(parsed_types))
+            return tuple(ALL_VIZ_TYPES)
+
+        return tuple(parsed_types)
+
+    @staticmethod
+    def _parse_max_images(raw: object) -> int | None:
+        if raw is None:
+            return None
+        if isinstance(raw, bool) or not isinstance(raw, int) or raw <= 0:
+            logger.warning("Invalid 'max_images' value: %s, visualizing all images", raw)
+            return None
+        return raw
+
+    @staticmethod
+    def _parse_strategy(raw: object) -> VisualizationStrategy:
+        if raw is None:
+            return VisualizationStrategy.ALL
+        try:
+            return VisualizationStrategy(str(raw))
+        except ValueError:
+            logger.warning("Unknown visualization strategy: %s, using 'all'", raw)
+            return VisualizationStrategy.ALL
 
     @classmethod
     def default(cls) -> VisualizationConfig:
@@ -14,12 +14,32 @@ class VisualizationType(StrEnum):
 ALL_VIZ_TYPES: list[VisualizationType] = list(VisualizationType)
 
 
+class VisualizationStrategy(StrEnum):
+    """max_images で件数を絞るときの画像の選び方。"""
+
+    ALL = "all"  # 先頭から順に
+    TOP_K = "top_k"  # 異常スコアの高い順
+    WORST_ERRORS = "worst_errors"  # 確信度の高い偽陽性・偽陰性を交互に
+    STRATIFIED = "stratified"  # ラベルごとに均等、各ラベル内はスコア分布から等間隔
+
+
+# visualizations/ 配下に書き出すマニフェストのファイル名
+MANIFEST_FILENAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+# 投稿コードが生の異常マップ (float16) とマスクを書き出すストア (visualizations/ からの相対)。
+# ここに含まれる画像の heatmap / mask / overlay は API がリクエスト時に描画する。
+RAW_STORE_DIRNAME = "raw"
+RAW_INDEX_FILENAME = "index.json"
+
+
 @dataclass(frozen=True)
 class VisualizationArtifact:
     filename: str
     artifact_type: VisualizationType
     original_image_name: str
     relative_path: str
+    size_bytes: int = 0
 
 
 @dataclass(frozen=True)
@@ -28,9 +28,9 @@ class MockTrackingAdapter(TrackingPort):
         self.calls: list[tuple[str, Any]] = []
         self.run_id = "mock-run-id"
 
-    def start_run(self, run_name: str) -> str:
+    def start_run(self, run_name: str, run_id: str | None = None) -> str:
         self.calls.append(("start_run", run_name))
-        return self.run_id
+        return run_id or self.run_id
 
     def log_params(self, params: dict[str, Any]) -> None:
         self.calls.append(("log_params", params))
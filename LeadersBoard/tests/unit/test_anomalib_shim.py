@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+
+SRC_DIR = Path(__file__).resolve().parents[2] / "src"
+# 軽量なツール (Worker の子プロセスから読む trainers など) が import してよいローカルのモジュール
+LIGHT_SHIM_MODULES = {
+    "anomalib",
+    "anomalib.trainers",
+    "anomalib.trainers.resume",
+    "anomalib.metric_stream",
+}
+HEAVY_PREFIXES = ("torch", "lightning", "torchvision", "numpy", "cv2")
+# 遅いマシンでも揺れないよう、実測 (数十 ms) より十分大きく取る
+IMPORT_BUDGET_US = 500_000
+
+
+def parse_importtime(stderr: str) -> dict[str, tuple[int, int]]:
+    """`python -X importtime` の出力を {module: (self_us, cumulative_us)} にする."""
+    timings: dict[str, tuple[int, int]] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        if not self_us.strip().isdigit():  # ヘッダ行
+            continue
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+@pytest.fixture
+def upstream(tmp_path: Path) -> Path:
+    """__init__ の実行を記録する、上流 anomalib の代わりのパッケージ."""
+    package = tmp_path / "site" / "anomalib"
+    (package / "models").mkdir(parents=True)
+    (package / "__init__.py").write_text(
+        textwrap.dedent(
+            f"""
+            from enum import Enum
+            open({str(tmp_path / "loaded")!r}, "a").write("upstream\\n")
+            __version__ = "9.9.9"
+            __all__ = ["TaskType"]
+
+            class TaskType(str, Enum):
+                CLASSIFICATION = "classification"
+            """
+        )
+    )
+    (package / "models" / "__init__.py").write_text(
+        "from anomalib import TaskType\nDEFAULT_TASK = TaskType.CLASSIFICATION\n"
+    )
+    return tmp_path
+
+
+def _run(code: str, site: Path, *options: str) -> subprocess.CompletedProcess[str]:
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([str(SRC_DIR), str(site)])}
+    return subprocess.run(
+        [sys.executable, *options, "-c", code],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def test_importing_trainers_does_not_load_upstream(upstream: Path) -> None:
+    completed = _run("import anomalib.trainers", upstream / "site", "-X", "importtime")
+
+    timings = parse_importtime(completed.stderr)
+    assert "anomalib.trainers" in timings
+    shim_modules = {name for name in timings if name.split(".")[0] == "anomalib"}
+    assert shim_modules <= LIGHT_SHIM_MODULES
+    assert not [name for name in timings if name.startswith(HEAVY_PREFIXES)]
+    assert timings["anomalib.trainers"][1] < IMPORT_BUDGET_US
+    assert not (upstream / "loaded").exists()
+
+
+def test_upstream_is_loaded_once_on_first_attribute_access(upstream: Path) -> None:
+    code = textwrap.dedent(
+        """
+        import anomalib
+        from anomalib import TaskType
+        from anomalib.models import DEFAULT_TASK
+        from anomalib.trainers import get_trainer
+        assert DEFAULT_TASK is TaskType.CLASSIFICATION
+        assert anomalib.__version__ == "9.9.9" and anomalib.__all__ == ["TaskType"]
+        assert anomalib.models.DEFAULT_TASK is DEFAULT_TASK
+        print(anomalib.__path__[0])
+        """
+    )
+
+    completed = _run(code, upstream / "site")
+
+    assert completed.stdout.strip() == str(SRC_DIR / "anomalib")
+    assert (upstream / "loaded").read_text() == "upstream\n"
+
+
+def test_missing_attribute_raises_attribute_error(upstream: Path) -> None:
+    code = "import anomalib\nprint(hasattr(anomalib, 'NoSuchThing'))"
+
+    completed = _run(code, upstream / "site")
+
+    assert completed.stdout.strip() == "False"
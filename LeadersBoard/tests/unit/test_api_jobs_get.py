@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Generator
 from typing import Any
 
 import pytest
@@ -8,6 +8,7 @@ from fastapi.testclient import TestClient
 
 from src.api import jobs as jobs_module
 from src.api.main import app
+from src.domain.list_jobs import JobListPage
 
 
 class DummyJobStatusUseCase:
@@ -26,6 +27,38 @@ class DummyJobResultsUseCase:
         return self.payload
 
 
+class DummyListJobsUseCase:
+    def __init__(self, jobs: list[dict[str, Any]], next_cursor: str | None = None) -> None:
+        self.jobs = jobs
+        self.next_cursor = next_cursor
+        self.last_args: tuple[str, str | None, int, str | None] | None = None
+
+    def execute(
+        self,
+        user_id: str,
+        cursor: str | None = None,
+        limit: int = 20,
+        status: str | None = None,
+    ) -> JobListPage:
+        self.last_args = (user_id, cursor, limit, status)
+        if status == "bogus":
+            raise ValueError("unknown status: bogus")
+        return JobListPage(jobs=self.jobs, next_cursor=self.next_cursor)
+
+
+class DummyJobEvents:
+    def __init__(self, events: list[dict[str, Any] | None]) -> None:
+        self.events = events
+        self.last_user_id: str | None = None
+
+    async def listen(
+        self, user_id: str, heartbeat_seconds: float = 15.0
+    ) -> AsyncGenerator[dict[str, Any] | None]:
+        self.last_user_id = user_id
+        for event in self.events:
+            yield event
+
+
 class DummyStorage:
     def __init__(self, payload: str, raise_not_found: bool = False) -> None:
         self.payload = payload
@@ -64,6 +97,10 @@ def override_storage(storage: DummyStorage) -> None:
     app.dependency_overrides[jobs_module.get_storage] = lambda: storage
 
 
+def override_list_jobs(use_case: DummyListJobsUseCase) -> None:
+    app.dependency_overrides[jobs_module.get_list_jobs_use_case] = lambda: use_case
+
+
 def test_get_job_status_success() -> None:
     override_current_user()
     override_job_status(DummyJobStatusUseCase({"status": "running"}))
@@ -140,3 +177,66 @@ def test_get_job_logs_file_not_found_returns_empty() -> None:
 
     assert response.status_code == 200
     assert response.json() == {"job_id": "job-1", "logs": ""}
+
+
+def test_list_jobs_returns_page_for_current_user() -> None:
+    use_case = DummyListJobsUseCase([{"job_id": "job-2"}, {"job_id": "job-1"}], "1700")
+    override_current_user()
+    override_list_jobs(use_case)
+
+    response = client.get(
+        "/jobs",
+        params={"cursor": "1800", "limit": 2, "status": "completed"},
+        headers={"Authorization": "Bearer devtoken"},
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "jobs": [{"job_id": "job-2"}, {"job_id": "job-1"}],
+        "next_cursor": "1700",
+    }
+    assert use_case.last_args == ("user-1", "1800", 2, "completed")
+
+
+def test_list_jobs_invalid_status_returns_400() -> None:
+    override_current_user()
+    override_list_jobs(DummyListJobsUseCase([]))
+
+    response = client.get(
+        "/jobs",
+        params={"status": "bogus"},
+        headers={"Authorization": "Bearer devtoken"},
+    )
+
+    assert response.status_code == 400
+
+
+def test_list_jobs_rejects_out_of_range_limit() -> None:
+    override_current_user()
+    override_list_jobs(DummyListJobsUseCase([]))
+
+    response = client.get(
+        "/jobs",
+        params={"limit": 1000},
+        headers={"Authorization": "Bearer devtoken"},
+    )
+
+    assert response.status_code == 422
+
+
+def test_stream_job_events_emits_sse_frames() -> None:
+    events = DummyJobEvents([None, {"job_id": "job-1", "status": "completed"}])
+    override_current_user()
+    app.dependency_overrides[jobs_module.get_job_events] = lambda: events
+
+    response = client.get(
+        "/jobs/events",
+        headers={"Authorization": "Bearer devtoken"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.text == (
+        ': keepalive\n\nevent: job_status\ndata: {"job_id": "job-1", "status": "completed"}\n\n'
+    )
+    assert events.last_user_id == "user-1"
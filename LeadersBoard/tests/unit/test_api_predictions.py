@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+from collections.abc import Generator
+from pathlib import Path
+from typing import Any
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from fastapi.testclient import TestClient
+
+from src.adapters.filesystem_storage_adapter import FileSystemStorageAdapter
+from src.api.jobs import get_job_status
+from src.api.main import app
+from src.api.submissions import get_current_user, get_storage
+from src.ports.job_status_port import JobStatus
+
+client = TestClient(app)
+
+
+class DummyJobStatus:
+    def __init__(self, status: dict[str, Any] | None) -> None:
+        self.status = status
+
+    def get_status(self, job_id: str) -> dict[str, Any] | None:
+        return self.status
+
+
+@pytest.fixture(autouse=True)
+def clear_overrides() -> Generator[None]:
+    yield
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def artifacts_root(tmp_path: Path) -> Path:
+    job_dir = tmp_path / "artifacts" / "job-1"
+    job_dir.mkdir(parents=True)
+    table = pa.table(
+        {
+            "image_path": ["good/000.png", "good/001.png", "crack/000.png", "crack/001.png"],
+            "category": pa.array(["good", "good", "crack", "crack"]).dictionary_encode(),
+            "anomaly_score": pa.array([0.1, 0.6, 0.9, 0.3], type=pa.float32()),
+            "pred_label": [False, True, True, False],
+            "gt_label": [False, False, True, True],
+        }
+    )
+    pq.write_table(table, job_dir / "image_predictions.parquet")
+    return tmp_path / "artifacts"
+
+
+def _override(artifacts_root: Path, status: dict[str, Any] | None) -> None:
+    storage = FileSystemStorageAdapter(
+        artifacts_root.parent / "submissions", artifacts_root=artifacts_root
+    )
+    app.dependency_overrides[get_current_user] = lambda: "user-1"
+    app.dependency_overrides[get_storage] = lambda: storage
+    app.dependency_overrides[get_job_status] = lambda: DummyJobStatus(status)
+
+
+def test_histogram_endpoint(artifacts_root: Path) -> None:
+    _override(artifacts_root, {"status": JobStatus.COMPLETED.value})
+
+    response = client.get("/jobs/job-1/predictions/histogram", params={"bins": 2})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["job_id"] == "job-1"
+    assert body["counts"] == [2, 2]
+    assert body["total"] == 4
+    assert len(body["bin_edges"]) == 3
+
+
+def test_histogram_endpoint_with_filter(artifacts_root: Path) -> None:
+    _override(artifacts_root, {"status": JobStatus.COMPLETED.value})
+
+    response = client.get(
+        "/jobs/job-1/predictions/histogram", params={"bins": 2, "category": "crack"}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["counts"] == [1, 1]
+
+
+def test_worst_endpoint_returns_false_positives(artifacts_root: Path) -> None:
+    _override(artifacts_root, {"status": JobStatus.COMPLETED.value})
+
+    response = client.get("/jobs/job-1/predictions/worst", params={"n": 1, "gt_label": "false"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["order"] == "desc"
+    assert [p["image_path"] for p in body["predictions"]] == ["good/001.png"]
+    assert body["predictions"][0]["category"] == "good"
+    assert body["predictions"][0]["pred_label"] is True
+
+
+def test_worst_endpoint_ascending(artifacts_root: Path) -> None:
+    _override(artifacts_root, {"status": JobStatus.COMPLETED.value})
+
+    response = client.get(
+        "/jobs/job-1/predictions/worst", params={"order": "asc", "gt_label": "true"}
+    )
+
+    assert response.status_code == 200
+    paths = [p["image_path"] for p in response.json()["predictions"]]
+    assert paths == ["crack/001.png", "crack/000.png"]
+
+
+@pytest.mark.parametrize("status", [None, {"status": JobStatus.RUNNING.value}])
+def test_predictions_not_found(artifacts_root: Path, status: dict[str, Any] | None) -> None:
+    _override(artifacts_root, status)
+
+    assert client.get("/jobs/job-1/predictions/histogram").status_code == 404
+    assert client.get("/jobs/job-1/predictions/worst").status_code == 404
+
+
+def test_predictions_invalid_params(artifacts_root: Path) -> None:
+    _override(artifacts_root, {"status": JobStatus.COMPLETED.value})
+
+    assert client.get("/jobs/job-1/predictions/histogram?bins=0").status_code == 422
+    assert client.get("/jobs/job-1/predictions/worst?order=random").status_code == 422
@@ -82,7 +82,7 @@ def test_list_visualizations_returns_correct_json() -> None:
     )
 
     class DummyUseCase:
-        def execute(self, job_id: str) -> VisualizationResult:
+        def execute(self, job_id: str, **kwargs: Any) -> VisualizationResult:
             return VisualizationResult(
                 artifacts=[
                     VisualizationArtifactInfo(
@@ -116,7 +116,7 @@ def test_list_visualizations_empty_when_no_artifacts() -> None:
     from src.domain.get_visualization_artifacts import VisualizationResult
 
     class DummyUseCase:
-        def execute(self, job_id: str) -> VisualizationResult:
+        def execute(self, job_id: str, **kwargs: Any) -> VisualizationResult:
             return VisualizationResult(artifacts=[], csv_files=[])
 
     override_current_user()
@@ -250,3 +250,238 @@ def test_get_visualization_file_returns_404_when_job_not_exists() -> None:
     )
 
     assert response.status_code == 404
+
+
+def _serve_file(tmp_path: Path, job_status: str, content: bytes = b"0123456789") -> Path:
+    target = tmp_path / "image_predictions.csv"
+    target.write_bytes(content)
+
+    class DummyStorageWithFile:
+        def load_artifact_file(self, job_id: str, filepath: str) -> Path:
+            return target
+
+    class DummyJobStatusWithJob:
+        def get_status(self, job_id: str) -> dict[str, Any] | None:
+            return {"status": job_status}
+
+    override_current_user()
+    app.dependency_overrides[get_storage] = lambda: DummyStorageWithFile()
+    app.dependency_overrides[get_job_status] = lambda: DummyJobStatusWithJob()
+    return target
+
+
+def test_get_visualization_file_sets_cache_validators_for_completed_job(tmp_path: Path) -> None:
+    _serve_file(tmp_path, "completed")
+
+    response = client.get(
+        "/jobs/job-1/visualizations/image_predictions.csv",
+        headers={"Authorization": "Bearer devtoken"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["etag"].startswith('"')
+    assert "last-modified" in response.headers
+    assert "immutable" in response.headers["cache-control"]
+
+
+def test_get_visualization_file_requires_revalidation_for_running_job(tmp_path: Path) -> None:
+    _serve_file(tmp_path, "running")
+
+    response = client.get(
+        "/jobs/job-1/visualizations/image_predictions.csv",
+        headers={"Authorization": "Bearer devtoken"},
+    )
+
+    assert response.headers["cache-control"] == viz_module.REVALIDATE_CACHE_CONTROL
+
+
+def test_get_visualization_file_returns_304_for_matching_etag(tmp_path: Path) -> None:
+    _serve_file(tmp_path, "completed")
+    first = client.get(
+        "/jobs/job-1/visualizations/image_predictions.csv",
+        headers={"Authorization": "Bearer devtoken"},
+    )
+
+    response = client.get(
+        "/jobs/job-1/visualizations/image_predictions.csv",
+        headers={"Authorization": "Bearer devtoken", "If-None-Match": first.headers["etag"]},
+    )
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == first.headers["etag"]
+
+
+def test_get_visualization_file_returns_304_when_not_modified_since(tmp_path: Path) -> None:
+    _serve_file(tmp_path, "completed")
+    first = client.get(
+        "/jobs/job-1/visualizations/image_predictions.csv",
+        headers={"Authorization": "Bearer devtoken"},
+    )
+
+    response = client.get(
+        "/jobs/job-1/visualizations/image_predictions.csv",
+        headers={
+            "Authorization": "Bearer devtoken",
+            "If-Modified-Since": first.headers["last-modified"],
+        },
+    )
+
+    assert response.status_code == 304
+
+
+def test_get_visualization_file_supports_range_requests(tmp_path: Path) -> None:
+    _serve_file(tmp_path, "completed")
+
+    response = client.get(
+        "/jobs/job-1/visualizations/image_predictions.csv",
+        headers={"Authorization": "Bearer devtoken", "Range": "bytes=2-5"},
+    )
+
+    assert response.status_code == 206
+    assert response.content == b"2345"
+    assert response.headers["content-range"] == "bytes 2-5/10"
+
+
+class DummyThumbnails:
+    def __init__(self, preview: Path | None = None) -> None:
+        self.preview = preview
+        self.calls: list[tuple[Path, int | None, str]] = []
+
+    def get_thumbnail(self, source: Path, width: int | None, image_format: str) -> Path:
+        self.calls.append((source, width, image_format))
+        if self.preview is None:
+            raise ValueError("cannot render preview")
+        return self.preview
+
+
+def test_get_visualization_file_serves_preview_when_width_given(tmp_path: Path) -> None:
+    source = _serve_file(tmp_path, "completed")
+    preview = tmp_path / "preview.webp"
+    preview.write_bytes(b"webp-bytes")
+    thumbnails = DummyThumbnails(preview)
+    app.dependency_overrides[viz_module.get_thumbnails] = lambda: thumbnails
+
+    response = client.get(
+        "/jobs/job-1/visualizations/img_heatmap.png",
+        params={"w": 256},
+        headers={"Authorization": "Bearer devtoken"},
+    )
+
+    assert response.status_code == 200
+    assert response.content == b"webp-bytes"
+    assert response.headers["content-type"] == "image/webp"
+    assert response.headers["etag"].endswith('-w256.webp"')
+    assert thumbnails.calls == [(source, 256, "webp")]
+
+
+def test_get_visualization_file_preview_of_non_image_returns_400(tmp_path: Path) -> None:
+    _serve_file(tmp_path, "completed")
+    app.dependency_overrides[viz_module.get_thumbnails] = lambda: DummyThumbnails()
+
+    response = client.get(
+        "/jobs/job-1/visualizations/image_predictions.csv",
+        params={"w": 256, "format": "jpeg"},
+        headers={"Authorization": "Bearer devtoken"},
+    )
+
+    assert response.status_code == 400
+
+
+def test_get_visualization_file_rejects_unknown_preview_format(tmp_path: Path) -> None:
+    _serve_file(tmp_path, "completed")
+    app.dependency_overrides[viz_module.get_thumbnails] = lambda: DummyThumbnails()
+
+    response = client.get(
+        "/jobs/job-1/visualizations/img.png",
+        params={"format": "gif"},
+        headers={"Authorization": "Bearer devtoken"},
+    )
+
+    assert response.status_code == 422
+
+
+class DummyAnomalyMaps:
+    def __init__(self, rendered: Path) -> None:
+        self.rendered = rendered
+        self.calls: list[tuple[Path, str, str, Path | None]] = []
+
+    def render(
+        self, store_dir: Path, image_name: str, artifact_type: str, original: Path | None = None
+    ) -> Path:
+        self.calls.append((store_dir, image_name, artifact_type, original))
+        return self.rendered
+
+
+def _serve_raw_store(tmp_path: Path, with_original: bool = True) -> DummyAnomalyMaps:
+    job_dir = tmp_path / "job-1"
+    store = job_dir / "visualizations" / "raw"
+    store.mkdir(parents=True)
+    (store / "index.json").write_text("{}")
+    if with_original:
+        (job_dir / "visualizations" / "img_original.png").write_bytes(b"orig")
+    rendered = tmp_path / "rendered.png"
+    rendered.write_bytes(b"png-bytes")
+
+    class DummyStorageWithStore:
+        def load_artifact_file(self, job_id: str, filepath: str) -> Path:
+            path = job_dir / filepath
+            if not path.is_file():
+                raise FileNotFoundError(path)
+            return path
+
+    class DummyJobStatusWithJob:
+        def get_status(self, job_id: str) -> dict[str, Any] | None:
+            return {"status": "completed"}
+
+    anomaly_maps = DummyAnomalyMaps(rendered)
+    override_current_user()
+    app.dependency_overrides[get_storage] = lambda: DummyStorageWithStore()
+    app.dependency_overrides[get_job_status] = lambda: DummyJobStatusWithJob()
+    app.dependency_overrides[viz_module.get_anomaly_maps] = lambda: anomaly_maps
+    return anomaly_maps
+
+
+def test_get_visualization_file_renders_missing_overlay_from_raw_store(tmp_path: Path) -> None:
+    anomaly_maps = _serve_raw_store(tmp_path)
+
+    response = client.get(
+        "/jobs/job-1/visualizations/img_overlay.png",
+        headers={"Authorization": "Bearer devtoken"},
+    )
+
+    assert response.status_code == 200
+    assert response.content == b"png-bytes"
+    assert response.headers["content-type"] == "image/png"
+    assert response.headers["etag"].endswith('-overlay"')
+    store_dir = tmp_path / "job-1" / "visualizations" / "raw"
+    original = tmp_path / "job-1" / "visualizations" / "img_original.png"
+    assert anomaly_maps.calls == [(store_dir, "img", "overlay", original)]
+
+
+def test_get_visualization_file_revalidates_raw_render_without_rendering(tmp_path: Path) -> None:
+    anomaly_maps = _serve_raw_store(tmp_path)
+    first = client.get(
+        "/jobs/job-1/visualizations/img_heatmap.png",
+        headers={"Authorization": "Bearer devtoken"},
+    )
+
+    response = client.get(
+        "/jobs/job-1/visualizations/img_heatmap.png",
+        headers={"Authorization": "Bearer devtoken", "If-None-Match": first.headers["etag"]},
+    )
+
+    assert response.status_code == 304
+    assert len(anomaly_maps.calls) == 1
+
+
+def test_get_visualization_file_overlay_without_original_returns_404(tmp_path: Path) -> None:
+    anomaly_maps = _serve_raw_store(tmp_path, with_original=False)
+
+    response = client.get(
+        "/jobs/job-1/visualizations/img_overlay.png",
+        headers={"Authorization": "Bearer devtoken"},
+    )
+
+    assert response.status_code == 404
+    assert anomaly_maps.calls == []
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import io
+import os
+import tarfile
+import time
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from src.adapters.archive_extractor import ArchiveError, ArchiveExtractor, copy_tree
+
+
+def _zip(path: Path, members: dict[str, bytes]) -> Path:
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return path
+
+
+def _tar(path: Path, members: dict[str, bytes], symlink: str | None = None) -> Path:
+    with tarfile.open(path, "w:gz") as tar:
+        root = tarfile.TarInfo("./")
+        root.type = tarfile.DIRTYPE
+        tar.addfile(root)
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+        if symlink:
+            link = tarfile.TarInfo(symlink)
+            link.type = tarfile.SYMTYPE
+            link.linkname = "/etc/passwd"
+            tar.addfile(link)
+    return path
+
+
+@pytest.fixture
+def extractor(tmp_path: Path) -> ArchiveExtractor:
+    return ArchiveExtractor(tmp_path / "cache")
+
+
+def test_zip_is_extracted_once_per_hash(
+    tmp_path: Path, extractor: ArchiveExtractor, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    archive = _zip(tmp_path / "project.zip", {"main.py": b"print(1)", "pkg/util.py": b"x = 1"})
+
+    tree = extractor.extract(archive)
+
+    assert (tree / "main.py").read_bytes() == b"print(1)"
+    assert (tree / "pkg" / "util.py").read_bytes() == b"x = 1"
+
+    def fail(*args: object) -> None:
+        raise AssertionError("archive was extracted again")
+
+    monkeypatch.setattr(extractor, "_extract_zip", fail)
+    copy = tmp_path / "copy.zip"
+    copy.write_bytes(archive.read_bytes())
+    assert extractor.extract(copy) == tree
+
+
+def test_tar_gz_is_extracted_with_streaming_reader(
+    tmp_path: Path, extractor: ArchiveExtractor
+) -> None:
+    archive = _tar(tmp_path / "project.tar.gz", {"./main.py": b"print(2)", "data/a.txt": b"a"})
+
+    tree = extractor.extract(archive)
+
+    assert (tree / "main.py").read_bytes() == b"print(2)"
+    assert (tree / "data" / "a.txt").read_bytes() == b"a"
+
+
+@pytest.mark.parametrize("name", ["../evil.py", "/etc/evil.py", "a/../../evil.py", "C:/evil.py"])
+def test_path_traversal_is_rejected(tmp_path: Path, extractor: ArchiveExtractor, name: str) -> None:
+    archive = _zip(tmp_path / "bad.zip", {"main.py": b"ok", name: b"evil"})
+
+    with pytest.raises(ArchiveError, match="unsafe path"):
+        extractor.extract(archive)
+
+    assert not (tmp_path / "evil.py").exists()
+    assert list((tmp_path / "cache").iterdir()) == []
+
+
+def test_tar_symlink_is_rejected(tmp_path: Path, extractor: ArchiveExtractor) -> None:
+    archive = _tar(tmp_path / "link.tar.gz", {"main.py": b"ok"}, symlink="passwd")
+
+    with pytest.raises(ArchiveError, match="regular files"):
+        extractor.extract(archive)
+
+
+def test_zip_symlink_is_rejected(tmp_path: Path, extractor: ArchiveExtractor) -> None:
+    archive = tmp_path / "link.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        info = zipfile.ZipInfo("passwd")
+        info.external_attr = 0o120777 << 16
+        zf.writestr(info, "/etc/passwd")
+
+    with pytest.raises(ArchiveError, match="symbolic links"):
+        extractor.extract(archive)
+
+
+def test_zip_bomb_is_rejected_by_actual_size(tmp_path: Path) -> None:
+    extractor = ArchiveExtractor(tmp_path / "cache", max_ratio=10)
+    archive = _zip(tmp_path / "bomb.zip", {"zeros.bin": bytes(5 * 1024 * 1024)})
+
+    with pytest.raises(ArchiveError, match="expands to more than"):
+        extractor.extract(archive)
+    assert list((tmp_path / "cache").iterdir()) == []
+
+
+def test_too_many_files_are_rejected(tmp_path: Path) -> None:
+    extractor = ArchiveExtractor(tmp_path / "cache", max_files=2)
+    archive = _zip(tmp_path / "many.zip", {f"{i}.txt": b"x" for i in range(3)})
+
+    with pytest.raises(ArchiveError, match="more than 2 files"):
+        extractor.extract(archive)
+
+
+def test_corrupted_archives_are_rejected(tmp_path: Path, extractor: ArchiveExtractor) -> None:
+    (tmp_path / "broken.zip").write_bytes(b"not a zip")
+    (tmp_path / "broken.tar.gz").write_bytes(b"not a tarball")
+
+    for name in ("broken.zip", "broken.tar.gz"):
+        with pytest.raises(ArchiveError, match="not a valid"):
+            extractor.extract(tmp_path / name)
+
+
+def test_least_recently_used_trees_are_evicted(tmp_path: Path) -> None:
+    extractor = ArchiveExtractor(tmp_path / "cache", cache_max_bytes=150)
+    first = extractor.extract(_zip(tmp_path / "a.zip", {"a.bin": os.urandom(100)}))
+    os.utime(first, (time.time() - 60, time.time() - 60))
+
+    second = extractor.extract(_zip(tmp_path / "b.zip", {"b.bin": os.urandom(100)}))
+
+    assert not first.exists()
+    assert second.exists()
+
+
+def test_tampered_cache_tree_is_extracted_again(
+    tmp_path: Path, extractor: ArchiveExtractor
+) -> None:
+    archive = _zip(tmp_path / "project.zip", {"main.py": b"print(1)"})
+    tree = extractor.extract(archive)
+    (tree / "main.py").write_bytes(b"import os; os.system('evil')")
+    (tree / "extra.py").write_bytes(b"planted")
+
+    again = extractor.extract(archive)
+
+    assert again == tree
+    assert (again / "main.py").read_bytes() == b"print(1)"
+    assert not (again / "extra.py").exists()
+
+
+def test_copy_tree_keeps_existing_files_and_detaches_from_cache(tmp_path: Path) -> None:
+    source = tmp_path / "tree"
+    (source / "pkg").mkdir(parents=True)
+    (source / "main.py").write_text("archived")
+    (source / "pkg" / "util.py").write_text("util")
+    destination = tmp_path / "submission"
+    destination.mkdir()
+    (destination / "main.py").write_text("uploaded")
+
+    placed = copy_tree(source, destination)
+
+    assert placed == ["pkg/util.py"]
+    assert (destination / "main.py").read_text() == "uploaded"
+    # 提出物を書き換えてもキャッシュ側は変わらない
+    (destination / "pkg" / "util.py").write_text("modified by a job")
+    assert (source / "pkg" / "util.py").read_text() == "util"
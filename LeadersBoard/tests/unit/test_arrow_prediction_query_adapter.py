@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import csv
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from src.adapters.arrow_prediction_query_adapter import ArrowPredictionQueryAdapter
+from src.ports.prediction_query_port import PredictionFilter
+
+ROWS = [
+    # (image_path, category, score, pred_label, gt_label)
+    ("test/good/000.png", "good", 0.10, False, False),
+    ("test/good/001.png", "good", 0.70, True, False),
+    ("test/good/002.png", "good", 0.20, False, False),
+    ("test/crack/000.png", "crack", 0.90, True, True),
+    ("test/crack/001.png", "crack", 0.30, False, True),
+    ("test/hole/000.png", "hole", 0.80, True, True),
+]
+
+
+def _write_parquet(path: Path, row_group_size: int = 2) -> Path:
+    schema = pa.schema(
+        [
+            ("image_path", pa.string()),
+            ("category", pa.dictionary(pa.int32(), pa.string())),
+            ("anomaly_score", pa.float32()),
+            ("pred_label", pa.bool_()),
+            ("gt_label", pa.bool_()),
+        ]
+    )
+    table = pa.table(
+        {name: [row[i] for row in ROWS] for i, name in enumerate(schema.names)},
+        schema=schema,
+    )
+    pq.write_table(table, path, row_group_size=row_group_size)
+    return path
+
+
+def _write_csv(path: Path) -> Path:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["image_path", "anomaly_score", "pred_label", "gt_label"])
+        for image_path, _, score, pred, gt in ROWS:
+            writer.writerow([image_path, score, pred, int(gt)])
+    return path
+
+
+@pytest.fixture(params=["parquet", "csv"])
+def source(request: pytest.FixtureRequest, tmp_path: Path) -> Path:
+    if request.param == "parquet":
+        return _write_parquet(tmp_path / "image_predictions.parquet")
+    return _write_csv(tmp_path / "image_predictions.csv")
+
+
+def test_histogram_counts_all_scores(source: Path) -> None:
+    result = ArrowPredictionQueryAdapter().histogram(source, 4, PredictionFilter())
+
+    assert result.total == len(ROWS)
+    assert sum(result.counts) == len(ROWS)
+    assert len(result.bin_edges) == 5
+    assert result.bin_edges[0] == pytest.approx(0.1)
+    assert result.bin_edges[-1] == pytest.approx(0.9)
+
+
+def test_histogram_applies_filters_with_global_edges(source: Path) -> None:
+    adapter = ArrowPredictionQueryAdapter()
+    everything = adapter.histogram(source, 4, PredictionFilter())
+    normal = adapter.histogram(source, 4, PredictionFilter(gt_label=False))
+
+    # 絞り込んでもビン境界は全体と同じなので重ねて比較できる
+    assert normal.bin_edges == everything.bin_edges
+    assert normal.total == 3
+    assert normal.counts[0] == 2
+
+
+def test_top_scores_desc_and_asc(source: Path) -> None:
+    adapter = ArrowPredictionQueryAdapter()
+
+    worst = adapter.top_scores(source, 2, ascending=False, filters=PredictionFilter())
+    lowest = adapter.top_scores(source, 2, ascending=True, filters=PredictionFilter())
+
+    assert [r.image_path for r in worst] == ["test/crack/000.png", "test/hole/000.png"]
+    assert [r.image_path for r in lowest] == ["test/good/000.png", "test/good/002.png"]
+    assert worst[0].anomaly_score == pytest.approx(0.9)
+    assert worst[0].gt_label is True
+    assert worst[0].category == "crack"
+
+
+def test_top_scores_with_filters(source: Path) -> None:
+    adapter = ArrowPredictionQueryAdapter()
+
+    false_positives = adapter.top_scores(
+        source, 10, ascending=False, filters=PredictionFilter(gt_label=False, pred_label=True)
+    )
+    crack = adapter.top_scores(
+        source, 10, ascending=True, filters=PredictionFilter(category="crack")
+    )
+
+    assert [r.image_path for r in false_positives] == ["test/good/001.png"]
+    assert [r.image_path for r in crack] == ["test/crack/001.png", "test/crack/000.png"]
+
+
+def test_parquet_reads_only_needed_columns(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    source = _write_parquet(tmp_path / "image_predictions.parquet")
+    requested: list[list[str] | None] = []
+    original = pq.ParquetFile.iter_batches
+
+    def spy(self: pq.ParquetFile, *args: object, **kwargs: object):  # type: ignore[no-untyped-def]
+        requested.append(kwargs.get("columns"))  # type: ignore[arg-type]
+        return original(self, *args, **kwargs)  # type: ignore[arg-type]
+
+    monkeypatch.setattr(pq.ParquetFile, "iter_batches", spy)
+
+    ArrowPredictionQueryAdapter().histogram(source, 4, PredictionFilter(gt_label=True))
+
+    assert requested == [["anomaly_score", "gt_label"]]
+
+
+def test_parquet_files_are_closed(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    source = _write_parquet(tmp_path / "image_predictions.parquet")
+    opened: list[pq.ParquetFile] = []
+    original = pq.ParquetFile.__init__
+
+    def spy(self: pq.ParquetFile, *args: object, **kwargs: object) -> None:
+        original(self, *args, **kwargs)  # type: ignore[arg-type]
+        opened.append(self)
+
+    monkeypatch.setattr(pq.ParquetFile, "__init__", spy)
+    adapter = ArrowPredictionQueryAdapter()
+
+    adapter.histogram(source, 4, PredictionFilter())
+    adapter.top_scores(source, 1, ascending=False, filters=PredictionFilter())
+
+    assert opened
+    assert all(parquet_file.closed for parquet_file in opened)
+
+
+def test_missing_filter_column_returns_empty(tmp_path: Path) -> None:
+    source = tmp_path / "image_predictions.parquet"
+    pq.write_table(pa.table({"image_path": ["a.png"], "anomaly_score": [0.5]}), source)
+    adapter = ArrowPredictionQueryAdapter()
+
+    result = adapter.top_scores(source, 5, ascending=False, filters=PredictionFilter(gt_label=True))
+
+    assert result == []
+    assert adapter.histogram(source, 2, PredictionFilter(gt_label=True)).total == 0
+
+
+def test_invalid_arguments_raise(source: Path) -> None:
+    adapter = ArrowPredictionQueryAdapter()
+
+    with pytest.raises(ValueError):
+        adapter.histogram(source, 0, PredictionFilter())
+    with pytest.raises(ValueError):
+        adapter.top_scores(source, 0, ascending=False, filters=PredictionFilter())
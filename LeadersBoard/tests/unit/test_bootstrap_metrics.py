@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.worker import bootstrap_metrics
+from src.worker.bootstrap_metrics import (
+    ImagePredictions,
+    _metrics_for_counts,
+    _prepare,
+    bootstrap_confidence_intervals,
+    image_metrics,
+    intervals_to_metrics,
+    load_image_predictions,
+)
+
+
+def _exact_auroc(scores: np.ndarray, gt: np.ndarray) -> float:
+    pos, neg = scores[gt], scores[~gt]
+    wins = (pos[:, None] > neg[None, :]).sum() + 0.5 * (pos[:, None] == neg[None, :]).sum()
+    return float(wins / (pos.size * neg.size))
+
+
+def _exact_average_precision(scores: np.ndarray, gt: np.ndarray) -> float:
+    total = 0.0
+    for threshold in np.unique(scores):
+        selected = scores >= threshold
+        at_threshold = (scores == threshold) & gt
+        total += at_threshold.sum() * gt[selected].mean()
+    return float(total / gt.sum())
+
+
+@pytest.fixture
+def predictions() -> ImagePredictions:
+    rng = np.random.default_rng(1)
+    gt = rng.random(200) < 0.4
+    # 丸めて同スコアを作り、タイの扱いも検証する
+    scores = np.round(rng.normal(gt.astype(float), 1.0), 1)
+    return ImagePredictions(scores=scores, gt_labels=gt, pred_labels=scores > 0.5)
+
+
+def test_point_estimates_match_exact_computation(predictions: ImagePredictions) -> None:
+    counts = np.ones((1, len(predictions)), dtype=np.int64)
+    auroc, aupr, f1 = _metrics_for_counts(_prepare(predictions), counts)[0]
+
+    gt, pred = predictions.gt_labels, predictions.pred_labels
+    assert pred is not None
+    expected_f1 = 2 * (pred & gt).sum() / (2 * (pred & gt).sum() + (pred ^ gt).sum())
+    assert auroc == pytest.approx(_exact_auroc(predictions.scores, gt), abs=1e-6)
+    assert aupr == pytest.approx(_exact_average_precision(predictions.scores, gt), abs=1e-6)
+    assert f1 == pytest.approx(expected_f1, abs=1e-6)
+
+
+def test_weighted_counts_match_explicit_resample(predictions: ImagePredictions) -> None:
+    rng = np.random.default_rng(5)
+    indices = rng.integers(0, len(predictions), size=len(predictions))
+    order = np.argsort(predictions.scores, kind="stable")
+    counts = np.bincount(np.argsort(order)[indices], minlength=len(predictions))
+
+    auroc, aupr, _ = _metrics_for_counts(_prepare(predictions), counts[None, :])[0]
+
+    scores, gt = predictions.scores[indices], predictions.gt_labels[indices]
+    assert auroc == pytest.approx(_exact_auroc(scores, gt), abs=1e-6)
+    assert aupr == pytest.approx(_exact_average_precision(scores, gt), abs=1e-6)
+
+
+def test_intervals_are_deterministic_and_independent_of_workers(
+    predictions: ImagePredictions,
+) -> None:
+    serial = bootstrap_confidence_intervals(predictions, 300, seed=3, max_workers=1, chunk_size=64)
+    parallel = bootstrap_confidence_intervals(
+        predictions, 300, seed=3, max_workers=2, chunk_size=64
+    )
+
+    assert serial == parallel
+    for interval in serial.values():
+        assert interval.lower <= interval.estimate <= interval.upper
+        assert interval.std > 0
+
+
+def test_pool_does_not_fork_and_caps_default_workers(
+    predictions: ImagePredictions, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Worker はスレッドを持つので fork せず、既定のプロセス数も上限で抑える。"""
+    created: list[dict[str, object]] = []
+    real_pool = bootstrap_metrics.ProcessPoolExecutor
+
+    def recording_pool(**kwargs: object) -> object:
+        created.append(kwargs)
+        return real_pool(**kwargs)
+
+    monkeypatch.setattr(bootstrap_metrics, "ProcessPoolExecutor", recording_pool)
+    monkeypatch.setattr(bootstrap_metrics.os, "cpu_count", lambda: 64)
+
+    bootstrap_confidence_intervals(predictions, 640, seed=1, chunk_size=64)
+
+    assert created[0]["max_workers"] == bootstrap_metrics.DEFAULT_MAX_WORKERS
+    assert created[0]["mp_context"].get_start_method() != "fork"
+
+
+def test_intervals_to_metrics_names(predictions: ImagePredictions) -> None:
+    intervals = bootstrap_confidence_intervals(predictions, 50, max_workers=1)
+
+    metrics = intervals_to_metrics(intervals)
+
+    assert set(metrics) == {
+        f"image_{name}_{suffix}"
+        for name in ("AUROC", "AUPR", "F1Score")
+        for suffix in ("ci_lower", "ci_upper", "std")
+    }
+
+
+def test_without_pred_labels_skips_f1() -> None:
+    predictions = ImagePredictions(
+        scores=np.array([0.1, 0.4, 0.35, 0.8]),
+        gt_labels=np.array([False, False, True, True]),
+    )
+
+    intervals = bootstrap_confidence_intervals(predictions, 100, max_workers=1)
+
+    assert set(intervals) == {"image_AUROC", "image_AUPR"}
+    assert intervals["image_AUROC"].estimate == pytest.approx(0.75)
+    assert image_metrics(predictions) == pytest.approx(
+        {"image_AUROC": 0.75, "image_AUPR": intervals["image_AUPR"].estimate}
+    )
+
+
+def test_invalid_arguments(predictions: ImagePredictions) -> None:
+    with pytest.raises(ValueError):
+        bootstrap_confidence_intervals(predictions, 0)
+    with pytest.raises(ValueError):
+        bootstrap_confidence_intervals(predictions, 10, confidence=1.0)
+
+
+def test_load_image_predictions(tmp_path: Path) -> None:
+    csv_path = tmp_path / "image_predictions.csv"
+    csv_path.write_text(
+        "image_path,anomaly_score,pred_label,gt_label\n"
+        "a.png,0.9,True,1\n"
+        "b.png,0.2,False,0\n"
+        "c.png,0.5,True,\n"
+        "d.png,nan,True,1\n",
+        encoding="utf-8",
+    )
+
+    predictions = load_image_predictions(csv_path)
+
+    assert predictions is not None
+    assert predictions.scores.tolist() == [0.9, 0.2]
+    assert predictions.gt_labels.tolist() == [True, False]
+    assert predictions.pred_labels is not None
+    assert predictions.pred_labels.tolist() == [True, False]
+    assert load_image_predictions(tmp_path / "missing.csv") is None
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+registry_module = pytest.importorskip("src.anomalib.dataset_registry")
+shards = pytest.importorskip("src.anomalib.shards")
+DatasetRegistry = registry_module.DatasetRegistry
+
+
+def _write_dataset(root: Path) -> None:
+    for directory in ("Normal", "Anomaly", "Mask"):
+        (root / directory).mkdir(parents=True)
+    for i in range(3):
+        cv2.imwrite(str(root / "Normal" / f"{i}.png"), np.full((8, 12, 3), i, dtype=np.uint8))
+    cv2.imwrite(str(root / "Anomaly" / "a.png"), np.zeros((8, 12, 3), dtype=np.uint8))
+    cv2.imwrite(str(root / "Mask" / "a.png"), np.full((8, 12), 255, dtype=np.uint8))
+
+
+def _manifest(tmp_path: Path, version: str = "1") -> object:
+    _write_dataset(tmp_path / "data")
+    return registry_module.build_manifest(
+        "pcb1", version, tmp_path / "data", "Normal", abnormal_dir="Anomaly", mask_dir="Mask"
+    )
+
+
+def test_build_manifest_records_relative_paths_and_hashes(tmp_path: Path) -> None:
+    manifest = _manifest(tmp_path)
+
+    by_path = {f.path: f for f in manifest.files}
+    assert sorted(by_path) == ["Anomaly/a.png", "Normal/0.png", "Normal/1.png", "Normal/2.png"]
+    anomaly = by_path["Anomaly/a.png"]
+    assert (anomaly.split, anomaly.label, anomaly.mask) == ("test", 1, "Mask/a.png")
+    data = (tmp_path / "data" / "Normal" / "0.png").read_bytes()
+
+    assert by_path["Normal/0.png"].sha256 == hashlib.sha256(data).hexdigest()
+    assert by_path["Normal/0.png"].size == len(data)
+
+
+def test_digest_ignores_root_location(tmp_path: Path) -> None:
+    manifest = _manifest(tmp_path)
+    moved = type(manifest)(manifest.name, manifest.version, "/elsewhere", manifest.files)
+
+    assert moved.digest == manifest.digest
+    changed = type(manifest)(manifest.name, manifest.version, manifest.root, manifest.files[1:])
+    assert changed.digest != manifest.digest
+
+
+def test_register_and_resolve_latest_version(tmp_path: Path) -> None:
+    registry = DatasetRegistry(tmp_path / "registry")
+    first = _manifest(tmp_path)
+    registry.register(first)
+    second = type(first)(first.name, "10", first.root, first.files[:2])
+    registry.register(second)
+    registry.register(type(first)(first.name, "2", first.root, first.files[:3]))
+
+    assert registry.versions("pcb1") == ["1", "2", "10"]
+    assert registry.get("pcb1").version == "10"
+    assert registry.get("pcb1@1") == first
+    assert registry.names() == ["pcb1"]
+    with pytest.raises(KeyError):
+        registry.get("missing")
+
+
+def test_register_rejects_changed_contents_for_existing_version(tmp_path: Path) -> None:
+    registry = DatasetRegistry(tmp_path / "registry")
+    manifest = _manifest(tmp_path)
+    registry.register(manifest)
+    registry.register(manifest)  # 同じ内容なら何もしない
+
+    with pytest.raises(ValueError, match="new version"):
+        registry.register(type(manifest)("pcb1", "1", manifest.root, manifest.files[:1]))
+
+
+def test_corrupted_manifest_and_invalid_names_are_rejected(tmp_path: Path) -> None:
+    registry = DatasetRegistry(tmp_path / "registry")
+    path = registry.register(_manifest(tmp_path))
+    data = json.loads(path.read_text())
+    data["files"] = data["files"][:1]
+    path.write_text(json.dumps(data))
+
+    with pytest.raises(ValueError, match="digest"):
+        registry.get("pcb1@1")
+    with pytest.raises(ValueError, match="invalid"):
+        registry.get("../etc@1")
+
+
+def test_verify_reports_missing_and_modified_files(tmp_path: Path) -> None:
+    manifest = _manifest(tmp_path)
+    assert registry_module.verify_manifest(manifest, full=True) == []
+
+    (tmp_path / "data" / "Normal" / "1.png").unlink()
+    path = tmp_path / "data" / "Normal" / "2.png"
+    data = bytearray(path.read_bytes())
+    data[-1] ^= 0xFF
+    path.write_bytes(bytes(data))
+
+    assert registry_module.verify_manifest(manifest) == ["missing: Normal/1.png"]
+    assert sorted(registry_module.verify_manifest(manifest, full=True)) == [
+        "checksum mismatch: Normal/2.png",
+        "missing: Normal/1.png",
+    ]
+
+
+def test_manifest_dataset_reads_without_walking(tmp_path: Path) -> None:
+    manifest = _manifest(tmp_path)
+
+    test = registry_module.ManifestDataset(manifest, "test", image_size=(4, 6))
+
+    assert len(test) == 1
+    item = test[0]
+    assert item["image"].shape == (3, 4, 6)
+    assert item["gt_mask"].shape == (4, 6) and item["gt_mask"].all()
+    assert item["gt_label"] == 1
+    train = registry_module.ManifestDataset(manifest, "train")
+    assert train[0]["image"].shape == (3, 8, 12)
+    assert not train[0]["gt_mask"].any()
+
+
+def test_shards_record_manifest_digest(tmp_path: Path) -> None:
+    manifest = _manifest(tmp_path)
+
+    shards.build_shards(
+        manifest.sources(), tmp_path / "shards", (4, 4), dataset_digest=manifest.digest
+    )
+
+    assert shards.ShardDataset(tmp_path / "shards", "train").dataset_digest == manifest.digest
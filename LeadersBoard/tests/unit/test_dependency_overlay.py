@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import time
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from src.worker.dependency_overlay import DependencyOverlay, parse_requirements
+
+
+def _wheel(wheelhouse: Path, name: str, version: str = "1.0") -> Path:
+    """依存なしの最小の wheel を作る (オフラインの wheelhouse として使う)."""
+    wheelhouse.mkdir(parents=True, exist_ok=True)
+    path = wheelhouse / f"{name}-{version}-py3-none-any.whl"
+    dist_info = f"{name}-{version}.dist-info"
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr(f"{name}/__init__.py", f"VERSION = {version!r}\n")
+        zf.writestr(
+            f"{dist_info}/METADATA",
+            f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n",
+        )
+        zf.writestr(
+            f"{dist_info}/WHEEL",
+            "Wheel-Version: 1.0\nGenerator: test\nRoot-Is-Purelib: true\nTag: py3-none-any\n",
+        )
+        zf.writestr(
+            f"{dist_info}/RECORD",
+            f"{name}/__init__.py,,\n{dist_info}/METADATA,,\n{dist_info}/WHEEL,,\n"
+            f"{dist_info}/RECORD,,\n",
+        )
+    return path
+
+
+@pytest.fixture
+def overlay(tmp_path: Path) -> DependencyOverlay:
+    _wheel(tmp_path / "wheelhouse", "tinypkg")
+    return DependencyOverlay(tmp_path / "overlays", wheelhouse=tmp_path / "wheelhouse")
+
+
+def _submission(tmp_path: Path, requirements: str | None) -> Path:
+    submission = tmp_path / "submission"
+    submission.mkdir(exist_ok=True)
+    if requirements is not None:
+        (submission / "requirements.txt").write_text(requirements)
+    return submission
+
+
+def test_parse_requirements_normalizes_order_and_comments() -> None:
+    text = (
+        "# extra deps\nTimm==0.9.2\n\nfaiss-cpu>=1.7  # search\nnumpy ; python_version >= '3.9'\n"
+    )
+
+    assert parse_requirements(text) == [
+        "faiss-cpu>=1.7",
+        "numpy ; python_version >= '3.9'",
+        "Timm==0.9.2",
+    ]
+
+
+@pytest.mark.parametrize(
+    "line",
+    [
+        "--index-url https://example.com/simple",
+        "-e .",
+        "pkg @ https://example.com/pkg.whl",
+        "./local/pkg",
+        "pkg-1.0-py3-none-any.whl",
+    ],
+)
+def test_parse_requirements_rejects_options_urls_and_paths(line: str) -> None:
+    with pytest.raises(ValueError, match="unsupported line"):
+        parse_requirements(line)
+
+
+def test_submission_without_requirements_has_no_overlay(
+    tmp_path: Path, overlay: DependencyOverlay
+) -> None:
+    assert overlay.resolve(_submission(tmp_path, None)) is None
+    assert overlay.resolve(_submission(tmp_path, "# nothing\n")) is None
+
+
+def test_overlay_is_built_from_wheelhouse_and_importable(
+    tmp_path: Path, overlay: DependencyOverlay
+) -> None:
+    target = overlay.resolve(_submission(tmp_path, "tinypkg==1.0\n"))
+
+    assert target is not None and target.parent == overlay.overlay_root
+    env = {**os.environ, "PYTHONPATH": str(target)}
+    result = subprocess.run(
+        [sys.executable, "-c", "import tinypkg; print(tinypkg.VERSION)"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    assert result.stdout.strip() == "1.0"
+    assert [p.name for p in overlay.overlay_root.iterdir() if p.name.startswith(".build-")] == []
+
+
+def test_overlay_is_reused_for_same_requirements(
+    tmp_path: Path, overlay: DependencyOverlay, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    first = overlay.resolve(_submission(tmp_path, "tinypkg==1.0\n"))
+
+    def fail(*args: object) -> None:
+        raise AssertionError("overlay was built again")
+
+    monkeypatch.setattr(overlay, "_build", fail)
+    assert overlay.resolve(_submission(tmp_path, "# same\n  tinypkg==1.0  \n")) == first
+
+
+def test_overlay_key_depends_on_base_image(
+    overlay: DependencyOverlay, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("BASE_IMAGE_ID", "image-a")
+    key_a = overlay.key(["tinypkg==1.0"])
+    monkeypatch.setenv("BASE_IMAGE_ID", "image-b")
+
+    assert overlay.key(["tinypkg==1.0"]) != key_a
+
+
+def test_missing_package_fails_without_leaving_partial_overlay(
+    tmp_path: Path, overlay: DependencyOverlay
+) -> None:
+    with pytest.raises(ValueError, match="failed to install requirements.txt"):
+        overlay.resolve(_submission(tmp_path, "not-in-wheelhouse==2.0\n"))
+
+    assert [p for p in overlay.overlay_root.iterdir() if p.is_dir()] == []
+
+
+def test_least_recently_used_overlays_are_evicted(tmp_path: Path) -> None:
+    wheelhouse = tmp_path / "wheelhouse"
+    _wheel(wheelhouse, "pkga")
+    _wheel(wheelhouse, "pkgb")
+    overlay = DependencyOverlay(tmp_path / "overlays", wheelhouse=wheelhouse, cache_max_bytes=1)
+    first = overlay.resolve(_submission(tmp_path, "pkga\n"))
+    assert first is not None
+    os.utime(first, (time.time() - 60, time.time() - 60))
+
+    second = overlay.resolve(_submission(tmp_path, "pkgb\n"))
+
+    assert not first.exists()
+    assert second is not None and second.exists()
+
+
+def test_tampered_overlay_is_rebuilt_before_reuse(
+    tmp_path: Path, overlay: DependencyOverlay
+) -> None:
+    submission = _submission(tmp_path, "tinypkg==1.0\n")
+    target = overlay.resolve(submission)
+    assert target is not None
+    module = target / "tinypkg" / "__init__.py"
+    # 公開したオーバーレイは書き込み不可
+    assert not (target / "tinypkg").stat().st_mode & 0o222
+    assert not module.stat().st_mode & 0o222
+    (target / "tinypkg").chmod(0o755)
+    module.chmod(0o644)
+    module.write_text("import os; os.system('evil')\n")
+
+    assert overlay.resolve(submission) == target
+    assert module.read_text() == "VERSION = '1.0'\n"
+    assert [p.name for p in overlay.overlay_root.iterdir() if p.name.startswith(".stale-")] == []
+
+
+def test_overlay_in_use_is_not_evicted(tmp_path: Path) -> None:
+    wheelhouse = tmp_path / "wheelhouse"
+    _wheel(wheelhouse, "pkga")
+    _wheel(wheelhouse, "pkgb")
+    overlay = DependencyOverlay(tmp_path / "overlays", wheelhouse=wheelhouse, cache_max_bytes=1)
+    other_submission = tmp_path / "other"
+    other_submission.mkdir()
+    (other_submission / "requirements.txt").write_text("pkgb\n")
+
+    with overlay.hold(_submission(tmp_path, "pkga\n")) as first:
+        assert first is not None
+        os.utime(first, (time.time() - 60, time.time() - 60))
+        second = overlay.resolve(other_submission)
+        assert first.exists()
+
+    assert second is not None and second.exists()
@@ -8,7 +8,7 @@ import pytest
 from src.config import get_max_concurrent_running, get_max_submissions_per_hour
 from src.domain.enqueue_job import EnqueueJob
 from src.ports.job_queue_port import JobQueuePort
-from src.ports.job_status_port import JobStatusPort
+from src.ports.job_status_port import JobStatus, JobStatusPort
 from src.ports.rate_limit_port import RateLimitPort
 from src.ports.storage_port import StoragePort
 
@@ -79,6 +79,15 @@ class DummyStatus(JobStatusPort):
     def count_running(self, user_id: str) -> int:
         return self.running
 
+    def list_jobs(
+        self,
+        user_id: str,
+        cursor: str | None = None,
+        limit: int = 20,
+        status: JobStatus | None = None,
+    ) -> tuple[list[dict[str, Any]], str | None]:
+        return [], None
+
 
 class DummyRateLimit(RateLimitPort):
     def __init__(self, next_value: int = 1) -> None:
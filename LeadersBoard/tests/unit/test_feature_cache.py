@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import multiprocessing
+import time
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pytest
+
+feature_cache = pytest.importorskip("src.anomalib.feature_cache")
+FeatureCache = feature_cache.FeatureCache
+FeatureCacheKey = feature_cache.FeatureCacheKey
+FeatureCacheWriter = feature_cache.FeatureCacheWriter
+
+SAMPLES = [f"img{i:02d}.png" for i in range(6)]
+
+
+def _key(dataset: str = "pcb1") -> Any:
+    return FeatureCacheKey(
+        dataset=dataset,
+        transform="Resize(256)",
+        backbone="resnet18",
+        layers=("layer1", "layer2"),
+        weights="w",
+    )
+
+
+def _features(samples: list[str]) -> dict[str, np.ndarray]:
+    rows = np.array([SAMPLES.index(s) for s in samples], dtype=np.float32)
+    return {
+        "layer1": np.broadcast_to(rows[:, None, None], (len(samples), 4, 2)).copy(),
+        "layer2": rows[:, None] * 10,
+    }
+
+
+def _fill(cache: Any, key: Any) -> Any:
+    writer = cache.open(key, SAMPLES)
+    assert isinstance(writer, FeatureCacheWriter)
+    # シャッフルされた順のバッチで書き込む
+    writer.write(SAMPLES[3:], _features(SAMPLES[3:]))
+    writer.write(SAMPLES[:3][::-1], _features(SAMPLES[:3][::-1]))
+    return writer.commit()
+
+
+def test_entry_round_trip_as_float16_memmap(tmp_path: Path) -> None:
+    cache = FeatureCache(tmp_path)
+
+    entry = _fill(cache, _key())
+
+    assert entry is not None
+    reopened = cache.open(_key(), SAMPLES)
+    assert not isinstance(reopened, FeatureCacheWriter)
+    features = reopened.features(["img04.png", "img01.png"])
+    assert features["layer1"].dtype == np.float16
+    assert features["layer1"][:, 0, 0].tolist() == [4.0, 1.0]
+    assert features["layer2"][:, 0].tolist() == [40.0, 10.0]
+    assert isinstance(reopened.layer("layer1"), np.memmap)
+
+
+def test_incomplete_entry_is_discarded(tmp_path: Path) -> None:
+    cache = FeatureCache(tmp_path)
+    writer = cache.open(_key(), SAMPLES)
+    writer.write(SAMPLES[:2], _features(SAMPLES[:2]))
+
+    assert writer.commit() is None
+    assert cache.get(_key()) is None
+    # ロックは解放されているので再度書き込める
+    assert isinstance(cache.open(_key(), SAMPLES), FeatureCacheWriter)
+
+
+def test_key_digest_depends_on_every_field() -> None:
+    base = _key()
+    variants = [
+        _key("other"),
+        FeatureCacheKey(base.dataset, "Resize(224)", base.backbone, base.layers, base.weights),
+        FeatureCacheKey(base.dataset, base.transform, "wide_resnet50_2", base.layers, "w"),
+        FeatureCacheKey(base.dataset, base.transform, base.backbone, ("layer1",), "w"),
+        FeatureCacheKey(base.dataset, base.transform, base.backbone, base.layers, "w2"),
+    ]
+
+    assert len({base.digest(), *(v.digest() for v in variants)}) == 6
+
+
+def test_dataset_fingerprint_tracks_file_changes(tmp_path: Path) -> None:
+    paths = []
+    for name in ("a.png", "b.png"):
+        path = tmp_path / name
+        path.write_bytes(b"x")
+        paths.append(path)
+    before = feature_cache.dataset_fingerprint(paths)
+
+    assert feature_cache.dataset_fingerprint(reversed(paths)) == before
+    paths[0].write_bytes(b"xy")
+    assert feature_cache.dataset_fingerprint(paths) != before
+
+
+def test_lru_eviction_keeps_recently_used_entries(tmp_path: Path) -> None:
+    entry_bytes = len(SAMPLES) * (4 * 2 + 1) * 2
+    cache = FeatureCache(tmp_path, max_bytes=entry_bytes * 2)
+    _fill(cache, _key("a"))
+    time.sleep(0.02)
+    _fill(cache, _key("b"))
+    time.sleep(0.02)
+    assert cache.get(_key("a")) is not None  # a を最近使ったことにする
+    time.sleep(0.02)
+
+    _fill(cache, _key("c"))
+
+    assert cache.get(_key("a")) is not None
+    assert cache.get(_key("b")) is None
+    assert cache.get(_key("c")) is not None
+
+
+def test_entry_stays_readable_after_another_worker_evicts_it(tmp_path: Path) -> None:
+    cache = FeatureCache(tmp_path)
+    _fill(cache, _key("a"))
+    entry = cache.get(_key("a"))
+    assert entry is not None
+
+    # 他の Worker の commit が上限を超えたとして a を削除する
+    FeatureCache(tmp_path, max_bytes=0).evict()
+
+    assert cache.get(_key("a")) is None
+    assert entry.features(["img02.png"])["layer2"][:, 0].tolist() == [20.0]
+
+
+def _compute_once(root: str, results: Any) -> None:
+    cache = FeatureCache(Path(root), lock_timeout=30)
+    opened = cache.open(_key(), SAMPLES)
+    if isinstance(opened, FeatureCacheWriter):
+        time.sleep(0.5)  # 他のプロセスがロック待ちになる時間を作る
+        opened.write(SAMPLES, _features(SAMPLES))
+        opened.commit()
+        results.put("computed")
+    else:
+        results.put("reused")
+
+
+def test_concurrent_workers_compute_entry_once(tmp_path: Path) -> None:
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    processes = [
+        context.Process(target=_compute_once, args=(str(tmp_path), results)) for _ in range(3)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=60)
+
+    outcomes = sorted(results.get(timeout=5) for _ in processes)
+    assert outcomes == ["computed", "reused", "reused"]
+
+
+def test_lock_timeout_returns_none(tmp_path: Path) -> None:
+    holder = FeatureCache(tmp_path).open(_key(), SAMPLES)
+    assert isinstance(holder, FeatureCacheWriter)
+
+    assert FeatureCache(tmp_path, lock_timeout=0.3).open(_key(), SAMPLES) is None
+    holder.abort()
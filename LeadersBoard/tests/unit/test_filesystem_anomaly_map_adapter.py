@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.adapters.filesystem_anomaly_map_adapter import FileSystemAnomalyMapAdapter
+
+
+def _write_store(store_dir: Path, with_masks: bool = True) -> Path:
+    """2 画像分 (32x32 と 16x24) のストアを 0 埋めで書き出す。"""
+    store_dir.mkdir(parents=True)
+    maps = np.zeros((2, 32, 32), dtype=np.float16)
+    maps[0] = np.linspace(0.0, 3.0, 32 * 32, dtype=np.float32).reshape(32, 32)
+    maps[1, :16, :24] = 5.0
+    np.save(store_dir / "anomaly_maps.npy", maps)
+    if with_masks:
+        mask = np.zeros((32, 32), dtype=bool)
+        mask[:, :10] = True
+        masks = np.zeros((2, 32, 4), dtype=np.uint8)
+        masks[0] = np.packbits(mask, axis=-1)
+        np.save(store_dir / "pred_masks.npy", masks)
+    index = {
+        "version": 1,
+        "maps": "anomaly_maps.npy",
+        "masks": "pred_masks.npy" if with_masks else None,
+        "images": [
+            {"name": "img0", "height": 32, "width": 32},
+            {"name": "img1", "height": 16, "width": 24},
+        ],
+    }
+    (store_dir / "index.json").write_text(json.dumps(index))
+    return store_dir
+
+
+def _write_compressed_store(store_dir: Path) -> Path:
+    """version 2: 画像ごとのバイトプレーンを 1 つの .npz に deflate で書き出す。"""
+    store_dir.mkdir(parents=True)
+    raw_map = np.linspace(0.0, 3.0, 16 * 24, dtype=np.float32).reshape(16, 24)
+    planes = np.moveaxis(raw_map.astype("<f2").view(np.uint8).reshape(16, 24, 2), -1, 0)
+    mask = np.zeros((16, 24), dtype=bool)
+    mask[:, :10] = True
+    np.savez_compressed(
+        store_dir / "anomaly_maps.npz", map_0=planes, mask_0=np.packbits(mask, axis=-1)
+    )
+    index = {
+        "version": 2,
+        "maps": "anomaly_maps.npz",
+        "masks": "anomaly_maps.npz",
+        "images": [{"name": "img0", "height": 16, "width": 24}],
+    }
+    (store_dir / "index.json").write_text(json.dumps(index))
+    return store_dir
+
+
+def test_render_heatmap_applies_jet_colormap(tmp_path: Path) -> None:
+    store = _write_store(tmp_path / "raw")
+    adapter = FileSystemAnomalyMapAdapter(tmp_path / "cache")
+
+    rendered = adapter.render(store, "img0", "heatmap")
+
+    arr = np.asarray(Image.open(rendered))
+    assert arr.shape == (32, 32, 3)
+    # 最小値は暗い青、最大値は暗い赤 (JET)
+    assert tuple(arr[0, 0]) == (0, 0, 128)
+    assert tuple(arr[-1, -1]) == (128, 0, 0)
+
+
+def test_render_crops_padded_maps_to_original_size(tmp_path: Path) -> None:
+    store = _write_store(tmp_path / "raw")
+    adapter = FileSystemAnomalyMapAdapter(tmp_path / "cache")
+
+    rendered = adapter.render(store, "img1", "heatmap")
+
+    assert Image.open(rendered).size == (24, 16)
+
+
+def test_render_mask_unpacks_bits(tmp_path: Path) -> None:
+    store = _write_store(tmp_path / "raw")
+    adapter = FileSystemAnomalyMapAdapter(tmp_path / "cache")
+
+    arr = np.asarray(Image.open(adapter.render(store, "img0", "mask")))
+
+    assert arr.shape == (32, 32)
+    assert (arr[:, :10] == 255).all()
+    assert (arr[:, 10:] == 0).all()
+
+
+def test_render_overlay_blends_onto_resized_original(tmp_path: Path) -> None:
+    store = _write_store(tmp_path / "raw")
+    original = tmp_path / "img0_original.png"
+    Image.new("RGB", (64, 64), (0, 0, 0)).save(original)
+    adapter = FileSystemAnomalyMapAdapter(tmp_path / "cache")
+
+    arr = np.asarray(Image.open(adapter.render(store, "img0", "overlay", original)))
+
+    assert arr.shape == (64, 64, 3)
+    assert tuple(arr[0, 0]) == (0, 0, 51)
+
+
+def test_render_reads_compressed_per_image_store(tmp_path: Path) -> None:
+    store = _write_compressed_store(tmp_path / "raw")
+    adapter = FileSystemAnomalyMapAdapter(tmp_path / "cache")
+
+    heatmap = np.asarray(Image.open(adapter.render(store, "img0", "heatmap")))
+    mask = np.asarray(Image.open(adapter.render(store, "img0", "mask")))
+
+    assert heatmap.shape == (16, 24, 3)
+    assert tuple(heatmap[0, 0]) == (0, 0, 128)
+    assert tuple(heatmap[-1, -1]) == (128, 0, 0)
+    assert (mask[:, :10] == 255).all()
+    assert (mask[:, 10:] == 0).all()
+
+
+def test_render_reuses_cached_png(tmp_path: Path) -> None:
+    store = _write_store(tmp_path / "raw")
+    adapter = FileSystemAnomalyMapAdapter(tmp_path / "cache")
+
+    first = adapter.render(store, "img0", "heatmap")
+    second = adapter.render(store, "img0", "heatmap")
+
+    assert first == second
+    assert adapter.render(store, "img0", "mask") != first
+    assert len(list((tmp_path / "cache").iterdir())) == 2
+
+
+def test_render_unknown_image_raises_file_not_found(tmp_path: Path) -> None:
+    store = _write_store(tmp_path / "raw")
+    adapter = FileSystemAnomalyMapAdapter(tmp_path / "cache")
+
+    with pytest.raises(FileNotFoundError):
+        adapter.render(store, "missing", "heatmap")
+
+
+def test_render_mask_without_stored_masks_raises_file_not_found(tmp_path: Path) -> None:
+    store = _write_store(tmp_path / "raw", with_masks=False)
+    adapter = FileSystemAnomalyMapAdapter(tmp_path / "cache")
+
+    with pytest.raises(FileNotFoundError):
+        adapter.render(store, "img0", "mask")
+
+
+def test_render_ignores_file_names_in_index(tmp_path: Path) -> None:
+    # index.json は投稿が書くので、他のストアを指すパスが入っていてもそれは読まない
+    other = _write_store(tmp_path / "other")
+    store = _write_store(tmp_path / "raw")
+    (store / "anomaly_maps.npy").write_bytes(b"not an array")
+    index = json.loads((store / "index.json").read_text())
+    index["maps"] = str(other / "anomaly_maps.npy")
+    (store / "index.json").write_text(json.dumps(index))
+    adapter = FileSystemAnomalyMapAdapter(tmp_path / "cache")
+
+    with pytest.raises(ValueError):  # 他のストアを読んでいれば描画できてしまう
+        adapter.render(store, "img0", "heatmap")
+
+
+@pytest.mark.parametrize(("artifact_type", "original"), [("original", None), ("overlay", None)])
+def test_render_rejects_invalid_requests(
+    tmp_path: Path, artifact_type: str, original: Path | None
+) -> None:
+    store = _write_store(tmp_path / "raw")
+    adapter = FileSystemAnomalyMapAdapter(tmp_path / "cache")
+
+    with pytest.raises(ValueError):
+        adapter.render(store, "img0", artifact_type, original)
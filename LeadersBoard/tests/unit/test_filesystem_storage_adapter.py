@@ -1,10 +1,12 @@
 from __future__ import annotations
 
+import zipfile
 from io import BytesIO
 from pathlib import Path
 
 import pytest
 
+from src.adapters.archive_extractor import ArchiveExtractor
 from src.adapters.filesystem_storage_adapter import FileSystemStorageAdapter
 
 
@@ -210,3 +212,47 @@ class TestArtifactAccess:
         )
         with pytest.raises(ValueError, match="不正なファイルパスです"):
             adapter.load_artifact_file("job-1", "/etc/passwd")
+
+
+def _zip_bytes(members: dict[str, bytes]) -> bytes:
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return buffer.getvalue()
+
+
+def test_save_extracts_archive_into_submission(tmp_path: Path) -> None:
+    root = tmp_path / "submissions"
+    adapter = FileSystemStorageAdapter(
+        root, logs_root=tmp_path / "logs", extractor=ArchiveExtractor(tmp_path / "cache")
+    )
+    archive = _zip_bytes({"main.py": b"print('zip')", "pkg/model.py": b"MODEL = 1"})
+    metadata = {"entrypoint": "main.py", "config_file": "config.yaml"}
+
+    adapter.save("sub-zip", [_create_file(archive, "project.zip")], metadata)
+    # 実行中のジョブが自分の提出物を書き換えても、次の投稿には影響しない
+    (root / "sub-zip" / "pkg" / "model.py").write_bytes(b"MODEL = 'tampered'")
+    adapter.save("sub-zip-2", [_create_file(archive, "project.zip")], metadata)
+
+    submission_dir = root / "sub-zip-2"
+    assert (submission_dir / "main.py").read_bytes() == b"print('zip')"
+    assert (submission_dir / "pkg" / "model.py").read_bytes() == b"MODEL = 1"
+    assert adapter.validate_entrypoint("sub-zip-2", "main.py")
+    stored = adapter.load_metadata("sub-zip")
+    assert list(stored["archives"]) == ["project.zip"]
+    assert len([p for p in (tmp_path / "cache").iterdir() if p.is_dir()]) == 1
+
+
+def test_save_rejects_unsafe_archive(tmp_path: Path) -> None:
+    root = tmp_path / "submissions"
+    adapter = FileSystemStorageAdapter(
+        root, logs_root=tmp_path / "logs", extractor=ArchiveExtractor(tmp_path / "cache")
+    )
+    archive = _zip_bytes({"../escape.py": b"x"})
+
+    with pytest.raises(ValueError, match="unsafe path"):
+        adapter.save("sub-bad", [_create_file(archive, "bad.zip")], {})
+
+    assert not (root / "sub-bad").exists()
+    assert not (root / "escape.py").exists()
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+from src.adapters.filesystem_thumbnail_adapter import FileSystemThumbnailAdapter
+
+
+def _write_png(path: Path, size: tuple[int, int] = (512, 256), color: int = 128) -> Path:
+    Image.new("RGB", size, (color, 0, 0)).save(path)
+    return path
+
+
+def test_get_thumbnail_downscales_and_converts_format(tmp_path: Path) -> None:
+    source = _write_png(tmp_path / "img_heatmap.png")
+    adapter = FileSystemThumbnailAdapter(tmp_path / "cache")
+
+    preview = adapter.get_thumbnail(source, 128, "webp")
+
+    with Image.open(preview) as img:
+        assert img.format == "WEBP"
+        assert img.size == (128, 64)
+
+
+def test_get_thumbnail_does_not_upscale(tmp_path: Path) -> None:
+    source = _write_png(tmp_path / "small.png", size=(64, 32))
+    adapter = FileSystemThumbnailAdapter(tmp_path / "cache")
+
+    preview = adapter.get_thumbnail(source, 256, "jpeg")
+
+    with Image.open(preview) as img:
+        assert img.size == (64, 32)
+
+
+def test_get_thumbnail_reuses_cached_entry(tmp_path: Path) -> None:
+    source = _write_png(tmp_path / "img.png")
+    adapter = FileSystemThumbnailAdapter(tmp_path / "cache")
+
+    first = adapter.get_thumbnail(source, 128, "webp")
+    os.utime(first, ns=(0, 0))
+    second = adapter.get_thumbnail(source, 128, "webp")
+
+    assert first == second
+    assert second.stat().st_mtime_ns > 0
+    assert adapter.get_thumbnail(source, 64, "webp") != first
+
+
+def test_get_thumbnail_evicts_least_recently_used(tmp_path: Path) -> None:
+    sources = [_write_png(tmp_path / f"img{i}.png", color=i * 40) for i in range(3)]
+    cache_root = tmp_path / "cache"
+    probe = FileSystemThumbnailAdapter(tmp_path / "probe").get_thumbnail(sources[0], 128, "png")
+    adapter = FileSystemThumbnailAdapter(cache_root, max_bytes=probe.stat().st_size * 2 + 1)
+
+    oldest = adapter.get_thumbnail(sources[0], 128, "png")
+    os.utime(oldest, ns=(1, 1))
+    adapter.get_thumbnail(sources[1], 128, "png")
+    adapter.get_thumbnail(sources[2], 128, "png")
+
+    assert not oldest.exists()
+    assert len(list(cache_root.iterdir())) <= 2
+
+
+def test_get_thumbnail_rejects_non_image(tmp_path: Path) -> None:
+    source = tmp_path / "image_predictions.csv"
+    source.write_text("a,b\n")
+    adapter = FileSystemThumbnailAdapter(tmp_path / "cache")
+
+    with pytest.raises(ValueError):
+        adapter.get_thumbnail(source, 128, "webp")
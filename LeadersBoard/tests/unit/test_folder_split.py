@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+folder_split = pytest.importorskip("src.anomalib.folder_split")
+shards = pytest.importorskip("src.anomalib.shards")
+torch = pytest.importorskip("torch")
+
+
+@dataclass
+class ListSource:
+    image_paths: list[str]
+    labels: list[int]
+
+
+def _write_folder(root: Path, normal_test: bool = True) -> Path:
+    """中身を読まない (Folder も setup では開かない) ので空のファイルで足りる。"""
+    layout = {"Normal": 9, "Anomaly": 7, "Test": 4 if normal_test else 0}
+    for directory, count in layout.items():
+        (root / directory).mkdir(parents=True)
+        for i in range(count):
+            (root / directory / f"{directory.lower()}_{i:02d}.png").write_bytes(b"")
+    (root / "Anomaly" / "anomaly_99.JPG").write_bytes(b"")
+    (root / "Normal" / "notes.txt").write_text("ignored")
+    return root.resolve()
+
+
+def _sources(root: Path, normal_test: bool = True) -> tuple[ListSource, ListSource]:
+    """anomalib.shards / dataset_registry と同じ列挙から元の train / test split を作る。"""
+    found = shards.discover_folder(root, "Normal", "Anomaly", "Test" if normal_test else None)
+    train, test = ListSource([], []), ListSource([], [])
+    for source in found:
+        target = train if source.split == "train" else test
+        target.image_paths.append(str(source.path))
+        target.labels.append(source.label)
+    return train, test
+
+
+def _names(items: list[Any]) -> list[str]:
+    return [Path(item.path).name for item in items]
+
+
+def test_default_split_holds_out_half_of_each_test_label_for_validation(tmp_path: Path) -> None:
+    train, test = _sources(_write_folder(tmp_path / "data"))
+    options = folder_split.FolderSplitOptions(seed=7)
+
+    splits = folder_split.folder_splits(train, test, options)
+
+    assert len(splits.train) == 9
+    # 異常 8 枚 (.JPG を含む) と正常 4 枚をラベルごとに半分ずつ (パスの昇順)
+    assert sorted(item.label for item in splits.test) == [0, 0, 1, 1, 1, 1]
+    assert sorted(item.label for item in splits.val) == [0, 0, 1, 1, 1, 1]
+    assert _names(splits.test) == sorted(_names(splits.test))
+    assert not set(_names(splits.test)) & set(_names(splits.val))
+    assert sorted(_names(splits.test + splits.val)) == sorted(
+        Path(p).name for p in test.image_paths
+    )
+    assert folder_split.folder_splits(train, test, options) == splits
+
+
+def test_normal_test_images_are_sampled_from_training_set_when_missing(tmp_path: Path) -> None:
+    train, test = _sources(_write_folder(tmp_path / "data", normal_test=False))
+    options = folder_split.FolderSplitOptions(val_split_mode="same_as_test", seed=1)
+
+    splits = folder_split.folder_splits(train, test, options)
+
+    # test_split_ratio=0.2 で 9 枚を 8 / 1 に分け (端数は前から配る)、異常画像と合わせる
+    assert len(splits.train) == 8
+    assert sorted(item.label for item in splits.test) == [0] + [1] * 8
+    assert [item.split for item in splits.test if item.label == 0] == ["train"]
+    assert splits.val == splits.test
+
+
+def test_extensions_and_split_modes_come_from_init_args() -> None:
+    options = folder_split.FolderSplitOptions.from_init_args(
+        {"extensions": [".PNG"], "val_split_mode": "FROM_TRAIN", "seed": "3"}
+    )
+    train = ListSource(["/d/n/a.png", "/d/n/b.jpg"], [0, 0])
+    test = ListSource(["/d/a/c.png"], [1])
+
+    splits = folder_split.folder_splits(train, test, options)
+
+    assert (options.val_split_mode, options.seed) == ("from_train", 3)
+    assert _names(splits.train + splits.val) == ["a.png"]
+    with pytest.raises(ValueError, match="synthetic"):
+        folder_split.FolderSplitOptions.from_init_args({"val_split_mode": "synthetic"})
+
+
+@pytest.mark.parametrize(
+    "init_args",
+    [
+        {},
+        {"seed": 7},
+        {"seed": 7, "normal_test_dir": None},
+        {"seed": 11, "val_split_mode": "from_train", "val_split_ratio": 0.3},
+        {"seed": 5, "val_split_mode": "same_as_test", "extensions": [".png"]},
+        {"seed": 2, "test_split_mode": "none", "normal_test_dir": None},
+    ],
+)
+def test_splits_match_anomalib_folder(tmp_path: Path, init_args: dict[str, Any]) -> None:
+    data = pytest.importorskip("anomalib.data")
+    normal_test = init_args.get("normal_test_dir", "Test") is not None
+    root = _write_folder(tmp_path / "data", normal_test=normal_test)
+    folder = data.Folder(
+        name="parity",
+        root=root,
+        normal_dir="Normal",
+        abnormal_dir="Anomaly",
+        normal_test_dir="Test" if normal_test else None,
+        **{k: v for k, v in init_args.items() if k != "normal_test_dir"},
+    )
+    # seed が無ければどちらも torch の既定の乱数を同じ順に使う
+    torch.manual_seed(0)
+    folder.setup()
+    train, test = _sources(root, normal_test=normal_test)
+
+    torch.manual_seed(0)
+    splits = folder_split.folder_splits(
+        train, test, folder_split.FolderSplitOptions.from_init_args(init_args)
+    )
+
+    assert [item.path for item in splits.train] == list(folder.train_data.samples.image_path)
+    assert [item.path for item in splits.test] == list(folder.test_data.samples.image_path)
+    if hasattr(folder, "val_data"):
+        assert [item.path for item in splits.val] == list(folder.val_data.samples.image_path)
@@ -20,6 +20,15 @@ class DummyStatus(JobStatusPort):
     def count_running(self, user_id: str) -> int:
         return 0
 
+    def list_jobs(
+        self,
+        user_id: str,
+        cursor: str | None = None,
+        limit: int = 20,
+        status: JobStatus | None = None,
+    ) -> tuple[list[dict[str, str]], str | None]:
+        return [], None
+
 
 def test_get_job_results_returns_links() -> None:
     dummy = DummyStatus({"run_id": "run-123"})
@@ -22,6 +22,15 @@ class DummyStatus(JobStatusPort):
     def count_running(self, user_id: str) -> int:
         return 0
 
+    def list_jobs(
+        self,
+        user_id: str,
+        cursor: str | None = None,
+        limit: int = 20,
+        status: JobStatus | None = None,
+    ) -> tuple[list[dict[str, Any]], str | None]:
+        return [], None
+
 
 def test_get_job_status_returns_status_dict() -> None:
     dummy = DummyStatus({"prog": "ok"})
@@ -1,11 +1,13 @@
 from __future__ import annotations
 
+import json
 from pathlib import Path
 from typing import Any
 
 import pytest
 
 from src.domain.get_visualization_artifacts import (
+    MANIFEST_PATH,
     GetVisualizationArtifacts,
     VisualizationArtifactInfo,
 )
@@ -18,9 +20,11 @@ class DummyStorage(StoragePort):
         self,
         visualizations: dict[str, list[str]] | None = None,
         root_files: dict[str, list[str]] | None = None,
+        files: dict[str, dict[str, Path]] | None = None,
     ) -> None:
         self.visualizations = visualizations or {}
         self.root_files = root_files or {}
+        self.files = files or {}
 
     def save(self, submission_id: str, files, metadata):  # type: ignore[override]
         raise NotImplementedError
@@ -48,7 +52,9 @@ class DummyStorage(StoragePort):
         return []
 
     def load_artifact_file(self, job_id: str, filepath: str) -> Path:
-        raise NotImplementedError
+        if filepath in self.files.get(job_id, {}):
+            return self.files[job_id][filepath]
+        raise FileNotFoundError(filepath)
 
 
 class DummyStatus(JobStatusPort):
@@ -67,6 +73,15 @@ class DummyStatus(JobStatusPort):
     def count_running(self, user_id: str) -> int:
         return 0
 
+    def list_jobs(
+        self,
+        user_id: str,
+        cursor: str | None = None,
+        limit: int = 20,
+        status: JobStatus | None = None,
+    ) -> tuple[list[dict[str, Any]], str | None]:
+        return [], None
+
 
 def test_job_completed_with_artifacts_returns_correct_list() -> None:
     status = DummyStatus({"status": JobStatus.COMPLETED.value})
@@ -210,3 +225,70 @@ def test_job_failed_returns_empty_result() -> None:
 
     assert result.artifacts == []
     assert result.csv_files == []
+
+
+def _write_manifest(tmp_path: Path) -> Path:
+    manifest = {
+        "version": 1,
+        "total_images": 3,
+        "csv_files": ["image_predictions.csv"],
+        "images": [
+            {"name": "a", "score": 0.2, "label": "0", "files": {"original": 10, "heatmap": 20}},
+            {"name": "b", "score": 0.9, "label": "1", "files": {"original": 11}},
+            {"name": "c", "score": None, "label": None, "files": {"original": 12}},
+        ],
+    }
+    path = tmp_path / "manifest.json"
+    path.write_text(json.dumps(manifest))
+    return path
+
+
+def test_manifest_is_served_without_directory_listing(tmp_path: Path) -> None:
+    status = DummyStatus({"status": JobStatus.COMPLETED.value})
+    storage = DummyStorage(
+        visualizations={"job-1": ["stale_original.png"]},
+        files={"job-1": {MANIFEST_PATH: _write_manifest(tmp_path)}},
+    )
+    use_case = GetVisualizationArtifacts(storage, status)
+
+    result = use_case.execute("job-1")
+
+    assert result.total_images == 3
+    assert [g.name for g in result.images] == ["a", "b", "c"]
+    assert result.csv_files == ["image_predictions.csv"]
+    assert result.images[0].artifacts[1] == VisualizationArtifactInfo(
+        filename="a_heatmap.png",
+        artifact_type="heatmap",
+        url="/jobs/job-1/visualizations/a_heatmap.png",
+        size_bytes=20,
+    )
+    assert all(a.filename != "stale_original.png" for a in result.artifacts)
+
+
+def test_manifest_sorted_by_score_and_paginated(tmp_path: Path) -> None:
+    status = DummyStatus({"status": JobStatus.COMPLETED.value})
+    storage = DummyStorage(files={"job-1": {MANIFEST_PATH: _write_manifest(tmp_path)}})
+    use_case = GetVisualizationArtifacts(storage, status)
+
+    first = use_case.execute("job-1", offset=0, limit=2, sort="score_desc")
+    rest = use_case.execute("job-1", offset=2, limit=2, sort="score_desc")
+
+    assert [(g.name, g.score) for g in first.images] == [("b", 0.9), ("a", 0.2)]
+    assert [g.name for g in rest.images] == ["c"]
+    assert [a.filename for a in rest.artifacts] == ["c_original.png"]
+    assert first.total_images == 3
+
+
+def test_listing_fallback_groups_and_paginates() -> None:
+    status = DummyStatus({"status": JobStatus.COMPLETED.value})
+    storage = DummyStorage(
+        visualizations={"job-1": ["x_heatmap.png", "x_original.png", "y_original.png"]},
+        root_files={"job-1": []},
+    )
+    use_case = GetVisualizationArtifacts(storage, status)
+
+    result = use_case.execute("job-1", limit=1)
+
+    assert result.total_images == 2
+    assert [g.name for g in result.images] == ["x"]
+    assert [a.filename for a in result.artifacts] == ["x_heatmap.png", "x_original.png"]
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pytest
+
+from src.worker.inference_benchmark import (
+    BenchmarkSettings,
+    ExportManifest,
+    InferenceBenchmark,
+    max_abs_difference,
+    summarize,
+)
+
+
+def _write_manifest(output_dir: Path, **overrides: object) -> Path:
+    export_dir = output_dir / "exported"
+    export_dir.mkdir(parents=True, exist_ok=True)
+    manifest = {"format": "torchscript", "file": "model.pt", "input_shape": [3, 8, 8]}
+    manifest.update(overrides)
+    (export_dir / "export.json").write_text(json.dumps(manifest))
+    return export_dir
+
+
+def test_summarize_percentiles_and_throughput() -> None:
+    latencies = [i / 1000 for i in range(1, 101)]  # 1ms..100ms
+
+    result = summarize(latencies, batch_size=4, elapsed=2.0)
+
+    assert result["latency_p50_ms"] == pytest.approx(50.5)
+    assert result["latency_p95_ms"] == pytest.approx(95.05)
+    assert result["latency_p99_ms"] == pytest.approx(99.01)
+    assert result["throughput_ips"] == pytest.approx(200.0)
+
+
+def test_settings_from_env(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("INFERENCE_BENCHMARK_BATCH_SIZES", "1,16")
+    monkeypatch.setenv("INFERENCE_BENCHMARK_THREADS", "bad")
+    monkeypatch.setenv("INFERENCE_BENCHMARK_ITERATIONS", "20")
+    monkeypatch.setenv("INFERENCE_PARITY_ATOL", "1e-2")
+
+    settings = BenchmarkSettings.from_env()
+
+    assert settings.batch_sizes == (1, 16)
+    assert settings.threads == BenchmarkSettings().threads
+    assert settings.iterations == 20
+    assert settings.parity_atol == pytest.approx(1e-2)
+
+
+def test_exported_model_missing_returns_none(tmp_path: Path) -> None:
+    assert ExportManifest.from_output_dir(tmp_path) is None
+    assert InferenceBenchmark(BenchmarkSettings()).run(tmp_path) == {}
+
+
+@pytest.mark.parametrize(
+    "overrides",
+    [
+        {"format": "pickle"},
+        {"file": "../model.pt"},
+        {"file": "missing.pt"},
+        {"input_shape": "3x8x8"},
+        {"models": []},
+        {"models": [{"format": "onnx", "file": "missing.onnx"}]},
+        {"sample_input": "missing.npy"},
+    ],
+)
+def test_exported_model_invalid_manifest(tmp_path: Path, overrides: dict[str, object]) -> None:
+    export_dir = _write_manifest(tmp_path, **overrides)
+    (export_dir / "model.pt").write_bytes(b"")
+
+    with pytest.raises(ValueError):
+        ExportManifest.from_output_dir(tmp_path)
+
+
+def test_manifest_with_multiple_models(tmp_path: Path) -> None:
+    export_dir = _write_manifest(
+        tmp_path,
+        models=[
+            {"format": "onnx", "file": "model.onnx"},
+            {"format": "torch_export", "file": "model.pt2"},
+        ],
+        sample_input="sample_input.npy",
+    )
+    for name in ("model.onnx", "model.pt2", "sample_input.npy"):
+        (export_dir / name).write_bytes(b"")
+
+    manifest = ExportManifest.from_output_dir(tmp_path)
+
+    assert manifest is not None
+    assert [m.format for m in manifest.models] == ["onnx", "torch_export"]
+    assert manifest.reference is not None
+    assert manifest.reference.format == "torch_export"
+    assert manifest.sample_input == export_dir / "sample_input.npy"
+    assert manifest.input_shape == (3, 8, 8)
+
+
+def test_max_abs_difference_ignores_non_float_outputs() -> None:
+    reference = [np.zeros((2, 3), dtype=np.float32), np.array([True, False])]
+    outputs = [np.full((2, 3), 0.25, dtype=np.float32), np.array([False, True])]
+
+    assert max_abs_difference(reference, outputs) == pytest.approx(0.25)
+    with pytest.raises(ValueError, match="count"):
+        max_abs_difference(reference, outputs[:1])
+
+
+def _export_program(torch: Any, module: Any, path: Path) -> None:
+    program = torch.export.export(
+        module, (torch.zeros(2, 3, 8, 8),), dynamic_shapes=({0: torch.export.Dim("batch")},)
+    )
+    torch.export.save(program, str(path))
+
+
+def test_run_measures_exported_program(tmp_path: Path) -> None:
+    torch = pytest.importorskip("torch")
+    export_dir = _write_manifest(tmp_path, format="torch_export", file="model.pt2")
+    _export_program(torch, torch.nn.Conv2d(3, 1, kernel_size=3), export_dir / "model.pt2")
+    settings = BenchmarkSettings(batch_sizes=(1, 2), threads=(1,), warmup=1, iterations=3)
+
+    metrics = InferenceBenchmark(settings).run(tmp_path)
+
+    for prefix in ("cpu_bs1_t1", "cpu_bs2_t1"):
+        assert metrics[f"{prefix}_latency_p50_ms"] > 0
+        assert metrics[f"{prefix}_latency_p99_ms"] >= metrics[f"{prefix}_latency_p50_ms"]
+        assert metrics[f"{prefix}_throughput_ips"] > 0
+        assert metrics[f"{prefix}_peak_rss_mb"] > 0
+
+
+def test_run_checks_onnx_parity_and_measures_runtime(tmp_path: Path) -> None:
+    torch = pytest.importorskip("torch")
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("onnxscript")
+    torch.manual_seed(0)
+    module = torch.nn.Conv2d(3, 1, kernel_size=3).eval()
+    other = torch.nn.Conv2d(3, 1, kernel_size=3).eval()
+    export_dir = _write_manifest(
+        tmp_path,
+        models=[
+            {"format": "torch_export", "file": "model.pt2"},
+            {"format": "onnx", "file": "model.onnx"},
+        ],
+        sample_input="sample_input.npy",
+    )
+    _export_program(torch, module, export_dir / "model.pt2")
+    np.save(export_dir / "sample_input.npy", np.random.default_rng(0).random((2, 3, 8, 8)))
+    settings = BenchmarkSettings(batch_sizes=(1,), threads=(1,), warmup=1, iterations=2)
+
+    def export_onnx(model: Any) -> dict[str, float]:
+        torch.onnx.export(
+            model,
+            (torch.zeros(2, 3, 8, 8),),
+            str(export_dir / "model.onnx"),
+            input_names=["input"],
+            dynamo=True,
+            dynamic_shapes=({0: torch.export.Dim("batch")},),
+        )
+        return InferenceBenchmark(settings).run(tmp_path)
+
+    metrics = export_onnx(module)
+
+    assert metrics["export_onnx_parity_ok"] == 1.0
+    assert metrics["export_onnx_max_abs_diff"] < 1e-4
+    assert metrics["cpu_bs1_t1_latency_p50_ms"] > 0
+    assert metrics["cpu_onnx_bs1_t1_latency_p50_ms"] > 0
+    assert metrics["cpu_onnx_bs1_t1_throughput_ips"] > 0
+
+    # 別の重みで書き出した ONNX は数値一致しない
+    mismatched = export_onnx(other)
+
+    assert mismatched["export_onnx_parity_ok"] == 0.0
+    assert mismatched["export_onnx_max_abs_diff"] > settings.parity_atol
+
+
+def test_run_skips_broken_accelerated_model(tmp_path: Path) -> None:
+    torch = pytest.importorskip("torch")
+    export_dir = _write_manifest(
+        tmp_path,
+        models=[
+            {"format": "torch_export", "file": "model.pt2"},
+            {"format": "onnx", "file": "model.onnx"},
+        ],
+    )
+    _export_program(torch, torch.nn.Conv2d(3, 1, kernel_size=3), export_dir / "model.pt2")
+    (export_dir / "model.onnx").write_bytes(b"not a model")
+    settings = BenchmarkSettings(batch_sizes=(1,), threads=(1,), warmup=0, iterations=1)
+
+    metrics = InferenceBenchmark(settings).run(tmp_path)
+
+    assert "cpu_bs1_t1_latency_p50_ms" in metrics
+    assert not any(key.startswith(("cpu_onnx", "export_onnx")) for key in metrics)
+
+
+def test_run_raises_when_process_fails(tmp_path: Path) -> None:
+    export_dir = _write_manifest(tmp_path)
+    (export_dir / "model.pt").write_bytes(b"not a model")
+    settings = BenchmarkSettings(batch_sizes=(1,), threads=(1,), warmup=0, iterations=1)
+
+    with pytest.raises(RuntimeError, match="failed"):
+        InferenceBenchmark(settings).run(tmp_path)
+
+
+def test_disabled_skips(tmp_path: Path) -> None:
+    _write_manifest(tmp_path)
+
+    assert InferenceBenchmark(BenchmarkSettings(enabled=False)).run(tmp_path) == {}
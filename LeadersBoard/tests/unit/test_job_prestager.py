@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import time
+from pathlib import Path
+from typing import Any
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.ports.job_queue_port import JobQueuePort
+from src.worker.job_prestager import (
+    JobPrestager,
+    PrestageSettings,
+    dataset_files,
+    warm_page_cache,
+)
+
+
+class PeekQueue(JobQueuePort):
+    def __init__(self, jobs: list[dict[str, Any]]) -> None:
+        self.jobs = jobs
+
+    def enqueue(self, job_id, submission_id, entrypoint, config_file, config) -> None:  # type: ignore[no-untyped-def]
+        raise NotImplementedError
+
+    def dequeue(self, timeout: int = 0) -> dict[str, Any] | None:
+        return self.jobs.pop(0) if self.jobs else None
+
+    def peek(self) -> dict[str, Any] | None:
+        return self.jobs[0] if self.jobs else None
+
+
+def _job(job_id: str = "job-1", entrypoint: str = "main.py") -> dict[str, Any]:
+    return {
+        "job_id": job_id,
+        "submission_id": "sub-1",
+        "entrypoint": entrypoint,
+        "config_file": "config.yaml",
+    }
+
+
+@pytest.fixture
+def submission(tmp_path: Path) -> Path:
+    submission_dir = tmp_path / "submission"
+    submission_dir.mkdir()
+    (submission_dir / "main.py").write_text("print('hi')")
+    shards = tmp_path / "shards"
+    shards.mkdir()
+    (shards / "images-00000.npy").write_bytes(b"x" * 100)
+    (shards / "masks-00000.npy").write_bytes(b"x" * 50)
+    (submission_dir / "config.yaml").write_text(
+        f"shards:\n  path: {shards}\nresource_class: small\n"
+    )
+    return submission_dir
+
+
+def _prestager(submission: Path, **settings: Any) -> JobPrestager:
+    storage = MagicMock()
+    storage.load.return_value = str(submission)
+    return JobPrestager(storage, PrestageSettings(**settings))
+
+
+def test_stage_parses_config_and_warms_dataset(submission: Path) -> None:
+    prestager = _prestager(submission)
+
+    staged = prestager.stage(_job())
+
+    assert staged.error is None
+    assert staged.submission_dir == submission
+    assert staged.config["resource_class"] == "small"
+    assert (staged.warmed_files, staged.warmed_bytes) == (2, 150)
+    assert prestager.take("job-1") is staged
+    assert prestager.take("job-1") is None
+
+
+def test_stage_records_missing_entrypoint(submission: Path) -> None:
+    staged = _prestager(submission).stage(_job(entrypoint="missing.py"))
+
+    assert staged.submission_dir is None
+    assert "missing.py" in (staged.error or "")
+
+
+def test_stage_records_invalid_config(submission: Path) -> None:
+    (submission / "config.yaml").write_text("- just\n- a list\n")
+
+    staged = _prestager(submission).stage(_job())
+
+    assert staged.error == "config.yaml must be a mapping"
+
+
+def test_warm_page_cache_respects_byte_budget(tmp_path: Path) -> None:
+    paths = []
+    for name in ("a", "b", "c"):
+        path = tmp_path / name
+        path.write_bytes(b"x" * 10)
+        paths.append(path)
+
+    assert warm_page_cache([*paths, tmp_path / "gone"], max_bytes=100) == (3, 30, 1)
+    assert warm_page_cache(paths, max_bytes=25) == (2, 20, 0)
+
+
+def test_dataset_files_without_dataset_is_empty() -> None:
+    assert dataset_files({"data": {"init_args": {"root": "/nowhere"}}}) == []
+
+
+def test_old_staged_jobs_are_dropped(submission: Path) -> None:
+    prestager = _prestager(submission, max_staged=2)
+    for job_id in ("a", "b", "c"):
+        prestager.stage(_job(job_id))
+
+    assert prestager.take("a") is None
+    assert prestager.take("c") is not None
+
+
+def test_background_thread_stages_queue_head(submission: Path) -> None:
+    prestager = _prestager(submission, interval=0.01)
+    queue = PeekQueue([_job("next")])
+
+    prestager.start(queue)
+    try:
+        deadline = time.monotonic() + 5
+        staged = None
+        while staged is None and time.monotonic() < deadline:
+            staged = prestager.take("next")
+            time.sleep(0.01)
+    finally:
+        prestager.stop()
+
+    assert staged is not None and staged.error is None
+    assert queue.jobs  # peek はキューからジョブを取り出さない
+
+
+def test_disabled_prestager_does_not_start(submission: Path) -> None:
+    prestager = _prestager(submission, enabled=False)
+
+    prestager.start(PeekQueue([_job()]))
+
+    assert prestager._thread is None
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+import os
 import subprocess
+import sys
 import threading
+import time
 from pathlib import Path
-from typing import Any
+from typing import Any, cast
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -12,7 +15,7 @@ from src.ports.job_queue_port import JobQueuePort
 from src.ports.job_status_port import JobStatus, JobStatusPort
 from src.ports.storage_port import StoragePort
 from src.ports.tracking_port import TrackingPort
-from src.worker.job_worker import JobWorker
+from src.worker.job_worker import JobInterrupted, JobWorker
 
 
 class DummyStorage(StoragePort):
@@ -69,6 +72,15 @@ class DummyStatus(JobStatusPort):
     def count_running(self, user_id: str) -> int:
         return 0
 
+    def list_jobs(
+        self,
+        user_id: str,
+        cursor: str | None = None,
+        limit: int = 20,
+        status: JobStatus | None = None,
+    ) -> tuple[list[dict[str, Any]], str | None]:
+        return [], None
+
 
 class DummyQueue(JobQueuePort):
     def __init__(self, jobs: list[dict[str, Any]]) -> None:
@@ -94,10 +106,13 @@ class DummyTracking(TrackingPort):
     def __init__(self) -> None:
         self.calls: list[tuple[str, Any]] = []
         self.run_id = "run-123"
+        self.resumed_run_ids: list[str] = []
 
-    def start_run(self, run_name: str) -> str:
+    def start_run(self, run_name: str, run_id: str | None = None) -> str:
         self.calls.append(("start_run", run_name))
-        return self.run_id
+        if run_id:
+            self.resumed_run_ids.append(run_id)
+        return run_id or self.run_id
 
     def log_params(self, params: dict[str, Any]) -> None:
         self.calls.append(("log_params", params))
@@ -203,6 +218,36 @@ def test_execute_job_invalid_path_updates_status(
     assert status.calls[-1][1] == JobStatus.FAILED
 
 
+def test_execute_job_consumes_prestaged_job(
+    monkeypatch: Any, worker: JobWorker, storage: DummyStorage
+) -> None:
+    job = {
+        "job_id": "job-staged",
+        "submission_id": "sub-1",
+        "entrypoint": "main.py",
+        "config_file": "config.yaml",
+    }
+    (storage.path / "main.py").write_text("print('ok')")
+    (storage.path / "config.yaml").write_text("visualization:\n  enabled: false\n")
+    staged = worker.prestager.stage(job)
+    assert staged.error is None
+    output_dir = worker.artifacts_root / "job-staged"
+    output_dir.mkdir(parents=True, exist_ok=True)
+    (output_dir / "metrics.json").write_text('{"params": {}, "metrics": {"auc": 0.9}}')
+    popen = create_mock_popen()
+    monkeypatch.setattr("src.worker.job_worker.subprocess.Popen", popen)
+    storage.load = MagicMock(side_effect=AssertionError("submission was already resolved"))
+    collect = MagicMock()
+    monkeypatch.setattr("src.worker.job_worker.VisualizationCollector", collect)
+
+    worker.execute_job(job)
+
+    assert worker.prestager.take("job-staged") is None
+    assert popen.call_args.args[0][1] == str(storage.path / "main.py")
+    # 解析済みの config (visualization 無効) が使われ、収集は行われない
+    collect.assert_not_called()
+
+
 def test_run_processes_job(
     monkeypatch: Any,
     storage: DummyStorage,
@@ -847,3 +892,307 @@ def test_visualization_collection_called_after_subprocess(
 
     mock_config_cls.from_config_file.assert_called_once_with(config_path)
     mock_collector.collect.assert_called_once_with(output_dir, mock_config)
+
+
+def test_execute_job_logs_bootstrap_intervals(
+    monkeypatch: Any,
+    worker: JobWorker,
+    tracking: DummyTracking,
+) -> None:
+    job = {
+        "job_id": "job-bootstrap",
+        "submission_id": "sub-1",
+        "entrypoint": "main.py",
+        "config_file": "config.yaml",
+    }
+    output_dir = worker.artifacts_root / job["job_id"]
+    output_dir.mkdir(parents=True, exist_ok=True)
+    (output_dir / "metrics.json").write_text(
+        '{"params": {"method": "padim"}, "metrics": {"image_AUROC": 0.9}}'
+    )
+    rows = [f"img_{i}.png,{i / 20},{i >= 10},{int(i % 3 != 0)}" for i in range(20)]
+    (output_dir / "image_predictions.csv").write_text(
+        "image_path,anomaly_score,pred_label,gt_label\n" + "\n".join(rows) + "\n"
+    )
+    monkeypatch.setattr("src.worker.job_worker.subprocess.Popen", create_mock_popen())
+    monkeypatch.setattr(JobWorker, "BOOTSTRAP_RESAMPLES", 200)
+    monkeypatch.setattr(JobWorker, "BOOTSTRAP_WORKERS", 1)
+
+    worker.execute_job(job)
+
+    assert ("log_metrics", {"image_AUROC": 0.9}) in tracking.calls
+    logged = [call[1] for call in tracking.calls if call[0] == "log_metrics"]
+    bootstrap = next(m for m in logged if "image_AUROC_ci_lower" in m)
+    assert bootstrap["image_AUROC_ci_lower"] <= bootstrap["image_AUROC_ci_upper"]
+    assert "image_F1Score_std" in bootstrap
+
+
+def test_execute_job_logs_inference_benchmark_as_system_metrics(
+    monkeypatch: Any,
+    worker: JobWorker,
+    tracking: DummyTracking,
+) -> None:
+    job = {
+        "job_id": "job-benchmark",
+        "submission_id": "sub-1",
+        "entrypoint": "main.py",
+        "config_file": "config.yaml",
+    }
+    output_dir = worker.artifacts_root / job["job_id"]
+    output_dir.mkdir(parents=True, exist_ok=True)
+    (output_dir / "metrics.json").write_text(
+        '{"params": {}, "metrics": {"auc": 0.9}, "performance": {"training_time_seconds": 1.0}}'
+    )
+    monkeypatch.setattr("src.worker.job_worker.subprocess.Popen", create_mock_popen())
+    benchmark = MagicMock()
+    benchmark.run.return_value = {"cpu_bs1_t1_latency_p50_ms": 12.5}
+    worker.benchmark = benchmark
+
+    worker.execute_job(job)
+
+    benchmark.run.assert_called_once_with(output_dir, worker._run_post_process)
+    expected = {
+        "system/training_time_seconds": 1.0,
+        "system/cpu_bs1_t1_latency_p50_ms": 12.5,
+    }
+    assert ("log_metrics", expected) in tracking.calls
+
+
+def test_execute_job_continues_when_benchmark_fails(
+    monkeypatch: Any,
+    worker: JobWorker,
+    status: DummyStatus,
+) -> None:
+    job = {
+        "job_id": "job-benchmark-fail",
+        "submission_id": "sub-1",
+        "entrypoint": "main.py",
+        "config_file": "config.yaml",
+    }
+    output_dir = worker.artifacts_root / job["job_id"]
+    output_dir.mkdir(parents=True, exist_ok=True)
+    (output_dir / "metrics.json").write_text('{"params": {}, "metrics": {"auc": 0.9}}')
+    monkeypatch.setattr("src.worker.job_worker.subprocess.Popen", create_mock_popen())
+    benchmark = MagicMock()
+    benchmark.run.side_effect = RuntimeError("benchmark failed")
+    worker.benchmark = benchmark
+
+    worker.execute_job(job)
+
+    assert status.calls[-1][1] == JobStatus.COMPLETED
+
+
+def test_execute_job_logs_quantization_metrics_with_prefix(
+    monkeypatch: Any,
+    worker: JobWorker,
+    tracking: DummyTracking,
+    status: DummyStatus,
+) -> None:
+    job = {
+        "job_id": "job-quant",
+        "submission_id": "sub-1",
+        "entrypoint": "main.py",
+        "config_file": "config.yaml",
+    }
+    output_dir = worker.artifacts_root / job["job_id"]
+    output_dir.mkdir(parents=True, exist_ok=True)
+    (output_dir / "metrics.json").write_text('{"params": {}, "metrics": {"auc": 0.9}}')
+    monkeypatch.setattr("src.worker.job_worker.subprocess.Popen", create_mock_popen())
+    quantization = MagicMock()
+    quantization.run.return_value = {"image_AUROC_delta": -0.01, "size_ratio": 0.26}
+    worker.quantization = quantization
+
+    worker.execute_job(job)
+
+    quantization.run.assert_called_once_with(output_dir, worker._run_post_process)
+    expected = {"quant/image_AUROC_delta": -0.01, "quant/size_ratio": 0.26}
+    assert ("log_metrics", expected) in tracking.calls
+
+    quantization.run.side_effect = RuntimeError("quantization failed")
+    job["job_id"] = "job-quant-fail"
+    (worker.artifacts_root / "job-quant-fail").mkdir()
+    (worker.artifacts_root / "job-quant-fail" / "metrics.json").write_text(
+        '{"params": {}, "metrics": {"auc": 0.9}}'
+    )
+
+    worker.execute_job(job)
+
+    assert status.calls[-1][1] == JobStatus.COMPLETED
+
+
+def test_dependency_overlay_is_appended_to_child_pythonpath(
+    monkeypatch: Any, worker: JobWorker, storage: DummyStorage, tmp_path: Path
+) -> None:
+    overlay = tmp_path / "overlays" / "abc"
+    monkeypatch.setenv("PYTHONPATH", "/app/src")
+
+    env = worker._build_env(overlay)
+
+    assert env["PYTHONPATH"].split(":") == ["/app/src", str(overlay)]
+    assert worker._build_env(None)["PYTHONPATH"] == "/app/src"
+
+
+def test_invalid_requirements_fail_the_job(worker: JobWorker, storage: DummyStorage) -> None:
+    (storage.path / "requirements.txt").write_text("--extra-index-url https://example.com\n")
+    job = {
+        "job_id": "job-deps",
+        "submission_id": "sub-1",
+        "entrypoint": "main.py",
+        "config_file": "config.yaml",
+    }
+
+    with pytest.raises(ValueError, match="unsupported line"):
+        worker.execute_job(job)
+
+    assert worker.status.calls[-1][1] == JobStatus.FAILED  # type: ignore[attr-defined]
+
+
+def test_stop_interrupts_running_job_and_requeues_it(
+    worker: JobWorker, status: DummyStatus, storage: DummyStorage
+) -> None:
+    (storage.path / "main.py").write_text("import time\ntime.sleep(30)\n")
+    (storage.path / "config.yaml").write_text("resource_class: unlimited\n")
+    job = {
+        "job_id": "job-preempted",
+        "submission_id": "sub-1",
+        "entrypoint": "main.py",
+        "config_file": "config.yaml",
+        "config": {"resource_class": "unlimited"},
+    }
+    queue = MagicMock()
+    worker.queue = queue
+
+    def stop_when_started() -> None:
+        while worker._process is None:
+            threading.Event().wait(0.01)
+        worker.stop()
+
+    stopper = threading.Thread(target=stop_when_started)
+    stopper.start()
+    with pytest.raises(JobInterrupted):
+        worker.execute_job(job)
+    stopper.join()
+
+    assert status.calls[-1][1] == JobStatus.PENDING
+    queue.requeue.assert_called_once_with({**job, "attempt": 1, "run_id": "run-123"})
+
+
+def test_stop_during_post_processing_terminates_it_and_requeues_job(
+    worker: JobWorker, status: DummyStatus, storage: DummyStorage
+) -> None:
+    (storage.path / "main.py").write_text(
+        "import json, pathlib, sys\n"
+        "out = pathlib.Path(sys.argv[sys.argv.index('--output') + 1])\n"
+        "out.mkdir(parents=True, exist_ok=True)\n"
+        "(out / 'metrics.json').write_text(json.dumps({'params': {}, 'metrics': {}}))\n"
+    )
+    (storage.path / "config.yaml").write_text("{}\n")
+    job = {
+        "job_id": "job-post-process",
+        "submission_id": "sub-1",
+        "entrypoint": "main.py",
+        "config_file": "config.yaml",
+    }
+    queue = MagicMock()
+    worker.queue = queue
+    sleeper = [sys.executable, "-c", "import time; time.sleep(30)"]
+    benchmark = MagicMock()
+    benchmark.run.side_effect = lambda output_dir, runner: runner(sleeper, dict(os.environ), 60)
+    worker.benchmark = benchmark
+
+    def stop_when_benchmarking() -> None:
+        while not (benchmark.run.called and worker._process is not None):
+            threading.Event().wait(0.01)
+        worker.stop()
+
+    stopper = threading.Thread(target=stop_when_benchmarking)
+    stopper.start()
+    started = time.monotonic()
+    with pytest.raises(JobInterrupted):
+        worker.execute_job(job)
+    stopper.join()
+
+    assert time.monotonic() - started < 20
+    assert status.calls[-1][1] == JobStatus.PENDING
+    queue.requeue.assert_called_once_with({**job, "attempt": 1, "run_id": "run-123"})
+    assert not [c for c in worker.tracking.calls if c[0] == "log_params"]  # type: ignore[attr-defined]
+
+
+def test_requeued_job_resumes_from_last_checkpoint(
+    monkeypatch: Any, worker: JobWorker, storage: DummyStorage, tmp_path: Path
+) -> None:
+    logs_root = tmp_path / "logs"
+    logs_root.mkdir()
+    storage.logs_root = logs_root
+    (logs_root / "job-resume.log").write_text("first attempt\n")
+    output_dir = worker.artifacts_root / "job-resume"
+    checkpoint = output_dir / "checkpoints" / "last.ckpt"
+    checkpoint.parent.mkdir(parents=True)
+    checkpoint.write_bytes(b"ckpt")
+    (output_dir / "metrics.json").write_text('{"params": {}, "metrics": {"auc": 0.9}}')
+    (output_dir / "metrics_stream.jsonl").write_text('{"key": "loss", "value": 1.0, "step": 1}\n')
+    popen = create_mock_popen()
+    monkeypatch.setattr("src.worker.job_worker.subprocess.Popen", popen)
+    job = {
+        "job_id": "job-resume",
+        "submission_id": "sub-1",
+        "entrypoint": "main.py",
+        "config_file": "config.yaml",
+        "attempt": 1,
+        "run_id": "run-previous",
+    }
+
+    worker.execute_job(job)
+
+    env = popen.call_args.kwargs["env"]
+    assert env[JobWorker.RESUME_CHECKPOINT_ENV] == str(checkpoint)
+    assert (logs_root / "job-resume.log").read_text().startswith("first attempt")
+    # 前回の run を再開し、送信済みのストリームは読み直さない
+    tracking = cast(DummyTracking, worker.tracking)
+    assert tracking.resumed_run_ids == ["run-previous"]
+    assert not [c for c in tracking.calls if c[0] == "log_metrics" and "loss" in c[1]]
+    assert (output_dir / "metrics_stream.1.jsonl").exists()
+    assert not (output_dir / "metrics_stream.jsonl").exists()
+
+
+def _streaming_script(exit_code: int) -> str:
+    return (
+        "import argparse, json, os, sys\n"
+        "parser = argparse.ArgumentParser()\n"
+        "parser.add_argument('--config')\n"
+        "parser.add_argument('--output')\n"
+        "args = parser.parse_args()\n"
+        "os.makedirs(args.output, exist_ok=True)\n"
+        "with open(os.environ['LEADERBOARD_METRICS_STREAM'], 'a') as f:\n"
+        "    for step in range(3):\n"
+        "        f.write(json.dumps({'step': step, 'metrics': {'train_loss': 1.0 - step / 10}}))\n"
+        "        f.write('\\n')\n"
+        "with open(os.path.join(args.output, 'metrics.json'), 'w') as f:\n"
+        "    json.dump({'params': {}, 'metrics': {'auc': 0.9}}, f)\n"
+        f"sys.exit({exit_code})\n"
+    )
+
+
+@pytest.mark.parametrize("exit_code", [0, 1])
+def test_streamed_metrics_reach_tracking_even_if_job_crashes(
+    worker: JobWorker, storage: DummyStorage, tracking: DummyTracking, exit_code: int
+) -> None:
+    (storage.path / "main.py").write_text(_streaming_script(exit_code))
+    (storage.path / "config.yaml").write_text("{}\n")
+    job = {
+        "job_id": f"job-stream-{exit_code}",
+        "submission_id": "sub-1",
+        "entrypoint": "main.py",
+        "config_file": "config.yaml",
+    }
+
+    if exit_code:
+        with pytest.raises(subprocess.CalledProcessError):
+            worker.execute_job(job)
+    else:
+        worker.execute_job(job)
+
+    streamed = [c[1] for c in tracking.calls if c[0] == "log_metrics" and "train_loss" in c[1]]
+    assert streamed == [{"train_loss": 1.0}, {"train_loss": 0.9}, {"train_loss": 0.8}]
+    assert tracking.calls[0] == ("start_run", job["job_id"])
+    assert tracking.calls[-1] == ("end_run", None)
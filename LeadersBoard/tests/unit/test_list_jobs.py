@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+
+from src.domain.list_jobs import ListJobs
+from src.ports.job_status_port import JobStatus, JobStatusPort
+
+
+class DummyStatus(JobStatusPort):
+    def __init__(self, jobs: list[dict[str, Any]], next_cursor: str | None = None) -> None:
+        self.jobs = jobs
+        self.next_cursor = next_cursor
+        self.calls: list[tuple[str, str | None, int, JobStatus | None]] = []
+
+    def create(self, job_id: str, submission_id: str, user_id: str) -> None:
+        raise NotImplementedError
+
+    def update(self, job_id: str, status: JobStatus, **kwargs: Any) -> None:
+        raise NotImplementedError
+
+    def get_status(self, job_id: str) -> dict[str, Any] | None:
+        return None
+
+    def count_running(self, user_id: str) -> int:
+        return 0
+
+    def list_jobs(
+        self,
+        user_id: str,
+        cursor: str | None = None,
+        limit: int = 20,
+        status: JobStatus | None = None,
+    ) -> tuple[list[dict[str, Any]], str | None]:
+        self.calls.append((user_id, cursor, limit, status))
+        return self.jobs, self.next_cursor
+
+
+def test_list_jobs_passes_parsed_status_and_cursor() -> None:
+    dummy = DummyStatus([{"job_id": "job-1"}], next_cursor="123")
+    use_case = ListJobs(dummy)
+
+    page = use_case.execute("user-1", cursor="456", limit=10, status="completed")
+
+    assert page.jobs == [{"job_id": "job-1"}]
+    assert page.next_cursor == "123"
+    assert dummy.calls == [("user-1", "456", 10, JobStatus.COMPLETED)]
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"limit": 0},
+        {"limit": ListJobs.MAX_LIMIT + 1},
+        {"cursor": "not-a-number"},
+        {"cursor": "123:"},
+        {"status": "unknown"},
+    ],
+)
+def test_list_jobs_rejects_invalid_arguments(kwargs: dict[str, Any]) -> None:
+    use_case = ListJobs(DummyStatus([]))
+
+    with pytest.raises(ValueError):
+        use_case.execute("user-1", **kwargs)
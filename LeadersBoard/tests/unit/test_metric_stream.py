@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import json
+import time
+from pathlib import Path
+from typing import Any
+
+from src.ports.tracking_port import MetricRecord, TrackingPort
+from src.worker.metric_stream import MetricStreamTailer, parse_stream_line
+
+
+class BatchTracking(TrackingPort):
+    def __init__(self, fail: bool = False) -> None:
+        self.batches: list[list[MetricRecord]] = []
+        self.fail = fail
+
+    def start_run(self, run_name: str) -> str:
+        return "run"
+
+    def log_params(self, params: dict[str, Any]) -> None:
+        pass
+
+    def log_metrics(self, metrics: dict[str, float]) -> None:
+        pass
+
+    def log_artifact(self, local_path: str) -> None:
+        pass
+
+    def end_run(self) -> str:
+        return "run"
+
+    def log_metric_batch(self, records: list[MetricRecord]) -> None:
+        if self.fail:
+            raise ConnectionError("tracking server is down")
+        self.batches.append(records)
+
+
+def _line(step: int, **metrics: Any) -> str:
+    return json.dumps({"step": step, "metrics": metrics, "timestamp": 1700000000.5}) + "\n"
+
+
+def test_parse_stream_line_skips_non_numeric_values() -> None:
+    line = json.dumps(
+        {"step": 3, "metrics": {"loss": 0.5, "epoch": 1, "name": "x", "flag": True}}
+    ).encode()
+
+    assert parse_stream_line(line) == [
+        MetricRecord("loss", 0.5, 3, None),
+        MetricRecord("epoch", 1.0, 3, None),
+    ]
+    assert parse_stream_line(b"not json") == []
+    assert parse_stream_line(b'{"step": 1}') == []
+
+
+def test_tailer_forwards_only_complete_lines(tmp_path: Path) -> None:
+    path = tmp_path / "metrics_stream.jsonl"
+    tracking = BatchTracking()
+    tailer = MetricStreamTailer(path, tracking, interval=60)
+
+    assert tailer.poll() == 0  # まだファイルが無い
+    full = _line(10, loss=0.5)
+    path.write_text(_line(0, loss=0.9) + full[:15])
+    assert tailer.poll() == 1
+    with open(path, "a") as f:
+        f.write(full[15:])
+    assert tailer.poll() == 1
+
+    assert [(r.key, r.value, r.step) for b in tracking.batches for r in b] == [
+        ("loss", 0.9, 0),
+        ("loss", 0.5, 10),
+    ]
+    assert tracking.batches[0][0].timestamp_ms == 1700000000500
+
+
+def test_tailer_splits_batches_and_survives_tracking_errors(tmp_path: Path) -> None:
+    path = tmp_path / "metrics_stream.jsonl"
+    path.write_text("".join(_line(step, loss=1.0 / (step + 1)) for step in range(5)))
+
+    batched = BatchTracking()
+    assert MetricStreamTailer(path, batched, interval=60, max_batch=2).poll() == 5
+    assert [len(b) for b in batched.batches] == [2, 2, 1]
+
+    assert MetricStreamTailer(path, BatchTracking(fail=True), interval=60).poll() == 0
+
+
+def test_background_thread_streams_while_running_and_flushes_on_stop(tmp_path: Path) -> None:
+    path = tmp_path / "metrics_stream.jsonl"
+    tracking = BatchTracking()
+    tailer = MetricStreamTailer(path, tracking, interval=0.01)
+
+    tailer.start()
+    path.write_text(_line(1, loss=0.7))
+    deadline = time.monotonic() + 5
+    while not tracking.batches and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert tracking.batches  # 子プロセスの終了を待たずに送られる
+    with open(path, "a") as f:
+        f.write(_line(2, loss=0.6))
+    tailer.stop()
+
+    assert tailer.forwarded == 2
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+metric_stream = pytest.importorskip("src.anomalib.metric_stream")
+
+
+def test_log_metrics_appends_numeric_values(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    path = tmp_path / "out" / "metrics_stream.jsonl"
+    monkeypatch.setenv(metric_stream.STREAM_ENV, str(path))
+
+    metric_stream.log_metrics({"loss": 0.5, "epoch": 2, "tag": "x", "nan": float("nan")}, step=7)
+    metric_stream.log_metrics({"loss": 0.4}, step=8)
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [(line["step"], line["metrics"]) for line in lines] == [
+        (7, {"loss": 0.5, "epoch": 2.0}),
+        (8, {"loss": 0.4}),
+    ]
+
+
+def test_log_metrics_is_noop_outside_worker(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv(metric_stream.STREAM_ENV, raising=False)
+
+    metric_stream.log_metrics({"loss": 0.5})
+
+    assert metric_stream.metric_stream_callback() is None
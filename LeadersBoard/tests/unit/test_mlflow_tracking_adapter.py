@@ -6,6 +6,7 @@ from typing import Any
 import pytest
 
 from src.adapters.mlflow_tracking_adapter import MLflowTrackingAdapter
+from src.ports.tracking_port import MetricRecord
 
 
 class DummyRun:
@@ -25,10 +26,11 @@ class DummyMLflow:
     def set_tracking_uri(self, uri: str) -> None:
         self.set_uri.append(uri)
 
-    def start_run(self, run_name: str) -> DummyRun:
-        self.run_id_counter += 1
-        run_id = f"run-{self.run_id_counter}"
-        self.started_with.append({"run_name": run_name})
+    def start_run(self, run_name: str | None = None, run_id: str | None = None) -> DummyRun:
+        if run_id is None:
+            self.run_id_counter += 1
+            run_id = f"run-{self.run_id_counter}"
+        self.started_with.append({"run_name": run_name, "run_id": run_id})
         return DummyRun(run_id=run_id)
 
     def log_params(self, params: dict[str, Any]) -> None:
@@ -72,3 +74,51 @@ def test_logging_methods_forward_to_mlflow(dummy_mlflow: DummyMLflow) -> None:
     assert dummy_mlflow.metrics == [{"accuracy": 0.9}]
     assert dummy_mlflow.artifacts == ["/tmp/artifact.png"]
     assert adapter.end_run() == "run-1"
+
+
+def test_metric_batch_is_written_with_steps_for_the_current_run(
+    dummy_mlflow: DummyMLflow, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    batches: list[tuple[str, list[Any]]] = []
+
+    class DummyClient:
+        def __init__(self, tracking_uri: str | None = None) -> None:
+            self.tracking_uri = tracking_uri
+
+        def log_batch(self, run_id: str, metrics: list[Any]) -> None:
+            batches.append((run_id, metrics))
+
+    dummy_mlflow.MlflowClient = DummyClient  # type: ignore[attr-defined]
+    monkeypatch.setattr(MLflowTrackingAdapter, "MAX_BATCH_METRICS", 2)
+    adapter = MLflowTrackingAdapter(tracking_uri="http://mlflow:5010")
+    adapter.start_run("demo")
+
+    adapter.log_metric_batch(
+        [MetricRecord("loss", 1.0 / step, step, 1000 + step) for step in range(1, 4)]
+    )
+
+    assert [(run_id, len(metrics)) for run_id, metrics in batches] == [("run-1", 2), ("run-1", 1)]
+    first = batches[0][1][0]
+    assert (first.key, first.value, first.step, first.timestamp) == ("loss", 1.0, 1, 1001)
+
+
+def test_fail_run_ends_run_as_failed(dummy_mlflow: DummyMLflow) -> None:
+    statuses: list[str] = []
+    dummy_mlflow.end_run = lambda status="FINISHED": statuses.append(status)  # type: ignore[method-assign]
+    adapter = MLflowTrackingAdapter(tracking_uri="http://mlflow:5010")
+    adapter.start_run("demo")
+
+    assert adapter.fail_run() == "run-1"
+    assert statuses == ["FAILED"]
+
+
+def test_interrupted_run_is_killed_and_resumed_by_run_id(dummy_mlflow: DummyMLflow) -> None:
+    statuses: list[str] = []
+    dummy_mlflow.end_run = lambda status="FINISHED": statuses.append(status)  # type: ignore[method-assign]
+    adapter = MLflowTrackingAdapter(tracking_uri="http://mlflow:5010")
+    adapter.start_run("demo")
+
+    assert adapter.interrupt_run() == "run-1"
+    assert adapter.start_run("demo", run_id="run-1") == "run-1"
+    assert statuses == ["KILLED"]
+    assert dummy_mlflow.started_with[-1] == {"run_name": None, "run_id": "run-1"}
@@ -61,6 +61,9 @@ class InMemoryStatus(JobStatusPort):
     def count_running(self, user_id: str) -> int:
         return 0
 
+    def list_jobs(self, user_id, cursor=None, limit=20, status=None):
+        return [], None
+
 
 class InMemoryTracking(TrackingPort):
     def start_run(self, run_name):
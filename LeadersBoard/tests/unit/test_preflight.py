@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import textwrap
+import threading
+import time
+from pathlib import Path
+from typing import Any
+from unittest.mock import MagicMock
+
+import fakeredis
+import pytest
+
+from src.adapters.redis_job_queue_adapter import RedisJobQueueAdapter
+from src.api import jobs as jobs_module
+from src.ports.job_status_port import JobStatus
+from src.worker.dependency_overlay import DependencyOverlay
+from src.worker.preflight import (
+    PreflightChecker,
+    PreflightSettings,
+    PreflightWorker,
+    iter_class_paths,
+)
+
+# スモーク実行で上書きされた config と環境変数を確かめてから終了する投稿
+SMOKE_ENTRYPOINT = textwrap.dedent(
+    """
+    import argparse, os, sys, time
+    import yaml
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--config", required=True)
+    parser.add_argument("--output", required=True)
+    args = parser.parse_args()
+    config = yaml.safe_load(open(args.config))
+    trainer = config["trainer"]
+    assert trainer["limit_train_batches"] == 1 and trainer["accelerator"] == "cpu"
+    assert trainer["limit_predict_batches"] == 1
+    assert "strategy" not in trainer and trainer["max_epochs"] == 1
+    assert config["export"]["enabled"] is False
+    assert config["visualization"]["enabled"] is False
+    assert os.environ["CUDA_VISIBLE_DEVICES"] == ""
+    assert os.environ["LEADERBOARD_SMOKE_RUN"] == "1"
+    assert "LEADERBOARD_RESUME_CHECKPOINT" not in os.environ
+    print("smoke ok", flush=True)
+    time.sleep(float(config.get("sleep", 0)))
+    sys.exit(int(config.get("exit_code", 0)))
+    """
+)
+
+
+def _job(job_id: str = "job-1") -> dict[str, Any]:
+    return {
+        "job_id": job_id,
+        "submission_id": "sub-1",
+        "entrypoint": "main.py",
+        "config_file": "config.yaml",
+        "config": {"lr": 0.01},
+    }
+
+
+def _write_submission(submission_dir: Path, config: str) -> Path:
+    submission_dir.mkdir(exist_ok=True)
+    (submission_dir / "main.py").write_text(SMOKE_ENTRYPOINT)
+    (submission_dir / "mymodule.py").write_text("class MyData: ...\n")
+    (submission_dir / "config.yaml").write_text(textwrap.dedent(config))
+    return submission_dir
+
+
+@pytest.fixture
+def submission(tmp_path: Path) -> Path:
+    data_root = tmp_path / "data"
+    data_root.mkdir()
+    return _write_submission(
+        tmp_path / "submission",
+        f"""
+        model:
+          class_path: collections.OrderedDict
+        data:
+          class_path: mymodule.MyData
+          init_args:
+            root: {data_root}
+        trainer:
+          max_epochs: 50
+          strategy: ddp
+          callbacks:
+            - class_path: pathlib.Path
+        export:
+          enabled: true
+        visualization:
+          max_images: 10
+        """,
+    )
+
+
+def _checker(tmp_path: Path, smoke_run: bool = True) -> PreflightChecker:
+    return PreflightChecker(
+        PreflightSettings(smoke_run=smoke_run, smoke_timeout=60),
+        DependencyOverlay(overlay_root=tmp_path / "overlays"),
+    )
+
+
+def test_iter_class_paths_reports_nested_locations() -> None:
+    config = {"model": {"class_path": "a.B"}, "trainer": {"callbacks": [{"class_path": "c.D"}]}}
+
+    assert list(iter_class_paths(config)) == [
+        ("model.class_path", "a.B"),
+        ("trainer.callbacks[0].class_path", "c.D"),
+    ]
+
+
+def test_valid_submission_passes_and_smoke_runs_with_overrides(
+    tmp_path: Path, submission: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("LEADERBOARD_RESUME_CHECKPOINT", "/tmp/last.ckpt")
+
+    result = _checker(tmp_path).check(submission, _job())
+
+    assert result.errors == []
+    assert "smoke ok" in result.output
+    assert list(submission.glob(".preflight-*")) == []
+
+
+def test_unresolvable_class_path_fails_without_smoke_run(tmp_path: Path, submission: Path) -> None:
+    config = (submission / "config.yaml").read_text()
+    (submission / "config.yaml").write_text(
+        config.replace("collections.OrderedDict", "collections.NoSuchModel")
+    )
+
+    result = _checker(tmp_path).check(submission, _job())
+
+    assert not result.ok
+    assert result.errors[0].startswith("model.class_path: cannot import collections.NoSuchModel")
+    assert result.output == ""
+
+
+def test_missing_package_is_a_warning_when_requirements_are_declared(
+    tmp_path: Path, submission: Path
+) -> None:
+    config = (submission / "config.yaml").read_text()
+    (submission / "config.yaml").write_text(
+        config.replace("collections.OrderedDict", "not_installed_pkg.Model")
+    )
+    (submission / "requirements.txt").write_text("not-installed-pkg==1.0\n")
+
+    result = _checker(tmp_path, smoke_run=False).check(submission, _job())
+
+    assert result.ok
+    assert result.warnings == ["model.class_path: not_installed_pkg is not installed here"]
+
+
+def test_missing_dataset_root_and_config_errors(tmp_path: Path) -> None:
+    submission = _write_submission(
+        tmp_path / "submission",
+        f"""
+        data:
+          init_args:
+            root: {tmp_path / "missing"}
+        shards:
+          path: {tmp_path / "no-shards"}
+        """,
+    )
+    (submission / "main.py").unlink()
+
+    result = _checker(tmp_path).check(submission, _job())
+
+    assert result.errors == [
+        "entrypoint main.py not found",
+        f"shards.path {tmp_path / 'no-shards'} does not exist",
+        f"data.init_args.root {tmp_path / 'missing'} does not exist",
+    ]
+    assert result.warnings == ["data.class_path is not set; the entrypoint must resolve it"]
+
+
+def test_invalid_yaml_is_rejected(tmp_path: Path) -> None:
+    submission = _write_submission(tmp_path / "submission", "- just\n- a list\n")
+
+    result = _checker(tmp_path).check(submission, _job())
+
+    assert result.errors == ["config.yaml must be a mapping"]
+
+
+def test_smoke_run_failure_reports_exit_code_and_last_line(
+    tmp_path: Path, submission: Path
+) -> None:
+    with open(submission / "config.yaml", "a") as f:
+        f.write("exit_code: 3\n")
+
+    result = _checker(tmp_path).check(submission, _job())
+
+    assert result.errors == ["smoke run exited with 3: smoke ok"]
+
+
+def test_worker_forwards_passing_jobs_to_training_queue(tmp_path: Path, submission: Path) -> None:
+    redis = fakeredis.FakeRedis()
+    preflight_queue = RedisJobQueueAdapter(redis, RedisJobQueueAdapter.PREFLIGHT_QUEUE)
+    jobs_queue = RedisJobQueueAdapter(redis)
+    storage = MagicMock()
+    storage.load.return_value = str(submission)
+    storage.logs_root = tmp_path / "logs"
+    status = MagicMock()
+    worker = PreflightWorker(
+        preflight_queue, jobs_queue, status, storage, _checker(tmp_path, smoke_run=False)
+    )
+
+    worker.process(_job())
+
+    assert jobs_queue.dequeue(timeout=1) == _job()
+    status.update.assert_not_called()
+
+
+def test_worker_fails_rejected_jobs_and_writes_log(tmp_path: Path, submission: Path) -> None:
+    (submission / "config.yaml").write_text("model:\n  class_path: collections.Missing\n")
+    jobs_queue = MagicMock()
+    storage = MagicMock()
+    storage.load.return_value = str(submission)
+    storage.logs_root = tmp_path / "logs"
+    status = MagicMock()
+    worker = PreflightWorker(
+        MagicMock(), jobs_queue, status, storage, _checker(tmp_path, smoke_run=False)
+    )
+
+    worker.process(_job())
+
+    jobs_queue.enqueue.assert_not_called()
+    job_id, job_status = status.update.call_args.args
+    error = status.update.call_args.kwargs["error"]
+    assert (job_id, job_status) == ("job-1", JobStatus.FAILED)
+    assert error.startswith("preflight failed: model.class_path: cannot import")
+    log = (tmp_path / "logs" / "job-1.log").read_text()
+    assert log.startswith("[preflight] error: model.class_path")
+
+
+def test_stop_interrupts_smoke_run_and_requeues_job(tmp_path: Path, submission: Path) -> None:
+    with open(submission / "config.yaml", "a") as f:
+        f.write("sleep: 60\n")
+    redis = fakeredis.FakeRedis()
+    preflight_queue = RedisJobQueueAdapter(redis, RedisJobQueueAdapter.PREFLIGHT_QUEUE)
+    jobs_queue = MagicMock()
+    storage = MagicMock()
+    storage.load.return_value = str(submission)
+    checker = _checker(tmp_path)
+    worker = PreflightWorker(
+        preflight_queue, jobs_queue, MagicMock(), storage, checker, dequeue_timeout=1
+    )
+    preflight_queue.enqueue("job-1", "sub-1", "main.py", "config.yaml", {"lr": 0.01})
+    runner = threading.Thread(target=worker.run)
+    runner.start()
+    while checker._process is None:
+        threading.Event().wait(0.01)
+
+    started = time.monotonic()
+    worker.stop()
+    runner.join(timeout=30)
+
+    assert not runner.is_alive()
+    assert time.monotonic() - started < checker.STOP_GRACE_SECONDS + 5
+    jobs_queue.enqueue.assert_not_called()
+    assert preflight_queue.dequeue(timeout=1) == _job()
+    assert list(submission.glob(".preflight-*")) == []
+
+
+@pytest.mark.parametrize(
+    ("enabled", "queue_name"),
+    [("1", RedisJobQueueAdapter.PREFLIGHT_QUEUE), ("0", RedisJobQueueAdapter.DEFAULT_QUEUE)],
+)
+def test_api_enqueues_to_preflight_lane_when_enabled(
+    monkeypatch: pytest.MonkeyPatch, enabled: str, queue_name: str
+) -> None:
+    monkeypatch.setenv("PREFLIGHT_ENABLED", enabled)
+
+    queue = jobs_module.get_job_queue(fakeredis.FakeRedis())
+
+    assert isinstance(queue, RedisJobQueueAdapter)
+    assert queue.queue_name == queue_name
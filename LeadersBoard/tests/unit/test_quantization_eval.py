@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import json
+import logging
+import subprocess
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pytest
+
+from src.worker.quantization_eval import (
+    QUANTIZED_FILENAME,
+    QuantizationEvaluator,
+    QuantizationSettings,
+)
+
+SHAPE = (3, 16, 16)
+
+
+def _write_export(tmp_path: Path, **overrides: object) -> Path:
+    export_dir = tmp_path / "exported"
+    export_dir.mkdir(parents=True, exist_ok=True)
+    manifest: dict[str, object] = {
+        "models": [{"format": "onnx", "file": "model.onnx"}],
+        "input_shape": list(SHAPE),
+        "calibration_input": "calibration_input.npy",
+        "evaluation_input": "evaluation_input.npy",
+        "evaluation_labels": "evaluation_labels.npy",
+    }
+    manifest.update(overrides)
+    (export_dir / "export.json").write_text(json.dumps(manifest))
+    return export_dir
+
+
+def _write_data(export_dir: Path) -> None:
+    """異常画像ほど明るい (スコアが高くなる) 評価データと、正常画像だけの較正データ。"""
+    rng = np.random.default_rng(0)
+    labels = np.arange(24) % 2 == 1
+    images = rng.random((24, *SHAPE), dtype=np.float32) + labels[:, None, None, None] * 0.5
+    np.save(export_dir / "evaluation_input.npy", images.astype(np.float16))
+    np.save(export_dir / "evaluation_labels.npy", labels)
+    np.save(export_dir / "calibration_input.npy", rng.random((8, *SHAPE), dtype=np.float32))
+
+
+def _export_onnx(torch: Any, path: Path) -> None:
+    torch.manual_seed(0)
+    model = torch.nn.Sequential(
+        torch.nn.Conv2d(3, 8, kernel_size=3, padding=1),
+        torch.nn.ReLU(),
+        torch.nn.Conv2d(8, 1, kernel_size=3, padding=1),
+    ).eval()
+    with torch.no_grad():
+        for layer in (model[0], model[2]):
+            layer.weight.abs_()
+    torch.onnx.export(
+        model,
+        (torch.zeros(2, *SHAPE),),
+        str(path),
+        input_names=["input"],
+        dynamo=True,
+        dynamic_shapes=({0: torch.export.Dim("batch")},),
+    )
+
+
+def test_settings_from_env(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("QUANTIZATION_MODE", "bogus")
+    monkeypatch.setenv("QUANTIZATION_CALIBRATION_SAMPLES", "16")
+
+    settings = QuantizationSettings.from_env()
+
+    assert settings.mode == "static"
+    assert settings.calibration_samples == 16
+
+
+def test_skips_without_onnx_model_or_evaluation_data(tmp_path: Path) -> None:
+    evaluator = QuantizationEvaluator(QuantizationSettings())
+    assert evaluator.run(tmp_path) == {}
+
+    export_dir = _write_export(
+        tmp_path, evaluation_input=None, evaluation_labels=None, calibration_input=None
+    )
+    (export_dir / "model.onnx").write_bytes(b"")
+    assert evaluator.run(tmp_path) == {}
+    assert QuantizationEvaluator(QuantizationSettings(enabled=False)).run(tmp_path) == {}
+
+
+@pytest.mark.parametrize("mode", ["static", "dynamic"])
+def test_run_quantizes_and_compares_with_fp32(tmp_path: Path, mode: str) -> None:
+    torch = pytest.importorskip("torch")
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("onnxscript")
+    export_dir = _write_export(tmp_path)
+    _export_onnx(torch, export_dir / "model.onnx")
+    _write_data(export_dir)
+    settings = QuantizationSettings(mode=mode, warmup=1, iterations=2)
+
+    metrics = QuantizationEvaluator(settings).run(tmp_path)
+
+    assert (export_dir / QUANTIZED_FILENAME).is_file()
+    assert metrics["evaluation_images"] == 24
+    assert metrics["fp32_image_AUROC"] > 0.9
+    assert metrics["image_AUROC_delta"] == pytest.approx(
+        metrics["int8_image_AUROC"] - metrics["fp32_image_AUROC"]
+    )
+    assert abs(metrics["image_AUROC_delta"]) < 0.1
+    assert metrics["int8_size_mb"] > 0
+    assert metrics["size_ratio"] == pytest.approx(metrics["int8_size_mb"] / metrics["fp32_size_mb"])
+    assert metrics["int8_latency_p50_ms"] > 0
+    assert "latency_delta_ms" in metrics
+
+
+def test_run_warns_when_deltas_cannot_be_computed(
+    tmp_path: Path, caplog: pytest.LogCaptureFixture
+) -> None:
+    export_dir = _write_export(tmp_path)
+    (export_dir / "model.onnx").write_bytes(b"")
+    _write_data(export_dir)
+    # 評価データが正常画像だけだと AUROC/AUPR が定義できず差も返らない
+    result = {"fp32_size_mb": 1.0, "evaluation_images": 24, "evaluation_anomalous_images": 0}
+
+    def runner(command: list[str], env: dict[str, str], timeout: float) -> Any:
+        return subprocess.CompletedProcess(command, 0, json.dumps(result), "")
+
+    with caplog.at_level(logging.WARNING):
+        metrics = QuantizationEvaluator(QuantizationSettings()).run(tmp_path, runner)
+
+    assert metrics == result
+    assert "delta of image_AUROC, image_AUPR is unavailable: 0 of 24" in caplog.text
+
+
+def test_run_raises_when_model_is_broken(tmp_path: Path) -> None:
+    export_dir = _write_export(tmp_path)
+    (export_dir / "model.onnx").write_bytes(b"not a model")
+    _write_data(export_dir)
+    settings = QuantizationSettings(warmup=0, iterations=1)
+
+    with pytest.raises(RuntimeError, match="quantization failed"):
+        QuantizationEvaluator(settings).run(tmp_path)
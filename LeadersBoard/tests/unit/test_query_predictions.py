@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+from src.domain.query_predictions import GetScoreHistogram, GetWorstPredictions
+from src.ports.job_status_port import JobStatus
+from src.ports.prediction_query_port import PredictionFilter, PredictionRecord, ScoreHistogram
+
+
+class DummyStorage:
+    def __init__(self, files: dict[str, Path]) -> None:
+        self.files = files
+
+    def load_artifact_file(self, job_id: str, filepath: str) -> Path:
+        if filepath in self.files:
+            return self.files[filepath]
+        raise FileNotFoundError(filepath)
+
+
+class DummyStatus:
+    def __init__(self, status: dict[str, Any] | None) -> None:
+        self.status = status
+
+    def get_status(self, job_id: str) -> dict[str, Any] | None:
+        return self.status
+
+
+class DummyQuery:
+    def __init__(self) -> None:
+        self.calls: list[tuple[Any, ...]] = []
+
+    def histogram(self, source: Path, bins: int, filters: PredictionFilter) -> ScoreHistogram:
+        self.calls.append(("histogram", source, bins, filters))
+        return ScoreHistogram(bin_edges=[0.0, 1.0], counts=[3], total=3)
+
+    def top_scores(
+        self, source: Path, n: int, ascending: bool, filters: PredictionFilter
+    ) -> list[PredictionRecord]:
+        self.calls.append(("top_scores", source, n, ascending, filters))
+        return [PredictionRecord(image_path="a.png", anomaly_score=0.9)]
+
+
+COMPLETED = {"status": JobStatus.COMPLETED.value}
+
+
+def test_histogram_prefers_parquet() -> None:
+    query = DummyQuery()
+    storage = DummyStorage(
+        {
+            "image_predictions.parquet": Path("/jobs/job-1/image_predictions.parquet"),
+            "image_predictions.csv": Path("/jobs/job-1/image_predictions.csv"),
+        }
+    )
+    use_case = GetScoreHistogram(storage, DummyStatus(COMPLETED), query)  # type: ignore[arg-type]
+
+    result = use_case.execute("job-1", bins=10)
+
+    assert result is not None and result.total == 3
+    assert query.calls == [
+        ("histogram", Path("/jobs/job-1/image_predictions.parquet"), 10, PredictionFilter())
+    ]
+
+
+def test_worst_falls_back_to_csv_and_maps_order() -> None:
+    query = DummyQuery()
+    storage = DummyStorage({"image_predictions.csv": Path("/jobs/job-1/image_predictions.csv")})
+    use_case = GetWorstPredictions(storage, DummyStatus(COMPLETED), query)  # type: ignore[arg-type]
+    filters = PredictionFilter(gt_label=False)
+
+    result = use_case.execute("job-1", n=5, order="asc", filters=filters)
+
+    assert result == [PredictionRecord(image_path="a.png", anomaly_score=0.9)]
+    assert query.calls == [
+        ("top_scores", Path("/jobs/job-1/image_predictions.csv"), 5, True, filters)
+    ]
+
+
+def test_returns_none_when_job_not_completed_or_no_file() -> None:
+    query: Any = DummyQuery()
+    files = {"image_predictions.csv": Path("/jobs/job-1/image_predictions.csv")}
+    storage: Any = DummyStorage(files)
+    empty_storage: Any = DummyStorage({})
+    running: Any = DummyStatus({"status": JobStatus.RUNNING.value})
+    missing: Any = DummyStatus(None)
+    completed: Any = DummyStatus(COMPLETED)
+
+    assert GetScoreHistogram(storage, running, query).execute("job-1") is None
+    assert GetScoreHistogram(storage, missing, query).execute("job-1") is None
+    assert GetWorstPredictions(empty_storage, completed, query).execute("job-1") is None
+    assert query.calls == []
@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+import fakeredis
+
+from src.adapters.redis_job_event_adapter import RedisJobEventAdapter
+from src.adapters.redis_job_status_adapter import RedisJobStatusAdapter
+
+
+async def test_listen_yields_published_events_and_heartbeats() -> None:
+    redis_client = fakeredis.FakeAsyncRedis()
+    adapter = RedisJobEventAdapter(redis_client)
+    channel = RedisJobStatusAdapter.event_channel_for("user-1")
+
+    stream = adapter.listen("user-1", heartbeat_seconds=0.05)
+    first = await stream.__anext__()
+    assert first is None
+
+    await redis_client.publish(channel, json.dumps({"job_id": "job-1", "status": "running"}))
+    event = await asyncio.wait_for(stream.__anext__(), timeout=1)
+    while event is None:
+        event = await asyncio.wait_for(stream.__anext__(), timeout=1)
+
+    assert event == {"job_id": "job-1", "status": "running"}
+    await stream.aclose()
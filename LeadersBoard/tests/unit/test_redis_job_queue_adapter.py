@@ -67,3 +67,29 @@ def test_dequeue_timeout_returns_none() -> None:
     adapter = RedisJobQueueAdapter(redis_client, queue_name="leaderboard:jobs")
 
     assert adapter.dequeue(timeout=1) is None
+
+
+def test_peek_returns_next_job_without_removing_it() -> None:
+    redis_client = fakeredis.FakeRedis()
+    adapter = RedisJobQueueAdapter(redis_client, queue_name="leaderboard:jobs")
+    payload, args = _sample_job_payload()
+
+    assert adapter.peek() is None
+    adapter.enqueue(*args)
+    adapter.enqueue("job-2", "sub-2", "main.py", "config.yaml", {})
+
+    assert adapter.peek() == payload
+    assert redis_client.llen("leaderboard:jobs") == 2
+    assert adapter.dequeue(timeout=1) == payload
+
+
+def test_requeue_puts_job_at_the_head_of_the_queue() -> None:
+    redis_client = fakeredis.FakeRedis()
+    adapter = RedisJobQueueAdapter(redis_client, queue_name="leaderboard:jobs")
+    payload, args = _sample_job_payload()
+    adapter.enqueue("job-2", "sub-2", "main.py", "config.yaml", {})
+
+    adapter.requeue({**payload, "attempt": 1})
+
+    assert adapter.dequeue(timeout=1) == {**payload, "attempt": 1}
+    assert adapter.dequeue(timeout=1)["job_id"] == "job-2"  # type: ignore[index]
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import json
+
 import fakeredis
 
 from src.adapters.redis_job_status_adapter import RedisJobStatusAdapter
@@ -48,3 +50,114 @@ def test_get_status_returns_none_for_missing_job() -> None:
     adapter = RedisJobStatusAdapter(redis_client)
 
     assert adapter.get_status("missing") is None
+
+
+def test_create_indexes_job_under_user() -> None:
+    redis_client = fakeredis.FakeRedis()
+    adapter = RedisJobStatusAdapter(redis_client)
+
+    adapter.create("job-1", "sub-1", "user-1")
+
+    index_key = adapter.user_index_key_for("user-1")
+    assert redis_client.zrange(index_key, 0, -1) == [b"job-1"]
+    assert redis_client.ttl(index_key) > 0
+
+
+def test_list_jobs_returns_newest_first_with_cursor_pagination() -> None:
+    redis_client = fakeredis.FakeRedis()
+    adapter = RedisJobStatusAdapter(redis_client)
+    for i in range(5):
+        adapter.create(f"job-{i}", "sub", "user-1")
+    adapter.create("other", "sub", "user-2")
+
+    first, cursor = adapter.list_jobs("user-1", limit=2)
+    assert [j["job_id"] for j in first] == ["job-4", "job-3"]
+    assert cursor is not None
+
+    second, cursor = adapter.list_jobs("user-1", cursor=cursor, limit=2)
+    assert [j["job_id"] for j in second] == ["job-2", "job-1"]
+
+    last, cursor = adapter.list_jobs("user-1", cursor=cursor, limit=2)
+    assert [j["job_id"] for j in last] == ["job-0"]
+    assert cursor is None
+
+
+def test_list_jobs_filters_by_status_across_batches() -> None:
+    redis_client = fakeredis.FakeRedis()
+    adapter = RedisJobStatusAdapter(redis_client)
+    adapter._LIST_BATCH_SIZE = 2
+    for i in range(6):
+        adapter.create(f"job-{i}", "sub", "user-1")
+    adapter.update("job-0", JobStatus.COMPLETED)
+    adapter.update("job-4", JobStatus.COMPLETED)
+
+    jobs, cursor = adapter.list_jobs("user-1", limit=10, status=JobStatus.COMPLETED)
+
+    assert [j["job_id"] for j in jobs] == ["job-4", "job-0"]
+    assert cursor is None
+
+
+def test_list_jobs_prunes_expired_entries() -> None:
+    redis_client = fakeredis.FakeRedis()
+    adapter = RedisJobStatusAdapter(redis_client)
+    adapter.create("job-1", "sub", "user-1")
+    adapter.create("job-2", "sub", "user-1")
+    redis_client.delete(adapter.key_for("job-1"))
+
+    jobs, _ = adapter.list_jobs("user-1")
+
+    assert [j["job_id"] for j in jobs] == ["job-2"]
+    assert redis_client.zrange(adapter.user_index_key_for("user-1"), 0, -1) == [b"job-2"]
+
+
+def test_update_publishes_event_to_owner_channel() -> None:
+    redis_client = fakeredis.FakeRedis()
+    adapter = RedisJobStatusAdapter(redis_client)
+    adapter.create("job-1", "sub-1", "user-1")
+    pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(adapter.event_channel_for("user-1"))
+    pubsub.get_message(timeout=0.1)
+
+    adapter.update("job-1", JobStatus.COMPLETED, run_id="run-1")
+
+    message = pubsub.get_message(timeout=1)
+    assert message is not None
+    event = json.loads(message["data"])
+    assert event["job_id"] == "job-1"
+    assert event["status"] == JobStatus.COMPLETED.value
+    assert event["run_id"] == "run-1"
+
+
+def test_list_jobs_does_not_skip_jobs_sharing_a_score_across_pages() -> None:
+    redis_client = fakeredis.FakeRedis()
+    adapter = RedisJobStatusAdapter(redis_client)
+    adapter._LIST_BATCH_SIZE = 2
+    for i in range(7):
+        adapter.create(f"job-{i}", "sub", "user-1")
+    index_key = adapter.user_index_key_for("user-1")
+    # 同じマイクロ秒に作られたジョブを再現する
+    redis_client.zadd(index_key, {f"job-{i}": 1000 for i in range(1, 6)})
+    redis_client.zadd(index_key, {"job-0": 500, "job-6": 2000})
+
+    seen: list[str] = []
+    cursor = None
+    while True:
+        page, cursor = adapter.list_jobs("user-1", cursor=cursor, limit=2)
+        seen.extend(j["job_id"] for j in page)
+        if cursor is None:
+            break
+
+    assert seen == ["job-6", "job-5", "job-4", "job-3", "job-2", "job-1", "job-0"]
+
+
+def test_list_jobs_accepts_legacy_score_cursor() -> None:
+    redis_client = fakeredis.FakeRedis()
+    adapter = RedisJobStatusAdapter(redis_client)
+    for i in range(3):
+        adapter.create(f"job-{i}", "sub", "user-1")
+    index_key = adapter.user_index_key_for("user-1")
+    redis_client.zadd(index_key, {"job-0": 100, "job-1": 200, "job-2": 300})
+
+    jobs, _ = adapter.list_jobs("user-1", cursor="300")
+
+    assert [j["job_id"] for j in jobs] == ["job-1", "job-0"]
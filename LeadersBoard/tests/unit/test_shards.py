@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import json
+import pickle
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+shards = pytest.importorskip("src.anomalib.shards")
+
+
+def _write_dataset(root: Path) -> None:
+    for directory in ("Normal", "Test", "Anomaly", "Mask"):
+        (root / directory).mkdir(parents=True)
+    for i in range(5):
+        image = np.full((40, 60, 3), (i * 10, 0, 255), dtype=np.uint8)  # BGR
+        cv2.imwrite(str(root / "Normal" / f"{i}.png"), image)
+    cv2.imwrite(str(root / "Test" / "t.png"), np.zeros((40, 60, 3), dtype=np.uint8))
+    for name in ("a", "b"):
+        cv2.imwrite(str(root / "Anomaly" / f"{name}.png"), np.zeros((40, 60, 3), dtype=np.uint8))
+    mask = np.zeros((40, 60), dtype=np.uint8)
+    mask[:20] = 255
+    cv2.imwrite(str(root / "Mask" / "a.png"), mask)
+    (root / "Normal" / "notes.txt").write_text("ignored")
+
+
+def _build(tmp_path: Path, shard_size: int = 2) -> Path:
+    _write_dataset(tmp_path / "data")
+    sources = shards.discover_folder(
+        tmp_path / "data", "Normal", abnormal_dir="Anomaly", normal_test_dir="Test", mask_dir="Mask"
+    )
+    output = tmp_path / "shards"
+    shards.build_shards(sources, output, (16, 24), shard_size=shard_size, workers=2)
+    return output
+
+
+def test_build_and_read_train_split(tmp_path: Path) -> None:
+    output = _build(tmp_path)
+
+    train = shards.ShardDataset(output, "train")
+
+    assert len(train) == 5
+    assert sorted(p.name for p in output.glob("images-*.npy")) == [
+        "images-00000.npy",
+        "images-00001.npy",
+        "images-00002.npy",
+        "images-00003.npy",
+    ]
+    item = train[3]
+    assert item["image"].shape == (3, 16, 24)
+    assert item["image"].dtype == np.uint8
+    # RGB の CHW で保存される
+    assert item["image"][:, 0, 0].tolist() == [255, 0, 30]
+    assert item["gt_label"] == 0
+    assert not item["gt_mask"].any()
+    assert not (tmp_path / ".shards.tmp").exists()
+
+
+def test_test_split_labels_and_masks(tmp_path: Path) -> None:
+    output = _build(tmp_path)
+
+    test = shards.ShardDataset(output, "test")
+
+    by_name = {Path(item["image_path"]).name: item for item in test}
+    assert {name: item["gt_label"] for name, item in by_name.items()} == {
+        "t.png": 0,
+        "a.png": 1,
+        "b.png": 1,
+    }
+    mask = by_name["a.png"]["gt_mask"]
+    assert mask.shape == (16, 24)
+    assert mask[:8].all() and not mask[8:].any()
+    assert by_name["a.png"]["mask_path"].endswith("Mask/a.png")
+    # マスクの無い異常画像はゼロマスク
+    assert by_name["b.png"]["mask_path"] is None
+    assert not by_name["b.png"]["gt_mask"].any()
+
+
+def test_dataset_pickles_without_open_memmaps(tmp_path: Path) -> None:
+    train = shards.ShardDataset(_build(tmp_path), "train")
+    expected = train.image(0).copy()
+
+    restored = pickle.loads(pickle.dumps(train))
+
+    assert restored._images == {}
+    np.testing.assert_array_equal(restored.image(0), expected)
+
+
+def test_rebuild_replaces_existing_output(tmp_path: Path) -> None:
+    output = _build(tmp_path)
+    sources = shards.discover_folder(tmp_path / "data", "Normal")
+
+    shards.build_shards(sources[:1], output, (8, 8))
+
+    assert len(shards.ShardDataset(output, "train")) == 1
+    assert len(list(output.glob("images-*.npy"))) == 1
+
+
+def test_unknown_format_version_is_rejected(tmp_path: Path) -> None:
+    output = _build(tmp_path)
+    index = json.loads((output / shards.INDEX_FILE).read_text())
+    index["version"] = shards.FORMAT_VERSION + 1
+    (output / shards.INDEX_FILE).write_text(json.dumps(index))
+
+    with pytest.raises(ValueError, match="version"):
+        shards.ShardDataset(output, "train")
@@ -88,6 +88,113 @@ def test_add_job_to_state_deduplicates_and_keeps_latest_first() -> None:
     assert len(jobs) == 2
 
 
+def test_append_jobs_to_state_skips_known_jobs_and_keeps_cursor() -> None:
+    state: dict[str, object] = {"jobs": [{"job_id": "job-3"}]}
+
+    jobs = streamlit_app.append_jobs_to_state(
+        state, [{"job_id": "job-3"}, {"job_id": "job-2"}], "cursor-1"
+    )
+
+    assert [j["job_id"] for j in jobs] == ["job-3", "job-2"]
+    assert state["jobs_next_cursor"] == "cursor-1"
+
+
+@patch("src.streamlit.app.requests.get")
+def test_fetch_jobs_sends_cursor_and_status(mock_get: MagicMock) -> None:
+    mock_get.return_value.json.return_value = {"jobs": [], "next_cursor": None}
+    mock_get.return_value.raise_for_status = MagicMock()
+
+    result = streamlit_app.fetch_jobs(
+        "http://api:8010", "devtoken", cursor="123", limit=10, status="running"
+    )
+
+    assert result == {"jobs": [], "next_cursor": None}
+    args, kwargs = mock_get.call_args
+    assert args[0] == "http://api:8010/jobs"
+    assert kwargs["params"] == {"limit": 10, "cursor": "123", "status": "running"}
+
+
+def test_parse_sse_events_skips_comments_and_invalid_payloads() -> None:
+    lines = [
+        ": keepalive",
+        "",
+        "event: job_status",
+        'data: {"job_id": "job-1", "status": "running"}',
+        "",
+        "data: not-json",
+        "",
+    ]
+
+    events = list(streamlit_app.parse_sse_events(lines))
+
+    assert events == [{"job_id": "job-1", "status": "running"}]
+
+
+def test_job_event_listener_drain_keeps_latest_per_job() -> None:
+    listener = streamlit_app.JobEventListener("http://api:8010", "devtoken")
+    listener.handle_event({"job_id": "job-1", "status": "running"})
+    listener.handle_event({"job_id": "job-1", "status": "completed", "run_id": "run-1"})
+
+    assert listener.drain() == {
+        "job-1": {"job_id": "job-1", "status": "completed", "run_id": "run-1"}
+    }
+    assert listener.drain() == {}
+
+
+def test_job_event_listener_requests_resync_once_per_connection() -> None:
+    listener = streamlit_app.JobEventListener("http://api:8010", "devtoken")
+    assert listener.take_resync() is False
+
+    listener._mark_connected()
+
+    assert listener.connected is True
+    assert listener.take_resync() is True
+    assert listener.take_resync() is False
+
+
+def test_job_event_listener_stops_when_session_ends() -> None:
+    alive = [True]
+    listener = streamlit_app.JobEventListener(
+        "http://api:8010", "devtoken", session_alive=lambda: alive[0]
+    )
+    lines = iter(["data: {}", "", ": keepalive", ""])
+
+    received = [next(listener._lines_while_alive(lines))]
+    alive[0] = False
+
+    assert received == ["data: {}"]
+    assert list(listener._lines_while_alive(lines)) == []
+    assert listener._alive() is False
+
+
+def test_needs_status_fetch_after_reconnect_and_on_slow_interval() -> None:
+    running = [{"job_id": "job-1", "status": "running"}]
+    listener = streamlit_app.JobEventListener("http://api:8010", "devtoken")
+    interval = streamlit_app.STATUS_RESYNC_SECONDS
+
+    # 未接続ならポーリング、実行中のジョブが無ければ呼ばない
+    assert streamlit_app.needs_status_fetch(running, listener, 100.0, 101.0) is True
+    assert streamlit_app.needs_status_fetch([{"status": "completed"}], None, None, 0.0) is False
+
+    listener._mark_connected()
+    assert streamlit_app.needs_status_fetch(running, listener, 100.0, 101.0) is True
+    assert streamlit_app.needs_status_fetch(running, listener, 100.0, 101.0) is False
+    assert streamlit_app.needs_status_fetch(running, listener, 100.0, 100.0 + interval) is True
+
+
+def test_apply_job_events_updates_only_changed_jobs() -> None:
+    jobs = [{"job_id": "job-1", "status": "running"}, {"job_id": "job-2", "status": "pending"}]
+
+    changed = streamlit_app.apply_job_events(
+        jobs, {"job-1": {"job_id": "job-1", "status": "completed", "run_id": "run-1"}}
+    )
+
+    assert changed is True
+    assert jobs[0] == {"job_id": "job-1", "status": "completed", "run_id": "run-1"}
+    assert jobs[1] == {"job_id": "job-2", "status": "pending"}
+    assert streamlit_app.apply_job_events(jobs, {}) is False
+
+
 def test_has_running_jobs_detects_pending_and_running() -> None:
     """実行中ジョブを検出できることを確認"""
     jobs_with_running = [
@@ -211,3 +318,64 @@ def test_build_mlflow_artifacts_link() -> None:
 def test_build_mlflow_artifacts_link_trailing_slash() -> None:
     link = streamlit_app.build_mlflow_artifacts_link("/mlflow/", "run-456")
     assert link == "/mlflow/#/experiments/1/runs/run-456/artifacts"
+
+
+@patch("src.streamlit.app.requests.get")
+def test_fetch_artifact_bytes_revalidates_with_etag(mock_get: MagicMock) -> None:
+    cache: dict[str, tuple[str, bool, bytes]] = {}
+    mock_get.return_value.status_code = 200
+    mock_get.return_value.headers = {"ETag": '"abc"', "Cache-Control": "private, no-cache"}
+    mock_get.return_value.content = b"png"
+
+    assert streamlit_app.fetch_artifact_bytes("http://api/x.png", "devtoken", cache) == b"png"
+
+    mock_get.return_value.status_code = 304
+    mock_get.return_value.content = b""
+    assert streamlit_app.fetch_artifact_bytes("http://api/x.png", "devtoken", cache) == b"png"
+    _, kwargs = mock_get.call_args
+    assert kwargs["headers"]["If-None-Match"] == '"abc"'
+
+
+@patch("src.streamlit.app.requests.get")
+def test_fetch_artifact_bytes_skips_request_for_immutable(mock_get: MagicMock) -> None:
+    cache: dict[str, tuple[str, bool, bytes]] = {}
+    mock_get.return_value.status_code = 200
+    mock_get.return_value.headers = {"ETag": '"abc"', "Cache-Control": "private, immutable"}
+    mock_get.return_value.content = b"png"
+
+    streamlit_app.fetch_artifact_bytes("http://api/x.png", "devtoken", cache)
+    streamlit_app.fetch_artifact_bytes("http://api/x.png", "devtoken", cache)
+
+    assert mock_get.call_count == 1
+
+
+def test_group_visualizations_prefers_server_side_groups() -> None:
+    viz_data = {
+        "artifacts": [],
+        "images": [
+            {
+                "name": "img_a",
+                "score": 0.9,
+                "artifacts": [{"filename": "img_a_mask.png", "artifact_type": "mask"}],
+            }
+        ],
+    }
+
+    groups = streamlit_app.group_visualizations(viz_data)
+
+    assert list(groups) == ["img_a"]
+    assert groups["img_a"]["mask"]["filename"] == "img_a_mask.png"
+    assert streamlit_app.format_image_label("img_a", 0.9) == "img_a (score 0.9000)"
+
+
+def test_group_visualizations_falls_back_to_filenames() -> None:
+    viz_data = {
+        "artifacts": [
+            {"filename": "b_heatmap.png", "artifact_type": "heatmap"},
+            {"filename": "a_original.png", "artifact_type": "original"},
+        ]
+    }
+
+    groups = streamlit_app.group_visualizations(viz_data)
+
+    assert list(groups) == ["a", "b"]
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+resume = pytest.importorskip("src.anomalib.trainers.resume")
+
+
+def test_resume_hint_from_worker_takes_precedence(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    hinted = tmp_path / "elsewhere" / "last.ckpt"
+    hinted.parent.mkdir()
+    hinted.write_bytes(b"ckpt")
+    local = tmp_path / "output" / "checkpoints" / "last.ckpt"
+    local.parent.mkdir(parents=True)
+    local.write_bytes(b"ckpt")
+    monkeypatch.setenv(resume.RESUME_ENV, str(hinted))
+
+    assert resume.find_resume_checkpoint(tmp_path / "output") == str(hinted)
+
+
+def test_latest_last_checkpoint_under_default_root_dir(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.delenv(resume.RESUME_ENV, raising=False)
+    checkpoints = tmp_path / "checkpoints"
+    checkpoints.mkdir()
+    older = checkpoints / "last.ckpt"
+    older.write_bytes(b"old")
+    os.utime(older, (time.time() - 60, time.time() - 60))
+    newer = checkpoints / "last-v1.ckpt"
+    newer.write_bytes(b"new")
+
+    assert resume.find_resume_checkpoint(tmp_path) == str(newer)
+
+
+def test_no_checkpoint_means_fresh_start(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv(resume.RESUME_ENV, str(tmp_path / "missing.ckpt"))
+
+    assert resume.find_resume_checkpoint(tmp_path) is None
+    assert resume.find_resume_checkpoint(None) is None
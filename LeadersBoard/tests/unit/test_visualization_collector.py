@@ -1,14 +1,17 @@
 from __future__ import annotations
 
+import json
 from pathlib import Path
 from unittest.mock import patch
 
 import pytest
 
-from src.worker.visualization_collector import VisualizationCollector
+from src.worker.visualization_collector import MAX_SCAN_DEPTH, VisualizationCollector
 from src.worker.visualization_config import VisualizationConfig
 from src.worker.visualization_types import (
+    MANIFEST_FILENAME,
     VisualizationError,
+    VisualizationStrategy,
     VisualizationType,
 )
 
@@ -79,6 +82,31 @@ class TestVisualizationCollectorCopiesToVisualizations:
         assert dest.read_bytes() == b"heatmap"
         assert manifest.artifacts[0].relative_path == "visualizations/000_heatmap.png"
 
+    def test_places_files_as_hardlinks(self, tmp_path: Path) -> None:
+        (tmp_path / "images").mkdir()
+        source = tmp_path / "images" / "000_heatmap.png"
+        source.write_bytes(b"heatmap")
+
+        VisualizationCollector().collect(tmp_path, VisualizationConfig.default())
+
+        dest = tmp_path / "visualizations" / "000_heatmap.png"
+        assert dest.stat().st_ino == source.stat().st_ino
+
+    def test_falls_back_to_copy_when_hardlink_fails(self, tmp_path: Path) -> None:
+        (tmp_path / "images").mkdir()
+        source = tmp_path / "images" / "000_heatmap.png"
+        source.write_bytes(b"heatmap")
+
+        with (
+            patch("src.worker.visualization_collector.os.link", side_effect=OSError("EXDEV")),
+            patch.object(VisualizationCollector, "_reflink", return_value=False),
+        ):
+            VisualizationCollector().collect(tmp_path, VisualizationConfig.default())
+
+        dest = tmp_path / "visualizations" / "000_heatmap.png"
+        assert dest.read_bytes() == b"heatmap"
+        assert dest.stat().st_ino != source.stat().st_ino
+
 
 class TestVisualizationCollectorCsvDetection:
     def test_detects_csv_files_image_and_pixel_predictions(self, tmp_path: Path) -> None:
@@ -136,6 +164,38 @@ class TestVisualizationCollectorRecursiveScan:
         assert len(manifest.artifacts) == 1
         assert manifest.artifacts[0].original_image_name == "002"
 
+    def test_prunes_checkpoint_log_and_hidden_directories(self, tmp_path: Path) -> None:
+        for name in ("checkpoints", "lightning_logs", ".cache"):
+            (tmp_path / name).mkdir()
+            (tmp_path / name / f"{name}_heatmap.png").write_bytes(b"h")
+        (tmp_path / "images").mkdir()
+        (tmp_path / "images" / "000_heatmap.png").write_bytes(b"h")
+
+        manifest = VisualizationCollector().collect(tmp_path, VisualizationConfig.default())
+
+        assert [a.original_image_name for a in manifest.artifacts] == ["000"]
+
+    def test_limits_scan_depth(self, tmp_path: Path) -> None:
+        deep = tmp_path.joinpath(*[f"d{i}" for i in range(MAX_SCAN_DEPTH + 1)])
+        deep.mkdir(parents=True)
+        (deep / "000_heatmap.png").write_bytes(b"h")
+        (deep.parent / "001_heatmap.png").write_bytes(b"h")
+
+        manifest = VisualizationCollector().collect(tmp_path, VisualizationConfig.default())
+
+        assert [a.original_image_name for a in manifest.artifacts] == ["001"]
+
+    def test_ignores_symlinked_files(self, tmp_path: Path) -> None:
+        outside = tmp_path / "outside.png"
+        outside.write_bytes(b"secret")
+        output_dir = tmp_path / "job"
+        output_dir.mkdir()
+        (output_dir / "000_heatmap.png").symlink_to(outside)
+
+        manifest = VisualizationCollector().collect(output_dir, VisualizationConfig.default())
+
+        assert manifest.artifacts == ()
+
 
 class TestVisualizationCollectorIgnoresNonPng:
     def test_ignores_non_png_files(self, tmp_path: Path) -> None:
@@ -166,6 +226,121 @@ class TestVisualizationCollectorManifest:
         assert len(manifest.artifacts) == 4
 
 
+class TestVisualizationCollectorPersistedManifest:
+    def test_writes_grouped_manifest_with_scores_and_sizes(self, tmp_path: Path) -> None:
+        (tmp_path / "000_original.png").write_bytes(b"orig")
+        (tmp_path / "000_heatmap.png").write_bytes(b"heatmap")
+        (tmp_path / "001_original.png").write_bytes(b"o")
+        (tmp_path / "image_predictions.csv").write_text(
+            "image_path,anomaly_score,pred_label\n/data/000.jpg,0.75,True\n"
+        )
+
+        collector = VisualizationCollector()
+        collector.collect(tmp_path, VisualizationConfig.default())
+
+        data = json.loads((tmp_path / "visualizations" / MANIFEST_FILENAME).read_text())
+        assert data["total_images"] == 2
+        assert data["csv_files"] == ["image_predictions.csv"]
+        assert data["images"] == [
+            {
+                "name": "000",
+                "score": 0.75,
+                "label": "True",
+                "files": {"original": 4, "heatmap": 7},
+            },
+            {"name": "001", "score": None, "label": None, "files": {"original": 1}},
+        ]
+
+    def test_lists_lazily_rendered_types_from_raw_store(self, tmp_path: Path) -> None:
+        viz_dir = tmp_path / "visualizations"
+        (viz_dir / "raw").mkdir(parents=True)
+        (viz_dir / "raw" / "index.json").write_text(
+            json.dumps(
+                {
+                    "version": 1,
+                    "maps": "anomaly_maps.npy",
+                    "masks": "pred_masks.npy",
+                    "images": [
+                        {"name": "000", "height": 8, "width": 8},
+                        {"name": "001", "height": 8, "width": 8},
+                    ],
+                }
+            )
+        )
+        (viz_dir / "000_original.png").write_bytes(b"orig")
+        (viz_dir / "000_heatmap.png").write_bytes(b"heatmap")
+
+        collector = VisualizationCollector()
+        manifest = collector.collect(tmp_path, VisualizationConfig.default())
+
+        files = {(a.original_image_name, a.artifact_type.value) for a in manifest.artifacts}
+        # 001 は original が無いため overlay は描画できない
+        assert files == {
+            ("000", "original"),
+            ("000", "heatmap"),
+            ("000", "mask"),
+            ("000", "overlay"),
+            ("001", "heatmap"),
+            ("001", "mask"),
+        }
+        data = json.loads((viz_dir / MANIFEST_FILENAME).read_text())
+        assert data["images"][0]["files"] == {
+            "original": 4,
+            "heatmap": 7,
+            "overlay": 0,
+            "mask": 0,
+        }
+
+    def test_no_manifest_written_without_artifacts(self, tmp_path: Path) -> None:
+        collector = VisualizationCollector()
+        collector.collect(tmp_path, VisualizationConfig.default())
+
+        assert not (tmp_path / "visualizations" / MANIFEST_FILENAME).exists()
+
+
+class TestVisualizationCollectorSelection:
+    def test_max_images_limits_copied_images_by_strategy(self, tmp_path: Path) -> None:
+        for i in range(5):
+            (tmp_path / f"{i:03d}_original.png").write_bytes(b"o")
+            (tmp_path / f"{i:03d}_heatmap.png").write_bytes(b"h")
+        (tmp_path / "image_predictions.csv").write_text(
+            "image_path,anomaly_score,pred_label\n"
+            + "".join(f"/data/{i:03d}.jpg,{i / 10},False\n" for i in range(5))
+        )
+        config = VisualizationConfig(max_images=2, strategy=VisualizationStrategy.TOP_K)
+
+        manifest = VisualizationCollector().collect(tmp_path, config)
+
+        assert manifest.total_images == 2
+        assert {a.original_image_name for a in manifest.artifacts} == {"004", "003"}
+        copied = sorted(p.name for p in (tmp_path / "visualizations").glob("*.png"))
+        assert copied == [
+            "003_heatmap.png",
+            "003_original.png",
+            "004_heatmap.png",
+            "004_original.png",
+        ]
+
+    def test_max_images_applies_to_raw_store_entries(self, tmp_path: Path) -> None:
+        viz_dir = tmp_path / "visualizations"
+        (viz_dir / "raw").mkdir(parents=True)
+        (viz_dir / "raw" / "index.json").write_text(
+            json.dumps(
+                {
+                    "version": 1,
+                    "maps": "anomaly_maps.npy",
+                    "masks": None,
+                    "images": [{"name": f"{i:03d}", "height": 8, "width": 8} for i in range(4)],
+                }
+            )
+        )
+        config = VisualizationConfig(max_images=1, strategy=VisualizationStrategy.ALL)
+
+        manifest = VisualizationCollector().collect(tmp_path, config)
+
+        assert {a.original_image_name for a in manifest.artifacts} == {"000"}
+
+
 class TestVisualizationCollectorPermissionError:
     def test_raises_visualization_error_on_permission_error(self, tmp_path: Path) -> None:
         (tmp_path / "000_heatmap.png").write_bytes(b"h")
@@ -173,9 +348,13 @@ class TestVisualizationCollectorPermissionError:
         collector = VisualizationCollector()
         config = VisualizationConfig.default()
 
-        with patch(
-            "src.worker.visualization_collector.shutil.copy2",
-            side_effect=PermissionError("denied"),
+        with (
+            patch("src.worker.visualization_collector.os.link", side_effect=OSError("EXDEV")),
+            patch.object(VisualizationCollector, "_reflink", return_value=False),
+            patch(
+                "src.worker.visualization_collector.shutil.copy2",
+                side_effect=PermissionError("denied"),
+            ),
         ):
             with pytest.raises(VisualizationError, match="Failed to collect"):
                 collector.collect(tmp_path, config)
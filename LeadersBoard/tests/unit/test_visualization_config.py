@@ -7,7 +7,11 @@ import pytest
 import yaml
 
 from src.worker.visualization_config import VisualizationConfig
-from src.worker.visualization_types import ALL_VIZ_TYPES, VisualizationType
+from src.worker.visualization_types import (
+    ALL_VIZ_TYPES,
+    VisualizationStrategy,
+    VisualizationType,
+)
 
 
 class TestVisualizationConfigDefault:
@@ -15,6 +19,8 @@ class TestVisualizationConfigDefault:
         config = VisualizationConfig.default()
         assert config.enabled is True
         assert config.types == tuple(ALL_VIZ_TYPES)
+        assert config.max_images is None
+        assert config.strategy == VisualizationStrategy.ALL
 
 
 class TestVisualizationConfigFromConfigFile:
@@ -150,6 +156,43 @@ class TestVisualizationConfigFromConfigFile:
         assert config.types == tuple(ALL_VIZ_TYPES)
         assert "No valid types found" in caplog.text
 
+    def test_max_images_and_strategy_are_parsed(self, tmp_path: Path) -> None:
+        config_file = tmp_path / "config.yaml"
+        config_file.write_text(
+            yaml.dump({"visualization": {"max_images": 50, "strategy": "worst_errors"}}),
+            encoding="utf-8",
+        )
+        config = VisualizationConfig.from_config_file(config_file)
+        assert config.max_images == 50
+        assert config.strategy == VisualizationStrategy.WORST_ERRORS
+        assert config.types == tuple(ALL_VIZ_TYPES)
+
+    @pytest.mark.parametrize("max_images", [0, -5, "10", True])
+    def test_invalid_max_images_logs_warning_and_disables_limit(
+        self, tmp_path: Path, caplog: pytest.LogCaptureFixture, max_images: object
+    ) -> None:
+        config_file = tmp_path / "config.yaml"
+        config_file.write_text(
+            yaml.dump({"visualization": {"max_images": max_images}}),
+            encoding="utf-8",
+        )
+        config = VisualizationConfig.from_config_file(config_file)
+        assert config.max_images is None
+        assert "Invalid 'max_images' value" in caplog.text
+
+    def test_unknown_strategy_logs_warning_and_uses_all(
+        self, tmp_path: Path, caplog: pytest.LogCaptureFixture
+    ) -> None:
+        config_file = tmp_path / "config.yaml"
+        config_file.write_text(
+            yaml.dump({"visualization": {"max_images": 10, "strategy": "random"}}),
+            encoding="utf-8",
+        )
+        config = VisualizationConfig.from_config_file(config_file)
+        assert config.max_images == 10
+        assert config.strategy == VisualizationStrategy.ALL
+        assert "Unknown visualization strategy: random" in caplog.text
+
 
 class TestVisualizationConfigFrozen:
     def test_is_frozen_dataclass(self) -> None:
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import pytest
+
+from src.anomalib.visualization_selection import ImageRecord, parse_label, select_images
+from src.worker.visualization_types import VisualizationStrategy
+
+
+def _records() -> list[ImageRecord]:
+    # name, score, pred, gt
+    rows = [
+        ("n0", 0.1, "False", "False"),
+        ("n1", 0.9, "True", "False"),  # 偽陽性 (高スコア)
+        ("n2", 0.6, "True", "False"),  # 偽陽性
+        ("a0", 0.95, "True", "True"),
+        ("a1", 0.2, "False", "True"),  # 偽陰性 (低スコア)
+        ("a2", 0.4, "False", "True"),  # 偽陰性
+        ("a3", 0.8, "True", "True"),
+    ]
+    return [ImageRecord(name, score, pred, gt) for name, score, pred, gt in rows]
+
+
+@pytest.mark.parametrize(
+    ("label", "expected"),
+    [("True", True), ("1", True), ("anomalous", True), ("False", False), ("0.0", False)],
+)
+def test_parse_label(label: str, expected: bool) -> None:
+    assert parse_label(label) is expected
+
+
+def test_parse_label_unknown_returns_none() -> None:
+    assert parse_label("unknown") is None
+    assert parse_label(None) is None
+
+
+def test_select_returns_all_when_under_limit() -> None:
+    records = _records()
+
+    selected = select_images(records, VisualizationStrategy.TOP_K, 100)
+
+    assert selected == [r.name for r in records]
+
+
+def test_select_all_strategy_keeps_order_up_to_limit() -> None:
+    assert select_images(_records(), VisualizationStrategy.ALL, 2) == ["n0", "n1"]
+
+
+def test_select_top_k_orders_by_score_and_puts_unscored_last() -> None:
+    records = [*_records(), ImageRecord("x", None)]
+
+    assert select_images(records, VisualizationStrategy.TOP_K, 3) == ["a0", "n1", "a3"]
+    assert select_images(records, VisualizationStrategy.TOP_K, 7)[-1] != "x"
+
+
+def test_select_worst_errors_interleaves_false_positives_and_negatives() -> None:
+    selected = select_images(_records(), VisualizationStrategy.WORST_ERRORS, 4)
+
+    assert selected == ["n1", "a1", "n2", "a2"]
+
+
+def test_select_worst_errors_fills_remaining_slots_by_score() -> None:
+    selected = select_images(_records(), VisualizationStrategy.WORST_ERRORS, 6)
+
+    assert selected == ["n1", "a1", "n2", "a2", "a0", "a3"]
+
+
+def test_select_worst_errors_without_ground_truth_falls_back_to_top_k() -> None:
+    records = [ImageRecord(r.name, r.score, r.pred_label) for r in _records()]
+
+    selected = select_images(records, VisualizationStrategy.WORST_ERRORS, 2)
+
+    assert selected == ["a0", "n1"]
+
+
+def test_select_stratified_splits_evenly_across_labels() -> None:
+    selected = select_images(_records(), VisualizationStrategy.STRATIFIED, 4)
+
+    # 各ラベル 2 枚ずつ、スコア分布の両端から選ぶ
+    assert selected == ["n1", "n0", "a0", "a1"]
+
+
+def test_select_stratified_gives_leftover_slots_to_larger_label() -> None:
+    records = [r for r in _records() if r.name != "n2" and r.name != "n0"]
+
+    selected = select_images(records, VisualizationStrategy.STRATIFIED, 4)
+
+    assert len(selected) == 4
+    assert "n1" in selected